@@ -2,7 +2,10 @@
 Admin configuration for coding app
 """
 from django.contrib import admin
-from .models import CodingTopic, CodingTask, CodingTestCase, CodingSubmission, CodingProgress
+from .models import (
+    CodingTopic, CodingTask, CodingTestCase, CodingSubmission, CodingProgress, CodingStudentTaskStat,
+    CodingRunDailyStat, CodingRunCode, CodeBlob, CodingRegradeJob,
+)
 
 
 @admin.register(CodingTopic)
@@ -37,3 +40,40 @@ class CodingProgressAdmin(admin.ModelAdmin):
     search_fields = ['student_profile__user__email', 'exercise__title']
     readonly_fields = ['created_at', 'updated_at']
     ordering = ['-updated_at']
+
+
+@admin.register(CodingStudentTaskStat)
+class CodingStudentTaskStatAdmin(admin.ModelAdmin):
+    list_display = ['student', 'task', 'attempts', 'run_attempts', 'solved', 'best_score', 'updated_at']
+    list_filter = ['solved']
+    search_fields = ['student__email', 'task__title']
+    readonly_fields = ['updated_at']
+
+
+@admin.register(CodingRunDailyStat)
+class CodingRunDailyStatAdmin(admin.ModelAdmin):
+    list_display = ['student', 'task', 'day', 'run_count', 'passed_count']
+    list_filter = ['day']
+    search_fields = ['student__email', 'task__title']
+
+
+@admin.register(CodingRunCode)
+class CodingRunCodeAdmin(admin.ModelAdmin):
+    list_display = ['student', 'task', 'code_blob', 'run_count', 'last_seen_at']
+    search_fields = ['student__email', 'task__title', 'code_blob__sha256']
+
+
+@admin.register(CodeBlob)
+class CodeBlobAdmin(admin.ModelAdmin):
+    list_display = ['sha256', 'size', 'compressed', 'created_at']
+    list_filter = ['compressed']
+    search_fields = ['sha256']
+    readonly_fields = ['sha256', 'size', 'compressed', 'created_at']
+
+
+@admin.register(CodingRegradeJob)
+class CodingRegradeJobAdmin(admin.ModelAdmin):
+    list_display = ['task', 'scope', 'status', 'processed', 'total', 'changed', 'error_count', 'created_at']
+    list_filter = ['status', 'scope']
+    search_fields = ['task__title']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'updated_at']
@@ -0,0 +1,35 @@
+"""
+Content-addressed storage of submitted code (CodeBlob rows keyed by SHA-256 of the UTF-8 source).
+Identical code is stored once no matter how many submissions reference it. Sources of at least
+CODING_CODE_BLOB_COMPRESS_MIN_BYTES are zlib-compressed when that is actually smaller (0 = never).
+Pure helpers only (no model imports), so data migrations can use them too.
+"""
+import hashlib
+import zlib
+
+from django.conf import settings
+
+DEFAULT_COMPRESS_MIN_BYTES = 512
+
+
+def compress_min_bytes():
+    return int(getattr(settings, 'CODING_CODE_BLOB_COMPRESS_MIN_BYTES', DEFAULT_COMPRESS_MIN_BYTES) or 0)
+
+
+def pack_code(code, min_bytes=None):
+    """(sha256, data, compressed, size) for one source text."""
+    raw = (code or '').encode('utf-8')
+    sha = hashlib.sha256(raw).hexdigest()
+    min_bytes = compress_min_bytes() if min_bytes is None else min_bytes
+    if min_bytes > 0 and len(raw) >= min_bytes:
+        packed = zlib.compress(raw, 6)
+        if len(packed) < len(raw):
+            return sha, packed, True, len(raw)
+    return sha, raw, False, len(raw)
+
+
+def unpack_code(data, compressed):
+    raw = bytes(data or b'')
+    if compressed:
+        raw = zlib.decompress(raw)
+    return raw.decode('utf-8')
@@ -0,0 +1,30 @@
+"""
+Rebuild CodingStudentTaskStat (coding monitor rollup) from CodingSubmission history.
+Usage: python manage.py backfill_coding_stats [--task ID ...] [--student ID ...] [--batch-size 1000]
+Run once after migrating; afterwards the rows are kept current on every submission save.
+Safe to re-run: rows are upserted. Run it before deleting old submissions, not after.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from coding.services.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-student/per-task coding stats from submissions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--task', type=int, action='append', default=None, help='Only this task id (repeatable)')
+        parser.add_argument('--student', type=int, action='append', default=None, help='Only this student user id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per upsert batch')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = rebuild_stats(
+            student_ids=options['student'],
+            task_ids=options['task'],
+            batch_size=max(1, options['batch_size']),
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} stat row(s) in {elapsed:.2f}s'))
@@ -0,0 +1,104 @@
+"""
+Compare cold (fresh interpreter per run) vs warm (worker pool) sandbox throughput.
+Also reports per-run CPU time and peak memory of the sandboxed process: the cold/warm CPU
+difference is the interpreter startup cost paid per case without the pool.
+Usage: python manage.py benchmark_sandbox [--runs 100] [--concurrency 4] [--pool-size 4]
+No database access; only exercises coding.run_code.
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from coding import run_code
+
+BENCH_CODE = (
+    "n = int(input())\n"
+    "print(sum(i * i for i in range(n)))\n"
+)
+BENCH_INPUT = "1000\n"
+
+
+class Command(BaseCommand):
+    help = 'Benchmark coding sandbox: cold subprocess vs warm worker pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=100, help='Executions per mode')
+        parser.add_argument('--concurrency', type=int, default=4, help='Concurrent callers')
+        parser.add_argument('--pool-size', type=int, default=4, help='Warm pool size')
+
+    def _measure(self, fn, runs, concurrency):
+        latencies = []
+
+        def one(_):
+            start = time.perf_counter()
+            stdout, stderr, rc = fn(BENCH_CODE, BENCH_INPUT, 5)
+            latencies.append((time.perf_counter() - start) * 1000)
+            return rc == 0 and stdout.strip() == str(sum(i * i for i in range(1000)))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as ex:
+            ok = sum(1 for r in ex.map(one, range(runs)) if r)
+        wall = time.perf_counter() - start
+        latencies.sort()
+        return {
+            'ok': ok,
+            'throughput': runs / wall if wall else 0.0,
+            'p50': statistics.median(latencies),
+            'p95': latencies[max(0, int(len(latencies) * 0.95) - 1)],
+        }
+
+    def handle(self, *args, **options):
+        runs = max(1, options['runs'])
+        concurrency = max(1, options['concurrency'])
+        self.stdout.write(f'runs={runs} concurrency={concurrency}')
+
+        cold = self._measure(run_code._run_python_code_cold, runs, concurrency)
+        self._report('cold', cold, runs)
+        samples = min(runs, 20)
+        cold_cpu = self._report_resources(
+            'cold', [run_code.run_python_code_timed_cold(BENCH_CODE, BENCH_INPUT, 5) for _ in range(samples)]
+        )
+
+        if not run_code.POOL_SUPPORTED:
+            self.stdout.write(self.style.WARNING('Worker pool not supported on this platform; skipping warm run.'))
+            return
+        pool = run_code.SandboxWorkerPool(options['pool_size'])
+        try:
+            # Warm-up: let every worker finish interpreter startup before timing.
+            for _ in range(pool.size):
+                pool.run('pass', '', 5)
+
+            def warm(code, stdin_input, timeout):
+                return pool.run(code, stdin_input, timeout) or ('', 'pool unavailable', -1)
+
+            warm_stats = self._measure(warm, runs, concurrency)
+            warm_cases = pool.run_batch(BENCH_CODE, [BENCH_INPUT] * samples, 5) or []
+        finally:
+            pool.close()
+        self._report('warm', warm_stats, runs)
+        warm_cpu = self._report_resources('warm', warm_cases)
+        if warm_cases:
+            self.stdout.write(f'startup overhead: ~{cold_cpu - warm_cpu:.1f}ms CPU per case without the pool')
+        if warm_stats['throughput'] and cold['throughput']:
+            self.stdout.write(self.style.SUCCESS(
+                f"speedup: {warm_stats['throughput'] / cold['throughput']:.1f}x throughput"
+            ))
+
+    def _report_resources(self, label, results):
+        """Print mean CPU / wall time and max peak memory of CaseResults; returns mean CPU ms."""
+        if not results:
+            return 0.0
+        cpu = statistics.mean(r.cpu_ms for r in results)
+        self.stdout.write(
+            f"{label:5s} cpu={cpu:.1f}ms wall={statistics.mean(r.elapsed_ms for r in results):.1f}ms "
+            f"peak={max(r.peak_kb for r in results) / 1024:.1f}MB per case"
+        )
+        return cpu
+
+    def _report(self, label, stats, runs):
+        self.stdout.write(
+            f"{label:5s} ok={stats['ok']}/{runs} throughput={stats['throughput']:.1f} runs/s "
+            f"p50={stats['p50']:.1f}ms p95={stats['p95']:.1f}ms"
+        )
@@ -0,0 +1,51 @@
+"""
+Archive old RUN submissions: roll them into per-student/task/day counters, keep each distinct code
+once, delete the raw rows in bounded batches (coding.services.retention).
+Usage: python manage.py compact_coding_runs [--older-than-days N] [--batch-size 1000] [--max-batches N] [--dry-run]
+Schedule daily (cron), e.g. `15 3 * * * python manage.py compact_coding_runs`, or let
+`process_coding_queue` run it every CODING_RUN_COMPACT_INTERVAL_HOURS.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from coding.services.retention import DEFAULT_BATCH_SIZE, compact_runs, retention_days
+
+
+class Command(BaseCommand):
+    help = 'Roll RUN submissions older than N days into daily counters and delete them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=None,
+            help='Retention in days (default: CODING_RUN_RETENTION_DAYS; 0 = do nothing)',
+        )
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per transaction')
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count rows that would be archived')
+
+    def handle(self, *args, **options):
+        days = options['older_than_days']
+        if days is None:
+            days = retention_days()
+        started = time.perf_counter()
+        summary = compact_runs(
+            older_than_days=days,
+            batch_size=max(1, options['batch_size']),
+            max_batches=options['max_batches'],
+            dry_run=options['dry_run'],
+        )
+        elapsed = time.perf_counter() - started
+        if summary['cutoff'] is None:
+            self.stdout.write(self.style.WARNING('RUN retention disabled (older-than-days <= 0)'))
+            return
+        if options['dry_run']:
+            self.stdout.write(f"{summary['rows']} RUN row(s) older than {summary['cutoff']:%Y-%m-%d %H:%M} would be archived")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {summary['rows']} RUN row(s) in {summary['batches']} batch(es), "
+            f"{summary['dailyRows']} daily counter(s) touched, {summary['newCodes']} new distinct code(s), "
+            f"{elapsed:.2f}s"
+        ))
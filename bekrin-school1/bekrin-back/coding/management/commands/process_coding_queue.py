@@ -0,0 +1,139 @@
+"""
+Coding submission queue worker: grades SUBMIT rows queued by the submit view (CODING_SUBMIT_ASYNC).
+Usage: python manage.py process_coding_queue [--concurrency N] [--once] [--poll-interval 1.0] [--stale-after 300]
+--once: drain the queue and exit (cron-friendly). Without it the worker polls until interrupted.
+Long-running workers also archive old RUN submissions every CODING_RUN_COMPACT_INTERVAL_HOURS
+(coding.services.retention; 0 = off, e.g. when compact_coding_runs runs from cron).
+Regrade jobs queued from the teacher panel (coding.services.regrade) run on a separate thread;
+--once runs the queued ones after the submission queue is drained.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from coding.services.regrade import run_pending_jobs
+from coding.services.retention import compact_runs
+from coding.services.submissions import (
+    claim_next_submission,
+    process_submission,
+    requeue_stale_submissions,
+)
+
+
+class Command(BaseCommand):
+    help = 'Grade queued coding submissions with N concurrent executors'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=None,
+            help='Concurrent executors (default: CODING_QUEUE_WORKERS)',
+        )
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when idle')
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=300,
+            help='Requeue running submissions claimed more than this many seconds ago',
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency'] or getattr(settings, 'CODING_QUEUE_WORKERS', 2)
+        concurrency = max(1, int(concurrency))
+        once = options['once']
+        poll_interval = max(0.05, options['poll_interval'])
+
+        requeued = requeue_stale_submissions(options['stale_after'])
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale running submission(s)'))
+        self.stdout.write(f'Coding queue worker: concurrency={concurrency} once={once}')
+
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._processed = 0
+        compact_hours = float(getattr(settings, 'CODING_RUN_COMPACT_INTERVAL_HOURS', 0) or 0)
+        if not once and compact_hours > 0:
+            threading.Thread(target=self._compact_loop, args=(compact_hours * 3600,), daemon=True).start()
+        if not once:
+            threading.Thread(target=self._regrade_loop, args=(poll_interval,), daemon=True).start()
+        if concurrency == 1:
+            self._loop(once, poll_interval, in_thread=False)
+        else:
+            threads = [
+                threading.Thread(target=self._loop, args=(once, poll_interval, True), daemon=True)
+                for _ in range(concurrency)
+            ]
+            for t in threads:
+                t.start()
+            try:
+                while any(t.is_alive() for t in threads):
+                    for t in threads:
+                        t.join(timeout=0.5)
+            except KeyboardInterrupt:
+                self._stop.set()
+                self.stdout.write('Stopping after current submissions...')
+                for t in threads:
+                    t.join()
+        if once:
+            regraded = run_pending_jobs(on_progress=self._regrade_progress)
+            if regraded:
+                self.stdout.write(f'Ran {regraded} regrade job(s)')
+        self.stdout.write(self.style.SUCCESS(f'Processed {self._processed} submission(s)'))
+
+    def _loop(self, once, poll_interval, in_thread):
+        try:
+            while not self._stop.is_set():
+                close_old_connections()
+                sub = claim_next_submission()
+                if sub is None:
+                    if once:
+                        return
+                    self._stop.wait(poll_interval)
+                    continue
+                started = time.perf_counter()
+                process_submission(sub)
+                with self._lock:
+                    self._processed += 1
+                self.stdout.write(
+                    f'  #{sub.id} task={sub.task_id} student={sub.student_id} -> {sub.status} '
+                    f'({sub.passed_count}/{sub.total_count}) {int((time.perf_counter() - started) * 1000)}ms'
+                )
+        finally:
+            if in_thread:
+                connection.close()
+
+    def _compact_loop(self, interval):
+        """Scheduled RUN retention; first pass right away, then every interval seconds."""
+        try:
+            while not self._stop.is_set():
+                close_old_connections()
+                try:
+                    summary = compact_runs()
+                    if summary['rows']:
+                        self.stdout.write(f"  archived {summary['rows']} old RUN submission(s)")
+                except Exception as e:
+                    self.stderr.write(f'  RUN retention failed: {e}')
+                self._stop.wait(interval)
+        finally:
+            connection.close()
+
+    def _regrade_progress(self, job):
+        self.stdout.write(f'  regrade job {job.id} task={job.task_id}: {job.processed}/{job.total} ({job.changed} changed)')
+
+    def _regrade_loop(self, poll_interval):
+        """Run queued regrade jobs one at a time; a stop request leaves the current job pending."""
+        try:
+            while not self._stop.is_set():
+                close_old_connections()
+                try:
+                    run_pending_jobs(on_progress=self._regrade_progress, should_stop=self._stop.is_set)
+                except Exception as e:
+                    self.stderr.write(f'  regrade failed: {e}')
+                self._stop.wait(max(poll_interval, 5.0))
+        finally:
+            connection.close()
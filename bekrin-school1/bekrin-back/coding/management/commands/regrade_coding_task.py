@@ -0,0 +1,80 @@
+"""
+Regrade SUBMIT submissions of a coding task against its current test cases (coding.services.regrade).
+Usage: python manage.py regrade_coding_task --task ID [--scope latest|all] [--workers N] [--batch-size N]
+       python manage.py regrade_coding_task --job ID     (resume an interrupted or failed job)
+       python manage.py regrade_coding_task --pending    (run jobs queued from the teacher panel, e.g. cron)
+--task reuses an unfinished job of the same task and scope, so re-running the command after an
+interruption continues where it stopped.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from coding.models import CodingRegradeJob, CodingTask
+from coding.services.regrade import SCOPES, claim_job, run_job, start_regrade
+
+
+class Command(BaseCommand):
+    help = "Re-run a coding task's submissions against its current test cases"
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--task', type=int, help='Coding task id')
+        target.add_argument('--job', type=int, help='Resume this CodingRegradeJob')
+        target.add_argument('--pending', action='store_true', help='Run all queued jobs')
+        parser.add_argument('--scope', choices=SCOPES, default='latest', help='latest per student (default) or all')
+        parser.add_argument('--workers', type=int, default=None, help='Parallel gradings (default: CODING_REGRADE_WORKERS)')
+        parser.add_argument('--batch-size', type=int, default=None, help='Submissions per transaction (default: CODING_REGRADE_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        if options['pending']:
+            ran = 0
+            while True:
+                job = claim_job()
+                if job is None:
+                    break
+                self._run(job, options)
+                ran += 1
+            self.stdout.write(f'{ran} queued regrade job(s) run')
+            return
+        if options['job'] is not None:
+            if not CodingRegradeJob.objects.filter(id=options['job']).exists():
+                raise CommandError(f"Regrade job {options['job']} not found")
+            job = claim_job(options['job'])
+            if job is None:
+                raise CommandError(f"Regrade job {options['job']} is finished or still running")
+        else:
+            try:
+                task = CodingTask.objects.get(id=options['task'])
+            except CodingTask.DoesNotExist:
+                raise CommandError(f"Coding task {options['task']} not found")
+            queued, _ = start_regrade(task, options['scope'])
+            job = claim_job(queued.id)
+            if job is None:
+                raise CommandError(f'Regrade job {queued.id} of this task is already running')
+        self._run(job, options)
+
+    def _run(self, job, options):
+        self.stdout.write(f'Regrade job {job.id}: task={job.task_id} scope={job.scope} resume_after={job.last_submission_id}')
+        started = time.perf_counter()
+
+        def progress(j):
+            self.stdout.write(f'  {j.processed}/{j.total} regraded, {j.changed} changed, {j.error_count} error(s)')
+
+        job = run_job(
+            job,
+            workers=max(1, options['workers']) if options['workers'] else None,
+            batch_size=max(1, options['batch_size']) if options['batch_size'] else None,
+            on_progress=progress,
+        )
+        elapsed = time.perf_counter() - started
+        if job.status == 'done':
+            self.stdout.write(self.style.SUCCESS(
+                f'Regrade job {job.id} done: {job.processed} submission(s), {job.changed} changed, '
+                f'{job.error_count} error(s), {elapsed:.2f}s'
+            ))
+        else:
+            self.stdout.write(self.style.ERROR(
+                f'Regrade job {job.id} {job.status}: {job.error_message} '
+                f'(resume with --job {job.id})'
+            ))
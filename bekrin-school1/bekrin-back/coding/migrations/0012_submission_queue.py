@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coding', '0011_remove_codingsubmission_coding_subm_task_stu_created_idx'),
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='codingsubmission',
+            name='started_at',
+            field=models.DateTimeField(blank=True, help_text='When a queue worker claimed it', null=True),
+        ),
+        migrations.AlterField(
+            model_name='codingsubmission',
+            name='status',
+            field=models.CharField(choices=[('passed', 'Passed'), ('failed', 'Failed'), ('error', 'Error'), ('timeout', 'Timeout'), ('queued', 'Queued'), ('running', 'Running')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='codingsubmission',
+            index=models.Index(condition=models.Q(('status__in', ['queued', 'running'])), fields=['status', 'id'], name='coding_subm_queue_idx'),
+        ),
+    ]
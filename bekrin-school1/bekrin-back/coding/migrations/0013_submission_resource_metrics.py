@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coding', '0012_submission_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='codingsubmission',
+            name='cpu_time_ms',
+            field=models.IntegerField(blank=True, help_text='User+sys CPU time summed over executed cases', null=True),
+        ),
+        migrations.AddField(
+            model_name='codingsubmission',
+            name='peak_memory_kb',
+            field=models.IntegerField(blank=True, help_text='Largest max RSS of any executed case', null=True),
+        ),
+    ]
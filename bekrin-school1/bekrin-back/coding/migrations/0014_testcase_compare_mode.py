@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coding', '0013_submission_resource_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='codingtestcase',
+            name='compare_mode',
+            field=models.CharField(choices=[('exact', 'Exact (line by line)'), ('tokens', 'Token-wise'), ('float', 'Float tolerance'), ('unordered', 'Unordered lines')], default='exact', help_text='How stdout is compared with expected (coding.output_compare)', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='codingtestcase',
+            name='float_tolerance',
+            field=models.FloatField(blank=True, help_text='compare_mode=float: abs/relative tolerance (default 1e-6)', null=True),
+        ),
+    ]
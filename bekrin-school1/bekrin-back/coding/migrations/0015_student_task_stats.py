@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coding', '0014_testcase_compare_mode'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodingStudentTaskStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('run_attempts', models.PositiveIntegerField(default=0)),
+                ('solved', models.BooleanField(default=False)),
+                ('first_solved_at', models.DateTimeField(blank=True, null=True)),
+                ('last_submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('best_score', models.IntegerField(blank=True, null=True)),
+                ('best_cpu_time_ms', models.IntegerField(blank=True, null=True)),
+                ('best_peak_memory_kb', models.IntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coding_task_stats', to=settings.AUTH_USER_MODEL)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_stats', to='coding.codingtask')),
+            ],
+            options={
+                'verbose_name': 'Coding Student Task Stat',
+                'verbose_name_plural': 'Coding Student Task Stats',
+                'db_table': 'coding_student_task_stats',
+                'indexes': [models.Index(fields=['task'], name='coding_stud_task_id_8f5cf8_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'task'), name='coding_stat_student_task_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coding', '0015_student_task_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodingRunCode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code_sha256', models.CharField(max_length=64)),
+                ('code', models.TextField()),
+                ('run_count', models.PositiveIntegerField(default=0)),
+                ('first_seen_at', models.DateTimeField(blank=True, null=True)),
+                ('last_seen_at', models.DateTimeField(blank=True, null=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coding_run_codes', to=settings.AUTH_USER_MODEL)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='run_codes', to='coding.codingtask')),
+            ],
+            options={
+                'verbose_name': 'Coding Run Code',
+                'verbose_name_plural': 'Coding Run Codes',
+                'db_table': 'coding_run_codes',
+                'constraints': [models.UniqueConstraint(fields=('student', 'task', 'code_sha256'), name='coding_run_code_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CodingRunDailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('run_count', models.PositiveIntegerField(default=0)),
+                ('passed_count', models.PositiveIntegerField(default=0)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coding_run_daily_stats', to=settings.AUTH_USER_MODEL)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='run_daily_stats', to='coding.codingtask')),
+            ],
+            options={
+                'verbose_name': 'Coding Run Daily Stat',
+                'verbose_name_plural': 'Coding Run Daily Stats',
+                'db_table': 'coding_run_daily_stats',
+                'indexes': [models.Index(fields=['task', 'day'], name='coding_run__task_id_763b36_idx')],
+                'constraints': [models.UniqueConstraint(fields=('student', 'task', 'day'), name='coding_run_daily_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,152 @@
+# Migration: submitted code moves to content-addressed CodeBlob rows (one per distinct source).
+# Existing CodingSubmission.submitted_code and CodingRunCode.code values are deduplicated into blobs
+# in id-ordered batches, then the inline text columns are dropped. Reversible (text is copied back).
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from coding.code_blobs import compress_min_bytes, pack_code, unpack_code
+
+BATCH_SIZE = 2000
+
+
+def _store(CodeBlob, codes, min_bytes):
+    shas = {}
+    blobs = []
+    for code in codes:
+        code = code or ''
+        if code in shas:
+            continue
+        sha, data, compressed, size = pack_code(code, min_bytes)
+        shas[code] = sha
+        blobs.append(CodeBlob(sha256=sha, data=data, compressed=compressed, size=size))
+    CodeBlob.objects.bulk_create(blobs, ignore_conflicts=True, batch_size=500)
+    return shas
+
+
+def _move_to_blobs(model, text_field, CodeBlob, min_bytes):
+    last_id = 0
+    while True:
+        rows = list(
+            model.objects.filter(id__gt=last_id).order_by('id').values_list('id', text_field)[:BATCH_SIZE]
+        )
+        if not rows:
+            return
+        shas = _store(CodeBlob, (text for _, text in rows), min_bytes)
+        model.objects.bulk_update(
+            [model(id=row_id, code_blob_id=shas[text or '']) for row_id, text in rows], ['code_blob'],
+        )
+        last_id = rows[-1][0]
+
+
+def forwards(apps, schema_editor):
+    CodeBlob = apps.get_model('coding', 'CodeBlob')
+    min_bytes = compress_min_bytes()
+    _move_to_blobs(apps.get_model('coding', 'CodingSubmission'), 'submitted_code', CodeBlob, min_bytes)
+    _move_to_blobs(apps.get_model('coding', 'CodingRunCode'), 'code', CodeBlob, min_bytes)
+
+
+def _restore_text(model, fields):
+    last_id = 0
+    while True:
+        rows = list(
+            model.objects.filter(id__gt=last_id).select_related('code_blob').order_by('id')[:BATCH_SIZE]
+        )
+        if not rows:
+            return
+        for row in rows:
+            text = unpack_code(row.code_blob.data, row.code_blob.compressed) if row.code_blob_id else ''
+            for name, value in fields(row, text).items():
+                setattr(row, name, value)
+        model.objects.bulk_update(rows, list(fields(rows[0], '').keys()))
+        last_id = rows[-1].id
+
+
+def backwards(apps, schema_editor):
+    _restore_text(apps.get_model('coding', 'CodingSubmission'), lambda row, text: {'submitted_code': text})
+    _restore_text(
+        apps.get_model('coding', 'CodingRunCode'),
+        lambda row, text: {'code': text, 'code_sha256': row.code_blob_id or ''},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coding', '0016_run_retention'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('data', models.BinaryField()),
+                ('compressed', models.BooleanField(default=False)),
+                ('size', models.PositiveIntegerField(default=0, help_text='Length of the UTF-8 source in bytes')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Code Blob',
+                'verbose_name_plural': 'Code Blobs',
+                'db_table': 'coding_code_blobs',
+            },
+        ),
+        migrations.AddField(
+            model_name='codingsubmission',
+            name='code_blob',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='submissions', to='coding.codeblob'),
+        ),
+        migrations.AddField(
+            model_name='codingruncode',
+            name='code_blob',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='run_codes', to='coding.codeblob'),
+        ),
+        migrations.RemoveConstraint(
+            model_name='codingruncode',
+            name='coding_run_code_uniq',
+        ),
+        migrations.RunPython(forwards, backwards),
+        # Defaults only so the reverse migration can re-add the columns to a populated table.
+        migrations.AlterField(
+            model_name='codingsubmission',
+            name='submitted_code',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='codingsubmission',
+            name='submitted_code',
+        ),
+        migrations.AlterField(
+            model_name='codingruncode',
+            name='code',
+            field=models.TextField(default=''),
+        ),
+        migrations.AlterField(
+            model_name='codingruncode',
+            name='code_sha256',
+            field=models.CharField(default='', max_length=64),
+        ),
+        migrations.RemoveField(
+            model_name='codingruncode',
+            name='code',
+        ),
+        migrations.RemoveField(
+            model_name='codingruncode',
+            name='code_sha256',
+        ),
+        migrations.AlterField(
+            model_name='codingsubmission',
+            name='code_blob',
+            field=models.ForeignKey(help_text='Submitted source (shared by identical submissions); read and write it as submitted_code', on_delete=django.db.models.deletion.PROTECT, related_name='submissions', to='coding.codeblob'),
+        ),
+        migrations.AlterField(
+            model_name='codingruncode',
+            name='code_blob',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='run_codes', to='coding.codeblob'),
+        ),
+        migrations.AddConstraint(
+            model_name='codingruncode',
+            constraint=models.UniqueConstraint(fields=('student', 'task', 'code_blob'), name='coding_run_code_uniq'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:10
+# Existing stat rows start from the highest attempt_no already handed out for their (student, task).
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_attempt_counter(apps, schema_editor):
+    CodingStudentTaskStat = apps.get_model('coding', 'CodingStudentTaskStat')
+    CodingSubmission = apps.get_model('coding', 'CodingSubmission')
+    highest = (
+        CodingSubmission.objects.filter(
+            student_id=OuterRef('student_id'), task_id=OuterRef('task_id'), attempt_no__isnull=False,
+        )
+        .order_by('-attempt_no')
+        .values('attempt_no')[:1]
+    )
+    CodingStudentTaskStat.objects.update(last_attempt_no=Coalesce(Subquery(highest), 0))
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coding', '0017_code_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='codingstudenttaskstat',
+            name='last_attempt_no',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_attempt_counter, noop),
+    ]
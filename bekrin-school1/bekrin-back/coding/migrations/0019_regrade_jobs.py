@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coding', '0018_stat_attempt_counter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodingRegradeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('latest', 'Latest per student'), ('all', 'All submissions')], default='latest', max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('changed', models.PositiveIntegerField(default=0, help_text='Regraded submissions whose status or score changed')),
+                ('error_count', models.PositiveIntegerField(default=0, help_text='Submissions the sandbox could not grade (left as they were)')),
+                ('last_submission_id', models.BigIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Runner heartbeat (bumped every batch)')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='coding_regrade_jobs', to=settings.AUTH_USER_MODEL)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='regrade_jobs', to='coding.codingtask')),
+            ],
+            options={
+                'verbose_name': 'Coding Regrade Job',
+                'verbose_name_plural': 'Coding Regrade Jobs',
+                'db_table': 'coding_regrade_jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['task', 'status'], name='coding_regr_task_id_de8e0b_idx')],
+            },
+        ),
+    ]
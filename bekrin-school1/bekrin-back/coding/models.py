@@ -4,6 +4,8 @@ Points optional for future removal.
 """
 from django.db import models
 from accounts.models import User
+from coding.code_blobs import pack_code, unpack_code
+from coding.output_compare import COMPARE_EXACT, COMPARE_MODE_CHOICES
 from students.models import StudentProfile
 
 
@@ -113,6 +115,15 @@ class CodingTestCase(models.Model):
     explanation = models.TextField(blank=True, null=True)
     order_index = models.IntegerField(null=True, blank=True)
     is_sample = models.BooleanField(default=True, help_text='Used for Run (student preview); all cases used for Submit')
+    compare_mode = models.CharField(
+        max_length=16,
+        choices=COMPARE_MODE_CHOICES,
+        default=COMPARE_EXACT,
+        help_text='How stdout is compared with expected (coding.output_compare)',
+    )
+    float_tolerance = models.FloatField(
+        null=True, blank=True, help_text='compare_mode=float: abs/relative tolerance (default 1e-6)'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -128,10 +139,67 @@ class CodingTestCase(models.Model):
         return f"{self.task.title} - case {self.id}"
 
 
+class CodeBlobManager(models.Manager):
+    def store(self, codes):
+        """Make sure a blob exists for every source text (one INSERT, existing rows kept). Returns {code: CodeBlob}."""
+        blobs = {}
+        for code in codes:
+            code = code or ''
+            if code in blobs:
+                continue
+            sha, data, compressed, size = pack_code(code)
+            blob = self.model(sha256=sha, data=data, compressed=compressed, size=size)
+            blob.__dict__['_text'] = code
+            blobs[code] = blob
+        if blobs:
+            self.bulk_create(list(blobs.values()), ignore_conflicts=True, batch_size=500)
+        return blobs
+
+
+class CodeBlob(models.Model):
+    """
+    Submitted source stored once per content: primary key is the SHA-256 of the UTF-8 text,
+    data is the text itself or its zlib stream (compressed=True), see coding.code_blobs.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    data = models.BinaryField()
+    compressed = models.BooleanField(default=False)
+    size = models.PositiveIntegerField(default=0, help_text='Length of the UTF-8 source in bytes')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = CodeBlobManager()
+
+    class Meta:
+        db_table = 'coding_code_blobs'
+        verbose_name = 'Code Blob'
+        verbose_name_plural = 'Code Blobs'
+
+    def __str__(self):
+        return self.sha256[:12]
+
+    def text(self):
+        if '_text' not in self.__dict__:
+            self.__dict__['_text'] = unpack_code(self.data, self.compressed)
+        return self.__dict__['_text']
+
+
+class CodingSubmissionQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """Store the code blobs of the new rows first (save() is not called by bulk_create)."""
+        objs = list(objs)
+        pending = [o for o in objs if '_pending_code' in o.__dict__ or o.code_blob_id is None]
+        if pending:
+            blobs = CodeBlob.objects.store(o.submitted_code for o in pending)
+            for o in pending:
+                o.code_blob = blobs[o.__dict__.pop('_pending_code', '')]
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class CodingSubmission(models.Model):
     """
     Student submission (ERD: coding_submission). For ranking and history.
     run_type: RUN = student clicked Run (2 tests); SUBMIT = full submit (all tests, saved).
+    status queued/running: SUBMIT waiting for / being graded by the queue worker (CODING_SUBMIT_ASYNC).
     """
     RUN_TYPE_CHOICES = [
         ('RUN', 'Run'),
@@ -142,6 +210,8 @@ class CodingSubmission(models.Model):
         ('failed', 'Failed'),   # maps to WRONG_ANSWER
         ('error', 'Error'),
         ('timeout', 'Timeout'),
+        ('queued', 'Queued'),
+        ('running', 'Running'),
     ]
     organization = models.ForeignKey(
         'core.Organization',
@@ -162,7 +232,12 @@ class CodingSubmission(models.Model):
         related_name='coding_submissions',
         limit_choices_to={'role': 'student'},
     )
-    submitted_code = models.TextField()
+    code_blob = models.ForeignKey(
+        CodeBlob,
+        on_delete=models.PROTECT,
+        related_name='submissions',
+        help_text='Submitted source (shared by identical submissions); read and write it as submitted_code',
+    )
     language = models.CharField(max_length=20, default='python')
     run_type = models.CharField(
         max_length=10,
@@ -179,7 +254,10 @@ class CodingSubmission(models.Model):
     stderr = models.TextField(blank=True, null=True)
     is_archived = models.BooleanField(default=False, db_index=True)
     runtime_ms = models.IntegerField(null=True, blank=True)
+    cpu_time_ms = models.IntegerField(null=True, blank=True, help_text='User+sys CPU time summed over executed cases')
+    peak_memory_kb = models.IntegerField(null=True, blank=True, help_text='Largest max RSS of any executed case')
     attempt_no = models.IntegerField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True, help_text='When a queue worker claimed it')
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     details_json = models.JSONField(
         default=list,
@@ -197,11 +275,43 @@ class CodingSubmission(models.Model):
             models.Index(fields=['student', 'task']),
             models.Index(fields=['task']),
             models.Index(fields=['created_at']),
+            models.Index(
+                fields=['status', 'id'],
+                name='coding_subm_queue_idx',
+                condition=models.Q(status__in=['queued', 'running']),
+            ),
         ]
 
+    objects = CodingSubmissionQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.student.full_name} - {self.task.title} - {self.status}"
 
+    @property
+    def submitted_code(self):
+        """Source text. The blob is loaded on first access; use select_related('code_blob') for lists."""
+        pending = self.__dict__.get('_pending_code')
+        if pending is not None:
+            return pending
+        if self.code_blob_id is None:
+            return ''
+        return self.code_blob.text()
+
+    @submitted_code.setter
+    def submitted_code(self, value):
+        # Stored as a CodeBlob on save() / bulk_create().
+        self.__dict__['_pending_code'] = value or ''
+
+    def save(self, *args, **kwargs):
+        pending = self.__dict__.pop('_pending_code', None)
+        if pending is None and self.code_blob_id is None:
+            pending = ''
+        if pending is not None:
+            self.code_blob = CodeBlob.objects.store([pending])[pending]
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'code_blob'}
+        super().save(*args, **kwargs)
+
 
 class CodingProgress(models.Model):
     """
@@ -237,3 +347,174 @@ class CodingProgress(models.Model):
 
     def __str__(self):
         return f"{self.student_profile.user.full_name} - {self.exercise.title} - {self.status}"
+
+
+class CodingStudentTaskStat(models.Model):
+    """
+    Rollup per (student, task) for the coding monitor, so it never scans submission history.
+    Maintained by coding.services.stats on every CodingSubmission save (same transaction);
+    rebuild with `manage.py backfill_coding_stats`. Deleting old submissions keeps the totals.
+    attempts / last_submitted_at / solved / best_score: SUBMIT only. run_attempts / last_run_at: RUN.
+    best_cpu_time_ms / best_peak_memory_kb: lowest measured values among passing SUBMITs.
+    last_attempt_no: SUBMIT attempt counter (coding.services.submissions.next_attempt_no); never decreases.
+    """
+    student = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='coding_task_stats',
+    )
+    task = models.ForeignKey(
+        CodingTask,
+        on_delete=models.CASCADE,
+        related_name='student_stats',
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    run_attempts = models.PositiveIntegerField(default=0)
+    solved = models.BooleanField(default=False)
+    first_solved_at = models.DateTimeField(null=True, blank=True)
+    last_submitted_at = models.DateTimeField(null=True, blank=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    best_score = models.IntegerField(null=True, blank=True)
+    best_cpu_time_ms = models.IntegerField(null=True, blank=True)
+    best_peak_memory_kb = models.IntegerField(null=True, blank=True)
+    last_attempt_no = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'coding_student_task_stats'
+        verbose_name = 'Coding Student Task Stat'
+        verbose_name_plural = 'Coding Student Task Stats'
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'task'], name='coding_stat_student_task_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['task']),
+        ]
+
+    def __str__(self):
+        return f"stat student={self.student_id} task={self.task_id} attempts={self.attempts}"
+
+
+class CodingRunDailyStat(models.Model):
+    """
+    Archived RUN submissions: one counter row per (student, task, day) written by
+    coding.services.retention when raw RUN rows past CODING_RUN_RETENTION_DAYS are deleted.
+    """
+    student = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='coding_run_daily_stats',
+    )
+    task = models.ForeignKey(
+        CodingTask,
+        on_delete=models.CASCADE,
+        related_name='run_daily_stats',
+    )
+    day = models.DateField()
+    run_count = models.PositiveIntegerField(default=0)
+    passed_count = models.PositiveIntegerField(default=0)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'coding_run_daily_stats'
+        verbose_name = 'Coding Run Daily Stat'
+        verbose_name_plural = 'Coding Run Daily Stats'
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'task', 'day'], name='coding_run_daily_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['task', 'day']),
+        ]
+
+    def __str__(self):
+        return f"runs student={self.student_id} task={self.task_id} {self.day}: {self.run_count}"
+
+
+class CodingRunCode(models.Model):
+    """Distinct code of archived RUN submissions per (student, task): one row per CodeBlob, with a use count."""
+    student = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='coding_run_codes',
+    )
+    task = models.ForeignKey(
+        CodingTask,
+        on_delete=models.CASCADE,
+        related_name='run_codes',
+    )
+    code_blob = models.ForeignKey(
+        CodeBlob,
+        on_delete=models.PROTECT,
+        related_name='run_codes',
+    )
+    run_count = models.PositiveIntegerField(default=0)
+    first_seen_at = models.DateTimeField(null=True, blank=True)
+    last_seen_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'coding_run_codes'
+        verbose_name = 'Coding Run Code'
+        verbose_name_plural = 'Coding Run Codes'
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'task', 'code_blob'], name='coding_run_code_uniq'),
+        ]
+
+    def __str__(self):
+        return f"run code student={self.student_id} task={self.task_id} {self.code_blob_id[:12]}"
+
+    @property
+    def code(self):
+        return self.code_blob.text()
+
+
+class CodingRegradeJob(models.Model):
+    """
+    Re-run of a task's SUBMIT submissions against its current test cases (coding.services.regrade).
+    Progress is committed per batch together with the regraded rows; last_submission_id is the resume cursor.
+    """
+    SCOPE_CHOICES = [
+        ('latest', 'Latest per student'),
+        ('all', 'All submissions'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    task = models.ForeignKey(
+        CodingTask,
+        on_delete=models.CASCADE,
+        related_name='regrade_jobs',
+    )
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES, default='latest')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', db_index=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='coding_regrade_jobs',
+    )
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    changed = models.PositiveIntegerField(default=0, help_text='Regraded submissions whose status or score changed')
+    error_count = models.PositiveIntegerField(default=0, help_text='Submissions the sandbox could not grade (left as they were)')
+    last_submission_id = models.BigIntegerField(default=0)
+    error_message = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, help_text='Runner heartbeat (bumped every batch)')
+
+    class Meta:
+        db_table = 'coding_regrade_jobs'
+        verbose_name = 'Coding Regrade Job'
+        verbose_name_plural = 'Coding Regrade Jobs'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['task', 'status']),
+        ]
+
+    def __str__(self):
+        return f"regrade task={self.task_id} {self.scope} {self.status} {self.processed}/{self.total}"
@@ -0,0 +1,176 @@
+"""
+Output comparison for coding test cases.
+Streams both texts line by line (no full normalized copies), stops at the first mismatch and
+reports where it is. Modes (CodingTestCase.compare_mode):
+  exact     - line by line; CRLF/CR = LF, trailing whitespace per line, leading and trailing
+              blank space of the whole output ignored (same verdicts as the old strip() compare,
+              plus tolerance for trailing spaces)
+  tokens    - whitespace-separated tokens, line breaks and spacing ignored
+  float     - like tokens; numeric tokens equal within float_tolerance (absolute or relative)
+  unordered - same multiset of non-blank lines, any order
+"""
+import math
+import re
+from collections import Counter, namedtuple
+from itertools import zip_longest
+
+COMPARE_EXACT = 'exact'
+COMPARE_TOKENS = 'tokens'
+COMPARE_FLOAT = 'float'
+COMPARE_UNORDERED = 'unordered'
+COMPARE_MODE_CHOICES = [
+    (COMPARE_EXACT, 'Exact (line by line)'),
+    (COMPARE_TOKENS, 'Token-wise'),
+    (COMPARE_FLOAT, 'Float tolerance'),
+    (COMPARE_UNORDERED, 'Unordered lines'),
+]
+DEFAULT_FLOAT_TOLERANCE = 1e-6
+
+_NEWLINE_RE = re.compile(r'\r\n|\r|\n')
+_TOKEN_RE = re.compile(r'\S+')
+_SNIPPET = 80
+
+# passed: bool. On mismatch line/column are 1-based positions in the student output (column of the
+# first differing character or token); expected/got are short snippets of the differing line/token.
+CompareResult = namedtuple('CompareResult', 'passed line column expected got', defaults=(None, None, None, None))
+_MATCH = CompareResult(True)
+
+
+def iter_lines(text):
+    """Yield lines of text (any newline style) without splitting the whole string up front."""
+    text = text or ''
+    pos = 0
+    end = len(text)
+    while pos < end:
+        m = _NEWLINE_RE.search(text, pos)
+        if m is None:
+            yield text[pos:]
+            return
+        yield text[pos:m.start()]
+        pos = m.end()
+
+
+def _content_lines(text):
+    """
+    (line_no, line, lead) with trailing whitespace removed and the leading blank space of the whole
+    output skipped; lead = characters stripped from the start of the first content line.
+    """
+    started = False
+    for line_no, line in enumerate(iter_lines(text), 1):
+        line = line.rstrip()
+        if not started:
+            if not line.strip():
+                continue
+            started = True
+            lead = len(line) - len(line.lstrip())
+            yield line_no, line[lead:], lead
+            continue
+        yield line_no, line, 0
+
+
+def _mismatch(line, column, expected, got):
+    return CompareResult(False, line, column, (expected or '')[:_SNIPPET], (got or '')[:_SNIPPET])
+
+
+def _compare_exact(got, expected):
+    last_got_line = 0
+    for got_item, exp_item in zip_longest(_content_lines(got), _content_lines(expected)):
+        if got_item is None:
+            # Student output ended; only trailing blank lines may remain in expected.
+            if exp_item[1]:
+                return _mismatch(last_got_line + 1, 1, exp_item[1], '')
+            continue
+        got_no, got_line, lead = got_item
+        last_got_line = got_no
+        exp_line = exp_item[1] if exp_item is not None else ''
+        if got_line == exp_line:
+            continue
+        col = next(
+            (i for i, (a, b) in enumerate(zip(got_line, exp_line)) if a != b),
+            min(len(got_line), len(exp_line)),
+        )
+        return _mismatch(got_no, lead + col + 1, exp_line, got_line)
+    return _MATCH
+
+
+def _iter_tokens(text):
+    for line_no, line in enumerate(iter_lines(text), 1):
+        for m in _TOKEN_RE.finditer(line):
+            yield line_no, m.start() + 1, m.group()
+
+
+def _float_equal(a, b, tolerance):
+    try:
+        x = float(a)
+        y = float(b)
+    except ValueError:
+        return a == b
+    if math.isnan(x) or math.isnan(y):
+        return math.isnan(x) and math.isnan(y)
+    return abs(x - y) <= tolerance * max(1.0, abs(y))
+
+
+def _compare_tokens(got, expected, tolerance=None):
+    got_tokens = _iter_tokens(got)
+    last = (1, 1)
+    for _, _, exp_tok in _iter_tokens(expected):
+        item = next(got_tokens, None)
+        if item is None:
+            return _mismatch(last[0], last[1], exp_tok, '')
+        line_no, col, got_tok = item
+        last = (line_no, col + len(got_tok))
+        if got_tok == exp_tok:
+            continue
+        if tolerance is not None and _float_equal(got_tok, exp_tok, tolerance):
+            continue
+        return _mismatch(line_no, col, exp_tok, got_tok)
+    extra = next(got_tokens, None)
+    if extra is not None:
+        return _mismatch(extra[0], extra[1], '', extra[2])
+    return _MATCH
+
+
+def _compare_unordered(got, expected):
+    remaining = Counter(line.strip() for line in iter_lines(expected) if line.strip())
+    last_line = 0
+    for line_no, line in enumerate(iter_lines(got), 1):
+        last_line = line_no
+        line = line.strip()
+        if not line:
+            continue
+        if remaining[line] <= 0:
+            return _mismatch(line_no, 1, '', line)
+        remaining[line] -= 1
+    missing = next((line for line, n in remaining.items() if n > 0), None)
+    if missing is not None:
+        return _mismatch(last_line + 1, 1, missing, '')
+    return _MATCH
+
+
+def compare_output(got, expected, mode=COMPARE_EXACT, float_tolerance=None):
+    """Compare student output with expected output. Returns CompareResult."""
+    if mode == COMPARE_TOKENS:
+        return _compare_tokens(got, expected)
+    if mode == COMPARE_FLOAT:
+        tolerance = DEFAULT_FLOAT_TOLERANCE if float_tolerance is None else float_tolerance
+        return _compare_tokens(got, expected, tolerance)
+    if mode == COMPARE_UNORDERED:
+        return _compare_unordered(got, expected)
+    return _compare_exact(got, expected)
+
+
+def compare_case(got, test_case):
+    """compare_output with the test case's mode and tolerance."""
+    return compare_output(
+        got,
+        test_case.expected,
+        getattr(test_case, 'compare_mode', None) or COMPARE_EXACT,
+        getattr(test_case, 'float_tolerance', None),
+    )
+
+
+def mismatch_details(result):
+    """details_json fragment for a failed comparison ({} when passed)."""
+    if result.passed:
+        return {}
+    return {'first_diff': {'line': result.line, 'column': result.column, 'expected': result.expected, 'got': result.got}}
@@ -0,0 +1,165 @@
+"""
+Content-addressed cache of sandbox results for coding run/submit.
+Key: code hash (exact source, CRLF line endings read as LF) + test-case inputs hash + runtime (language, toolchain version, timeout, limits).
+Value: per-case CaseResult (stdout, stderr, return_code, elapsed_ms, peak_kb, cpu_ms) exactly as run_code_cases returns it,
+so pass/fail is still judged against the current expected outputs.
+In-process LRU (CODING_RESULT_CACHE_SIZE entries, 0 = disabled). A task's entries are dropped when
+its CodingTestCase rows change (coding.signals). Timeouts and sandbox failures are never cached.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from coding.run_code import _sandbox_setting, get_runner, run_code_cases
+
+
+def normalize_code(code: str) -> str:
+    """
+    Code as hashed for the key: only CRLF line endings become LF (browsers and editors differ there).
+    Nothing else is touched - trailing whitespace can be meaningful (multi-line string literals,
+    a backslash continuation followed by a space), and such programs must not share results.
+    """
+    return (code or '').replace('\r\n', '\n')
+
+
+def hash_inputs(inputs) -> str:
+    h = hashlib.sha256()
+    for data in inputs:
+        raw = (data or '').encode('utf-8')
+        h.update(len(raw).to_bytes(8, 'big'))
+        h.update(raw)
+    return h.hexdigest()
+
+
+def result_key(code, inputs, per_case_timeout, stop_on_error, language='python') -> str:
+    code_hash = hashlib.sha256(normalize_code(code).encode('utf-8', errors='surrogatepass')).hexdigest()
+    runtime = '|'.join([
+        language,
+        get_runner(language).version(),
+        str(per_case_timeout),
+        str(int(_sandbox_setting('CODING_SANDBOX_MEMORY_MB', 0) or 0)),
+        str(int(_sandbox_setting('CODING_SANDBOX_OUTPUT_LIMIT_KB', 0) or 0)),
+        str(int(_sandbox_setting('CODING_SANDBOX_MAX_OPEN_FILES', 0) or 0)),
+        '1' if stop_on_error else '0',
+    ])
+    return hashlib.sha256(f'{runtime}|{code_hash}|{hash_inputs(inputs)}'.encode('utf-8')).hexdigest()
+
+
+class ExecutionResultCache:
+    """Thread-safe LRU with a per-task key index for invalidation and hit/miss counters."""
+
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self._data = OrderedDict()
+        self._task_keys = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, task_id, value):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = (task_id, value)
+            self._task_keys.setdefault(task_id, set()).add(key)
+            while len(self._data) > self.capacity:
+                old_key, (old_task, _) = self._data.popitem(last=False)
+                self._discard_index(old_task, old_key)
+                self.evictions += 1
+
+    def invalidate_task(self, task_id):
+        with self._lock:
+            keys = self._task_keys.pop(task_id, set())
+            for key in keys:
+                self._data.pop(key, None)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._task_keys.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def _discard_index(self, task_id, key):
+        keys = self._task_keys.get(task_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._task_keys[task_id]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': True,
+                'size': len(self._data),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Process-wide cache; None when CODING_RESULT_CACHE_SIZE is 0."""
+    global _cache
+    capacity = int(_sandbox_setting('CODING_RESULT_CACHE_SIZE', 0) or 0)
+    if capacity <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None or _cache.capacity != capacity:
+            _cache = ExecutionResultCache(capacity)
+        return _cache
+
+
+def cache_stats():
+    cache = get_result_cache()
+    if cache is None:
+        return {'enabled': False, 'size': 0, 'capacity': 0, 'hits': 0, 'misses': 0, 'hitRate': 0.0,
+                'evictions': 0, 'invalidations': 0}
+    return cache.stats()
+
+
+def invalidate_task(task_id):
+    cache = get_result_cache()
+    return cache.invalidate_task(task_id) if cache is not None else 0
+
+
+def _cacheable(results):
+    # rc -1 = timeout or sandbox failure: load-dependent, must be re-run.
+    return bool(results) and all(r[2] != -1 for r in results)
+
+
+def run_cases_cached(task_id, code, inputs, per_case_timeout=5, stop_on_error=False, language='python'):
+    """run_code_cases with the result cache in front of it."""
+    inputs = list(inputs)
+    cache = get_result_cache()
+    if cache is None:
+        return run_code_cases(code, inputs, per_case_timeout, stop_on_error=stop_on_error, language=language)
+    key = result_key(code, inputs, per_case_timeout, stop_on_error, language)
+    cached = cache.get(key)
+    if cached is not None:
+        return list(cached)
+    results = run_code_cases(code, inputs, per_case_timeout, stop_on_error=stop_on_error, language=language)
+    if _cacheable(results):
+        cache.put(key, task_id, tuple(results))
+    return results
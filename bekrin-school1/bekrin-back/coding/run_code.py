@@ -1,56 +1,530 @@
 """
-Safe execution of student Python code against test cases.
+Safe execution of student code against test cases.
 Uses subprocess with timeout. stdin = input_data, compare stdout to expected.
-Blocks dangerous imports: exec, eval, os, subprocess, socket, requests, etc.
+Languages are pluggable LanguageRunner backends (python, c, cpp, javascript; CODING_LANGUAGES selects the
+ones offered). Compiled languages build once per code hash into a private temp directory (ArtifactCache)
+and run the binary as a fresh process per case; the batch/parallel paths below are language-agnostic.
+Optional warm worker pool (CODING_SANDBOX_POOL_SIZE > 0) avoids interpreter startup per Python run.
+All paths run under the same limits: CPU time, address space (CODING_SANDBOX_MEMORY_MB), open files
+(CODING_SANDBOX_MAX_OPEN_FILES) and a hard output cap (CODING_SANDBOX_OUTPUT_LIMIT_KB) that kills the
+process as soon as it is exceeded. Every case reports its peak memory (max RSS, KB) and user+sys
+CPU time of the child; cold runs include interpreter (and rlimit launcher) startup in both, pooled
+runs do not.
+On Linux max RSS survives exec, so a cold run's peak is at least the forking server process's RSS.
+Blocks dangerous imports and builtins (os, subprocess, socket, exec, eval, ...) via an AST policy check;
+C/C++ and JavaScript get a token denylist (process, file and network APIs).
+C/C++ programs are linked statically and run under a seccomp syscall allowlist (sandbox_exec.py
+--seccomp, libseccomp); without it the c/cpp runners report themselves unavailable.
 """
+import ast
+import atexit
+import hashlib
+import json
+from collections import OrderedDict, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import queue
+import re
+import select
+import shutil
+import signal
+import string
+import struct
 import subprocess
 import tempfile
+import threading
 import os
 import sys
 import time
-import re
 
-# Dangerous patterns to block (simple string scan)
-_DANGEROUS_PATTERNS = [
-    r'\bexec\s*\(',
-    r'\beval\s*\(',
-    r'\b__import__\s*\(',
-    r'\bcompile\s*\(',
-    r'\bglobals\s*\(',
-    r'\blocals\s*\(',
-    r'\bgetattr\s*\([^)]*["\']__',
-    r'\bopen\s*\([^)]*["\'][rw]',
-    r'\bimport\s+os\b',
-    r'\bfrom\s+os\s+import',
-    r'\bimport\s+subprocess\b',
-    r'\bfrom\s+subprocess\s+import',
-    r'\bimport\s+socket\b',
-    r'\bfrom\s+socket\s+import',
-    r'\bimport\s+requests\b',
-    r'\bfrom\s+requests\s+import',
-    r'\bimport\s+sys\b',
-    r'\bimport\s+os\.path\b',
-    r'\bfile\s*\(',  # Python 2 legacy
-]
-_DANGEROUS_RE = re.compile('|'.join(_DANGEROUS_PATTERNS), re.IGNORECASE)
-
-
-def validate_code_safe(code: str):
-    """Check code for dangerous patterns. Returns (ok, error_message)."""
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, only the timeout applies
+    resource = None
+
+# One executed case. Unpacks like the older (stdout, stderr, return_code, elapsed_ms) tuple
+# for the first four fields; peak_kb is the process max RSS in KB, cpu_ms its user+sys CPU
+# time (both 0 when unknown).
+CaseResult = namedtuple('CaseResult', 'stdout stderr returncode elapsed_ms peak_kb cpu_ms', defaults=(0, 0))
+OUTPUT_LIMIT_MESSAGE = 'Output limit exceeded'
+
+# ---- Safety validator (single AST pass) ----
+# Policy: denied modules (matched on the top-level package, so `import os.path` and
+# `from importlib import x` are caught) and denied builtins (any reference, so aliasing
+# `e = eval` is caught). open is denied the same way - plain references (`f = open`,
+# `open.__call__`), `.open` attribute access and getattr(x, 'open') - except a direct
+# open(0)/open(1) call. Override in settings: CODING_VALIDATOR_DENIED_IMPORTS,
+# CODING_VALIDATOR_DENIED_BUILTINS, CODING_VALIDATOR_ALLOWED_IMPORTS (non-empty = allowlist).
+# Attribute paths given as strings are checked like attribute access: attrgetter/methodcaller
+# arguments and str.format field paths ('{0.__init__.__globals__}'). Other string contents and
+# comments are never inspected, so they cannot cause false positives.
+
+DEFAULT_DENIED_IMPORTS = frozenset({
+    'os', 'posix', 'nt', 'sys', 'subprocess', 'socket', 'requests', 'urllib', 'http', 'ftplib',
+    'smtplib', 'telnetlib', 'asyncio', 'shutil', 'pathlib', 'io', 'tempfile', 'glob', 'importlib',
+    'builtins', 'ctypes', 'cffi', 'multiprocessing', 'threading', '_thread', 'concurrent', 'signal',
+    'pty', 'resource', 'gc', 'inspect', 'pickle', 'marshal', 'shelve', 'code', 'codeop', 'runpy',
+    'webbrowser', 'sqlite3', 'mmap', 'fcntl',
+    # Modules that open files by path (codecs.open, gzip.open, linecache.getline, ...).
+    'codecs', 'gzip', 'bz2', 'lzma', 'zipfile', 'tarfile', 'fileinput', 'linecache', 'tokenize', 'dbm',
+    'zipimport', 'pkgutil', 'logging',
+    # attrgetter/methodcaller walk attribute paths given as strings.
+    'operator', '_operator',
+})
+DEFAULT_DENIED_BUILTINS = frozenset({
+    'exec', 'eval', 'compile', '__import__', 'globals', 'locals', 'vars', 'breakpoint', 'help',
+    'memoryview', '__builtins__', '__loader__', '__spec__', 'file',
+})
+# Attribute names used to escape the namespace (e.g. ().__class__.__bases__[0].__subclasses__()).
+DENIED_ATTRIBUTES = frozenset({
+    '__subclasses__', '__globals__', '__builtins__', '__code__', '__closure__', '__bases__',
+    '__base__', '__mro__', '__dict__', '__getattribute__', '__loader__', '__spec__', '__import__',
+    'gi_frame', 'f_globals', 'f_locals', 'f_back', 'f_builtins', 'tb_frame', 'open',
+})
+_ATTR_BUILTINS = frozenset({'getattr', 'setattr', 'delattr', 'hasattr'})
+# Callables whose first argument is a (dotted) attribute path; checked even where operator is allowed.
+_ATTR_PATH_CALLS = frozenset({'attrgetter', 'methodcaller'})
+_FORMATTER = string.Formatter()
+# open() is only allowed on stdin/stdout file descriptors: open(0).read()
+_ALLOWED_OPEN_FDS = (0, 1)
+
+_VALIDATION_CACHE_SIZE = 1024
+_validation_cache = OrderedDict()
+_validation_cache_lock = threading.Lock()
+
+
+def _validator_policy():
+    allowed = _sandbox_setting('CODING_VALIDATOR_ALLOWED_IMPORTS', None) or ()
+    return (
+        frozenset(_sandbox_setting('CODING_VALIDATOR_DENIED_IMPORTS', None) or DEFAULT_DENIED_IMPORTS),
+        frozenset(allowed),
+        frozenset(_sandbox_setting('CODING_VALIDATOR_DENIED_BUILTINS', None) or DEFAULT_DENIED_BUILTINS),
+    )
+
+
+def _check_module(name, denied_imports, allowed_imports):
+    top = (name or '').split('.')[0]
+    if top in denied_imports:
+        return False
+    if allowed_imports and top not in allowed_imports:
+        return False
+    return True
+
+
+def _attr_path_denied(path, denied_names):
+    """True when a dotted/indexed attribute path ('a.__class__[0].b') has a dunder or denied part."""
+    return any(part.startswith('__') or part in denied_names for part in re.split(r'[.\[\]]', path))
+
+
+def _attr_path_call_denied(fname, call, denied_names):
+    """attrgetter(*paths) / methodcaller(name, ...): every path must be a string literal that is not denied."""
+    paths = call.args if fname == 'attrgetter' else call.args[:1]
+    if not paths:
+        return True
+    return not all(isinstance(arg, ast.Constant) and isinstance(arg.value, str)
+                   and not _attr_path_denied(arg.value, denied_names) for arg in paths)
+
+
+def _format_field_paths(text):
+    """Field names of a str.format template, nested format specs included ([] when it is not one)."""
+    try:
+        parsed = list(_FORMATTER.parse(text))
+    except ValueError:
+        return []
+    paths = []
+    for _, field, spec, _ in parsed:
+        if field:
+            paths.append(field)
+        if spec and '{' in spec:
+            paths.extend(_format_field_paths(spec))
+    return paths
+
+
+def _find_violation(tree, policy):
+    """Return a short description of the first policy violation, or None."""
+    denied_imports, allowed_imports, denied_builtins = policy
+    denied_names = denied_builtins | DENIED_ATTRIBUTES
+    allowed_open = set()  # ids of the `open` Name nodes of open(0)/open(1) calls
+    # ast.walk is breadth-first: a Call is always seen before its func Name.
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if not _check_module(alias.name, denied_imports, allowed_imports):
+                    return f'import {alias.name}', node.lineno
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                return 'relative import', node.lineno
+            if not _check_module(node.module, denied_imports, allowed_imports):
+                return f'from {node.module} import', node.lineno
+        elif isinstance(node, ast.Name):
+            if node.id in denied_builtins:
+                return node.id, node.lineno
+            if node.id == 'open' and id(node) not in allowed_open:
+                return 'open', node.lineno
+        elif isinstance(node, ast.Attribute):
+            if node.attr in DENIED_ATTRIBUTES:
+                return f'.{node.attr}', node.lineno
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str) and '{' in node.value:
+            # Any string may end up as a format template; only its field paths are checked.
+            if any(_attr_path_denied(path, denied_names) for path in _format_field_paths(node.value)):
+                return 'format field', node.lineno
+        elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+              and node.func.attr in _ATTR_PATH_CALLS):
+            if _attr_path_call_denied(node.func.attr, node, denied_names):
+                return f'{node.func.attr}()', node.lineno
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            fname = node.func.id
+            if fname in _ATTR_PATH_CALLS:
+                if _attr_path_call_denied(fname, node, denied_names):
+                    return f'{fname}()', node.lineno
+            elif fname in _ATTR_BUILTINS and len(node.args) >= 2:
+                attr = node.args[1]
+                if (not (isinstance(attr, ast.Constant) and isinstance(attr.value, str))
+                        or attr.value.startswith('__') or attr.value in denied_names):
+                    return f'{fname}()', node.lineno
+            elif fname == 'open':
+                first = node.args[0] if node.args else None
+                if not (isinstance(first, ast.Constant) and first.value in _ALLOWED_OPEN_FDS
+                        and not isinstance(first.value, bool)):
+                    return 'open()', node.lineno
+                allowed_open.add(id(node.func))
+    return None
+
+
+def _find_python_violation(code, policy):
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+    return _find_violation(tree, policy)
+
+
+# C/C++ and JavaScript: token denylists over the code with comments and string literals blanked out.
+# They only reject the obvious escapes (process/file/network APIs) with a readable message; for compiled
+# code the seccomp allowlist (sandbox_exec.py --seccomp) is the actual boundary, whatever names the
+# program declares itself.
+C_DENIED_HEADERS = frozenset({
+    'unistd.h', 'fcntl.h', 'dlfcn.h', 'spawn.h', 'pthread.h', 'dirent.h', 'pwd.h', 'grp.h', 'termios.h',
+    'netdb.h', 'poll.h', 'thread', 'filesystem', 'fstream', 'future',
+})
+C_DENIED_HEADER_PREFIXES = ('sys/', 'netinet/', 'arpa/', 'linux/', 'asm/', 'net/')
+C_DENIED_IDENTIFIERS = frozenset({
+    'system', 'popen', 'fork', 'vfork', 'clone', 'execl', 'execle', 'execlp', 'execv', 'execve', 'execvp',
+    'execvpe', 'posix_spawn', 'posix_spawnp', 'syscall', 'asm', '__asm', '__asm__', 'dlopen', 'dlsym',
+    'fopen', 'freopen', 'fdopen', 'open', 'openat', 'creat', 'unlink', 'rmdir', 'mkdir', 'chdir', 'kill',
+    'socket', 'connect', 'ptrace', 'mmap', 'mprotect', 'setrlimit', 'fstream', 'ifstream', 'ofstream',
+    'filesystem', 'thread', 'jthread', 'async', 'pthread_create',
+})
+# Modules a JavaScript solution may require: stdin reading and formatting. The permission model
+# (--allow-fs-read of the script only) blocks file access through fs at run time.
+JS_ALLOWED_MODULES = frozenset({'fs', 'readline', 'util', 'assert', 'string_decoder'})
+JS_DENIED_IDENTIFIERS = frozenset({
+    'eval', 'Function', 'global', 'globalThis', 'import', 'mainModule', 'binding', '_linkedBinding', 'dlopen',
+    'getBuiltinModule', 'WebAssembly', 'Worker', 'fetch', 'WebSocket',
+})
+_C_LIKE_TOKENS = re.compile(
+    r"//[^\n]*|/\*.*?\*/|\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`",
+    re.S,
+)
+_C_INCLUDE = re.compile(r'^[ \t]*#[ \t]*(include_next|include|import)[ \t]*([<"])([^>"\n]*)', re.M)
+_JS_REQUIRE = re.compile(r'\brequire\b(\s*\(\s*([\'"])(?:node:)?([\w/.-]+)\2\s*\))?')
+# obj.constructor leads to the Function constructor (string eval); computed access on process/module/require
+# hides member names from the token scan. Class constructors (`constructor() {}`) stay allowed.
+_JS_DENIED_ACCESS = re.compile(r'\.\s*constructor\b|\b(?:process|module|require|exports)\s*\[')
+_IDENTIFIER = re.compile(r'[A-Za-z_$][\w$]*')
+
+
+def _strip_c_like(code, keep_strings):
+    """Blank comments (and string/char/template literals unless keep_strings), keeping line numbers."""
+    def blank(match):
+        text = match.group()
+        if text[0] in '"\'`':
+            if keep_strings:
+                return text
+            return text[0] * 2 + '\n' * text.count('\n')
+        return ' ' + '\n' * text.count('\n')
+    return _C_LIKE_TOKENS.sub(blank, code)
+
+
+def _line_of(text, pos):
+    return text.count('\n', 0, pos) + 1
+
+
+def _first_identifier(text, denied):
+    for m in _IDENTIFIER.finditer(text):
+        if m.group() in denied:
+            return m.group(), _line_of(text, m.start())
+    return None
+
+
+def _find_c_violation(code, policy=None):
+    with_strings = _strip_c_like(code, keep_strings=True)
+    for m in _C_INCLUDE.finditer(with_strings):
+        directive, delim, header = m.group(1), m.group(2), m.group(3).strip()
+        lineno = _line_of(with_strings, m.start())
+        if directive != 'include' or delim == '"':
+            return f'#{directive} {delim}{header}', lineno
+        if header in C_DENIED_HEADERS or header.startswith(C_DENIED_HEADER_PREFIXES):
+            return f'#include <{header}>', lineno
+    text = _strip_c_like(code, keep_strings=False)
+    if '##' in text:
+        # Token pasting could assemble a denied name the scan below never sees.
+        return '##', _line_of(text, text.index('##'))
+    return _first_identifier(text, C_DENIED_IDENTIFIERS)
+
+
+def _find_js_violation(code, policy=None):
+    with_strings = _strip_c_like(code, keep_strings=True)
+    for m in _JS_REQUIRE.finditer(with_strings):
+        module = m.group(3)
+        if module is None or module not in JS_ALLOWED_MODULES:
+            return f"require('{module}')" if module else 'require', _line_of(with_strings, m.start())
+    text = _strip_c_like(code, keep_strings=False)
+    m = _JS_DENIED_ACCESS.search(text)
+    if m:
+        return re.sub(r'\s+', '', m.group()), _line_of(text, m.start())
+    return _first_identifier(text, JS_DENIED_IDENTIFIERS)
+
+
+def validate_code_safe(code: str, language: str = 'python'):
+    """
+    Check code against the policy of its language (Python: one AST pass over the import/builtin policy;
+    C, C++, JavaScript: token denylists). Returns (ok, error_message).
+    Results are cached per (language, code hash, policy). Python code that does not parse is allowed
+    through, so the student sees the SyntaxError from the sandbox run (compile errors likewise).
+    """
     if not code or not code.strip():
         return False, 'Kod boş ola bilməz'
-    m = _DANGEROUS_RE.search(code)
-    if m:
-        return False, f'Təhlükəli əmrlər icazə verilmir: {m.group(0).strip()}'
-    return True, ''
+    runner = _RUNNERS.get(language or 'python')
+    if runner is None:
+        return False, f'Dəstəklənməyən proqramlaşdırma dili: {language}'
+    policy = runner.validator_policy()
+    key = (runner.name, hashlib.sha256(code.encode('utf-8', errors='surrogatepass')).digest(), hash(policy))
+    with _validation_cache_lock:
+        cached = _validation_cache.get(key)
+        if cached is not None:
+            _validation_cache.move_to_end(key)
+            return cached
+    violation = runner.find_violation(code, policy)
+    if violation:
+        what, lineno = violation
+        result = (False, f'Təhlükəli əmrlər icazə verilmir: {what} (sətir {lineno})')
+    else:
+        result = (True, '')
+    with _validation_cache_lock:
+        _validation_cache[key] = result
+        while len(_validation_cache) > _VALIDATION_CACHE_SIZE:
+            _validation_cache.popitem(last=False)
+    return result
 
 
-def run_python_code(code: str, stdin_input: str, timeout_seconds: int = 5):
+def _sandbox_setting(name, default):
+    """Read CODING_SANDBOX_* from Django settings; defaults when run outside Django."""
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+def sandbox_limits():
+    """Per-case limits from settings, in the form the worker protocol and the cold path take."""
+    return {
+        'memory_mb': int(_sandbox_setting('CODING_SANDBOX_MEMORY_MB', 0) or 0),
+        'output_limit': int(_sandbox_setting('CODING_SANDBOX_OUTPUT_LIMIT_KB', 0) or 0) * 1024,
+        'max_open_files': int(_sandbox_setting('CODING_SANDBOX_MAX_OPEN_FILES', 0) or 0),
+    }
+
+
+def _peak_kb(rusage):
+    # ru_maxrss is KB on Linux, bytes on macOS.
+    return rusage.ru_maxrss // 1024 if sys.platform == 'darwin' else rusage.ru_maxrss
+
+
+def _cpu_ms(rusage):
+    return int((rusage.ru_utime + rusage.ru_stime) * 1000)
+
+
+_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sandbox_worker.py')
+_LAUNCHER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sandbox_exec.py')
+
+
+def _limited_argv(argv, timeout_seconds, limits, seccomp=False):
     """
-    Run Python code with stdin_input as stdin.
-    Returns (stdout, stderr, return_code).
-    Does NOT validate code - caller must call validate_code_safe first.
+    argv behind the sandbox_exec.py launcher, which sets the rlimits on itself and execs argv.
+    Replaces subprocess preexec_fn, which is not safe to use from the server's threads.
+    seccomp: the launcher also installs its syscall allowlist before exec (native programs).
+    argv unchanged where rlimits are unavailable.
+    """
+    if resource is None:
+        return list(argv)
+    return [sys.executable, '-I', '-S', _LAUNCHER_SCRIPT] + (['--seccomp'] if seccomp else []) + [
+        str(timeout_seconds), str(limits['memory_mb']), str(limits['max_open_files']), '--',
+    ] + list(argv)
+
+
+_seccomp_supported = None
+
+
+def seccomp_available():
+    """True when the launcher can install its seccomp filter here (Linux with libseccomp); checked once."""
+    global _seccomp_supported
+    if _seccomp_supported is None:
+        supported = False
+        if resource is not None and sys.platform.startswith('linux'):
+            try:
+                supported = subprocess.run(
+                    [sys.executable, '-I', '-S', _LAUNCHER_SCRIPT, '--seccomp-check'],
+                    stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10,
+                ).returncode == 0
+            except (OSError, subprocess.SubprocessError):
+                supported = False
+        _seccomp_supported = supported
+    return _seccomp_supported
+
+
+def _reap(proc, deadline):
+    """
+    Wait for proc (killing it at deadline).
+    Returns (returncode or None on timeout, peak_kb, cpu_ms).
     """
+    if not hasattr(os, 'wait4'):
+        try:
+            return proc.wait(timeout=max(0.0, deadline - time.monotonic())), 0, 0
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            return None, 0, 0
+    timed_out = False
+    while True:
+        pid, wait_status, rusage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            break
+        if time.monotonic() >= deadline:
+            proc.kill()
+            pid, wait_status, rusage = os.wait4(proc.pid, 0)
+            timed_out = True
+            break
+        time.sleep(0.005)
+    proc.returncode = os.waitstatus_to_exitcode(wait_status)
+    return (None if timed_out else proc.returncode), _peak_kb(rusage), _cpu_ms(rusage)
+
+
+def _drain(proc, deadline, output_limit):
+    """
+    Read stdout/stderr as they are produced. Kills the process once either stream passes
+    output_limit bytes (0 = unlimited) or the deadline passes.
+    Returns (stdout bytes, stderr bytes, 'limit' | 'timeout' | None).
+    """
+    if sys.platform == 'win32':
+        # No select() on pipes: buffer everything, enforce the cap afterwards.
+        try:
+            out, err = proc.communicate(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            out, err = proc.communicate()
+            return out, err, 'timeout'
+        if output_limit and (len(out) > output_limit or len(err) > output_limit):
+            return out[:output_limit], err[:output_limit], 'limit'
+        return out, err, None
+    bufs = {proc.stdout.fileno(): bytearray(), proc.stderr.fileno(): bytearray()}
+    open_fds = list(bufs)
+    while open_fds:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            proc.kill()
+            return bytes(bufs[proc.stdout.fileno()]), bytes(bufs[proc.stderr.fileno()]), 'timeout'
+        ready, _, _ = select.select(open_fds, [], [], remaining)
+        for fd in ready:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                open_fds.remove(fd)
+                continue
+            buf = bufs[fd]
+            buf.extend(chunk)
+            if output_limit and len(buf) > output_limit:
+                del buf[output_limit:]
+                proc.kill()
+                return bytes(bufs[proc.stdout.fileno()]), bytes(bufs[proc.stderr.fileno()]), 'limit'
+    return bytes(bufs[proc.stdout.fileno()]), bytes(bufs[proc.stderr.fileno()]), None
+
+
+def _run_process(argv, cwd, stdin_input, timeout_seconds, limits, env=None, seccomp=False):
+    """
+    Run argv once as a fresh process under the sandbox limits (a dict like sandbox_limits()),
+    and the seccomp allowlist when seccomp. Returns CaseResult. Shared by the Python cold path,
+    compiled programs and compilers.
+    """
+    start = time.perf_counter()
+    try:
+        with tempfile.TemporaryFile() as stdin_file:
+            stdin_file.write((stdin_input or '').encode('utf-8'))
+            stdin_file.seek(0)
+            proc = subprocess.Popen(
+                _limited_argv(argv, timeout_seconds, limits, seccomp),
+                stdin=stdin_file,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                cwd=cwd,
+                env=env,
+            )
+        deadline = time.monotonic() + timeout_seconds
+        try:
+            out, err, killed = _drain(proc, deadline, limits['output_limit'])
+        finally:
+            proc.stdout.close()
+            proc.stderr.close()
+        returncode, peak_kb, cpu_ms = _reap(proc, deadline)
+        elapsed_ms = int((time.perf_counter() - start) * 1000)
+        # SIGXCPU: the RLIMIT_CPU backstop fired before the wall-clock deadline was noticed (busy host)
+        cpu_limited = hasattr(signal, 'SIGXCPU') and returncode == -signal.SIGXCPU
+        if killed == 'timeout' or returncode is None or cpu_limited:
+            return CaseResult('', 'Timeout', -1, elapsed_ms, peak_kb, cpu_ms)
+        stdout = out.decode('utf-8', errors='replace')
+        if killed == 'limit':
+            return CaseResult(stdout, OUTPUT_LIMIT_MESSAGE, -1, elapsed_ms, peak_kb, cpu_ms)
+        return CaseResult(stdout, err.decode('utf-8', errors='replace'), returncode, elapsed_ms, peak_kb, cpu_ms)
+    except Exception as e:
+        return CaseResult('', str(e)[:500], -1, int((time.perf_counter() - start) * 1000))
+
+
+def _complete_results(results, count, stop_on_error, stderr, returncode=-1, elapsed_ms=0):
+    """
+    results (the cases that finished, in input order) extended to count entries: each case that did
+    not finish gets CaseResult('', stderr, returncode) - elapsed_ms on the first of them. With
+    stop_on_error the batch ends at the first failure, so at most one such case is added.
+    """
+    results = list(results)
+    if stop_on_error and results and results[-1].returncode != 0:
+        return results
+    missing = count - len(results)
+    if stop_on_error:
+        missing = min(missing, 1)
+    for i in range(missing):
+        results.append(CaseResult('', stderr, returncode, elapsed_ms if i == 0 else 0))
+    return results
+
+
+def _run_sequential(run_case, inputs, per_case_timeout, total_timeout, stop_on_error):
+    """run_case(stdin, timeout) per input in order, within total_timeout (see run_code_batch)."""
+    results = []
+    deadline = time.perf_counter() + total_timeout
+    for stdin_input in inputs:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            results.append(CaseResult('', 'Timeout', -1, 0))
+        else:
+            results.append(run_case(stdin_input, min(per_case_timeout, remaining)))
+        if stop_on_error and results[-1][2] != 0:
+            break
+    return results
+
+
+def _run_cold_case(code: str, stdin_input: str, timeout_seconds=5, limits=None):
+    """
+    Cold path: temp file + fresh interpreter per call, under sandbox limits.
+    Used when the pool is off or unavailable. Returns CaseResult.
+    """
+    limits = limits if limits is not None else sandbox_limits()
     with tempfile.NamedTemporaryFile(
         mode='w',
         suffix='.py',
@@ -60,19 +534,7 @@ def run_python_code(code: str, stdin_input: str, timeout_seconds: int = 5):
         f.write(code)
         path = f.name
     try:
-        result = subprocess.run(
-            [sys.executable, path],
-            input=stdin_input,
-            capture_output=True,
-            text=True,
-            timeout=timeout_seconds,
-            cwd=os.path.dirname(path),
-        )
-        return (result.stdout or '', result.stderr or '', result.returncode)
-    except subprocess.TimeoutExpired:
-        return ('', 'Timeout', -1)
-    except Exception as e:
-        return ('', str(e)[:500], -1)
+        return _run_process([sys.executable, path], os.path.dirname(path), stdin_input, timeout_seconds, limits)
     finally:
         try:
             os.unlink(path)
@@ -80,16 +542,742 @@ def run_python_code(code: str, stdin_input: str, timeout_seconds: int = 5):
             pass
 
 
+def _run_python_code_cold(code: str, stdin_input: str, timeout_seconds: int = 5):
+    """Cold path as (stdout, stderr, return_code)."""
+    return tuple(_run_cold_case(code, stdin_input, timeout_seconds)[:3])
+
+
+# ---- Warm worker pool ----
+# Each worker is a pre-started interpreter running coding/sandbox_worker.py (a "zygote").
+# A job (code + one or more stdin inputs) is sent over its stdin pipe; the zygote compiles
+# once and forks a fresh child per input, so every case starts from the same clean state.
+# Workers are recycled after CODING_SANDBOX_MAX_JOBS jobs and after any timeout, then
+# replaced with a fresh one. Case results stream back one frame each, so a worker that hangs
+# or dies mid-job loses only the cases it had not finished.
+
+WORKER_ERROR_MESSAGE = 'Sandbox worker error'
+_FRAME_HEADER = struct.Struct('>I')
+POOL_SUPPORTED = hasattr(os, 'fork') and hasattr(os, 'killpg') and sys.platform != 'win32'
+
+
+class _WorkerTimeout(Exception):
+    pass
+
+
+class _WorkerError(Exception):
+    pass
+
+
+class _SandboxWorker:
+    """One warm zygote process and its protocol pipes."""
+
+    def __init__(self):
+        self.proc = subprocess.Popen(
+            [sys.executable, _WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=tempfile.gettempdir(),
+            start_new_session=True,
+        )
+        self.jobs = 0
+
+    def run_batch(self, code, inputs, per_case_timeout, total_timeout, limits, stop_on_error, results):
+        """
+        Append a CaseResult to results as each case finishes. Raises _WorkerTimeout/_WorkerError;
+        results then holds the cases finished so far.
+        """
+        if self.proc.poll() is not None:
+            raise _WorkerError('worker exited')
+        # The worker enforces timeouts itself; this deadline only guards against a hung worker.
+        deadline = time.monotonic() + total_timeout + 2
+        payload = json.dumps({
+            'code': code,
+            'inputs': [x or '' for x in inputs],
+            'timeout': per_case_timeout,
+            'total_timeout': total_timeout,
+            'memory_mb': limits.get('memory_mb', 0),
+            'output_limit': limits.get('output_limit', 0),
+            'max_open_files': limits.get('max_open_files', 0),
+            'stop_on_error': stop_on_error,
+        }).encode('utf-8')
+        self._write(_FRAME_HEADER.pack(len(payload)) + payload)
+        while True:
+            header = self._read_exact(_FRAME_HEADER.size, deadline)
+            frame = json.loads(self._read_exact(_FRAME_HEADER.unpack(header)[0], deadline).decode('utf-8'))
+            if frame.get('done'):
+                break
+            r = frame['case']
+            results.append(CaseResult(
+                r.get('stdout') or '', r.get('stderr') or '', int(r.get('returncode', -1)),
+                int(r.get('elapsed_ms') or 0), int(r.get('peak_kb') or 0), int(r.get('cpu_ms') or 0),
+            ))
+        self.jobs += 1
+
+    def _write(self, data):
+        fd = self.proc.stdin.fileno()
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+
+    def _read_exact(self, n, deadline):
+        fd = self.proc.stdout.fileno()
+        buf = bytearray()
+        while len(buf) < n:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise _WorkerTimeout()
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                raise _WorkerTimeout()
+            chunk = os.read(fd, n - len(buf))
+            if not chunk:
+                raise _WorkerError('worker closed pipe')
+            buf.extend(chunk)
+        return bytes(buf)
+
+    def kill(self):
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError, OSError):
+            pass
+        for stream in (self.proc.stdin, self.proc.stdout):
+            try:
+                stream.close()
+            except Exception:
+                pass
+        try:
+            self.proc.wait(timeout=1)
+        except Exception:
+            pass
+
+
+class SandboxWorkerPool:
+    """
+    Fixed-size pool of warm workers, shared by all threads of one Django process.
+    run() returns None when no worker could be used; callers then fall back to the cold path.
+    """
+
+    def __init__(self, size, max_jobs=200, acquire_timeout=10):
+        self.size = max(1, int(size))
+        self.max_jobs = max(1, int(max_jobs))
+        self.acquire_timeout = acquire_timeout
+        self.pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._total = 0
+        self._closed = False
+        for _ in range(self.size):
+            self._spawn_idle()
+
+    def _spawn_idle(self):
+        with self._lock:
+            if self._closed or self._total >= self.size:
+                return
+            self._total += 1
+        try:
+            self._idle.put(_SandboxWorker())
+        except Exception:
+            with self._lock:
+                self._total -= 1
+
+    def _retire(self, worker):
+        worker.kill()
+        with self._lock:
+            self._total -= 1
+        self._spawn_idle()
+
+    def run_batch(self, code, inputs, per_case_timeout, total_timeout=None, limits=None, stop_on_error=False):
+        """
+        List of CaseResult per input, or None if no worker was usable.
+        limits: dict like sandbox_limits() (memory_mb, output_limit, max_open_files); None = no limits.
+        If the worker hangs or dies mid-job, the finished cases are kept and only the unfinished
+        ones report Timeout (hung) or WORKER_ERROR_MESSAGE (died).
+        """
+        if total_timeout is None:
+            total_timeout = per_case_timeout * max(1, len(inputs))
+        try:
+            worker = self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            return None
+        results = []
+        start = time.perf_counter()
+        try:
+            worker.run_batch(code, inputs, per_case_timeout, total_timeout, limits or {}, stop_on_error, results)
+        except _WorkerTimeout:
+            self._retire(worker)
+            elapsed_ms = int((time.perf_counter() - start) * 1000) - sum(r.elapsed_ms for r in results)
+            return _complete_results(results, len(inputs), stop_on_error, 'Timeout', elapsed_ms=max(0, elapsed_ms))
+        except (_WorkerError, OSError, ValueError, KeyError):
+            self._retire(worker)
+            if not results:
+                return None
+            return _complete_results(results, len(inputs), stop_on_error, WORKER_ERROR_MESSAGE)
+        timed_out = any(r.returncode == -1 and r.stderr == 'Timeout' for r in results)
+        if timed_out or worker.jobs >= self.max_jobs or self._closed:
+            self._retire(worker)
+        else:
+            self._idle.put(worker)
+        return results
+
+    def run(self, code, stdin_input, timeout_seconds, limits=None):
+        """Single input; (stdout, stderr, return_code) or None if no worker was usable."""
+        results = self.run_batch(code, [stdin_input], timeout_seconds, limits=limits)
+        if not results:
+            return None
+        return tuple(results[0][:3])
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.kill()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """Process-wide pool, created on first use. None when disabled (size 0) or unsupported."""
+    global _pool
+    size = int(_sandbox_setting('CODING_SANDBOX_POOL_SIZE', 0) or 0)
+    if size <= 0 or not POOL_SUPPORTED:
+        return None
+    with _pool_lock:
+        if _pool is not None and _pool.pid != os.getpid():
+            # Forked server process: the inherited pipes belong to the parent.
+            _pool = None
+        if _pool is None:
+            _pool = SandboxWorkerPool(
+                size,
+                max_jobs=_sandbox_setting('CODING_SANDBOX_MAX_JOBS', 200),
+            )
+        return _pool
+
+
+def shutdown_worker_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.close()
+        _pool = None
+
+
+atexit.register(shutdown_worker_pool)
+
+
+def run_python_code(code: str, stdin_input: str, timeout_seconds: int = 5):
+    """
+    Run Python code with stdin_input as stdin.
+    Returns (stdout, stderr, return_code).
+    Uses the warm worker pool when enabled, otherwise a fresh interpreter.
+    Does NOT validate code - caller must call validate_code_safe first.
+    """
+    pool = get_worker_pool()
+    if pool is not None:
+        result = pool.run(
+            code,
+            stdin_input,
+            timeout_seconds,
+            limits=sandbox_limits(),
+        )
+        if result is not None:
+            return result
+    return _run_python_code_cold(code, stdin_input, timeout_seconds)
+
+
+# ---- Language runners ----
+# A LanguageRunner turns code into a program once (build) and runs it as a fresh sandboxed process per
+# case. Builds live in private temp directories of the process-wide ArtifactCache, keyed by
+# (language, toolchain version, code hash), so a submit compiles once no matter how many cases or
+# parallel threads run it. Python keeps its own path (warm pool, cold interpreter fallback).
+
+
+class CompileError(Exception):
+    """Code that does not build; str() is the compiler output shown to the student."""
+
+
+class UnsupportedLanguage(ValueError):
+    """Language not registered, or its toolchain is not installed on this host."""
+
+
+Artifact = namedtuple('Artifact', 'program workdir')
+# Compilers get their own limits: no address-space cap (cc1plus maps a lot), compiler output capped.
+COMPILE_LIMITS = {'memory_mb': 0, 'output_limit': 64 * 1024, 'max_open_files': 0}
+COMPILE_MESSAGE_LIMIT = 4000
+
+
+def _minimal_env():
+    return {'PATH': os.environ.get('PATH', '/usr/local/bin:/usr/bin:/bin'), 'LANG': 'C.UTF-8'}
+
+
+def _tool_version(executable):
+    """First line of `<executable> --version`, '' when it cannot be run."""
+    try:
+        out = subprocess.run(
+            [executable, '--version'], capture_output=True, text=True, timeout=10, env=_minimal_env(),
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return ''
+    return next((line.strip() for line in out.splitlines() if line.strip()), '')
+
+
+class LanguageRunner:
+    """
+    One execution backend. Subclasses set name/label/tool and implement build() and command();
+    validator_policy()/find_violation() feed validate_code_safe.
+    """
+    name = ''
+    label = ''
+    tool = None  # executable looked up on PATH; its --version identifies the toolchain
+    seccomp = False  # run built programs under the launcher's syscall allowlist
+
+    def __init__(self):
+        self._version = None
+        self.executable = None
+
+    def version(self):
+        """Toolchain identity used in cache keys; '' when the toolchain is missing."""
+        if self._version is None:
+            self.executable = shutil.which(self.tool) if self.tool else None
+            self._version = _tool_version(self.executable) if self.executable else ''
+        return self._version
+
+    def available(self):
+        return bool(self.version())
+
+    def validator_policy(self):
+        return None
+
+    def find_violation(self, code, policy):
+        """(what, lineno) of the first policy violation, or None."""
+        return None
+
+    def build(self, code, workdir):
+        """Write (and compile) code inside workdir; returns the program path. Raises CompileError."""
+        raise NotImplementedError
+
+    def command(self, program, limits):
+        """argv that runs a built program under limits."""
+        return [program]
+
+    def case_limits(self, limits):
+        """Limits applied to each case process (a runtime may need address-space headroom)."""
+        return limits
+
+    def run_batch(self, code, inputs, per_case_timeout, total_timeout, stop_on_error):
+        try:
+            artifact = get_artifact_cache().get(self, code)
+        except CompileError as e:
+            # Nothing ran: every case reports the compiler output.
+            return _complete_results([], len(inputs), stop_on_error, str(e), returncode=1)
+        limits = self.case_limits(sandbox_limits())
+        argv = self.command(artifact.program, limits)
+        env = _minimal_env()
+        return _run_sequential(
+            lambda stdin_input, timeout: _run_process(
+                argv, artifact.workdir, stdin_input, timeout, limits, env, seccomp=self.seccomp,
+            ),
+            inputs, per_case_timeout, total_timeout, stop_on_error,
+        )
+
+
+def _compile(argv, workdir):
+    """Run a compiler in workdir; raises CompileError with its (path-free) output on failure."""
+    timeout = float(_sandbox_setting('CODING_COMPILE_TIMEOUT_SECONDS', 10) or 10)
+    result = _run_process(argv, workdir, '', timeout, COMPILE_LIMITS, _minimal_env())
+    if result.returncode == 0:
+        return
+    if result.returncode == -1 and result.stderr == 'Timeout':
+        raise CompileError('Compilation timed out')
+    output = (result.stderr or result.stdout).replace(workdir + os.sep, '')
+    raise CompileError(f'Compilation error:\n{output[:COMPILE_MESSAGE_LIMIT]}')
+
+
+class PythonRunner(LanguageRunner):
+    name = 'python'
+    label = 'Python 3'
+
+    def version(self):
+        return f'python-{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}'
+
+    def validator_policy(self):
+        return _validator_policy()
+
+    def find_violation(self, code, policy):
+        return _find_python_violation(code, policy)
+
+    def run_batch(self, code, inputs, per_case_timeout, total_timeout, stop_on_error):
+        limits = sandbox_limits()
+        pool = get_worker_pool()
+        if pool is not None:
+            results = pool.run_batch(
+                code,
+                inputs,
+                per_case_timeout,
+                total_timeout,
+                limits=limits,
+                stop_on_error=stop_on_error,
+            )
+            if results is not None:
+                return results
+        return _run_sequential(
+            lambda stdin_input, timeout: _run_cold_case(code, stdin_input, timeout, limits),
+            inputs, per_case_timeout, total_timeout, stop_on_error,
+        )
+
+
+class GccRunner(LanguageRunner):
+    """
+    C/C++ through gcc/g++: one optimized static build per code, the binary runs per case under the
+    seccomp allowlist (a static binary needs no open() to start). Unavailable without seccomp support.
+    """
+    std = ''
+    source_name = ''
+    seccomp = True
+
+    def available(self):
+        return super().available() and seccomp_available()
+
+    def find_violation(self, code, policy):
+        return _find_c_violation(code, policy)
+
+    def build(self, code, workdir):
+        source = os.path.join(workdir, self.source_name)
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write(code)
+        program = os.path.join(workdir, 'main')
+        _compile([self.executable, f'-std={self.std}', '-O2', '-pipe', '-static', '-o', program, self.source_name, '-lm'],
+                 workdir)
+        return program
+
+
+class CRunner(GccRunner):
+    name = 'c'
+    label = 'C (gcc)'
+    tool = 'gcc'
+    std = 'gnu11'
+    source_name = 'main.c'
+
+
+class CppRunner(GccRunner):
+    name = 'cpp'
+    label = 'C++ (g++)'
+    tool = 'g++'
+    std = 'gnu++17'
+    source_name = 'main.cpp'
+
+
+class JavaScriptRunner(LanguageRunner):
+    """
+    Node.js with the permission model: the script may read only itself (stdin via fs.readFileSync(0)
+    still works); file writes, child processes and workers are denied. Requires Node 20+.
+    """
+    name = 'javascript'
+    label = 'JavaScript (Node.js)'
+    tool = 'node'
+    # V8 reserves far more address space than it uses: RLIMIT_AS gets this headroom, and the JS heap is
+    # capped at CODING_SANDBOX_MEMORY_MB through --max-old-space-size instead.
+    ADDRESS_SPACE_OVERHEAD_MB = 1024
+
+    def version(self):
+        version = super().version()
+        match = re.match(r'v(\d+)\.', version)
+        return version if match and int(match.group(1)) >= 20 else ''
+
+    def find_violation(self, code, policy):
+        return _find_js_violation(code, policy)
+
+    def build(self, code, workdir):
+        program = os.path.join(workdir, 'main.js')
+        with open(program, 'w', encoding='utf-8') as f:
+            f.write(code)
+        return program
+
+    def command(self, program, limits):
+        major = int(re.match(r'v(\d+)', self.version()).group(1))
+        argv = [
+            self.executable, '--no-warnings',
+            '--permission' if major >= 23 else '--experimental-permission',
+            f'--allow-fs-read={program}',
+        ]
+        if limits['memory_mb'] > self.ADDRESS_SPACE_OVERHEAD_MB:
+            argv.append(f'--max-old-space-size={limits["memory_mb"] - self.ADDRESS_SPACE_OVERHEAD_MB}')
+        return argv + [program]
+
+    def case_limits(self, limits):
+        if limits['memory_mb'] > 0:
+            return {**limits, 'memory_mb': limits['memory_mb'] + self.ADDRESS_SPACE_OVERHEAD_MB}
+        return limits
+
+
+class ArtifactCache:
+    """
+    Built programs per (language, toolchain version, code hash): an LRU of CODING_ARTIFACT_CACHE_SIZE
+    build directories under one private temp root. Concurrent requests for the same code wait for a
+    single build; compile errors are cached like programs.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self.pid = os.getpid()
+        self.root = tempfile.mkdtemp(prefix='coding-artifacts-')
+        self._data = OrderedDict()  # key -> Artifact | CompileError
+        self._building = {}  # key -> threading.Event set when the build finished
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+
+    @staticmethod
+    def key(runner, code):
+        h = hashlib.sha256(f'{runner.name}|{runner.version()}|'.encode('utf-8'))
+        h.update(code.encode('utf-8', errors='surrogatepass'))
+        return h.hexdigest()
+
+    def get(self, runner, code):
+        """Artifact of code, building it on first use. Raises CompileError."""
+        key = self.key(runner, code)
+        while True:
+            with self._lock:
+                entry = self._data.get(key)
+                if entry is not None:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    break
+                event = self._building.get(key)
+                owner = event is None
+                if owner:
+                    event = self._building[key] = threading.Event()
+            if not owner:
+                event.wait()
+                continue
+            try:
+                entry = self._build(runner, code)
+            except BaseException:
+                with self._lock:
+                    del self._building[key]
+                event.set()
+                raise
+            with self._lock:
+                self.builds += 1
+                self._data[key] = entry
+                del self._building[key]
+                evicted = []
+                while len(self._data) > self.capacity:
+                    evicted.append(self._data.popitem(last=False)[1])
+            event.set()
+            for old in evicted:
+                if isinstance(old, Artifact):
+                    shutil.rmtree(old.workdir, ignore_errors=True)
+            break
+        if isinstance(entry, CompileError):
+            raise CompileError(*entry.args)
+        return entry
+
+    def _build(self, runner, code):
+        workdir = tempfile.mkdtemp(prefix=f'{runner.name}-', dir=self.root)
+        try:
+            return Artifact(runner.build(code, workdir), workdir)
+        except CompileError as e:
+            shutil.rmtree(workdir, ignore_errors=True)
+            return e
+        except BaseException:
+            shutil.rmtree(workdir, ignore_errors=True)
+            raise
+
+    def close(self):
+        with self._lock:
+            self._data.clear()
+        if self.pid == os.getpid():
+            shutil.rmtree(self.root, ignore_errors=True)
+
+
+_artifact_cache = None
+_artifact_cache_lock = threading.Lock()
+
+
+def get_artifact_cache():
+    """Process-wide artifact cache (CODING_ARTIFACT_CACHE_SIZE entries, default 64)."""
+    global _artifact_cache
+    capacity = max(1, int(_sandbox_setting('CODING_ARTIFACT_CACHE_SIZE', 64) or 1))
+    with _artifact_cache_lock:
+        if _artifact_cache is not None and _artifact_cache.pid != os.getpid():
+            # Forked server process: the parent owns (and removes) the inherited build directories.
+            _artifact_cache = None
+        if _artifact_cache is None or _artifact_cache.capacity != capacity:
+            if _artifact_cache is not None:
+                _artifact_cache.close()
+            _artifact_cache = ArtifactCache(capacity)
+        return _artifact_cache
+
+
+def shutdown_artifact_cache():
+    global _artifact_cache
+    with _artifact_cache_lock:
+        if _artifact_cache is not None:
+            _artifact_cache.close()
+        _artifact_cache = None
+
+
+atexit.register(shutdown_artifact_cache)
+
+_RUNNERS = OrderedDict()
+
+
+def register_runner(runner):
+    """Add (or replace) the backend for runner.name."""
+    _RUNNERS[runner.name] = runner
+    return runner
+
+
+for _runner in (PythonRunner(), CRunner(), CppRunner(), JavaScriptRunner()):
+    register_runner(_runner)
+
+
+def get_runner(language):
+    """Registered runner whose toolchain is installed; raises UnsupportedLanguage otherwise."""
+    name = language or 'python'
+    runner = _RUNNERS.get(name)
+    if runner is None or not runner.available():
+        raise UnsupportedLanguage(name)
+    return runner
+
+
+def enabled_languages():
+    """Languages students can use: CODING_LANGUAGES (default python) that are registered and installed."""
+    names = _sandbox_setting('CODING_LANGUAGES', None) or ['python']
+    return [name for name in names if name in _RUNNERS and _RUNNERS[name].available()]
+
+
+def language_choices():
+    """[{id, label}] of enabled_languages(), for task pages."""
+    return [{'id': name, 'label': _RUNNERS[name].label} for name in enabled_languages()]
+
+
+def run_code_batch(code: str, inputs, per_case_timeout: int = 5, total_timeout=None, stop_on_error: bool = False,
+                   language: str = 'python'):
+    """
+    Run the same code against every stdin in inputs, in order.
+    Returns [CaseResult(stdout, stderr, return_code, execution_time_ms, peak_kb, cpu_ms)] - the first four
+    fields match run_python_code_timed.
+    Python pool mode compiles once and runs all cases in one worker (fresh fork per case); other languages
+    build once (ArtifactCache) and run one process per case. A compile error is reported as a case with
+    return code 1 and the compiler output as stderr.
+    stop_on_error: stop after the first case with non-zero return code (timeout included),
+    so the result list can be shorter than inputs. Cases past total_timeout report Timeout.
+    Raises UnsupportedLanguage. Does NOT validate code - caller must call validate_code_safe first.
+    """
+    inputs = list(inputs)
+    if not inputs:
+        return []
+    if total_timeout is None:
+        total_timeout = per_case_timeout * len(inputs)
+    return get_runner(language).run_batch(code, inputs, per_case_timeout, total_timeout, stop_on_error)
+
+
+def run_python_code_batch(code: str, inputs, per_case_timeout: int = 5, total_timeout=None, stop_on_error: bool = False):
+    """run_code_batch for Python."""
+    return run_code_batch(code, inputs, per_case_timeout, total_timeout, stop_on_error)
+
+
+# ---- Parallel case execution (opt-in: CODING_PARALLEL_CASES) ----
+# Cases are spread over a process-wide thread pool (CODING_PARALLEL_POOL_SIZE, default CPU count);
+# each request keeps at most CODING_PARALLEL_MAX_PER_REQUEST cases in flight. Threads only wait on
+# sandbox pipes/subprocesses, the actual work runs in the sandbox processes.
+
+_case_executor = None
+_case_executor_pid = None
+_case_executor_lock = threading.Lock()
+
+
+def _get_case_executor():
+    global _case_executor, _case_executor_pid
+    with _case_executor_lock:
+        if _case_executor is None or _case_executor_pid != os.getpid():
+            size = int(_sandbox_setting('CODING_PARALLEL_POOL_SIZE', 0) or 0) or (os.cpu_count() or 1)
+            _case_executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='coding-case')
+            _case_executor_pid = os.getpid()
+        return _case_executor
+
+
+def run_code_parallel(code: str, inputs, per_case_timeout: int = 5, stop_on_error: bool = False, max_concurrency=None,
+                      language: str = 'python'):
+    """
+    Same contract and result as run_code_batch, but cases run concurrently (compiled code is still built
+    once: the threads share the ArtifactCache entry).
+    With stop_on_error, cases after the first failing one are not started (running ones are
+    discarded), and the result is cut right after the failing case - identical to sequential.
+    """
+    inputs = list(inputs)
+    if not inputs:
+        return []
+    cap = max_concurrency or int(_sandbox_setting('CODING_PARALLEL_MAX_PER_REQUEST', 4) or 1)
+    cap = max(1, min(cap, len(inputs)))
+    if cap == 1:
+        return run_code_batch(code, inputs, per_case_timeout, stop_on_error=stop_on_error, language=language)
+    executor = _get_case_executor()
+    results = [None] * len(inputs)
+    first_failed = len(inputs)
+    pending = {}
+    next_idx = 0
+    while True:
+        while len(pending) < cap and next_idx < min(len(inputs), first_failed):
+            fut = executor.submit(run_code_batch, code, [inputs[next_idx]], per_case_timeout, language=language)
+            pending[fut] = next_idx
+            next_idx += 1
+        if not pending:
+            break
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            idx = pending.pop(fut)
+            batch = fut.result()
+            results[idx] = batch[0] if batch else CaseResult('', 'Timeout', -1, 0)
+            if stop_on_error and results[idx][2] != 0:
+                first_failed = min(first_failed, idx)
+        if stop_on_error:
+            # Later cases cannot change the outcome; stop waiting for them.
+            for fut, idx in list(pending.items()):
+                if idx > first_failed:
+                    fut.cancel()
+                    del pending[fut]
+    if first_failed < len(inputs):
+        return results[:first_failed + 1]
+    return results
+
+
+def run_python_code_parallel(code: str, inputs, per_case_timeout: int = 5, stop_on_error: bool = False, max_concurrency=None):
+    """run_code_parallel for Python."""
+    return run_code_parallel(code, inputs, per_case_timeout, stop_on_error, max_concurrency)
+
+
+def run_code_cases(code: str, inputs, per_case_timeout: int = 5, stop_on_error: bool = False, language: str = 'python'):
+    """Entry point for the run/submit views: parallel when CODING_PARALLEL_CASES is on, else one batch."""
+    if _sandbox_setting('CODING_PARALLEL_CASES', False):
+        return run_code_parallel(code, inputs, per_case_timeout, stop_on_error=stop_on_error, language=language)
+    return run_code_batch(code, inputs, per_case_timeout, stop_on_error=stop_on_error, language=language)
+
+
+def run_python_code_cases(code: str, inputs, per_case_timeout: int = 5, stop_on_error: bool = False):
+    """run_code_cases for Python."""
+    return run_code_cases(code, inputs, per_case_timeout, stop_on_error)
+
+
 def normalize_output(s: str) -> str:
-    """Normalize for comparison: strip, collapse newlines."""
+    """Normalize for display: strip, collapse newlines. Comparison streams instead (coding.output_compare)."""
     if s is None:
         return ''
     return s.strip().replace('\r\n', '\n').replace('\r', '\n')
 
 
-def check_output_match(got: str, expected: str) -> bool:
-    """Compare normalized stdout to expected."""
-    return normalize_output(got) == normalize_output(expected)
+def check_output_match(got: str, expected: str, mode: str = 'exact', float_tolerance=None) -> bool:
+    """Compare stdout to expected line by line (see coding.output_compare for modes)."""
+    from coding.output_compare import compare_output
+    return compare_output(got, expected, mode, float_tolerance).passed
 
 
 def run_python_code_timed(code: str, stdin_input: str, timeout_seconds: int = 5):
@@ -100,3 +1288,8 @@ def run_python_code_timed(code: str, stdin_input: str, timeout_seconds: int = 5)
     stdout, stderr, return_code = run_python_code(code, stdin_input, timeout_seconds)
     elapsed_ms = int((time.perf_counter() - start) * 1000)
     return (stdout, stderr, return_code, elapsed_ms)
+
+
+def run_python_code_timed_cold(code: str, stdin_input: str, timeout_seconds: int = 5):
+    """Like run_python_code_timed but always a fresh interpreter (benchmarks). Returns CaseResult."""
+    return _run_cold_case(code, stdin_input, timeout_seconds)
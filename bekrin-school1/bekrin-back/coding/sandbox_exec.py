@@ -0,0 +1,121 @@
+"""
+Sandbox launcher for coding.run_code (cold path, compilers, compiled programs).
+Started as a standalone script, never imported by Django:
+  sandbox_exec.py [--seccomp] <timeout> <memory_mb> <max_open_files> -- program [args...]
+  sandbox_exec.py --seccomp-check   (exit 0 when the seccomp filter can be installed here)
+Sets RLIMIT_CPU/AS/NOFILE on itself and execs the program, so the limits are applied in the child
+and the server never runs Python between fork and exec (subprocess preexec_fn is not safe in a
+multithreaded process). Imports are kept to a minimum: this runs once per cold case.
+Exit code 127 with a message on stderr when the program cannot be started.
+
+--seccomp (native compiled programs): before exec, installs a libseccomp allowlist filter that
+survives exec and applies to anything the program execs in turn. Only what a static binary needs
+to compute and use its inherited stdin/stdout/stderr is allowed (memory, time, signals to itself
+via rt_sig*, exit). Every other syscall - open/openat/creat, unlink/rename, fork/clone, kill,
+socket, ptrace, execveat, ... - fails with EPERM, whatever name the program declares for it.
+execve stays allowed (the launch itself needs it), but anything exec'd runs under the same filter
+and a dynamically linked program cannot even load its libraries. The filter fails closed: if
+libseccomp cannot be loaded, the program is not started.
+"""
+import os
+import signal
+import sys
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - only started where resource exists
+    resource = None
+
+
+def apply_limits(timeout, memory_mb=0, max_open_files=0, output_limit=0):
+    """rlimits for one case; shared with sandbox_worker.py (output_limit: RLIMIT_FSIZE in bytes, 0 = off)."""
+    if resource is None:
+        return
+    cpu = int(timeout or 5)
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu + 1, cpu + 2))
+    if memory_mb > 0:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if max_open_files > 0:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (max_open_files, max_open_files))
+    if output_limit > 0:
+        # CPython ignores SIGXFSZ; restore the default so exceeding the cap terminates the process.
+        signal.signal(signal.SIGXFSZ, signal.SIG_DFL)
+        resource.setrlimit(resource.RLIMIT_FSIZE, (output_limit, output_limit))
+
+
+# Allowed syscall names; names unknown on this architecture are skipped by libseccomp's resolver.
+SECCOMP_ALLOWED_SYSCALLS = (
+    'read', 'write', 'readv', 'writev', 'pread64', 'lseek', 'close', 'fstat', 'newfstatat', 'statx',
+    'ioctl', 'fcntl', 'brk', 'mmap', 'munmap', 'mremap', 'mprotect', 'madvise', 'futex', 'getrandom',
+    'rt_sigaction', 'rt_sigprocmask', 'rt_sigreturn', 'sigaltstack', 'clock_gettime', 'clock_getres',
+    'clock_nanosleep', 'nanosleep', 'gettimeofday', 'time', 'times', 'getrusage', 'getpid', 'gettid',
+    'getuid', 'geteuid', 'getgid', 'getegid', 'uname', 'arch_prctl', 'set_tid_address', 'set_robust_list',
+    'rseq', 'prlimit64', 'getrlimit', 'sched_getaffinity', 'sched_yield', 'exit', 'exit_group', 'execve',
+)
+_SCMP_ACT_ALLOW = 0x7FFF0000
+_SCMP_ACT_ERRNO = 0x00050000
+
+
+def install_seccomp():
+    """Load the allowlist filter into this process (inherited across exec). Raises OSError."""
+    import ctypes
+    import errno
+
+    try:
+        lib = ctypes.CDLL('libseccomp.so.2')
+    except OSError:
+        import ctypes.util
+        name = ctypes.util.find_library('seccomp')
+        if not name:
+            raise OSError('libseccomp not found')
+        lib = ctypes.CDLL(name)
+    lib.seccomp_init.restype = ctypes.c_void_p
+    lib.seccomp_init.argtypes = [ctypes.c_uint32]
+    lib.seccomp_syscall_resolve_name.restype = ctypes.c_int
+    lib.seccomp_syscall_resolve_name.argtypes = [ctypes.c_char_p]
+    lib.seccomp_rule_add.restype = ctypes.c_int
+    lib.seccomp_rule_add.argtypes = [ctypes.c_void_p, ctypes.c_uint32, ctypes.c_int, ctypes.c_uint]
+    lib.seccomp_load.restype = ctypes.c_int
+    lib.seccomp_load.argtypes = [ctypes.c_void_p]
+    lib.seccomp_release.argtypes = [ctypes.c_void_p]
+    ctx = lib.seccomp_init(_SCMP_ACT_ERRNO | errno.EPERM)
+    if not ctx:
+        raise OSError('seccomp_init failed')
+    try:
+        for name in SECCOMP_ALLOWED_SYSCALLS:
+            nr = lib.seccomp_syscall_resolve_name(name.encode('ascii'))
+            if nr < 0:
+                continue
+            rc = lib.seccomp_rule_add(ctx, _SCMP_ACT_ALLOW, nr, 0)
+            if rc < 0:
+                raise OSError(-rc, f'seccomp_rule_add({name}) failed')
+        rc = lib.seccomp_load(ctx)
+        if rc < 0:
+            raise OSError(-rc, 'seccomp_load failed')
+    finally:
+        lib.seccomp_release(ctx)
+
+
+def main(args):
+    try:
+        if args == ['--seccomp-check']:
+            install_seccomp()
+            os._exit(0)
+        seccomp = args[:1] == ['--seccomp']
+        if seccomp:
+            args = args[1:]
+        sep = args.index('--')
+        timeout, memory_mb, max_open_files = args[:sep]
+        program = args[sep + 1:]
+        apply_limits(float(timeout), int(memory_mb), int(max_open_files))
+        if seccomp:
+            install_seccomp()
+        os.execvp(program[0], program)
+    except (OSError, ValueError, IndexError) as e:
+        os.write(2, f'sandbox launcher: {e}'.encode('utf-8', errors='replace'))
+    os._exit(127)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
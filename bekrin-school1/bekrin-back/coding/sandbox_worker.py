@@ -0,0 +1,255 @@
+"""
+Warm sandbox worker for coding.run_code (pooled mode).
+Started as a standalone script by run_code._SandboxWorker, never imported by Django.
+Protocol: length-prefixed JSON frames on stdin/stdout.
+  job:    {"code": str, "inputs": [str], "timeout": int, "total_timeout": float,
+           "memory_mb": int, "output_limit": int, "max_open_files": int, "stop_on_error": bool}
+  then one frame per finished case, in order, and an end frame:
+  case:   {"case": {"stdout": str, "stderr": str, "returncode": int, "elapsed_ms": int,
+                    "peak_kb": int, "cpu_ms": int}}
+  end:    {"done": true}
+Cases are streamed so the parent keeps the finished ones if the worker hangs or dies mid-job.
+The code is compiled once per job; every input runs in a fresh fork of this (already warm)
+interpreter, so state never leaks between cases and no interpreter startup is paid per case.
+Per-case and total timeouts are enforced here; a timed-out case reports ('', 'Timeout', -1).
+Each case child runs under RLIMIT_CPU/AS/NOFILE and RLIMIT_FSIZE = output_limit bytes: stdout and
+stderr go to temp files, so writing past the cap kills the child with SIGXFSZ and the case reports
+('<first output_limit bytes>', 'Output limit exceeded', -1). peak_kb is the child's max RSS and
+cpu_ms its user+sys CPU time; the child starts from the warm zygote, so neither includes startup.
+"""
+import builtins
+import json
+import linecache
+import os
+import select
+import signal
+import struct
+import sys
+import tempfile
+import time
+import traceback
+
+# Warm-up imports: modules students commonly use stay loaded in the zygote.
+import bisect  # noqa: F401
+import collections  # noqa: F401
+import decimal  # noqa: F401
+import fractions  # noqa: F401
+import functools  # noqa: F401
+import heapq  # noqa: F401
+import itertools  # noqa: F401
+import math  # noqa: F401
+import random  # noqa: F401
+import re  # noqa: F401
+import statistics  # noqa: F401
+import string  # noqa: F401
+
+# Script directory (still on sys.path here; main() removes it before running student code).
+from sandbox_exec import apply_limits
+
+_HEADER = struct.Struct('>I')
+OUTPUT_LIMIT_MESSAGE = 'Output limit exceeded'
+
+
+def _read_exact(fd, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = os.read(fd, n - len(buf))
+        if not chunk:
+            return None
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _write_frame(fd, obj):
+    data = json.dumps(obj).encode('utf-8')
+    view = memoryview(_HEADER.pack(len(data)) + data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _apply_limits(job):
+    apply_limits(
+        job.get('timeout'), int(job.get('memory_mb') or 0), int(job.get('max_open_files') or 0),
+        int(job.get('output_limit') or 0),
+    )
+
+
+def _exit_code(exc):
+    """Mirror interpreter behaviour for SystemExit."""
+    code = exc.code
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code & 0xFF
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _compile(source):
+    """Compile once per job. Returns (code_object, None) or (None, SyntaxError)."""
+    # Let tracebacks show source lines like a file-based run would.
+    linecache.cache['main.py'] = (len(source), None, source.splitlines(True), 'main.py')
+    try:
+        return compile(source, 'main.py', 'exec'), None
+    except (SyntaxError, ValueError) as e:
+        return None, e
+
+
+def _child(compiled, compile_error, stdin_text, job, out_fd, err_fd):
+    """Runs inside the forked child; never returns."""
+    code = 1
+    try:
+        stdin_file = tempfile.TemporaryFile()
+        stdin_file.write((stdin_text or '').encode('utf-8'))
+        stdin_file.seek(0)
+        os.dup2(stdin_file.fileno(), 0)
+        os.dup2(out_fd, 1)
+        os.dup2(err_fd, 2)
+        sys.stdin = open(0, 'r', encoding='utf-8', errors='replace', closefd=False)
+        sys.stdout = open(1, 'w', encoding='utf-8', errors='replace', closefd=False)
+        sys.stderr = open(2, 'w', encoding='utf-8', errors='replace', closefd=False)
+        _apply_limits(job)
+        code = 0
+        try:
+            if compile_error is not None:
+                raise compile_error
+            exec(compiled, {'__name__': '__main__', '__builtins__': builtins})
+        except SystemExit as e:
+            code = _exit_code(e)
+        except BaseException:
+            etype, value, tb = sys.exc_info()
+            if etype is not None and issubclass(etype, SyntaxError):
+                tb = None
+            traceback.print_exception(etype, value, tb.tb_next if tb else None)
+            code = 1
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+    finally:
+        os._exit(code)
+
+
+def _peak_kb(rusage):
+    # ru_maxrss is KB on Linux, bytes on macOS.
+    return rusage.ru_maxrss // 1024 if sys.platform == 'darwin' else rusage.ru_maxrss
+
+
+def _cpu_ms(rusage):
+    return int((rusage.ru_utime + rusage.ru_stime) * 1000)
+
+
+def _wait_child(pid, timeout):
+    """
+    Wait for pid up to timeout seconds. Returns (exit code, peak_kb, cpu_ms);
+    exit code is None after killing on timeout.
+    """
+    deadline = time.monotonic() + max(0.0, timeout)
+    pidfd = None
+    if hasattr(os, 'pidfd_open'):
+        try:
+            pidfd = os.pidfd_open(pid)
+        except OSError:
+            pidfd = None
+    try:
+        while True:
+            done, wait_status, rusage = os.wait4(pid, os.WNOHANG)
+            if done:
+                return os.waitstatus_to_exitcode(wait_status), _peak_kb(rusage), _cpu_ms(rusage)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                os.kill(pid, signal.SIGKILL)
+                _, _, rusage = os.wait4(pid, 0)
+                return None, _peak_kb(rusage), _cpu_ms(rusage)
+            if pidfd is not None:
+                select.select([pidfd], [], [], remaining)
+            else:
+                time.sleep(min(remaining, 0.005))
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+
+def _run_case(compiled, compile_error, stdin_text, job, timeout, protocol_fds):
+    out = tempfile.TemporaryFile()
+    err = tempfile.TemporaryFile()
+    try:
+        start = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            for fd in protocol_fds:
+                os.close(fd)
+            _child(compiled, compile_error, stdin_text, job, out.fileno(), err.fileno())
+        returncode, peak_kb, cpu_ms = _wait_child(pid, timeout)
+        elapsed_ms = int((time.perf_counter() - start) * 1000)
+        if returncode is None:
+            return {
+                'stdout': '', 'stderr': 'Timeout', 'returncode': -1,
+                'elapsed_ms': elapsed_ms, 'peak_kb': peak_kb, 'cpu_ms': cpu_ms,
+            }
+        out.seek(0)
+        err.seek(0)
+        stdout = out.read().decode('utf-8', errors='replace')
+        stderr = err.read().decode('utf-8', errors='replace')
+        if returncode == -signal.SIGXFSZ:
+            stderr, returncode = OUTPUT_LIMIT_MESSAGE, -1
+        return {
+            'stdout': stdout,
+            'stderr': stderr,
+            'returncode': returncode,
+            'elapsed_ms': elapsed_ms,
+            'peak_kb': peak_kb,
+            'cpu_ms': cpu_ms,
+        }
+    finally:
+        out.close()
+        err.close()
+
+
+def _run_job(job, protocol_fds, emit):
+    """Run every input of job, passing each case result to emit as soon as it finishes."""
+    compiled, compile_error = _compile(job.get('code') or '')
+    per_case = float(job.get('timeout') or 5)
+    total = float(job.get('total_timeout') or per_case * max(1, len(job.get('inputs') or [])))
+    deadline = time.monotonic() + total
+    stop_on_error = bool(job.get('stop_on_error'))
+    for stdin_text in job.get('inputs') or []:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            result = {'stdout': '', 'stderr': 'Timeout', 'returncode': -1, 'elapsed_ms': 0, 'peak_kb': 0, 'cpu_ms': 0}
+        else:
+            result = _run_case(compiled, compile_error, stdin_text, job, min(per_case, remaining), protocol_fds)
+        emit(result)
+        if result['returncode'] != 0 and stop_on_error:
+            break
+
+
+def main():
+    # Script dir must not be importable by student code.
+    if sys.path and os.path.abspath(sys.path[0] or '.') == os.path.dirname(os.path.abspath(__file__)):
+        sys.path.pop(0)
+    # Keep the protocol pipes on private fds; 0/1 become /dev/null so nothing can corrupt frames.
+    proto_in = os.dup(0)
+    proto_out = os.dup(1)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+    while True:
+        header = _read_exact(proto_in, _HEADER.size)
+        if header is None:
+            break
+        body = _read_exact(proto_in, _HEADER.unpack(header)[0])
+        if body is None:
+            break
+        _run_job(
+            json.loads(body.decode('utf-8')), (proto_in, proto_out),
+            lambda result: _write_frame(proto_out, {'case': result}),
+        )
+        _write_frame(proto_out, {'done': True})
+
+
+if __name__ == '__main__':
+    main()
@@ -77,7 +77,10 @@ class CodingTestCaseSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CodingTestCase
-        fields = ['id', 'input_data', 'expected', 'expected_output', 'explanation', 'order_index', 'is_sample', 'created_at']
+        fields = [
+            'id', 'input_data', 'expected', 'expected_output', 'explanation', 'order_index', 'is_sample',
+            'compare_mode', 'float_tolerance', 'created_at',
+        ]
         read_only_fields = ['id', 'created_at']
 
 
@@ -88,9 +91,15 @@ class CodingTestCaseCreateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CodingTestCase
-        fields = ['input_data', 'expected', 'expected_output', 'explanation', 'order_index', 'is_sample']
+        fields = [
+            'input_data', 'expected', 'expected_output', 'explanation', 'order_index', 'is_sample',
+            'compare_mode', 'float_tolerance',
+        ]
 
     def validate(self, attrs):
+        tolerance = attrs.get('float_tolerance')
+        if tolerance is not None and tolerance < 0:
+            raise serializers.ValidationError({'float_tolerance': 'Must be >= 0'})
         expected = attrs.get('expected') or attrs.get('expected_output')
         if expected is None:
             raise serializers.ValidationError('expected or expected_output is required')
@@ -0,0 +1 @@
+# Coding services
@@ -0,0 +1,227 @@
+"""
+Admission control for student coding run/submit (in-process, no Redis).
+Three checks, in order:
+  - per-user in-flight limit (CODING_ADMISSION_USER_INFLIGHT): concurrent run/submit requests of one user
+  - per-user token bucket (CODING_ADMISSION_RATE_PER_MINUTE, burst CODING_ADMISSION_BURST)
+  - global sandbox slots (CODING_ADMISSION_GLOBAL_SLOTS): excess requests wait up to
+    CODING_ADMISSION_QUEUE_TIMEOUT seconds; at most CODING_ADMISSION_QUEUE_SIZE may wait
+A rejected request gets 429 with Retry-After (admission_rejected_response).
+Limits are per server process; with N workers the effective global limit is N x slots.
+Async submits (CODING_SUBMIT_ASYNC) only enqueue, so they pass the token bucket and a per-user
+limit on pending queued rows instead of taking a sandbox slot.
+"""
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from coding.run_code import _sandbox_setting
+
+REASON_USER_INFLIGHT = 'user_inflight'
+REASON_RATE = 'rate_limited'
+REASON_BUSY = 'server_busy'
+
+_MESSAGES = {
+    REASON_USER_INFLIGHT: 'Əvvəlki sorğunuz hələ icra olunur. Bir az gözləyin.',
+    REASON_RATE: 'Çox tez-tez sorğu göndərirsiniz. Bir az sonra yenidən cəhd edin.',
+    REASON_BUSY: 'Server məşğuldur. Bir az sonra yenidən cəhd edin.',
+}
+# Full buckets carry no information; drop them once this many users are tracked.
+_MAX_TRACKED_BUCKETS = 10000
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason, retry_after, queue_depth):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+        self.queue_depth = queue_depth
+
+
+class AdmissionController:
+    """Thread-safe limits for one process. acquire() may block while waiting for a slot."""
+
+    def __init__(self, user_inflight=2, global_slots=8, queue_size=32, queue_timeout=10.0,
+                 rate_per_minute=20, burst=5):
+        self.user_inflight = max(1, int(user_inflight))
+        self.global_slots = max(1, int(global_slots))
+        self.queue_size = max(0, int(queue_size))
+        self.queue_timeout = max(0.0, float(queue_timeout))
+        self.rate_per_second = max(0.0, float(rate_per_minute)) / 60.0
+        self.burst = max(1, int(burst))
+        self._cond = threading.Condition()
+        self._inflight = {}
+        self._buckets = {}
+        self._running = 0
+        self._waiting = 0
+        self.admitted = 0
+        self.rejected = {REASON_USER_INFLIGHT: 0, REASON_RATE: 0, REASON_BUSY: 0}
+
+    def _take_token(self, user_id, now):
+        """Consume one token; returns seconds until one is available (0 = taken)."""
+        if self.rate_per_second <= 0:
+            return 0.0
+        tokens, last = self._buckets.get(user_id, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * self.rate_per_second)
+        if tokens < 1.0:
+            self._buckets[user_id] = (tokens, now)
+            return (1.0 - tokens) / self.rate_per_second
+        self._buckets[user_id] = (tokens - 1.0, now)
+        if len(self._buckets) > _MAX_TRACKED_BUCKETS:
+            full_after = self.burst / self.rate_per_second
+            self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < full_after}
+        return 0.0
+
+    def _refund_token(self, user_id):
+        tokens, last = self._buckets.get(user_id, (float(self.burst), time.monotonic()))
+        self._buckets[user_id] = (min(float(self.burst), tokens + 1.0), last)
+
+    def _reject(self, reason, retry_after):
+        self.rejected[reason] += 1
+        raise AdmissionRejected(reason, retry_after, self._waiting)
+
+    def check_enqueue(self, user_id, pending_count):
+        """Async submit: pending queued rows of the user + token bucket. Raises AdmissionRejected."""
+        with self._cond:
+            if pending_count >= self.user_inflight:
+                self._reject(REASON_USER_INFLIGHT, 1)
+            wait = self._take_token(user_id, time.monotonic())
+            if wait:
+                self._reject(REASON_RATE, wait)
+            self.admitted += 1
+
+    def acquire(self, user_id):
+        """Admit one sandbox request for user_id or raise AdmissionRejected. Pair with release()."""
+        with self._cond:
+            if self._inflight.get(user_id, 0) >= self.user_inflight:
+                self._reject(REASON_USER_INFLIGHT, 1)
+            wait = self._take_token(user_id, time.monotonic())
+            if wait:
+                self._reject(REASON_RATE, wait)
+            if self._running >= self.global_slots:
+                if self._waiting >= self.queue_size:
+                    self._refund_token(user_id)
+                    self._reject(REASON_BUSY, self.queue_timeout or 1)
+                self._waiting += 1
+                self._inflight[user_id] = self._inflight.get(user_id, 0) + 1
+                deadline = time.monotonic() + self.queue_timeout
+                try:
+                    while self._running >= self.global_slots:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._refund_token(user_id)
+                            self._release_user(user_id)
+                            self._reject(REASON_BUSY, self.queue_timeout or 1)
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            else:
+                self._inflight[user_id] = self._inflight.get(user_id, 0) + 1
+            self._running += 1
+            self.admitted += 1
+
+    def _release_user(self, user_id):
+        count = self._inflight.get(user_id, 0) - 1
+        if count > 0:
+            self._inflight[user_id] = count
+        else:
+            self._inflight.pop(user_id, None)
+
+    def release(self, user_id):
+        with self._cond:
+            self._running = max(0, self._running - 1)
+            self._release_user(user_id)
+            self._cond.notify()
+
+    def reset(self):
+        with self._cond:
+            self._buckets.clear()
+            self._inflight.clear()
+            self._running = 0
+            self.admitted = 0
+            self.rejected = dict.fromkeys(self.rejected, 0)
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'enabled': True,
+                'running': self._running,
+                'globalSlots': self.global_slots,
+                'queueDepth': self._waiting,
+                'queueSize': self.queue_size,
+                'admitted': self.admitted,
+                'rejected': dict(self.rejected),
+            }
+
+
+_controller = None
+_controller_config = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller():
+    """Process-wide controller; None when CODING_ADMISSION_ENABLED is off."""
+    global _controller, _controller_config
+    if not _sandbox_setting('CODING_ADMISSION_ENABLED', False):
+        return None
+    config = {
+        'user_inflight': _sandbox_setting('CODING_ADMISSION_USER_INFLIGHT', 2),
+        'global_slots': _sandbox_setting('CODING_ADMISSION_GLOBAL_SLOTS', 8),
+        'queue_size': _sandbox_setting('CODING_ADMISSION_QUEUE_SIZE', 32),
+        'queue_timeout': _sandbox_setting('CODING_ADMISSION_QUEUE_TIMEOUT', 10),
+        'rate_per_minute': _sandbox_setting('CODING_ADMISSION_RATE_PER_MINUTE', 20),
+        'burst': _sandbox_setting('CODING_ADMISSION_BURST', 5),
+    }
+    with _controller_lock:
+        if _controller is None or _controller_config != config:
+            _controller = AdmissionController(**config)
+            _controller_config = config
+        return _controller
+
+
+@contextmanager
+def admit(user_id):
+    """Hold an admission for the duration of the block. Raises AdmissionRejected."""
+    controller = get_admission_controller()
+    if controller is None:
+        yield
+        return
+    controller.acquire(user_id)
+    try:
+        yield
+    finally:
+        controller.release(user_id)
+
+
+def admit_enqueue(user_id, pending_count):
+    """Async submit: token bucket plus a cap on the user's pending queued rows."""
+    controller = get_admission_controller()
+    if controller is not None:
+        controller.check_enqueue(user_id, pending_count)
+
+
+def admission_stats():
+    controller = get_admission_controller()
+    if controller is None:
+        return {'enabled': False, 'running': 0, 'globalSlots': 0, 'queueDepth': 0, 'queueSize': 0,
+                'admitted': 0, 'rejected': {}}
+    return controller.stats()
+
+
+def admission_rejected_response(exc):
+    """429 response for a rejected request, with Retry-After and the current queue depth."""
+    response = Response(
+        {
+            'error': _MESSAGES.get(exc.reason, _MESSAGES[REASON_BUSY]),
+            'details': {'reason': exc.reason},
+            'retryAfter': exc.retry_after,
+            'queueDepth': exc.queue_depth,
+        },
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+    )
+    response['Retry-After'] = str(exc.retry_after)
+    return response
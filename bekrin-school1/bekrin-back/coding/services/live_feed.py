@@ -0,0 +1,225 @@
+"""
+Live submission feed for the teacher coding monitor (Server-Sent Events).
+One process-wide buffer of recent CodingSubmission events, shared by every open stream:
+  - submissions saved in this process are pushed by the post_save signal (after commit)
+  - submissions from other processes (other web workers, the queue worker) are picked up by
+    one `id > last_id` query per CODING_MONITOR_STREAM_POLL_SECONDS for the whole process,
+    no matter how many teachers are connected
+A stream that resumes from an id older than the buffer reads the gap from the database once.
+Events are keyed by submission id (the SSE id / resume cursor). A queued async submit appears
+with status=queued; its final result is in the monitor and the status endpoint.
+Ids are assigned at insert, so a row that commits after a higher id was already read is not
+streamed (rare; the monitor itself stays authoritative).
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+
+from coding.models import CodingSubmission
+from coding.run_code import _sandbox_setting
+
+BUFFER_SIZE = 2000
+_FETCH_LIMIT = 500
+_FIELDS = (
+    'id', 'organization_id', 'student_id', 'student__full_name', 'task_id', 'task__title', 'task__topic_id',
+    'status', 'run_type', 'passed_count', 'total_count', 'runtime_ms', 'created_at',
+)
+
+
+def stream_settings():
+    return {
+        'poll': max(0.05, float(_sandbox_setting('CODING_MONITOR_STREAM_POLL_SECONDS', 1.0))),
+        'heartbeat': max(1.0, float(_sandbox_setting('CODING_MONITOR_STREAM_HEARTBEAT_SECONDS', 15))),
+        'max_seconds': max(0.0, float(_sandbox_setting('CODING_MONITOR_STREAM_MAX_SECONDS', 300))),
+    }
+
+
+def _event(row):
+    created_at = row['created_at']
+    return {
+        'id': row['id'],
+        'organizationId': row['organization_id'],
+        'studentId': row['student_id'],
+        'studentName': row['student__full_name'] or '',
+        'taskId': row['task_id'],
+        'taskTitle': row['task__title'] or '',
+        'topicId': row['task__topic_id'],
+        'status': row['status'],
+        'runType': row['run_type'],
+        'passedCount': row['passed_count'],
+        'totalCount': row['total_count'],
+        'runtimeMs': row['runtime_ms'],
+        'createdAt': created_at.isoformat() if created_at else None,
+    }
+
+
+def _fetch_after(after_id, limit=_FETCH_LIMIT):
+    rows = (
+        CodingSubmission.objects.filter(id__gt=after_id, task__deleted_at__isnull=True)
+        .order_by('id')
+        .values(*_FIELDS)[:limit]
+    )
+    return [_event(r) for r in rows]
+
+
+class SubmissionFeed:
+    """Thread-safe ring buffer of submission events, refreshed from the DB at most once per poll interval."""
+
+    def __init__(self, size=BUFFER_SIZE):
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=size)
+        self._last_id = None
+        # The buffer holds every event with floor < id <= last_id.
+        self._floor = None
+        self._last_poll = 0.0
+
+    def head_id(self):
+        """Id new streams start after (latest submission id)."""
+        with self._lock:
+            if self._last_id is not None:
+                return self._last_id
+        last = CodingSubmission.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        with self._lock:
+            if self._last_id is None:
+                self._last_id = self._floor = last
+            return self._last_id
+
+    def _append(self, events):
+        for event in events:
+            if self._last_id is None or event['id'] > self._last_id:
+                if self._floor is None:
+                    self._floor = event['id'] - 1
+                elif len(self._events) == self._events.maxlen:
+                    self._floor = self._events[0]['id']
+                self._events.append(event)
+                self._last_id = event['id']
+
+    def publish(self, submission_id):
+        """Signal path: add one submission right after its transaction commits."""
+        events = [
+            _event(r) for r in CodingSubmission.objects.filter(id=submission_id).values(*_FIELDS)
+        ]
+        with self._lock:
+            if self._last_id is not None and events and events[0]['id'] > self._last_id + 1:
+                # Rows between were committed elsewhere; leave them to the next poll (keeps ids ordered).
+                self._last_poll = 0.0
+                return
+            self._append(events)
+
+    def _refresh(self, now, poll):
+        with self._lock:
+            if now - self._last_poll < poll:
+                return
+            self._last_poll = now
+            after = self._last_id
+        if after is None:
+            after = self.head_id()
+        events = _fetch_after(after)
+        with self._lock:
+            self._append(events)
+
+    def events_after(self, after_id, poll):
+        """Events with id > after_id (oldest first, at most one fetch batch)."""
+        self._refresh(time.monotonic(), poll)
+        with self._lock:
+            if self._floor is not None and after_id >= self._floor:
+                return [e for e in self._events if e['id'] > after_id]
+        return _fetch_after(after_id)
+
+    def reset(self):
+        with self._lock:
+            self._events.clear()
+            self._last_id = None
+            self._floor = None
+            self._last_poll = 0.0
+
+
+_feed = SubmissionFeed()
+
+
+def get_feed():
+    return _feed
+
+
+def publish_submission(submission_id):
+    _feed.publish(submission_id)
+
+
+def event_filter(student_ids=None, topic_id=None, include_run=False, organization_id=None):
+    """Predicate for one stream's query params (same filters as the monitor)."""
+    def accept(event):
+        if not include_run and event['runType'] != 'SUBMIT':
+            return False
+        if topic_id is not None and event['topicId'] != topic_id:
+            return False
+        if student_ids is not None and event['studentId'] not in student_ids:
+            return False
+        if organization_id is not None and event['organizationId'] != organization_id:
+            return False
+        return True
+    return accept
+
+
+def _format(event):
+    return f"id: {event['id']}\nevent: submission\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+class _StreamState:
+    """Shared step logic of the sync and async generators."""
+
+    def __init__(self, last_id, accept, settings):
+        self.last_id = last_id
+        self.accept = accept
+        self.settings = settings
+        self.started = time.monotonic()
+        self.last_write = self.started
+
+    def opening(self):
+        return f"retry: {int(self.settings['poll'] * 1000) + 1000}\n: connected\n\n"
+
+    def step(self, now):
+        """Chunks to write now; None when the stream should close."""
+        max_seconds = self.settings['max_seconds']
+        if max_seconds and now - self.started >= max_seconds:
+            return None
+        events = _feed.events_after(self.last_id, self.settings['poll'])
+        chunks = []
+        for event in events:
+            self.last_id = max(self.last_id, event['id'])
+            if self.accept(event):
+                chunks.append(_format(event))
+        if not chunks and now - self.last_write >= self.settings['heartbeat']:
+            chunks.append(': ping\n\n')
+        if chunks:
+            self.last_write = now
+        return chunks
+
+
+def sse_stream(last_id, accept):
+    """Blocking generator (WSGI): one worker thread per open stream until max_seconds."""
+    state = _StreamState(last_id, accept, stream_settings())
+    yield state.opening()
+    while True:
+        chunks = state.step(time.monotonic())
+        if chunks is None:
+            return
+        yield from chunks
+        time.sleep(state.settings['poll'])
+
+
+async def sse_stream_async(last_id, accept):
+    """Async generator (ASGI): idle streams only hold an event-loop timer, not a thread."""
+    from asgiref.sync import sync_to_async
+
+    state = _StreamState(last_id, accept, stream_settings())
+    step = sync_to_async(state.step, thread_sensitive=False)
+    yield state.opening()
+    while True:
+        chunks = await step(time.monotonic())
+        if chunks is None:
+            return
+        for chunk in chunks:
+            yield chunk
+        await asyncio.sleep(state.settings['poll'])
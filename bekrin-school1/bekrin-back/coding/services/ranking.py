@@ -0,0 +1,132 @@
+"""
+Coding monitor ranking: per-student aggregates over CodingStudentTaskStat, sorted and paginated
+in SQL with keyset cursors (no OFFSET, no Python sort over all students).
+A cursor is the sort key of the last row of a page (urlsafe base64 JSON), bound to the sort it
+was issued for. Every sort ends with student_id, so keys are unique and pages never overlap.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Avg, Count, F, FloatField, Max, Q, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Greatest
+
+RANKING_SORTS = ('most_solved', 'most_attempts', 'last_activity', 'cpu_time', 'peak_memory')
+DEFAULT_RANKING_PAGE_SIZE = 50
+MAX_RANKING_PAGE_SIZE = 200
+
+# NULL aggregates are replaced by sentinels so every key is comparable (NULLs sort last, except in the
+# ascending last_activity tie-break of most_solved, where no activity counts as oldest).
+_NO_ACTIVITY = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_NOT_MEASURED = 1e18
+
+# (annotation, descending)
+_SORT_KEYS = {
+    # Ties on solved count: earliest last activity first (reached the count first)
+    'most_solved': (('solved_count', True), ('last_activity', False), ('student_id', True)),
+    'most_attempts': (('attempt_total', True), ('solved_count', True), ('student_id', True)),
+    'last_activity': (('last_activity', True), ('student_id', True)),
+    'cpu_time': (('avg_cpu', False), ('solved_count', True), ('student_id', True)),
+    'peak_memory': (('avg_peak', False), ('solved_count', True), ('student_id', True)),
+}
+# Older clients send sort=most_submissions
+_SORT_KEYS['most_submissions'] = _SORT_KEYS['most_attempts']
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _sort_keys(sort):
+    return _SORT_KEYS.get(sort, _SORT_KEYS['most_solved'])
+
+
+def encode_cursor(sort, row):
+    values = []
+    for name, _ in _sort_keys(sort):
+        value = row[name]
+        values.append(value.isoformat() if isinstance(value, datetime) else value)
+    raw = json.dumps({'s': sort, 'v': values}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(sort, cursor):
+    """Sort key values of a cursor issued for this sort. Raises InvalidCursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+        keys = _sort_keys(sort)
+        if data['s'] != sort or len(data['v']) != len(keys):
+            raise InvalidCursor(cursor)
+        values = []
+        for (name, _), value in zip(keys, data['v']):
+            if name == 'last_activity':
+                value = datetime.fromisoformat(value)
+            elif not isinstance(value, (int, float)) or isinstance(value, bool):
+                raise InvalidCursor(cursor)
+            values.append(value)
+        return values
+    except (binascii.Error, ValueError, TypeError, KeyError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+def _after(keys, values):
+    """Rows strictly after the cursor position in the (mixed direction) sort order."""
+    condition = Q()
+    for i, (name, descending) in enumerate(keys):
+        step = Q(**{f'{name}__{"lt" if descending else "gt"}': values[i]})
+        for j in range(i):
+            step &= Q(**{keys[j][0]: values[j]})
+        condition |= step
+    return condition
+
+
+def ranking_queryset(stats_qs, include_run):
+    """One row per student: solved_count, attempt_total, last_activity, avg_cpu, avg_peak + projection."""
+    if include_run:
+        attempts = F('attempts') + F('run_attempts')
+        # GREATEST returns NULL on SQLite when either side is NULL; coalesce both sides first.
+        last = Greatest(
+            Coalesce('last_submitted_at', 'last_run_at'),
+            Coalesce('last_run_at', 'last_submitted_at'),
+        )
+    else:
+        attempts = F('attempts')
+        last = F('last_submitted_at')
+    return (
+        stats_qs.values('student_id')
+        .annotate(
+            solved_count=Count('id', filter=Q(solved=True)),
+            attempt_total=Sum(attempts),
+            last_activity=Coalesce(Max(last), Value(_NO_ACTIVITY)),
+            avg_cpu=Coalesce(Cast(Avg('best_cpu_time_ms'), FloatField()), Value(_NOT_MEASURED)),
+            avg_peak=Coalesce(Cast(Avg('best_peak_memory_kb'), FloatField()), Value(_NOT_MEASURED)),
+            full_name=Max('student__full_name'),
+            email=Max('student__email'),
+            profile_id=Max('student__student_profile__id', filter=Q(student__student_profile__is_deleted=False)),
+            grade=Max('student__student_profile__grade', filter=Q(student__student_profile__is_deleted=False)),
+        )
+    )
+
+
+def ranking_page(stats_qs, sort, include_run, cursor=None, page_size=DEFAULT_RANKING_PAGE_SIZE):
+    """
+    Returns (rows, next_cursor). rows are ranking_queryset dicts with sentinels mapped back to None.
+    Raises InvalidCursor for a malformed cursor or one issued for another sort.
+    """
+    keys = _sort_keys(sort)
+    qs = ranking_queryset(stats_qs, include_run)
+    if cursor:
+        qs = qs.filter(_after(keys, decode_cursor(sort, cursor)))
+    qs = qs.order_by(*[f'-{name}' if descending else name for name, descending in keys])
+    rows = list(qs[:page_size + 1])
+    next_cursor = encode_cursor(sort, rows[page_size - 1]) if len(rows) > page_size else None
+    rows = rows[:page_size]
+    for row in rows:
+        if row['last_activity'] == _NO_ACTIVITY:
+            row['last_activity'] = None
+        for name in ('avg_cpu', 'avg_peak'):
+            if row[name] >= _NOT_MEASURED:
+                row[name] = None
+    return rows, next_cursor
@@ -0,0 +1,264 @@
+"""
+Regrade engine: re-run a task's SUBMIT submissions against its current test cases, e.g. after a teacher
+fixes a wrong expected output. Scope 'latest' = each student's newest graded SUBMIT, 'all' = every one.
+A CodingRegradeJob walks the submissions in id order, CODING_REGRADE_BATCH_SIZE at a time:
+  - a batch is graded in parallel (CODING_REGRADE_WORKERS threads; the sandbox isolates the runs)
+  - results, CodingStudentTaskStat (rebuild_stats), CodingProgress and the job cursor/counters commit
+    in one transaction, so an interrupted job resumes after its last committed batch
+Cached sandbox output is reused when only expected outputs changed (coding.result_cache).
+Runners: `manage.py regrade_coding_task`, the queue worker (process_coding_queue) and, when there is no
+worker (CODING_SUBMIT_ASYNC off), a background thread started by the teacher endpoint.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from coding.models import CodingProgress, CodingRegradeJob, CodingSubmission
+from coding.run_code import _sandbox_setting
+from coding.services.stats import rebuild_stats
+from coding.services.submissions import PENDING_STATUSES, grade_code, task_cases
+from students.models import StudentProfile
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ('latest', 'all')
+ACTIVE_STATUSES = ('pending', 'running')
+RESULT_FIELDS = [
+    'status', 'passed_count', 'failed_count', 'total_count', 'score', 'error_message',
+    'runtime_ms', 'cpu_time_ms', 'peak_memory_kb', 'details_json',
+]
+# A running job whose heartbeat is older than this is treated as abandoned and can be claimed again.
+STALE_AFTER_SECONDS = 600
+
+
+def regrade_settings():
+    return {
+        'workers': max(1, int(_sandbox_setting('CODING_REGRADE_WORKERS', 4) or 1)),
+        'batch_size': max(1, int(_sandbox_setting('CODING_REGRADE_BATCH_SIZE', 50) or 1)),
+    }
+
+
+def target_queryset(task, scope):
+    """SUBMIT rows a job of this scope regrades (queued/running rows are graded by the queue anyway)."""
+    graded = CodingSubmission.objects.filter(task=task, run_type='SUBMIT').exclude(status__in=PENDING_STATUSES)
+    if scope == 'latest':
+        latest_ids = graded.order_by().values('student_id').annotate(last_id=Max('id')).values('last_id')
+        return graded.filter(id__in=latest_ids)
+    return graded
+
+
+def job_payload(job):
+    return {
+        'id': job.id,
+        'taskId': job.task_id,
+        'scope': job.scope,
+        'status': job.status,
+        'total': job.total,
+        'processed': job.processed,
+        'changed': job.changed,
+        'errorCount': job.error_count,
+        'errorMessage': job.error_message or None,
+        'createdAt': job.created_at.isoformat() if job.created_at else None,
+        'startedAt': job.started_at.isoformat() if job.started_at else None,
+        'finishedAt': job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+def start_regrade(task, scope='latest', user=None):
+    """
+    Queue a regrade of task. Returns (job, created); an unfinished job with the same scope is returned
+    instead of a second one. Raises ValueError for an unknown scope.
+    """
+    if scope not in SCOPES:
+        raise ValueError(scope)
+    with transaction.atomic():
+        job = (
+            CodingRegradeJob.objects.select_for_update()
+            .filter(task=task, scope=scope, status__in=ACTIVE_STATUSES)
+            .order_by('id')
+            .first()
+        )
+        if job is not None:
+            return job, False
+        job = CodingRegradeJob.objects.create(
+            task=task, scope=scope, created_by=user, total=target_queryset(task, scope).count(),
+        )
+    return job, True
+
+
+def claim_job(job_id=None, stale_after=STALE_AFTER_SECONDS):
+    """
+    Move a pending job (or a running one whose runner stopped, see stale_after) to running and return it.
+    With job_id, that job is claimed unless it is done or actively running. None if nothing to claim.
+    """
+    now = timezone.now()
+    claimable = Q(status='pending') | Q(status='running', updated_at__lt=now - timedelta(seconds=stale_after))
+    if job_id is not None:
+        claimable |= Q(status='failed')
+        candidates = [job_id]
+    else:
+        candidates = list(
+            CodingRegradeJob.objects.filter(claimable).order_by('id').values_list('id', flat=True)[:10]
+        )
+    for candidate in candidates:
+        claimed = CodingRegradeJob.objects.filter(claimable, id=candidate).update(
+            status='running', error_message='', finished_at=None, updated_at=now,
+        )
+        if claimed:
+            job = CodingRegradeJob.objects.select_related('task').get(id=candidate)
+            if job.started_at is None:
+                job.started_at = now
+                job.save(update_fields=['started_at'])
+            return job
+    return None
+
+
+def _grade(sub, cases):
+    try:
+        return grade_code(sub.submitted_code, cases, language=sub.language)
+    except Exception:
+        logger.exception('[coding_regrade] grading failed')
+        return None
+
+
+def sync_progress(task, student_ids):
+    """CodingProgress of task for these students from their graded SUBMITs: completed iff one passed."""
+    results = {
+        r['student_id']: r
+        for r in CodingSubmission.objects.filter(task=task, run_type='SUBMIT', student_id__in=student_ids)
+        .exclude(status__in=PENDING_STATUSES)
+        .order_by()
+        .values('student_id')
+        .annotate(passes=Count('id', filter=Q(status='passed')), best=Max('score', filter=Q(status='passed')))
+    }
+    profiles = dict(
+        StudentProfile.objects.filter(user_id__in=student_ids).values_list('id', 'user_id')
+    )
+    existing = {
+        p.student_profile_id: p
+        for p in CodingProgress.objects.filter(exercise=task, student_profile_id__in=profiles)
+    }
+    to_update, to_create = [], []
+    for profile_id, user_id in profiles.items():
+        result = results.get(user_id)
+        passed = bool(result and result['passes'])
+        progress = existing.get(profile_id)
+        if progress is None:
+            if passed:
+                to_create.append(CodingProgress(
+                    student_profile_id=profile_id, exercise=task, status='completed', score=result['best'] or 0,
+                ))
+            continue
+        new_status = 'completed' if passed else 'in_progress'
+        new_score = (result['best'] or 0) if passed else progress.score
+        if (progress.status, progress.score) != (new_status, new_score):
+            progress.status, progress.score, progress.updated_at = new_status, new_score, timezone.now()
+            to_update.append(progress)
+    CodingProgress.objects.bulk_update(to_update, ['status', 'score', 'updated_at'])
+    CodingProgress.objects.bulk_create(to_create)
+
+
+def run_job(job, workers=None, batch_size=None, on_progress=None, should_stop=None):
+    """
+    Regrade a claimed (running) job to the end. on_progress(job) is called after every committed batch;
+    should_stop() is checked between batches (a stopped job goes back to pending and resumes later).
+    Returns the job; on an unexpected error it is left failed with its cursor, so it can be resumed.
+    """
+    defaults = regrade_settings()
+    workers = workers or defaults['workers']
+    batch_size = batch_size or defaults['batch_size']
+    task = job.task
+    try:
+        cases = task_cases(task) if task.deleted_at is None else []
+        if not cases:
+            return _finish(job, 'failed', 'No test cases defined for this task')
+        remaining = target_queryset(task, job.scope).filter(id__gt=job.last_submission_id)
+        job.total = job.processed + remaining.count()
+        job.save(update_fields=['total', 'updated_at'])
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='coding-regrade') as pool:
+            while True:
+                if should_stop is not None and should_stop():
+                    job.status = 'pending'
+                    job.save(update_fields=['status', 'updated_at'])
+                    return job
+                batch = list(
+                    remaining.filter(id__gt=job.last_submission_id)
+                    .select_related('code_blob')
+                    .order_by('id')[:batch_size]
+                )
+                if not batch:
+                    break
+                results = list(pool.map(lambda sub: _grade(sub, cases), batch))
+                _apply_batch(job, task, batch, results)
+                if on_progress is not None:
+                    on_progress(job)
+        return _finish(job, 'done')
+    except Exception as e:
+        logger.exception('[coding_regrade] job %s failed', job.id)
+        return _finish(job, 'failed', str(e)[:500])
+
+
+def _apply_batch(job, task, batch, results):
+    graded = []
+    changed = errors = 0
+    for sub, result in zip(batch, results):
+        if result is None:
+            errors += 1
+            continue
+        if (sub.status, sub.score, sub.passed_count) != (result['status'], result['score'], result['passed_count']):
+            changed += 1
+        for field, value in result.items():
+            setattr(sub, field, value)
+        graded.append(sub)
+    student_ids = {sub.student_id for sub in graded}
+    with transaction.atomic():
+        CodingSubmission.objects.bulk_update(graded, RESULT_FIELDS)
+        if student_ids:
+            rebuild_stats(student_ids=student_ids, task_ids=[task.id])
+            sync_progress(task, student_ids)
+        job.processed += len(batch)
+        job.changed += changed
+        job.error_count += errors
+        job.last_submission_id = batch[-1].id
+        job.save(update_fields=['processed', 'changed', 'error_count', 'last_submission_id', 'updated_at'])
+
+
+def _finish(job, status, error_message=''):
+    job.status = status
+    job.error_message = error_message
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error_message', 'finished_at', 'updated_at'])
+    if status == 'done':
+        logger.info('[coding_regrade] job %s task=%s done: %s regraded, %s changed, %s errors',
+                    job.id, job.task_id, job.processed, job.changed, job.error_count)
+    return job
+
+
+def run_pending_jobs(on_progress=None, should_stop=None):
+    """Claim and run queued jobs until none is left. Returns the number of jobs run."""
+    count = 0
+    while should_stop is None or not should_stop():
+        job = claim_job()
+        if job is None:
+            break
+        run_job(job, on_progress=on_progress, should_stop=should_stop)
+        count += 1
+    return count
+
+
+def run_in_background(job_id):
+    """Run one job in a daemon thread of this process (no queue worker deployed)."""
+    def target():
+        try:
+            job = claim_job(job_id)
+            if job is not None:
+                run_job(job)
+        finally:
+            connection.close()
+
+    threading.Thread(target=target, name=f'coding-regrade-{job_id}', daemon=True).start()
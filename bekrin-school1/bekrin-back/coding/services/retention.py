@@ -0,0 +1,151 @@
+"""
+RUN submission retention: RUN rows older than CODING_RUN_RETENTION_DAYS are rolled into
+CodingRunDailyStat (per student/task/day counters) and CodingRunCode (distinct code per
+student/task, one row per CodeBlob, which keeps the text), then deleted. Each batch is one transaction, so counters and
+deletes commit together and an interrupted run can simply be restarted.
+CodingStudentTaskStat (monitor totals, include_run) is not touched: it already counts the runs.
+Entry points: `manage.py compact_coding_runs` (cron) and the queue worker's periodic hook.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from coding.models import CodingRunCode, CodingRunDailyStat, CodingSubmission
+from coding.run_code import _sandbox_setting
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def retention_days():
+    return int(_sandbox_setting('CODING_RUN_RETENTION_DAYS', 30))
+
+
+def _expired_runs(cutoff):
+    return CodingSubmission.objects.filter(run_type='RUN', created_at__lt=cutoff)
+
+
+def _merge_daily(rows):
+    daily = {}
+    for r in rows:
+        key = (r['student_id'], r['task_id'], timezone.localdate(r['created_at']))
+        entry = daily.setdefault(key, {'run_count': 0, 'passed_count': 0, 'last_run_at': r['created_at']})
+        entry['run_count'] += 1
+        entry['passed_count'] += r['status'] == 'passed'
+        entry['last_run_at'] = max(entry['last_run_at'], r['created_at'])
+    students = {k[0] for k in daily}
+    existing = {
+        (s.student_id, s.task_id, s.day): s
+        for s in CodingRunDailyStat.objects.select_for_update().filter(
+            student_id__in=students,
+            task_id__in={k[1] for k in daily},
+            day__in={k[2] for k in daily},
+        )
+    }
+    to_update, to_create = [], []
+    for (student_id, task_id, day), entry in daily.items():
+        stat = existing.get((student_id, task_id, day))
+        if stat is None:
+            to_create.append(CodingRunDailyStat(student_id=student_id, task_id=task_id, day=day, **entry))
+            continue
+        stat.run_count += entry['run_count']
+        stat.passed_count += entry['passed_count']
+        if stat.last_run_at is None or entry['last_run_at'] > stat.last_run_at:
+            stat.last_run_at = entry['last_run_at']
+        to_update.append(stat)
+    CodingRunDailyStat.objects.bulk_update(to_update, ['run_count', 'passed_count', 'last_run_at'])
+    CodingRunDailyStat.objects.bulk_create(to_create)
+    return len(daily)
+
+
+def _merge_codes(rows):
+    codes = {}
+    for r in rows:
+        key = (r['student_id'], r['task_id'], r['code_blob_id'])
+        entry = codes.setdefault(key, {
+            'run_count': 0,
+            'first_seen_at': r['created_at'], 'last_seen_at': r['created_at'],
+        })
+        entry['run_count'] += 1
+        entry['first_seen_at'] = min(entry['first_seen_at'], r['created_at'])
+        entry['last_seen_at'] = max(entry['last_seen_at'], r['created_at'])
+    existing = {
+        (c.student_id, c.task_id, c.code_blob_id): c
+        for c in CodingRunCode.objects.select_for_update().filter(
+            student_id__in={k[0] for k in codes},
+            task_id__in={k[1] for k in codes},
+            code_blob_id__in={k[2] for k in codes},
+        )
+    }
+    to_update, to_create = [], []
+    for (student_id, task_id, sha), entry in codes.items():
+        row = existing.get((student_id, task_id, sha))
+        if row is None:
+            to_create.append(CodingRunCode(student_id=student_id, task_id=task_id, code_blob_id=sha, **entry))
+            continue
+        row.run_count += entry['run_count']
+        row.first_seen_at = min(filter(None, (row.first_seen_at, entry['first_seen_at'])))
+        row.last_seen_at = max(filter(None, (row.last_seen_at, entry['last_seen_at'])))
+        to_update.append(row)
+    CodingRunCode.objects.bulk_update(to_update, ['run_count', 'first_seen_at', 'last_seen_at'])
+    CodingRunCode.objects.bulk_create(to_create)
+    return len(to_create)
+
+
+def compact_batch(cutoff, batch_size=DEFAULT_BATCH_SIZE):
+    """Archive and delete up to batch_size expired RUN rows. Returns (rows, daily_rows, new_codes)."""
+    with transaction.atomic():
+        rows = list(
+            _expired_runs(cutoff)
+            .select_for_update(skip_locked=True)
+            .order_by('id')
+            .values('id', 'student_id', 'task_id', 'status', 'created_at', 'code_blob_id')[:batch_size]
+        )
+        if not rows:
+            return 0, 0, 0
+        daily = _merge_daily(rows)
+        new_codes = _merge_codes(rows)
+        CodingSubmission.objects.filter(id__in=[r['id'] for r in rows]).delete()
+    return len(rows), daily, new_codes
+
+
+def compact_runs(older_than_days=None, batch_size=DEFAULT_BATCH_SIZE, max_batches=None, dry_run=False):
+    """
+    Archive RUN rows older than older_than_days (default CODING_RUN_RETENTION_DAYS; <= 0 disables).
+    Returns {'cutoff', 'rows', 'batches', 'dailyRows', 'newCodes'}; dry_run only counts rows.
+    """
+    days = retention_days() if older_than_days is None else int(older_than_days)
+    summary = {'cutoff': None, 'rows': 0, 'batches': 0, 'dailyRows': 0, 'newCodes': 0}
+    if days <= 0:
+        return summary
+    cutoff = timezone.now() - timedelta(days=days)
+    summary['cutoff'] = cutoff
+    if dry_run:
+        summary['rows'] = _expired_runs(cutoff).count()
+        return summary
+    while max_batches is None or summary['batches'] < max_batches:
+        rows, daily, new_codes = compact_batch(cutoff, batch_size)
+        if not rows:
+            break
+        summary['rows'] += rows
+        summary['batches'] += 1
+        summary['dailyRows'] += daily
+        summary['newCodes'] += new_codes
+    if summary['rows']:
+        logger.info('[coding_retention] archived %s RUN rows older than %s in %s batches',
+                    summary['rows'], cutoff.isoformat(), summary['batches'])
+    return summary
+
+
+def archived_run_count(student_ids=None, task_filter=None):
+    """Total archived RUN count (CodingRunDailyStat), optionally for some students / task lookups."""
+    qs = CodingRunDailyStat.objects.all()
+    if student_ids is not None:
+        qs = qs.filter(student_id__in=student_ids)
+    if task_filter:
+        qs = qs.filter(**task_filter)
+    return qs.aggregate(n=Sum('run_count'))['n'] or 0
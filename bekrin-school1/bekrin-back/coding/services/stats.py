@@ -0,0 +1,139 @@
+"""
+CodingStudentTaskStat maintenance. Called from the CodingSubmission post_save signal
+(coding.signals), so it runs in the same transaction as the submission write.
+Counters use F() updates (safe under concurrent submits); result fields only move one way
+(solved, earliest first_solved_at, highest best_score, lowest CPU/memory), so saving the
+same submission twice does not change them.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from coding.models import CodingRunDailyStat, CodingStudentTaskStat, CodingSubmission
+from coding.services.submissions import PENDING_STATUSES
+
+
+def _bump(current, value, fn):
+    """fn(current, value) treating a NULL current as value (LEAST/GREATEST differ on NULL per backend)."""
+    return fn(Coalesce(F(current), Value(value)), Value(value))
+
+
+def record_submission(sub, created):
+    """Apply one saved submission to its (student, task) stat row."""
+    if sub.student_id is None or sub.task_id is None:
+        return
+    with transaction.atomic():
+        stat, _ = CodingStudentTaskStat.objects.get_or_create(student_id=sub.student_id, task_id=sub.task_id)
+        updates = {}
+        if created:
+            if sub.run_type == 'RUN':
+                updates['run_attempts'] = F('run_attempts') + 1
+                updates['last_run_at'] = _bump('last_run_at', sub.created_at, Greatest)
+            else:
+                updates['attempts'] = F('attempts') + 1
+                updates['last_submitted_at'] = _bump('last_submitted_at', sub.created_at, Greatest)
+                if sub.attempt_no:
+                    # Rows written with an explicit attempt_no (seeds, imports) keep the counter ahead.
+                    updates['last_attempt_no'] = _bump('last_attempt_no', sub.attempt_no, Greatest)
+        if sub.run_type == 'SUBMIT' and sub.status not in PENDING_STATUSES:
+            if sub.score is not None:
+                updates['best_score'] = _bump('best_score', sub.score, Greatest)
+            if sub.status == 'passed':
+                updates['solved'] = Value(True)
+                updates['first_solved_at'] = _bump('first_solved_at', sub.created_at, Least)
+                if sub.cpu_time_ms is not None:
+                    updates['best_cpu_time_ms'] = _bump('best_cpu_time_ms', sub.cpu_time_ms, Least)
+                if sub.peak_memory_kb is not None:
+                    updates['best_peak_memory_kb'] = _bump('best_peak_memory_kb', sub.peak_memory_kb, Least)
+        if updates:
+            CodingStudentTaskStat.objects.filter(pk=stat.pk).update(**updates)
+
+
+def rebuild_stats(student_ids=None, task_ids=None, batch_size=1000):
+    """
+    Recompute stat rows from CodingSubmission (backfill / repair). Returns number of rows written.
+    RUN rows already archived by coding.services.retention are added from CodingRunDailyStat.
+    Rows of the selected pairs with no submissions left are kept (totals survive history cleanup).
+    last_attempt_no is only set on new rows; existing counters are never lowered.
+    """
+    qs = CodingSubmission.objects.all()
+    archived_qs = CodingRunDailyStat.objects.all()
+    if student_ids:
+        qs = qs.filter(student_id__in=student_ids)
+        archived_qs = archived_qs.filter(student_id__in=student_ids)
+    if task_ids:
+        qs = qs.filter(task_id__in=task_ids)
+        archived_qs = archived_qs.filter(task_id__in=task_ids)
+    archived = {
+        (r['student_id'], r['task_id']): r
+        for r in archived_qs.values('student_id', 'task_id').annotate(runs=Sum('run_count'), last=Max('last_run_at'))
+    }
+    submit = Q(run_type='SUBMIT')
+    passed = submit & Q(status='passed')
+    final = submit & ~Q(status__in=PENDING_STATUSES)
+    rows = (
+        qs.values('student_id', 'task_id')
+        .annotate(
+            attempts=Count('id', filter=submit),
+            run_attempts=Count('id', filter=Q(run_type='RUN')),
+            passes=Count('id', filter=passed),
+            first_solved_at=Min('created_at', filter=passed),
+            last_submitted_at=Max('created_at', filter=submit),
+            last_run_at=Max('created_at', filter=Q(run_type='RUN')),
+            best_score=Max('score', filter=final),
+            best_cpu_time_ms=Min('cpu_time_ms', filter=passed),
+            best_peak_memory_kb=Min('peak_memory_kb', filter=passed),
+            last_attempt_no=Coalesce(Max('attempt_no'), 0),
+        )
+        .order_by('student_id', 'task_id')
+    )
+    fields = [
+        'attempts', 'run_attempts', 'solved', 'first_solved_at', 'last_submitted_at', 'last_run_at',
+        'best_score', 'best_cpu_time_ms', 'best_peak_memory_kb',
+    ]
+    written = 0
+    batch = []
+
+    def flush():
+        CodingStudentTaskStat.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=['student', 'task'],
+            update_fields=fields,
+        )
+
+    def merged(rows):
+        for row in rows:
+            extra = archived.pop((row['student_id'], row['task_id']), None)
+            if extra:
+                row['run_attempts'] += extra['runs'] or 0
+                if extra['last'] and (row['last_run_at'] is None or extra['last'] > row['last_run_at']):
+                    row['last_run_at'] = extra['last']
+            yield row
+        for (student_id, task_id), extra in list(archived.items()):
+            yield dict(
+                dict.fromkeys(fields + ['passes'], None),
+                student_id=student_id, task_id=task_id, attempts=0, passes=0, last_attempt_no=0,
+                run_attempts=extra['runs'] or 0, last_run_at=extra['last'],
+            )
+
+    for row in merged(rows.iterator(chunk_size=batch_size)):
+        if row['student_id'] is None or row['task_id'] is None:
+            continue
+        batch.append(CodingStudentTaskStat(
+            student_id=row['student_id'],
+            task_id=row['task_id'],
+            solved=row['passes'] > 0,
+            last_attempt_no=row['last_attempt_no'],
+            **{f: row[f] for f in fields if f != 'solved'},
+        ))
+        if len(batch) >= batch_size:
+            with transaction.atomic():
+                flush()
+            written += len(batch)
+            batch = []
+    if batch:
+        with transaction.atomic():
+            flush()
+        written += len(batch)
+    return written
@@ -0,0 +1,231 @@
+"""
+Coding submission grading: run code against a task's test cases and persist the result.
+Shared by the synchronous submit view and the queue worker (manage.py process_coding_queue).
+Queue: SUBMIT rows are created with status=queued, claimed by a worker (queued -> running via a
+conditional UPDATE, so two workers never grade the same row) and finished with the final status.
+Every create/final save also updates CodingStudentTaskStat (post_save signal, same transaction);
+SUBMIT attempt numbers come from its last_attempt_no counter.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Max, Q
+from django.utils import timezone
+
+from coding.models import CodingProgress, CodingStudentTaskStat, CodingSubmission, CodingTestCase
+from coding.result_cache import run_cases_cached
+from coding.output_compare import compare_case, mismatch_details
+
+logger = logging.getLogger(__name__)
+
+SUBMIT_TIMEOUT_SECONDS = 5
+PENDING_STATUSES = ('queued', 'running')
+
+
+def grade_code(code, cases, run_timeout=SUBMIT_TIMEOUT_SECONDS, language='python'):
+    """
+    Run code (in language, see coding.run_code runners) against all cases; stop at the first timeout/error.
+    A compile error counts as an error on the first case.
+    Returns dict with CodingSubmission field values:
+    status, passed_count, failed_count, total_count, score, error_message, runtime_ms,
+    cpu_time_ms, peak_memory_kb, details_json.
+    runtime_ms is wall clock (pooled sandbox: student code only; cold: includes interpreter startup);
+    cpu_time_ms sums user+sys CPU of all executed cases, peak_memory_kb is the largest case max RSS.
+    """
+    passed_count = 0
+    failed_count = 0
+    total_time_ms = 0
+    total_cpu_ms = 0
+    peak_memory_kb = 0
+    error_message = None
+    result_status = 'passed'
+    details_list = []
+    # Stops at the first timeout/error like the loop below (batch or parallel, same results).
+    case_results = run_cases_cached(
+        cases[0].task_id if cases else None,
+        code,
+        [tc.input_data for tc in cases],
+        per_case_timeout=run_timeout,
+        stop_on_error=True,
+        language=language,
+    )
+    for tc, res in zip(cases, case_results):
+        stdout, stderr, return_code, elapsed_ms = res[:4]
+        metrics = {'elapsed_ms': elapsed_ms, 'cpu_ms': res.cpu_ms, 'peak_memory_kb': res.peak_kb}
+        total_time_ms += elapsed_ms
+        total_cpu_ms += res.cpu_ms
+        peak_memory_kb = max(peak_memory_kb, res.peak_kb)
+        passed = False
+        if return_code == -1 and stderr and 'Timeout' in stderr:
+            result_status = 'timeout'
+            error_message = 'Execution timeout'
+            failed_count += 1
+            details_list.append({
+                'test_case_id': tc.id, 'is_sample': tc.is_sample, 'passed': False,
+                'input': (tc.input_data or '')[:2000], 'output': (stderr or '')[:2000], 'expected': (tc.expected or '')[:2000],
+                **metrics,
+            })
+            break
+        if return_code != 0:
+            result_status = 'error'
+            error_message = (stderr or stdout or 'Runtime error')[:500]
+            failed_count += 1
+            details_list.append({
+                'test_case_id': tc.id, 'is_sample': tc.is_sample, 'passed': False,
+                'input': (tc.input_data or '')[:2000], 'output': (stderr or stdout or '')[:2000], 'expected': (tc.expected or '')[:2000],
+                **metrics,
+            })
+            break
+        comparison = compare_case(stdout, tc)
+        passed = comparison.passed
+        if passed:
+            passed_count += 1
+        else:
+            failed_count += 1
+            if result_status == 'passed':
+                result_status = 'failed'
+                error_message = 'Wrong answer'
+        details_list.append({
+            'test_case_id': tc.id, 'is_sample': tc.is_sample, 'passed': passed,
+            'input': (tc.input_data or '')[:2000], 'output': (stdout or '')[:2000], 'expected': (tc.expected or '')[:2000],
+            **metrics,
+            **mismatch_details(comparison),
+        })
+    if result_status == 'passed' and failed_count == 0:
+        passed_count = len(cases)
+        failed_count = 0
+    total_tests = len(cases)
+    return {
+        'status': result_status,
+        'passed_count': passed_count,
+        'failed_count': failed_count,
+        'total_count': total_tests,
+        'score': int(100 * passed_count / total_tests) if total_tests else 0,
+        'error_message': error_message,
+        'runtime_ms': total_time_ms or None,
+        'cpu_time_ms': total_cpu_ms if case_results else None,
+        'peak_memory_kb': peak_memory_kb or None,
+        'details_json': details_list,
+    }
+
+
+def display_status(result_status):
+    """Submit API 'status' label (Accepted / Wrong Answer / timeout / error / queued / running)."""
+    if result_status == 'passed':
+        return 'Accepted'
+    if result_status in ('timeout', 'error') or result_status in PENDING_STATUSES:
+        return result_status
+    return 'Wrong Answer'
+
+
+def update_progress_for(sub):
+    """Mark CodingProgress completed when a SUBMIT passed."""
+    if sub.status != 'passed':
+        return
+    student_profile = getattr(sub.student, 'student_profile', None)
+    if student_profile is None:
+        return
+    CodingProgress.objects.update_or_create(
+        student_profile=student_profile,
+        exercise_id=sub.task_id,
+        defaults={'status': 'completed', 'score': sub.score or 0},
+    )
+
+
+def next_attempt_no(task, student):
+    """
+    Reserve the next SUBMIT attempt number of (student, task): 1, 2, 3, ... without gaps or duplicates.
+    Increments CodingStudentTaskStat.last_attempt_no with an F() UPDATE; the row lock it takes is held
+    until commit, so concurrent submits wait for each other. Call it inside the transaction that
+    creates the submission.
+    """
+    def highest_existing():
+        # Only when the stat row is first created (submissions older than the rollup).
+        return CodingSubmission.objects.filter(task=task, student=student).aggregate(n=Max('attempt_no'))['n'] or 0
+
+    stat, _ = CodingStudentTaskStat.objects.get_or_create(
+        student=student, task=task, defaults={'last_attempt_no': highest_existing},
+    )
+    counter = CodingStudentTaskStat.objects.filter(pk=stat.pk)
+    counter.update(last_attempt_no=F('last_attempt_no') + 1)
+    return counter.values_list('last_attempt_no', flat=True).get()
+
+
+def task_cases(task):
+    return list(CodingTestCase.objects.filter(task=task).order_by('order_index', 'id'))
+
+
+def enqueue_submission(task, student, code, total_count, language='python'):
+    """Create a queued SUBMIT row; a worker grades it later."""
+    with transaction.atomic():
+        return CodingSubmission.objects.create(
+            organization_id=task.organization_id,
+            task=task,
+            student=student,
+            submitted_code=code,
+            language=language,
+            run_type='SUBMIT',
+            total_count=total_count,
+            status='queued',
+            attempt_no=next_attempt_no(task, student),
+            details_json=[],
+        )
+
+
+def claim_next_submission():
+    """Move the oldest queued SUBMIT to running and return it, or None if the queue is empty."""
+    candidate_ids = list(
+        CodingSubmission.objects.filter(status='queued', run_type='SUBMIT')
+        .order_by('id')
+        .values_list('id', flat=True)[:10]
+    )
+    for sub_id in candidate_ids:
+        claimed = CodingSubmission.objects.filter(id=sub_id, status='queued').update(
+            status='running', started_at=timezone.now()
+        )
+        if claimed:
+            return CodingSubmission.objects.select_related('task', 'student', 'code_blob').get(id=sub_id)
+    return None
+
+
+def process_submission(sub):
+    """Grade a claimed (running) submission and store the final result."""
+    task = sub.task
+    try:
+        cases = task_cases(task) if task.deleted_at is None else []
+        if not cases:
+            result = {
+                'status': 'error', 'passed_count': 0, 'failed_count': 0, 'total_count': 0, 'score': 0,
+                'error_message': 'No test cases defined for this task', 'runtime_ms': None, 'details_json': [],
+            }
+        else:
+            result = grade_code(sub.submitted_code, cases, language=sub.language)
+    except Exception as e:
+        logger.exception('[coding_queue] grading failed submission_id=%s', sub.id)
+        result = {
+            'status': 'error', 'passed_count': 0, 'failed_count': sub.total_count or 0,
+            'total_count': sub.total_count, 'score': 0, 'error_message': f'Grading failed: {str(e)[:200]}',
+            'runtime_ms': None, 'details_json': [],
+        }
+    for field, value in result.items():
+        setattr(sub, field, value)
+    with transaction.atomic():
+        sub.save(update_fields=list(result.keys()))
+    update_progress_for(sub)
+    return sub
+
+
+def requeue_stale_submissions(older_than_seconds):
+    """Put running rows whose worker died back into the queue. Returns count."""
+    cutoff = timezone.now() - timedelta(seconds=older_than_seconds)
+    return CodingSubmission.objects.filter(status='running').filter(
+        Q(started_at__lt=cutoff) | Q(started_at__isnull=True)
+    ).update(status='queued', started_at=None)
+
+
+def queue_position(sub):
+    """1-based position among queued submissions (0 when not queued)."""
+    if sub.status != 'queued':
+        return 0
+    return CodingSubmission.objects.filter(status='queued', run_type='SUBMIT', id__lte=sub.id).count()
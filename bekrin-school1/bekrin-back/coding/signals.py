@@ -0,0 +1,45 @@
+"""
+Signals: drop cached execution results of a task when its test cases change;
+keep CodingStudentTaskStat in step with submission writes; push new submissions to the live monitor feed.
+"""
+import logging
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from coding.models import CodingSubmission, CodingTestCase
+from coding.result_cache import invalidate_task
+from coding.services.live_feed import publish_submission
+from coding.services.stats import record_submission
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=CodingTestCase)
+@receiver(post_delete, sender=CodingTestCase)
+def invalidate_task_results(sender, instance, **kwargs):
+    if instance.task_id is not None:
+        invalidate_task(instance.task_id)
+
+
+@receiver(post_save, sender=CodingSubmission)
+def update_student_task_stat(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    record_submission(instance, created)
+
+
+def _publish(submission_id):
+    try:
+        publish_submission(submission_id)
+    except Exception:
+        # The feed also polls the database; a failed push only delays the event.
+        logger.exception('[coding_feed] publish failed submission_id=%s', submission_id)
+
+
+@receiver(post_save, sender=CodingSubmission)
+def publish_new_submission(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        transaction.on_commit(partial(_publish, instance.id))
@@ -1,15 +1,30 @@
 """
 Teacher coding tasks API
 """
+import json
+
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Q, Max
+from django.db.models import Q
 from django.db.models.functions import Coalesce
 from accounts.permissions import IsTeacher
-from students.serializers import StudentProfileSerializer
-from coding.models import CodingTask, CodingTestCase, CodingProgress, CodingSubmission, CodingTopic
+from coding.models import (
+    CodingTask, CodingTestCase, CodingProgress, CodingStudentTaskStat, CodingSubmission, CodingTopic,
+)
+from coding.result_cache import cache_stats
+from coding.services.admission import admission_stats
+from coding.services.regrade import job_payload, run_in_background, start_regrade
+from coding.services.retention import archived_run_count
+from coding.services.live_feed import event_filter, get_feed, sse_stream, sse_stream_async
+from coding.services.ranking import (
+    DEFAULT_RANKING_PAGE_SIZE,
+    MAX_RANKING_PAGE_SIZE,
+    InvalidCursor,
+    ranking_page,
+)
 from coding.serializers import (
     CodingTaskSerializer,
     CodingTaskCreateSerializer,
@@ -117,20 +132,29 @@ def teacher_coding_detail_view(request, pk):
 @permission_classes([IsAuthenticated, IsTeacher])
 def teacher_coding_monitor_view(request):
     """
-    GET /api/teacher/coding-monitor?groupId=&topic=&page=&sort=&include_run=
-    Returns: ranking with total_tasks_solved, total_attempts, per_task stats; paginated submissions.
-    sort: most_solved | most_attempts | last_activity (default last_activity)
+    GET /api/teacher/coding-monitor?groupId=&topic=&page=&sort=&include_run=&ranking_cursor=&ranking_page_size=
+    Returns: ranking with total_tasks_solved, total_attempts, per_task stats; paginated submissions;
+    ranking is read from CodingStudentTaskStat (one row per student/task), not from submission history.
+    ranking is one page (ranking_page_size, default 50, max 200), sorted and cut in SQL;
+    rankingPage: {count, next, pageSize}; pass next back as ranking_cursor for the following page.
+    executionCache: run/submit result cache stats of this server process (hits, misses, hitRate).
+    admission: run/submit admission control of this server process (running, queueDepth, rejected).
+    sort: most_solved | most_attempts (alias most_submissions) | last_activity | cpu_time | peak_memory
+    (default last_activity)
+      most_solved: ties broken by oldest last activity (the old order), then higher student id.
+      last_activity: most recent first; ties broken by higher student id.
+      cpu_time / peak_memory: lowest average (over solved tasks) of the best CPU time / peak memory
+      of passed submissions first, students without measured passed submissions last.
     include_run: true to show RUN submissions (default SUBMIT only)
 
     Validation:
     - groupId/topic: 400 if non-integer, 404 if group not found (when groupId given)
+    - ranking_cursor: 400 if malformed or issued for another sort
     - Null-safe: task/student/profile/user can be missing; defensively handled.
     """
     from collections import defaultdict
-    from datetime import datetime
     from django.conf import settings
     from groups.models import Group, GroupStudent
-    from students.models import StudentProfile
 
     # ---- Parse & validate query params ----
     group_id_raw = (request.query_params.get('groupId') or '').strip()
@@ -146,6 +170,21 @@ def teacher_coding_monitor_view(request):
         page_size = 20
     sort = (request.query_params.get('sort') or 'last_activity').strip() or 'last_activity'
     include_run = request.query_params.get('include_run', '').lower() in ('1', 'true', 'yes')
+    ranking_cursor = (request.query_params.get('ranking_cursor') or '').strip() or None
+    try:
+        ranking_page_size = min(
+            MAX_RANKING_PAGE_SIZE,
+            max(1, int(request.query_params.get('ranking_page_size', DEFAULT_RANKING_PAGE_SIZE))),
+        )
+    except (TypeError, ValueError):
+        ranking_page_size = DEFAULT_RANKING_PAGE_SIZE
+    empty_response = {
+        'ranking': [],
+        'rankingPage': {'count': 0, 'next': None, 'pageSize': ranking_page_size},
+        'executionCache': cache_stats(),
+        'admission': admission_stats(),
+        'submissions': {'count': 0, 'next': None, 'previous': None, 'results': []},
+    }
 
     # Validate groupId: must be integer if provided
     group_id = None
@@ -186,8 +225,15 @@ def teacher_coding_monitor_view(request):
         org = getattr(request.user, 'organization_id', None)
         if org is not None:
             submissions_qs = submissions_qs.filter(organization_id=org)
+    stats_qs = CodingStudentTaskStat.objects.filter(task__deleted_at__isnull=True)
+    stats_qs = stats_qs.filter(Q(attempts__gt=0) | Q(run_attempts__gt=0)) if include_run else stats_qs.filter(attempts__gt=0)
+    if not getattr(settings, 'SINGLE_TENANT', True):
+        org = getattr(request.user, 'organization_id', None)
+        if org is not None:
+            stats_qs = stats_qs.filter(task__organization_id=org)
     if topic_id is not None:
         submissions_qs = submissions_qs.filter(task__topic_id=topic_id)
+        stats_qs = stats_qs.filter(task__topic_id=topic_id)
 
     # Restrict to students in group if groupId given
     if group_id is not None:
@@ -200,147 +246,87 @@ def teacher_coding_monitor_view(request):
         )
         student_user_ids = {x for x in student_user_ids if x is not None}
         if not student_user_ids:
-            return Response({
-                'ranking': [],
-                'submissions': {'count': 0, 'next': None, 'previous': None, 'results': []},
-            })
+            return Response(empty_response)
         submissions_qs = submissions_qs.filter(student_id__in=student_user_ids)
+        stats_qs = stats_qs.filter(student_id__in=student_user_ids)
 
     if search:
-        submissions_qs = submissions_qs.filter(
-            Q(student__full_name__icontains=search) |
-            Q(student__email__icontains=search)
-        )
+        search_q = Q(student__full_name__icontains=search) | Q(student__email__icontains=search)
+        submissions_qs = submissions_qs.filter(search_q)
+        stats_qs = stats_qs.filter(search_q)
 
-    student_ids = list(submissions_qs.values_list('student_id', flat=True).distinct())
-    student_ids = [x for x in student_ids if x is not None]
-    if not student_ids:
-        return Response({
-            'ranking': [],
-            'submissions': {'count': 0, 'next': None, 'previous': None, 'results': []},
-        })
+    ranking_count = stats_qs.values('student_id').distinct().count()
+    if not ranking_count:
+        return Response(empty_response)
 
-    # ---- Aggregates (null-safe) ----
-    passed_by_student = list(
-        submissions_qs.filter(status='passed')
-        .values('student_id', 'task_id')
-        .distinct()
-    )
-    passed_pairs = {(r['student_id'], r['task_id']) for r in passed_by_student if r.get('student_id') is not None and r.get('task_id') is not None}
-    tasks_solved = defaultdict(int)
-    for row in passed_by_student:
-        sid = row.get('student_id')
-        if sid is not None:
-            tasks_solved[sid] += 1
-
-    attempts_by_student = (
-        submissions_qs.values('student_id')
-        .annotate(total_attempts=Count('id'))
-    )
-    attempt_counts = {r['student_id']: r['total_attempts'] for r in attempts_by_student if r.get('student_id') is not None}
+    # ---- Ranking page: aggregated, sorted and cut in SQL ----
+    try:
+        page_rows, next_ranking_cursor = ranking_page(
+            stats_qs, sort, include_run, cursor=ranking_cursor, page_size=ranking_page_size
+        )
+    except InvalidCursor:
+        return Response({'detail': 'Invalid ranking_cursor'}, status=status.HTTP_400_BAD_REQUEST)
+    page_student_ids = [r['student_id'] for r in page_rows]
 
-    per_task = (
-        submissions_qs.values('student_id', 'task_id', 'task__title')
-        .annotate(attempt_count=Count('id'), last_ts=Max('created_at'))
-    )
     per_task_map = defaultdict(dict)
     per_task_detail = defaultdict(dict)
-    for row in per_task:
-        sid = row.get('student_id')
-        tid = row.get('task_id')
-        if sid is None:
-            continue
-        title = row.get('task__title') or (f"task_{tid}" if tid is not None else '')
-        per_task_map[sid][title] = row.get('attempt_count', 0)
-        if tid is not None:
-            last_ts = row.get('last_ts')
-            per_task_detail[sid][str(tid)] = {
-                'attempts': row.get('attempt_count', 0),
-                'solved': (sid, tid) in passed_pairs,
-                'last_submitted_at': last_ts.isoformat() if last_ts and hasattr(last_ts, 'isoformat') else None,
-            }
-
-    last_sub = list(
-        submissions_qs.values('student_id')
-        .annotate(last_created=Max('created_at'))
-        .values_list('student_id', 'last_created')
-    )
-    last_submission_by_student = {sid: dt for sid, dt in last_sub if sid is not None}
-
-    # ---- Profiles: null-safe (student may have no StudentProfile, user may be None) ----
-    profiles = {}
-    for p in StudentProfile.objects.filter(user_id__in=student_ids, is_deleted=False).select_related('user'):
-        if p.user_id is not None and getattr(p, 'user', None) is not None:
-            profiles[p.user_id] = p
+    for row in stats_qs.filter(student_id__in=page_student_ids).values(
+        'student_id', 'task_id', 'task__title', 'attempts', 'run_attempts', 'solved',
+        'last_submitted_at', 'last_run_at',
+    ):
+        sid = row['student_id']
+        tid = row['task_id']
+        attempts = row['attempts'] + (row['run_attempts'] if include_run else 0)
+        last_ts = row['last_submitted_at']
+        if include_run and row['last_run_at'] and (last_ts is None or row['last_run_at'] > last_ts):
+            last_ts = row['last_run_at']
+        title = row.get('task__title') or f"task_{tid}"
+        per_task_map[sid][title] = attempts
+        per_task_detail[sid][str(tid)] = {
+            'attempts': attempts,
+            'solved': row['solved'],
+            'last_submitted_at': last_ts.isoformat() if last_ts else None,
+        }
 
     group_names = defaultdict(list)
-    for gs in GroupStudent.objects.filter(
-        student_profile__user_id__in=student_ids,
+    for user_id, name in GroupStudent.objects.filter(
+        student_profile__user_id__in=page_student_ids,
         active=True,
         left_at__isnull=True
-    ).select_related('group', 'student_profile'):
-        sp = getattr(gs, 'student_profile', None)
-        if sp is not None and getattr(sp, 'user_id', None) is not None:
-            g = getattr(gs, 'group', None)
-            name = g.name if g else ''
-            group_names[sp.user_id].append(name)
-
-    # ---- Build ranking: deterministic order (include students without profile) ----
-    ranking = []
-    for sid in student_ids:
-        sp = profiles.get(sid)
-        user = getattr(sp, 'user', None) if sp else None
-        full_name = getattr(user, 'full_name', '') if user else ''
-        if sp is not None:
-            try:
-                student_data = StudentProfileSerializer(sp).data
-            except Exception:
-                student_data = {'id': getattr(sp, 'id', 0), 'userId': sid, 'fullName': full_name, 'email': '', 'class': '', 'phone': None, 'balance': 0, 'status': 'active'}
-        else:
-            student_data = {'id': 0, 'userId': sid, 'fullName': full_name, 'email': '', 'class': '', 'phone': None, 'balance': 0, 'status': 'active'}
-        total_solved = tasks_solved.get(sid, 0)
-        total_attempts = attempt_counts.get(sid, 0)
-        last_act = last_submission_by_student.get(sid)
-        group_list = group_names.get(sid, []) or []
-        pt_map = per_task_map.get(sid, {})
-        pt_detail = per_task_detail.get(sid, {})
+    ).values_list('student_profile__user_id', 'group__name'):
+        group_names[user_id].append(name or '')
 
+    # ---- Build ranking rows (lightweight student projection, SQL order kept) ----
+    ranking = []
+    for row in page_rows:
+        sid = row['student_id']
+        full_name = row['full_name'] or ''
+        student_data = {
+            'id': row['profile_id'] or 0,
+            'userId': sid,
+            'fullName': full_name,
+            'email': row['email'] or '',
+            'class': row['grade'] or '',
+        }
+        group_list = group_names.get(sid, [])
+        last_act = row['last_activity']
+        avg_cpu = row['avg_cpu']
+        avg_peak = row['avg_peak']
         ranking.append({
             'student': student_data,
             'student_id': sid,
-            'full_name': full_name or student_data.get('fullName', ''),
+            'full_name': full_name,
             'group_names': group_list,
             'groupName': ', '.join(group_list),
-            'totalTasksSolved': total_solved,
-            'totalAttempts': total_attempts,
-            'perTaskAttemptCount': pt_map,
-            'per_task_map': pt_detail,
-            'lastActivity': last_act.isoformat() if last_act and hasattr(last_act, 'isoformat') else None,
+            'totalTasksSolved': row['solved_count'],
+            'totalAttempts': row['attempt_total'] or 0,
+            'perTaskAttemptCount': per_task_map.get(sid, {}),
+            'per_task_map': per_task_detail.get(sid, {}),
+            'lastActivity': last_act.isoformat() if last_act else None,
+            'avgCpuTimeMs': round(avg_cpu) if avg_cpu is not None else None,
+            'avgPeakMemoryKb': round(avg_peak) if avg_peak is not None else None,
         })
 
-    # Deterministic sort: nulls last, then secondary keys
-    def _sort_key_last_activity(x):
-        la = x.get('lastActivity')
-        if la and isinstance(la, str):
-            try:
-                return (0, datetime.fromisoformat(la.replace('Z', '+00:00')).timestamp(), -x.get('student_id', 0))
-            except Exception:
-                pass
-        return (1, 0.0, -x.get('student_id', 0))
-
-    def _sort_key_most_solved(x):
-        return (-x.get('totalTasksSolved', 0), _sort_key_last_activity(x)[1], -x.get('student_id', 0))
-
-    def _sort_key_most_attempts(x):
-        return (-x.get('totalAttempts', 0), -x.get('totalTasksSolved', 0), -x.get('student_id', 0))
-
-    if sort in ('most_attempts', 'most_submissions'):
-        ranking.sort(key=_sort_key_most_attempts)
-    elif sort == 'last_activity':
-        ranking.sort(key=_sort_key_last_activity)
-    else:
-        ranking.sort(key=_sort_key_most_solved)
-
     # ---- Paginate submissions ----
     total_submissions = submissions_qs.count()
     offset = (page - 1) * page_size
@@ -368,11 +354,16 @@ def teacher_coding_monitor_view(request):
                 else ((s.passed_count or 0) + (s.failed_count or 0) or 0)
             ),
             'runtimeMs': getattr(s, 'runtime_ms', None),
+            'cpuTimeMs': getattr(s, 'cpu_time_ms', None),
+            'peakMemoryKb': getattr(s, 'peak_memory_kb', None),
             'createdAt': created_at.isoformat() if created_at and hasattr(created_at, 'isoformat') else '',
         })
 
     return Response({
         'ranking': ranking,
+        'rankingPage': {'count': ranking_count, 'next': next_ranking_cursor, 'pageSize': ranking_page_size},
+        'executionCache': cache_stats(),
+        'admission': admission_stats(),
         'submissions': {
             'count': total_submissions,
             'next': page + 1 if offset + len(page_submissions) < total_submissions else None,
@@ -431,6 +422,43 @@ def teacher_coding_testcase_detail_view(request, caseId):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated, IsTeacher])
+def teacher_coding_regrade_view(request, pk):
+    """
+    GET /api/teacher/coding/{id}/regrade - latest regrade job of the task ({job: null} if none)
+    POST /api/teacher/coding/{id}/regrade - body { scope: "latest" | "all" } (default latest)
+    Re-runs SUBMIT submissions against the current test cases, updating status, score, details,
+    progress and monitor stats. 202 with the new job; 200 with the unfinished job of the same scope.
+    Jobs run on the queue worker (CODING_SUBMIT_ASYNC) or in a background thread of this process.
+    """
+    from django.conf import settings
+    from django.db import transaction
+
+    try:
+        task = CodingTask.objects.get(id=pk)
+    except CodingTask.DoesNotExist:
+        return Response({'detail': 'Task not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == 'GET':
+        job = task.regrade_jobs.order_by('-id').first()
+        return Response({'job': job_payload(job) if job else None})
+
+    scope = (request.data.get('scope') or 'latest').strip()
+    if not CodingTestCase.objects.filter(task=task).exists():
+        return Response({'detail': 'No test cases defined for this task'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        job, created = start_regrade(task, scope, user=request.user)
+    except ValueError:
+        return Response({'detail': 'scope must be "latest" or "all"'}, status=status.HTTP_400_BAD_REQUEST)
+    if created and not getattr(settings, 'CODING_SUBMIT_ASYNC', False):
+        transaction.on_commit(lambda: run_in_background(job.id))
+    return Response(
+        {'job': job_payload(job)},
+        status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK,
+    )
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsTeacher])
 def teacher_coding_submissions_list_view(request):
@@ -535,18 +563,100 @@ def teacher_coding_submission_detail_view(request, pk):
         'failedCount': sub.failed_count,
         'errorMessage': sub.error_message,
         'runtimeMs': sub.runtime_ms,
+        'cpuTimeMs': sub.cpu_time_ms,
+        'peakMemoryKb': sub.peak_memory_kb,
         'attemptNo': sub.attempt_no,
         'createdAt': sub.created_at.isoformat(),
         'detailsJson': details,
     })
 
 
+class EventStreamRenderer(BaseRenderer):
+    """Lets DRF negotiate Accept: text/event-stream; errors are still rendered as JSON."""
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode()
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsTeacher])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def teacher_coding_monitor_stream_view(request):
+    """
+    GET /api/teacher/coding-monitor/stream?groupId=&topic=&include_run=&last_id=
+    Server-Sent Events: one `submission` event per new CodingSubmission
+    (id, studentId, studentName, taskId, taskTitle, topicId, status, runType, passedCount, totalCount,
+    runtimeMs, createdAt). SSE id = submission id.
+    Resume: last_id (or the Last-Event-ID header sent by EventSource on reconnect) streams everything
+    after that id first; without it only submissions created after connecting are sent.
+    The stream closes after CODING_MONITOR_STREAM_MAX_SECONDS; clients reconnect with the last id.
+    Under ASGI (config/asgi.py) idle streams hold no thread; under WSGI each holds a worker thread.
+    Validation: groupId/topic/last_id 400 if non-integer, 404 if group not found.
+    """
+    from django.conf import settings
+    from django.core.handlers.asgi import ASGIRequest
+    from django.http import StreamingHttpResponse
+    from groups.models import Group, GroupStudent
+
+    params = {}
+    for name in ('groupId', 'topic', 'last_id'):
+        raw = (request.query_params.get(name) or '').strip()
+        if name == 'last_id' and not raw:
+            raw = (request.headers.get('Last-Event-ID') or '').strip()
+        if not raw:
+            params[name] = None
+            continue
+        try:
+            params[name] = int(raw)
+        except (TypeError, ValueError):
+            return Response({'detail': f'{name} must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    include_run = request.query_params.get('include_run', '').lower() in ('1', 'true', 'yes')
+
+    organization_id = None
+    if not getattr(settings, 'SINGLE_TENANT', True):
+        organization_id = getattr(request.user, 'organization_id', None)
+    student_ids = None
+    if params['groupId'] is not None:
+        groups = Group.objects.filter(pk=params['groupId'])
+        if organization_id is not None:
+            groups = groups.filter(organization_id=organization_id)
+        if not groups.exists():
+            return Response({'detail': 'Group not found'}, status=status.HTTP_404_NOT_FOUND)
+        student_ids = set(
+            GroupStudent.objects.filter(
+                group_id=params['groupId'], active=True, left_at__isnull=True
+            ).values_list('student_profile__user_id', flat=True)
+        )
+
+    last_id = params['last_id']
+    if last_id is None:
+        last_id = get_feed().head_id()
+    accept = event_filter(
+        student_ids=student_ids,
+        topic_id=params['topic'],
+        include_run=include_run,
+        organization_id=organization_id,
+    )
+    if isinstance(request._request, ASGIRequest):
+        stream = sse_stream_async(last_id, accept)
+    else:
+        stream = sse_stream(last_id, accept)
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsTeacher])
 def teacher_student_submissions_view(request, student_id):
     """
     GET /api/teacher/coding-monitor/students/{student_id}/submissions?group_id=&topic=&page=&page_size=&include_run=
     All submissions for a student, paginated. include_run=true to show RUN submissions.
+    archivedRunCount: RUN submissions past retention (only counted, no longer listed); 0 without include_run.
     """
     from django.conf import settings
     from accounts.models import User
@@ -573,7 +683,7 @@ def teacher_student_submissions_view(request, student_id):
         student=student,
         task__deleted_at__isnull=True,
         is_archived=False,
-    ).select_related('task', 'task__topic').order_by('-created_at')
+    ).select_related('task', 'task__topic', 'code_blob').order_by('-created_at')
     if not include_run:
         submissions_qs = submissions_qs.filter(run_type='SUBMIT')
     
@@ -585,6 +695,14 @@ def teacher_student_submissions_view(request, student_id):
     total = submissions_qs.count()
     offset = (page - 1) * page_size
     page_qs = submissions_qs[offset : offset + page_size]
+    archived_runs = 0
+    if include_run:
+        task_filter = {'task__deleted_at__isnull': True}
+        if topic_id:
+            task_filter['task__topic_id'] = topic_id
+        if task_id:
+            task_filter['task_id'] = task_id
+        archived_runs = archived_run_count(student_ids=[student.id], task_filter=task_filter)
     
     submissions_data = [
         {
@@ -601,6 +719,8 @@ def teacher_student_submissions_view(request, student_id):
             'failedCount': s.failed_count,
             'errorMessage': s.error_message,
             'runtimeMs': s.runtime_ms,
+            'cpuTimeMs': s.cpu_time_ms,
+            'peakMemoryKb': s.peak_memory_kb,
             'attemptNo': s.attempt_no,
             'createdAt': s.created_at.isoformat(),
             'detailsJson': getattr(s, 'details_json', None) or [],
@@ -613,6 +733,7 @@ def teacher_student_submissions_view(request, student_id):
         'studentName': student.full_name,
         'submissions': submissions_data,
         'count': total,
+        'archivedRunCount': archived_runs,
         'page': page,
         'pageSize': page_size,
         'next': page + 1 if offset + len(submissions_data) < total else None,
@@ -215,3 +215,63 @@ SPECTACULAR_SETTINGS = {
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
 }
+
+# Coding sandbox (coding/run_code.py)
+# Warm worker pool: pre-started interpreters that fork per job (0 = disabled, cold subprocess per run).
+# Pool is unavailable on Windows and falls back to the cold path automatically.
+CODING_SANDBOX_POOL_SIZE = env.int('CODING_SANDBOX_POOL_SIZE', default=4)
+# Recycle a worker after this many jobs
+CODING_SANDBOX_MAX_JOBS = env.int('CODING_SANDBOX_MAX_JOBS', default=200)
+# Address-space limit per run in MB (0 = no limit)
+CODING_SANDBOX_MEMORY_MB = env.int('CODING_SANDBOX_MEMORY_MB', default=512)
+# Hard cap on stdout/stderr per run in KB; the process is killed once exceeded (0 = no cap)
+CODING_SANDBOX_OUTPUT_LIMIT_KB = env.int('CODING_SANDBOX_OUTPUT_LIMIT_KB', default=1024)
+# RLIMIT_NOFILE per run (0 = inherit)
+CODING_SANDBOX_MAX_OPEN_FILES = env.int('CODING_SANDBOX_MAX_OPEN_FILES', default=64)
+# Languages students may choose (python, c, cpp, javascript); ones whose toolchain is missing are hidden.
+# c/cpp also need libseccomp and static libc (programs run statically linked under a syscall allowlist).
+CODING_LANGUAGES = env.list('CODING_LANGUAGES', default=['python'])
+# Compiler wall-clock limit and built programs kept per process (compiled once per code hash)
+CODING_COMPILE_TIMEOUT_SECONDS = env.int('CODING_COMPILE_TIMEOUT_SECONDS', default=10)
+CODING_ARTIFACT_CACHE_SIZE = env.int('CODING_ARTIFACT_CACHE_SIZE', default=64)
+# Parallel test-case execution for run/submit (opt-in). Pool size 0 = CPU count.
+CODING_PARALLEL_CASES = env.bool('CODING_PARALLEL_CASES', default=False)
+CODING_PARALLEL_POOL_SIZE = env.int('CODING_PARALLEL_POOL_SIZE', default=0)
+# Max cases of one request in flight at once
+CODING_PARALLEL_MAX_PER_REQUEST = env.int('CODING_PARALLEL_MAX_PER_REQUEST', default=4)
+# Submission queue: submit returns 202 and `manage.py process_coding_queue` grades it (default: synchronous)
+CODING_SUBMIT_ASYNC = env.bool('CODING_SUBMIT_ASYNC', default=False)
+CODING_QUEUE_WORKERS = env.int('CODING_QUEUE_WORKERS', default=2)
+# Execution result cache (per process LRU, entries). 0 = disabled.
+CODING_RESULT_CACHE_SIZE = env.int('CODING_RESULT_CACHE_SIZE', default=2048)
+# Admission control for student run/submit (per server process): 429 + Retry-After when exceeded.
+CODING_ADMISSION_ENABLED = env.bool('CODING_ADMISSION_ENABLED', default=True)
+# Concurrent run/submit requests per user (async submit: pending queued submissions per user)
+CODING_ADMISSION_USER_INFLIGHT = env.int('CODING_ADMISSION_USER_INFLIGHT', default=2)
+# Token bucket per user: sustained rate and burst
+CODING_ADMISSION_RATE_PER_MINUTE = env.int('CODING_ADMISSION_RATE_PER_MINUTE', default=20)
+CODING_ADMISSION_BURST = env.int('CODING_ADMISSION_BURST', default=5)
+# Sandbox-using requests running at once; others wait (max QUEUE_SIZE, up to QUEUE_TIMEOUT seconds)
+CODING_ADMISSION_GLOBAL_SLOTS = env.int('CODING_ADMISSION_GLOBAL_SLOTS', default=8)
+CODING_ADMISSION_QUEUE_SIZE = env.int('CODING_ADMISSION_QUEUE_SIZE', default=32)
+CODING_ADMISSION_QUEUE_TIMEOUT = env.int('CODING_ADMISSION_QUEUE_TIMEOUT', default=10)
+# RUN submission retention (coding/services/retention.py): RUN rows older than N days become daily
+# counters + distinct code (0 = keep forever). process_coding_queue runs it every INTERVAL hours (0 = off).
+CODING_RUN_RETENTION_DAYS = env.int('CODING_RUN_RETENTION_DAYS', default=30)
+CODING_RUN_COMPACT_INTERVAL_HOURS = env.int('CODING_RUN_COMPACT_INTERVAL_HOURS', default=24)
+# Regrade after test case changes (coding/services/regrade.py): parallel gradings per job, submissions per batch
+CODING_REGRADE_WORKERS = env.int('CODING_REGRADE_WORKERS', default=4)
+CODING_REGRADE_BATCH_SIZE = env.int('CODING_REGRADE_BATCH_SIZE', default=50)
+# Submitted code is stored once per SHA-256 (coding.CodeBlob); sources of at least N bytes are
+# zlib-compressed when that saves space (0 = store uncompressed)
+CODING_CODE_BLOB_COMPRESS_MIN_BYTES = env.int('CODING_CODE_BLOB_COMPRESS_MIN_BYTES', default=512)
+# Teacher coding monitor live feed (SSE): DB poll interval per process, keep-alive comment interval,
+# stream lifetime before the client reconnects (0 = until the client disconnects)
+CODING_MONITOR_STREAM_POLL_SECONDS = env.float('CODING_MONITOR_STREAM_POLL_SECONDS', default=1.0)
+CODING_MONITOR_STREAM_HEARTBEAT_SECONDS = env.int('CODING_MONITOR_STREAM_HEARTBEAT_SECONDS', default=15)
+CODING_MONITOR_STREAM_MAX_SECONDS = env.int('CODING_MONITOR_STREAM_MAX_SECONDS', default=300)
+# Code safety validator (AST). Empty lists = built-in defaults in coding/run_code.py.
+# A non-empty allowlist restricts imports to exactly those top-level modules.
+CODING_VALIDATOR_ALLOWED_IMPORTS = env.list('CODING_VALIDATOR_ALLOWED_IMPORTS', default=[])
+CODING_VALIDATOR_DENIED_IMPORTS = env.list('CODING_VALIDATOR_DENIED_IMPORTS', default=[])
+CODING_VALIDATOR_DENIED_BUILTINS = env.list('CODING_VALIDATOR_DENIED_BUILTINS', default=[])
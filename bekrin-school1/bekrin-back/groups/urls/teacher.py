@@ -46,7 +46,9 @@ from coding.views.teacher import (
     teacher_coding_list_view,
     teacher_coding_detail_view,
     teacher_coding_monitor_view,
+    teacher_coding_monitor_stream_view,
     teacher_coding_testcases_list_view,
+    teacher_coding_regrade_view,
     teacher_coding_testcase_detail_view,
     teacher_coding_topics_view,
     teacher_coding_topic_delete_view,
@@ -91,7 +93,10 @@ from tests.views.exams import (
     teacher_run_update_view,
     teacher_exam_attempts_view,
     teacher_exam_attempts_cleanup_view,
+    teacher_exam_grade_bulk_view,
     teacher_exam_reset_student_view,
+    teacher_exam_rescore_view,
+    teacher_exam_analytics_view,
     teacher_attempt_detail_view,
     teacher_attempt_grade_view,
     teacher_attempt_publish_view,
@@ -159,8 +164,10 @@ urlpatterns = [
     path('coding/<int:pk>/restore', restore_coding_task_view, name='coding-task-restore'),
     path('coding/<int:pk>/hard-delete', hard_delete_coding_task_view, name='coding-task-hard-delete'),
     path('coding/<int:pk>/testcases', teacher_coding_testcases_list_view, name='coding-testcases'),
+    path('coding/<int:pk>/regrade', teacher_coding_regrade_view, name='coding-regrade'),
     path('coding/testcases/<int:caseId>', teacher_coding_testcase_detail_view, name='coding-testcase-detail'),
     path('coding-monitor', teacher_coding_monitor_view, name='coding-monitor'),
+    path('coding-monitor/stream', teacher_coding_monitor_stream_view, name='coding-monitor-stream'),
     path('coding/submissions', teacher_coding_submissions_list_view, name='coding-submissions'),
     path('coding/submissions/<int:pk>', teacher_coding_submission_detail_view, name='coding-submission-detail'),
     path('coding/student/<int:student_id>/submissions', teacher_student_submissions_view, name='student-submissions'),
@@ -197,7 +204,10 @@ urlpatterns = [
     path('runs/<int:run_id>', teacher_run_update_view, name='run-update'),
     path('exams/<int:exam_id>/attempts', teacher_exam_attempts_view, name='exam-attempts'),
     path('exams/<int:exam_id>/attempts/cleanup', teacher_exam_attempts_cleanup_view, name='exam-attempts-cleanup'),
+    path('exams/<int:exam_id>/grade', teacher_exam_grade_bulk_view, name='exam-grade-bulk'),
     path('exams/<int:exam_id>/reset-student', teacher_exam_reset_student_view, name='exam-reset-student'),
+    path('exams/<int:exam_id>/rescore', teacher_exam_rescore_view, name='exam-rescore'),
+    path('exams/<int:exam_id>/analytics', teacher_exam_analytics_view, name='exam-analytics'),
     path('attempts/<int:attempt_id>', teacher_attempt_detail_view, name='attempt-detail'),
     path('attempts/<int:attempt_id>/grade', teacher_attempt_grade_view, name='attempt-grade'),
     path('attempts/<int:attempt_id>/publish', teacher_attempt_publish_view, name='attempt-publish'),
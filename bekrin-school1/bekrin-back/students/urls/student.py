@@ -12,6 +12,7 @@ from ..views.student import (
     student_coding_submission_detail_view,
     student_coding_run_view,
     student_coding_submit_view,
+    student_coding_submission_status_view,
 )
 from tests.views.exams import (
     student_exams_list_view,
@@ -32,6 +33,7 @@ urlpatterns = [
     path('results', student_results_view, name='results'),
     path('coding', student_coding_view, name='coding'),
     path('coding/run', student_coding_run_view, name='coding-run'),
+    path('coding/submissions/<int:submission_id>/status', student_coding_submission_status_view, name='coding-submission-status'),
     path('coding/<int:pk>', student_coding_detail_view, name='coding-detail'),
     path('coding/<int:pk>/submissions', student_coding_submissions_view, name='coding-submissions'),
     path('coding/<int:pk>/submissions/<int:submission_id>', student_coding_submission_detail_view, name='coding-submission-detail'),
@@ -11,6 +11,7 @@ from attendance.serializers import AttendanceRecordSerializer
 from tests.models import TestResult
 from tests.serializers import TestResultSerializer
 from coding.models import CodingTask, CodingProgress, CodingSubmission
+from django.db import transaction
 from django.db.models import Count
 
 
@@ -88,11 +89,13 @@ def student_results_view(request):
 @permission_classes([IsAuthenticated, IsStudent])
 def student_coding_view(request):
     """
-    GET /api/student/coding?topic=&status=&search=&sort=
+    GET /api/student/coding?topic=&status=&search=&sort=&page=&page_size=
     topic: topic id (optional)
     status: all | solved | attempted | not_attempted
     search: search in title (optional)
     sort: newest | most_solved | last_activity
+    page: optional; when given returns {count, next, previous, results} (page_size default 20, max 100),
+    otherwise the full list. Per-task stats, filtering and sorting are done in one annotated query.
     """
     try:
         student_profile = request.user.student_profile
@@ -100,6 +103,8 @@ def student_coding_view(request):
         return Response({'detail': 'Student profile not found'}, status=status.HTTP_404_NOT_FOUND)
 
     from django.conf import settings
+    from django.db.models import Exists, F, IntegerField, OuterRef, Q, Subquery, Value
+    from django.db.models.functions import Coalesce
     user = request.user
     tasks_qs = CodingTask.objects.filter(
         deleted_at__isnull=True,
@@ -116,82 +121,84 @@ def student_coding_view(request):
         except ValueError:
             pass
     search = (request.query_params.get('search') or '').strip()
-    from django.db.models import Q
     if search:
         tasks_qs = tasks_qs.filter(
             Q(title__icontains=search) | Q(description__icontains=search)
         )
-    tasks_qs = tasks_qs.select_related('topic')
-    task_ids = list(tasks_qs.values_list('id', flat=True))
-    if not task_ids:
-        return Response([])
-
-    # Submission stats per task for this student
-    stats_by_task = {}
-    for r in CodingSubmission.objects.filter(
-        student_id=user.id,
-        task_id__in=task_ids,
-    ).values('task_id').annotate(attempt_count=Count('id')):
-        stats_by_task[r['task_id']] = r
-    last_by_task = {}
-    for s in CodingSubmission.objects.filter(
-        student_id=user.id,
-        task_id__in=task_ids,
-    ).order_by('task_id', '-created_at').values('task_id', 'status', 'created_at'):
-        if s['task_id'] not in last_by_task:
-            last_by_task[s['task_id']] = s
-    passed_tasks = set(
-        CodingSubmission.objects.filter(
-            student_id=user.id,
-            task_id__in=task_ids,
-            status='passed',
-        ).values_list('task_id', flat=True).distinct()
+
+    # Submission stats per task for this student (correlated subqueries on the (student, task) index)
+    own = CodingSubmission.objects.filter(task_id=OuterRef('pk'), student_id=user.id)
+    latest = own.order_by('-created_at', '-id')
+    tasks_qs = tasks_qs.select_related('topic').annotate(
+        attempt_count=Coalesce(
+            Subquery(
+                own.order_by().values('task_id').annotate(c=Count('id')).values('c')[:1],
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        ),
+        solved=Exists(own.filter(status='passed')),
+        last_status=Subquery(latest.values('status')[:1]),
+        last_at=Subquery(latest.values('created_at')[:1]),
     )
 
     status_filter = (request.query_params.get('status') or 'all').strip().lower()
+    if status_filter in ('solved', 'completed'):
+        tasks_qs = tasks_qs.filter(solved=True)
+    elif status_filter == 'not_completed':
+        tasks_qs = tasks_qs.filter(solved=False)
+    elif status_filter == 'attempted':
+        tasks_qs = tasks_qs.filter(attempt_count__gt=0)
+    elif status_filter == 'not_attempted':
+        tasks_qs = tasks_qs.filter(attempt_count=0)
+
     sort = (request.query_params.get('sort') or 'newest').strip().lower()
-    if sort not in ('newest', 'most_solved', 'last_activity'):
-        sort = 'newest'
-
-    result = []
-    for task in tasks_qs:
-        st = stats_by_task.get(task.id, {})
-        attempt_count = st.get('attempt_count', 0)
-        solved = task.id in passed_tasks
-        last = last_by_task.get(task.id, {})
-        last_status = last.get('status') if last else None
-        last_created = last.get('created_at') if last else None
-        if status_filter == 'solved' and not solved:
-            continue
-        if status_filter == 'attempted' and attempt_count == 0:
-            continue
-        if status_filter == 'not_attempted' and attempt_count > 0:
-            continue
-        if status_filter == 'completed' and not solved:
-            continue
-        if status_filter == 'not_completed' and solved:
-            continue
-        result.append({
+    if sort == 'most_solved':
+        tasks_qs = tasks_qs.order_by('-solved', '-attempt_count', '-id')
+    elif sort == 'last_activity':
+        tasks_qs = tasks_qs.order_by(F('last_at').desc(nulls_last=True), '-id')
+    else:
+        tasks_qs = tasks_qs.order_by(F('created_at').desc(nulls_last=True), '-id')
+
+    paginated = 'page' in request.query_params
+    if paginated:
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+        except (TypeError, ValueError):
+            page = 1
+        try:
+            page_size = min(100, max(1, int(request.query_params.get('page_size', 20))))
+        except (TypeError, ValueError):
+            page_size = 20
+        total = tasks_qs.count()
+        offset = (page - 1) * page_size
+        tasks_qs = tasks_qs[offset:offset + page_size]
+
+    result = [
+        {
             'id': task.id,
             'title': task.title,
             'description': task.description,
             'difficulty': task.difficulty,
             'topicId': task.topic_id,
             'topicName': task.topic.name if task.topic else None,
-            'solved': solved,
-            'attemptCount': attempt_count,
-            'lastSubmissionStatus': last_status,
-            'lastSubmissionAt': last_created.isoformat() if last_created else None,
-            'createdAt': task.created_at.isoformat() if hasattr(task, 'created_at') and task.created_at else None,
+            'solved': task.solved,
+            'attemptCount': task.attempt_count,
+            'lastSubmissionStatus': task.last_status,
+            'lastSubmissionAt': task.last_at.isoformat() if task.last_at else None,
+            'createdAt': task.created_at.isoformat() if task.created_at else None,
             'score': None,
-        })
-    if sort == 'newest':
-        result.sort(key=lambda x: (x['createdAt'] or ''), reverse=True)
-    elif sort == 'most_solved':
-        result.sort(key=lambda x: (x['solved'], x['attemptCount']), reverse=True)
-    elif sort == 'last_activity':
-        result.sort(key=lambda x: (x['lastSubmissionAt'] or ''), reverse=True)
-    return Response(result)
+        }
+        for task in tasks_qs
+    ]
+    if not paginated:
+        return Response(result)
+    return Response({
+        'count': total,
+        'next': page + 1 if offset + len(result) < total else None,
+        'previous': page - 1 if page > 1 else None,
+        'results': result,
+    })
 
 
 @api_view(['GET'])
@@ -199,7 +206,7 @@ def student_coding_view(request):
 def student_coding_detail_view(request, pk):
     """
     GET /api/student/coding/{id}
-    Task details, starter_code, test_case_count (not full test cases).
+    Task details, starter_code, test_case_count (not full test cases), languages the code can be written in.
     """
     try:
         request.user.student_profile
@@ -219,6 +226,7 @@ def student_coding_detail_view(request, pk):
     if not task:
         return Response({'detail': 'Task not found'}, status=status.HTTP_404_NOT_FOUND)
     from coding.models import CodingTestCase
+    from coding.run_code import language_choices
     test_case_count = CodingTestCase.objects.filter(task_id=task.id).count()
     return Response({
         'id': task.id,
@@ -229,6 +237,7 @@ def student_coding_detail_view(request, pk):
         'topicId': task.topic_id,
         'topicName': task.topic.name if task.topic else None,
         'testCaseCount': test_case_count,
+        'languages': language_choices(),
     })
 
 
@@ -319,15 +328,30 @@ def _log_coding_debug(msg, data=None):
     print(f'[coding] {msg}', data or '', file=sys.stderr)
 
 
+def _requested_language(request):
+    """Body "language" (default python), or None when it is not one of the enabled coding languages."""
+    from coding.run_code import enabled_languages
+    language = str(request.data.get('language') or 'python').strip().lower()
+    return language if language in enabled_languages() else None
+
+
+def _unsupported_language_response(request):
+    return Response(
+        {'error': 'Unsupported language', 'details': {'language': request.data.get('language')}},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsStudent])
 def student_coding_run_view(request):
     """
     POST /api/student/coding/run
-    Body: { "taskId" or "task_id": <id>, "code": "..." }
+    Body: { "taskId" or "task_id": <id>, "code": "...", "language": "python" (optional, see CODING_LANGUAGES) }
     Run code against first 2 test cases (by order_index, then is_sample).
     Returns: { status: OK|ERROR, results: [{testCaseId, input, expected, actual, passed}], passedCount, totalCount }
     Optionally saves as submission with run_type=RUN.
+    429 + Retry-After when admission control rejects the request (coding.services.admission).
     """
     try:
         request.user.student_profile
@@ -344,9 +368,15 @@ def student_coding_run_view(request):
     if not code:
         return Response({'error': 'Code is required', 'details': {'code': 'Empty'}}, status=status.HTTP_400_BAD_REQUEST)
     from django.conf import settings
-    from coding.run_code import run_python_code_timed, check_output_match, validate_code_safe
+    from coding.result_cache import run_cases_cached
+    from coding.output_compare import compare_case
+    from coding.run_code import validate_code_safe
+    from coding.services.admission import AdmissionRejected, admission_rejected_response, admit
 
-    ok, msg = validate_code_safe(code)
+    language = _requested_language(request)
+    if language is None:
+        return _unsupported_language_response(request)
+    ok, msg = validate_code_safe(code, language)
     if not ok:
         return Response({'error': msg, 'details': {'code': 'Validation failed'}}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -374,14 +404,21 @@ def student_coding_run_view(request):
     run_timeout = 2
     results = []
     passed_count = 0
-    for tc in sample_cases:
-        stdout, stderr, return_code, _ = run_python_code_timed(code, tc.input_data, timeout_seconds=run_timeout)
+    try:
+        with admit(request.user.id):
+            case_results = run_cases_cached(
+                task.id, code, [tc.input_data for tc in sample_cases], per_case_timeout=run_timeout, language=language,
+            )
+    except AdmissionRejected as exc:
+        return admission_rejected_response(exc)
+    for tc, (stdout, stderr, return_code, *_) in zip(sample_cases, case_results):
         actual = (stdout or '') if return_code == 0 else (stderr or stdout or 'Runtime error')
         if return_code != 0 and return_code != -1:
             actual = (stderr or stdout or 'Runtime error')[:2000]
         elif return_code == -1 and 'Timeout' in (stderr or ''):
             actual = 'Timeout'
-        passed = return_code == 0 and check_output_match(stdout, tc.expected)
+        comparison = compare_case(stdout, tc) if return_code == 0 else None
+        passed = comparison is not None and comparison.passed
         if passed:
             passed_count += 1
         results.append({
@@ -390,21 +427,26 @@ def student_coding_run_view(request):
             'expected': (tc.expected or '')[:500],
             'actual': actual[:2000],
             'passed': passed,
+            'firstDiff': (
+                {'line': comparison.line, 'column': comparison.column, 'expected': comparison.expected, 'got': comparison.got}
+                if comparison is not None and not passed else None
+            ),
         })
     resp_status = 'OK' if passed_count == len(sample_cases) else 'ERROR'
-    # Save RUN as submission for teacher monitor (toggle to show runs)
-    CodingSubmission.objects.create(
-        organization_id=task.organization_id,
-        task=task,
-        student=request.user,
-        submitted_code=code,
-        language='python',
-        run_type='RUN',
-        passed_count=passed_count,
-        total_count=len(sample_cases),
-        failed_count=len(sample_cases) - passed_count,
-        status='passed' if passed_count == len(sample_cases) else 'failed',
-    )
+    # Save RUN as submission for teacher monitor (toggle to show runs); stats row updates in the same transaction
+    with transaction.atomic():
+        CodingSubmission.objects.create(
+            organization_id=task.organization_id,
+            task=task,
+            student=request.user,
+            submitted_code=code,
+            language=language,
+            run_type='RUN',
+            passed_count=passed_count,
+            total_count=len(sample_cases),
+            failed_count=len(sample_cases) - passed_count,
+            status='passed' if passed_count == len(sample_cases) else 'failed',
+        )
     return Response({
         'status': resp_status,
         'results': results,
@@ -418,16 +460,30 @@ def student_coding_run_view(request):
 def student_coding_submit_view(request, pk):
     """
     POST /api/student/coding/{id}/submit
-    Body: { "code": "...", "language": "python" (optional) }
+    Body: { "code": "...", "language": "python" (optional, see CODING_LANGUAGES) }
     Run code against ALL test cases, save submission with run_type=SUBMIT.
     Returns: { submissionId, status: ACCEPTED|WRONG_ANSWER|ERROR|TIMEOUT, passedCount, totalCount }
+    CODING_SUBMIT_ASYNC: 202 with resultStatus=queued instead; poll
+    GET /api/student/coding/submissions/{id}/status until done.
+    429 + Retry-After when admission control rejects the request (coding.services.admission).
     """
     try:
         request.user.student_profile
     except Exception:
         return Response({'error': 'Student profile not found', 'details': {}}, status=status.HTTP_404_NOT_FOUND)
     from django.conf import settings
-    from coding.run_code import run_python_code_timed, check_output_match, validate_code_safe
+    from coding.run_code import validate_code_safe
+    from coding.services.admission import AdmissionRejected, admission_rejected_response, admit, admit_enqueue
+    from coding.services.submissions import (
+        PENDING_STATUSES,
+        display_status,
+        enqueue_submission,
+        grade_code,
+        next_attempt_no,
+        queue_position,
+        task_cases,
+        update_progress_for,
+    )
 
     tasks_qs = CodingTask.objects.filter(id=pk, deleted_at__isnull=True, is_archived=False)
     if not getattr(settings, 'SINGLE_TENANT', True):
@@ -440,96 +496,62 @@ def student_coding_submit_view(request, pk):
     code = (request.data.get('code') or request.data.get('submitted_code') or '').strip()
     if not code:
         return Response({'error': 'Code is required', 'details': {'code': 'Empty'}}, status=status.HTTP_400_BAD_REQUEST)
-    ok, msg = validate_code_safe(code)
+    language = _requested_language(request)
+    if language is None:
+        return _unsupported_language_response(request)
+    ok, msg = validate_code_safe(code, language)
     if not ok:
         return Response({'error': msg, 'details': {'code': 'Validation failed'}}, status=status.HTTP_400_BAD_REQUEST)
-    from coding.models import CodingTestCase
-    cases = list(CodingTestCase.objects.filter(task=task).order_by('order_index', 'id'))
+    cases = task_cases(task)
     if not cases:
         _log_coding_debug('submit no test cases', pk)
         return Response(
             {'error': 'No test cases defined for this task'},
             status=status.HTTP_400_BAD_REQUEST,
         )
-    passed_count = 0
-    failed_count = 0
-    total_time_ms = 0
-    error_message = None
-    result_status = 'passed'
-    run_timeout = 5
-    details_list = []
-    for tc in cases:
-        stdout, stderr, return_code, elapsed_ms = run_python_code_timed(
-            code, tc.input_data, timeout_seconds=run_timeout
-        )
-        total_time_ms += elapsed_ms
-        passed = False
-        if return_code == -1 and stderr and 'Timeout' in stderr:
-            result_status = 'timeout'
-            error_message = 'Execution timeout'
-            failed_count += 1
-            details_list.append({
-                'test_case_id': tc.id, 'is_sample': tc.is_sample, 'passed': False,
-                'input': (tc.input_data or '')[:2000], 'output': (stderr or '')[:2000], 'expected': (tc.expected or '')[:2000],
-            })
-            break
-        if return_code != 0:
-            result_status = 'error'
-            error_message = (stderr or stdout or 'Runtime error')[:500]
-            failed_count += 1
-            details_list.append({
-                'test_case_id': tc.id, 'is_sample': tc.is_sample, 'passed': False,
-                'input': (tc.input_data or '')[:2000], 'output': (stderr or stdout or '')[:2000], 'expected': (tc.expected or '')[:2000],
-            })
-            break
-        passed = check_output_match(stdout, tc.expected)
-        if passed:
-            passed_count += 1
-        else:
-            failed_count += 1
-            if result_status == 'passed':
-                result_status = 'failed'
-                error_message = 'Wrong answer'
-        details_list.append({
-            'test_case_id': tc.id, 'is_sample': tc.is_sample, 'passed': passed,
-            'input': (tc.input_data or '')[:2000], 'output': (stdout or '')[:2000], 'expected': (tc.expected or '')[:2000],
-        })
-    if result_status == 'passed' and failed_count == 0:
-        passed_count = len(cases)
-        failed_count = 0
-    total_tests = len(cases)
-    display_status = 'Accepted' if result_status == 'passed' else 'Wrong Answer'
-    if result_status in ('timeout', 'error'):
-        display_status = result_status
-    attempt_no = CodingSubmission.objects.filter(
-        task=task,
-        student=request.user,
-    ).count() + 1
-    sub = CodingSubmission.objects.create(
-        organization_id=task.organization_id,
-        task=task,
-        student=request.user,
-        submitted_code=code,
-        language='python',
-        run_type='SUBMIT',
-        total_count=total_tests,
-        status=result_status,
-        score=int(100 * passed_count / total_tests) if total_tests else 0,
-        passed_count=passed_count,
-        failed_count=failed_count,
-        error_message=error_message,
-        runtime_ms=total_time_ms or None,
-        attempt_no=attempt_no,
-        details_json=details_list,
-    )
-    if result_status == 'passed':
-        CodingProgress.objects.update_or_create(
-            student_profile=request.user.student_profile,
-            exercise=task,
-            defaults={'status': 'completed', 'score': sub.score or 0},
+    if getattr(settings, 'CODING_SUBMIT_ASYNC', False):
+        pending = CodingSubmission.objects.filter(
+            student=request.user, run_type='SUBMIT', status__in=PENDING_STATUSES
+        ).count()
+        try:
+            admit_enqueue(request.user.id, pending)
+        except AdmissionRejected as exc:
+            return admission_rejected_response(exc)
+        sub = enqueue_submission(task, request.user, code, len(cases), language)
+        return Response({
+            'status': display_status(sub.status),
+            'passed_tests': 0,
+            'total_tests': len(cases),
+            'submissionId': sub.id,
+            'resultStatus': sub.status,
+            'passedCount': 0,
+            'totalCases': len(cases),
+            'score': None,
+            'queuePosition': queue_position(sub),
+            'createdAt': sub.created_at.isoformat(),
+        }, status=status.HTTP_202_ACCEPTED)
+    try:
+        with admit(request.user.id):
+            result = grade_code(code, cases, language=language)
+    except AdmissionRejected as exc:
+        return admission_rejected_response(exc)
+    with transaction.atomic():
+        sub = CodingSubmission.objects.create(
+            organization_id=task.organization_id,
+            task=task,
+            student=request.user,
+            submitted_code=code,
+            language=language,
+            run_type='SUBMIT',
+            attempt_no=next_attempt_no(task, request.user),
+            **result,
         )
+    update_progress_for(sub)
+    passed_count = sub.passed_count
+    total_tests = sub.total_count
+    result_status = sub.status
     return Response({
-        'status': display_status,
+        'status': display_status(result_status),
         'passed_tests': passed_count,
         'total_tests': total_tests,
         'submissionId': sub.id,
@@ -539,3 +561,35 @@ def student_coding_submit_view(request, pk):
         'score': sub.score,
         'createdAt': sub.created_at.isoformat(),
     }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsStudent])
+def student_coding_submission_status_view(request, submission_id):
+    """
+    GET /api/student/coding/submissions/{submissionId}/status
+    Poll a (possibly queued) submit. Same keys as the submit response plus done, queuePosition.
+    """
+    from coding.services.submissions import PENDING_STATUSES, display_status, queue_position
+    sub = CodingSubmission.objects.filter(
+        id=submission_id,
+        student_id=request.user.id,
+        run_type='SUBMIT',
+    ).first()
+    if not sub:
+        return Response({'detail': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
+    done = sub.status not in PENDING_STATUSES
+    return Response({
+        'status': display_status(sub.status),
+        'done': done,
+        'passed_tests': sub.passed_count or 0,
+        'total_tests': sub.total_count or 0,
+        'submissionId': sub.id,
+        'taskId': sub.task_id,
+        'resultStatus': sub.status,
+        'passedCount': sub.passed_count or 0,
+        'totalCases': sub.total_count or 0,
+        'score': sub.score if done else None,
+        'queuePosition': queue_position(sub),
+        'createdAt': sub.created_at.isoformat(),
+    })
@@ -0,0 +1,337 @@
+"""
+Per-question exam analytics (item analysis) over finished, non-archived attempts.
+Every finished attempt with its ExamAnswer rows (left join: an attempt without answers scores 0 on every
+item) is read in one query into columns (attempt, question, score, correct, chosen option); with NumPy they become an attempts x questions matrix and every statistic is one
+vectorized pass, without it the same numbers are computed in plain Python.
+  - pValue: share of attempts answering an auto-graded (mc/open) question correctly
+  - discrimination: point-biserial correlation of the item score with the rest of the total
+    (total_score minus the item), so the item does not correlate with itself
+  - options: selection counts per mc option (blank = no option chosen), correct option marked
+  - histograms: total and auto scores in 10 bins over [0, exam max]
+Results are memoized per exam until the attempts or their answers change (new submit, grading, rescoring,
+archiving) or the answer key changes; the check is two aggregate queries (attempts, answers per question).
+"""
+import math
+import statistics
+import threading
+from collections import OrderedDict
+
+from django.db.models import BooleanField, Count, DecimalField, ExpressionWrapper, F, Max, Q, Sum
+from django.utils import timezone
+
+from tests.grading import answer_key_version, get_grading_plan, points_per_question
+from tests.models import ExamAnswer, ExamAttempt, ExamQuestion
+
+# Optional: numpy for the vectorized path
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+HISTOGRAM_BINS = 10
+# Below this the item or the rest score is treated as constant: no discrimination
+MIN_VARIANCE = 1e-9
+ANALYTICS_CACHE_SIZE = 64
+BANK_KINDS = {
+    'MULTIPLE_CHOICE': 'mc', 'OPEN_SINGLE_VALUE': 'open', 'OPEN_ORDERED': 'open', 'OPEN_UNORDERED': 'open',
+    'SITUATION': 'situation',
+}
+OPTION_LABELS = 'ABCDEFGH'
+
+
+def _attempts(exam):
+    return ExamAttempt.objects.filter(exam=exam, finished_at__isnull=False, is_archived=False)
+
+
+def _weighted(field):
+    """field * attempt id: a per-question sum of it changes when points move between attempts."""
+    return ExpressionWrapper(F(field) * F('attempt_id'), output_field=DecimalField(max_digits=30, decimal_places=2))
+
+
+def analytics_fingerprint(exam):
+    """
+    Changes whenever an attempt is submitted, graded, rescored or archived, an answer's points change
+    (also when manual points only move between answers and the attempt totals stay the same),
+    or the answer key changes.
+    """
+    agg = _attempts(exam).aggregate(
+        n=Count('id'), last_id=Max('id'), last_finished=Max('finished_at'), checked=Count('id', filter=Q(is_checked=True)),
+        auto=Sum('auto_score'), manual=Sum('manual_score'), total=Sum('total_score'),
+    )
+    answers = ExamAnswer.objects.filter(
+        attempt__exam=exam, attempt__finished_at__isnull=False, attempt__is_archived=False,
+    ).values('question_id', 'question_number').annotate(
+        n=Count('id'), last_id=Max('id'), graded=Count('manual_score'),
+        auto=Sum('auto_score'), manual=Sum('manual_score'),
+        auto_placed=Sum(_weighted('auto_score')), manual_placed=Sum(_weighted('manual_score')),
+    ).values_list(
+        'question_id', 'question_number', 'n', 'last_id', 'graded', 'auto', 'manual', 'auto_placed', 'manual_placed',
+    ).order_by('question_id', 'question_number')
+    key_version = answer_key_version(exam.answer_key_json) if exam.answer_key_json else None
+    return ((key_version, exam.type, exam.max_score) + tuple(str(agg[k]) for k in sorted(agg))
+            + tuple(tuple(str(v) for v in row) for row in answers))
+
+
+def _questions(exam):
+    """Question descriptors in grading order: ref (number or question id), number, kind, option keys, correct key."""
+    if exam.source_type in ('PDF', 'JSON'):
+        plan = get_grading_plan(exam)
+        if plan is None:
+            return []
+        return [{
+            'ref': rule.number, 'number': rule.number, 'questionId': None, 'kind': rule.kind,
+            'options': list(rule.option_keys.values()), 'correct': rule.correct_key,
+        } for rule in plan.questions]
+    type_order = {'mc': 0, 'open': 1, 'situation': 2}
+    eqs = list(ExamQuestion.objects.filter(exam=exam).select_related('question').prefetch_related('question__options'))
+    eqs.sort(key=lambda eq: (type_order.get(BANK_KINDS.get(eq.question.type), 99), eq.order))
+    questions = []
+    for i, eq in enumerate(eqs, start=1):
+        options = sorted(eq.question.options.all(), key=lambda o: (o.order, o.id))
+        labels = {o.id: OPTION_LABELS[j] if j < len(OPTION_LABELS) else str(o.id) for j, o in enumerate(options)}
+        questions.append({
+            'ref': eq.question_id, 'number': i, 'questionId': eq.question_id,
+            'kind': BANK_KINDS.get(eq.question.type, 'open'),
+            'options': [labels[o.id] for o in options],
+            'correct': next((labels[o.id] for o in options if o.is_correct), None),
+            'labels': labels,
+        })
+    return questions
+
+
+def _load_columns(exam, questions):
+    """
+    One query: every finished attempt, left-joined with its answers, as parallel lists (attempt columns
+    once per attempt, answer columns once per answer row). Attempts without answers still count.
+    """
+    bank = exam.source_type not in ('PDF', 'JSON')
+    q_index = {q['ref']: i for i, q in enumerate(questions)}
+    rows = _attempts(exam).annotate(
+        has_text=ExpressionWrapper(
+            Q(answers__text_answer__isnull=False) & ~Q(answers__text_answer=''), output_field=BooleanField(),
+        ),
+    ).values_list(
+        'id', 'total_score', 'auto_score', 'answers__id', 'answers__question_id', 'answers__question_number',
+        'answers__selected_option_key', 'answers__selected_option', 'has_text', 'answers__auto_score',
+        'answers__manual_score',
+    ).order_by('id')
+    cols = {
+        'attempt_ids': [], 'totals': [], 'autos': [],
+        'a_idx': [], 'q_idx': [], 'score': [], 'correct': [], 'choice': [], 'answered': [], 'graded': [],
+    }
+    last_attempt = None
+    for (attempt_id, total, auto, answer_id, qid, number, option_key, option_id, has_text, auto_score,
+         manual_score) in rows.iterator(chunk_size=5000):
+        if attempt_id != last_attempt:
+            cols['attempt_ids'].append(attempt_id)
+            cols['totals'].append(float(total or 0))
+            cols['autos'].append(float(auto or 0))
+            last_attempt = attempt_id
+        q = q_index.get(qid if bank else number) if answer_id is not None else None
+        if q is None:
+            continue
+        question = questions[q]
+        if bank:
+            choice = question['labels'].get(option_id, str(option_id)) if option_id is not None else None
+        else:
+            choice = (option_key or '').strip().upper() or None
+        cols['a_idx'].append(len(cols['attempt_ids']) - 1)
+        cols['q_idx'].append(q)
+        cols['score'].append(float(auto_score or 0) + float(manual_score or 0))
+        cols['correct'].append(bool(auto_score and auto_score > 0))
+        cols['choice'].append(choice)
+        cols['answered'].append(choice is not None or bool(has_text))
+        cols['graded'].append(manual_score is not None)
+    return cols
+
+
+def _round(value, digits=4):
+    if value is None or (isinstance(value, float) and not math.isfinite(value)):
+        return None
+    return round(float(value), digits)
+
+
+def _histogram_python(values, max_score):
+    width = max_score / HISTOGRAM_BINS
+    counts = [0] * HISTOGRAM_BINS
+    for v in values:
+        counts[min(max(int(v / width), 0), HISTOGRAM_BINS - 1)] += 1
+    return counts
+
+
+def _correlation_python(xs, ys):
+    n = len(xs)
+    mx, my = sum(xs) / n, sum(ys) / n
+    sxy = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    sxx = sum((x - mx) ** 2 for x in xs)
+    syy = sum((y - my) ** 2 for y in ys)
+    if sxx <= MIN_VARIANCE or syy <= MIN_VARIANCE:
+        return None
+    return sxy / math.sqrt(sxx * syy)
+
+
+def _compute_python(cols, questions):
+    n, nq = len(cols['attempt_ids']), len(questions)
+    scores = [[0.0] * nq for _ in range(n)]
+    correct = [[False] * nq for _ in range(n)]
+    answered = [0] * nq
+    graded = [0] * nq
+    choices = [{} for _ in range(nq)]
+    for a, q, score, ok, choice, ans, gr in zip(
+        cols['a_idx'], cols['q_idx'], cols['score'], cols['correct'], cols['choice'], cols['answered'], cols['graded'],
+    ):
+        scores[a][q] += score
+        correct[a][q] = correct[a][q] or ok
+        answered[q] += ans
+        graded[q] += gr
+        choices[q][choice] = choices[q].get(choice, 0) + 1
+    totals = cols['totals']
+    per_question = []
+    for q in range(nq):
+        item = [scores[a][q] for a in range(n)]
+        per_question.append({
+            'p': sum(correct[a][q] for a in range(n)) / n,
+            'mean': sum(item) / n,
+            'r': _correlation_python(item, [totals[a] - item[a] for a in range(n)]),
+            'answered': answered[q], 'graded': graded[q], 'choices': choices[q],
+        })
+    return per_question
+
+
+def _compute_numpy(cols, questions):
+    n, nq = len(cols['attempt_ids']), len(questions)
+    a_idx = np.asarray(cols['a_idx'], dtype=np.int64)
+    q_idx = np.asarray(cols['q_idx'], dtype=np.int64)
+    scores = np.zeros((n, nq))
+    np.add.at(scores, (a_idx, q_idx), np.asarray(cols['score'], dtype=float))
+    ok = np.asarray(cols['correct'], dtype=bool)
+    correct = np.zeros((n, nq), dtype=bool)
+    correct[a_idx[ok], q_idx[ok]] = True
+    answered = np.bincount(q_idx, weights=np.asarray(cols['answered'], dtype=float), minlength=nq)
+    graded = np.bincount(q_idx, weights=np.asarray(cols['graded'], dtype=float), minlength=nq)
+
+    totals = np.asarray(cols['totals'], dtype=float)
+    rest = totals[:, None] - scores
+    xm = scores - scores.mean(axis=0)
+    rm = rest - rest.mean(axis=0)
+    sxx, srr = (xm ** 2).sum(axis=0), (rm ** 2).sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.where((sxx > MIN_VARIANCE) & (srr > MIN_VARIANCE), (xm * rm).sum(axis=0) / np.sqrt(sxx * srr), np.nan)
+    p = correct.mean(axis=0)
+    mean = scores.mean(axis=0)
+
+    # Option counts: one bincount over (question, option code) pairs
+    codes = {}
+    choice_codes = np.asarray([codes.setdefault(c, len(codes)) for c in cols['choice']], dtype=np.int64)
+    pair_counts = np.bincount(q_idx * len(codes) + choice_codes, minlength=nq * len(codes)).reshape(nq, len(codes)) if codes else None
+    per_question = []
+    for q in range(nq):
+        choices = {}
+        if pair_counts is not None:
+            for choice, code in codes.items():
+                if pair_counts[q, code]:
+                    choices[choice] = int(pair_counts[q, code])
+        per_question.append({
+            'p': float(p[q]), 'mean': float(mean[q]), 'r': None if np.isnan(r[q]) else float(r[q]),
+            'answered': int(answered[q]), 'graded': int(graded[q]), 'choices': choices,
+        })
+    return per_question
+
+
+def _summary(values, max_score, use_numpy):
+    if use_numpy:
+        arr = np.clip(np.asarray(values, dtype=float), 0, max_score)
+        counts, _ = np.histogram(arr, bins=HISTOGRAM_BINS, range=(0, max_score))
+        raw = np.asarray(values, dtype=float)
+        stats = (float(raw.mean()), float(np.median(raw)), float(raw.std()), float(raw.min()), float(raw.max()))
+        counts = [int(c) for c in counts]
+    else:
+        stats = (statistics.mean(values), statistics.median(values), statistics.pstdev(values), min(values), max(values))
+        counts = _histogram_python(values, max_score)
+    return stats, counts
+
+
+def compute_exam_analytics(exam, use_numpy=None):
+    """Item analysis of exam (uncached). use_numpy=None picks NumPy when it is installed."""
+    use_numpy = HAS_NUMPY if use_numpy is None else (use_numpy and HAS_NUMPY)
+    questions = _questions(exam)
+    cols = _load_columns(exam, questions)
+    max_score = float(exam.max_score or (100 if exam.type == 'quiz' else 150))
+    pts = float(points_per_question(exam.type))
+    n = len(cols['attempt_ids'])
+    result = {
+        'examId': exam.id,
+        'attempts': n,
+        'maxScore': max_score,
+        'engine': 'numpy' if use_numpy else 'python',
+        'computedAt': timezone.now().isoformat(),
+        'questions': [],
+        'scores': None,
+        'histograms': None,
+    }
+    if not n:
+        return result
+    per_question = (_compute_numpy if use_numpy else _compute_python)(cols, questions) if questions else []
+    edges = [_round(max_score * i / HISTOGRAM_BINS, 2) for i in range(HISTOGRAM_BINS + 1)]
+    for question, stats in zip(questions, per_question):
+        auto = question['kind'] in ('mc', 'open')
+        item = {
+            'questionNumber': question['number'],
+            'questionId': question['questionId'],
+            'kind': question['kind'],
+            'pValue': _round(stats['p']) if auto else None,
+            'meanScore': _round(stats['mean']),
+            'maxScore': _round(pts, 2) if auto else None,
+            'discrimination': _round(stats['r']),
+            'answered': stats['answered'],
+            'graded': stats['graded'] if not auto else None,
+            'options': None,
+        }
+        if question['kind'] == 'mc':
+            choices = stats['choices']
+            keys = list(question['options']) + sorted(k for k in choices if k is not None and k not in question['options'])
+            item['options'] = [{
+                'key': key, 'count': choices.get(key, 0), 'share': _round(choices.get(key, 0) / n),
+                'correct': key == question['correct'],
+            } for key in keys]
+            item['blank'] = n - sum(c for k, c in choices.items() if k is not None)
+        result['questions'].append(item)
+    (mean, median, std, low, high), total_counts = _summary(cols['totals'], max_score, use_numpy)
+    _, auto_counts = _summary(cols['autos'], max_score, use_numpy)
+    result['scores'] = {
+        'mean': _round(mean, 2), 'median': _round(median, 2), 'std': _round(std, 2), 'min': _round(low, 2), 'max': _round(high, 2),
+    }
+    result['histograms'] = {
+        'edges': edges,
+        'total': total_counts,
+        'auto': auto_counts,
+    }
+    return result
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_exam_analytics(exam):
+    """Analytics of exam, recomputed only when analytics_fingerprint(exam) changed. Adds 'cached': bool."""
+    fingerprint = analytics_fingerprint(exam)
+    with _cache_lock:
+        entry = _cache.get(exam.pk)
+        if entry is not None and entry[0] == fingerprint:
+            _cache.move_to_end(exam.pk)
+            return {**entry[1], 'cached': True}
+    result = compute_exam_analytics(exam)
+    with _cache_lock:
+        _cache[exam.pk] = (fingerprint, result)
+        _cache.move_to_end(exam.pk)
+        while len(_cache) > ANALYTICS_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return {**result, 'cached': False}
+
+
+def clear_exam_analytics():
+    with _cache_lock:
+        _cache.clear()
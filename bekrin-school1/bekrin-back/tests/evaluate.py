@@ -127,3 +127,54 @@ def evaluate_open_single_value(
         return tokens_unordered(student) == tokens_unordered(str(correct_answer))
 
     return normalize_whitespace(student).lower() == normalize_whitespace(str(correct_answer)).lower()
+
+
+class CompiledOpenAnswer:
+    """
+    Correct answer pre-normalized for one rule; matches(student_answer) agrees with
+    evaluate_open_single_value(student_answer, correct_answer, rule_type) but normalizes the key only once.
+    """
+    __slots__ = ('rule', 'expected')
+
+    def __init__(self, correct_answer, rule_type: str | None):
+        rule = (rule_type or "EXACT_MATCH").upper()
+        self.rule = rule
+        if correct_answer is None:
+            self.expected = None
+            return
+        correct = str(correct_answer)
+        if rule == "ORDERED_DIGITS":
+            expected = tuple(normalize_digits_sequence(correct))
+        elif rule == "UNORDERED_DIGITS":
+            expected = Counter(normalize_digits_sequence(correct))
+        elif rule == "NUMERIC_EQUAL":
+            expected = normalize_numeric(correct)
+        elif rule == "ORDERED_MATCH":
+            digits = tuple(normalize_digits_sequence(correct))
+            expected = (digits, tuple(tokens_ordered(correct)))
+        elif rule == "UNORDERED_MATCH":
+            expected = tokens_unordered(correct)
+        else:
+            expected = normalize_whitespace(correct).lower()
+        self.expected = expected
+
+    def matches(self, student_answer: str) -> bool:
+        if self.expected is None:
+            return False
+        student = (student_answer or "").strip()
+        rule = self.rule
+        if rule == "ORDERED_DIGITS":
+            return tuple(normalize_digits_sequence(student)) == self.expected
+        if rule == "UNORDERED_DIGITS":
+            return Counter(normalize_digits_sequence(student)) == self.expected
+        if rule == "NUMERIC_EQUAL":
+            return normalize_numeric(student) == self.expected
+        if rule == "ORDERED_MATCH":
+            digits, tokens = self.expected
+            student_digits = tuple(normalize_digits_sequence(student))
+            if student_digits or digits:
+                return student_digits == digits
+            return tuple(tokens_ordered(student)) == tokens
+        if rule == "UNORDERED_MATCH":
+            return tokens_unordered(student) == self.expected
+        return normalize_whitespace(student).lower() == self.expected
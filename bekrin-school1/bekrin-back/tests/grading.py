@@ -0,0 +1,143 @@
+"""
+Compiled grading plan for PDF/JSON exams.
+answer_key_json is turned once into immutable per-question rules: kind, correct option key and the stable
+option id attempt blueprints use for it (opt_<n> in key order), open rule with the correct answer
+pre-normalized (tests.evaluate.CompiledOpenAnswer).
+Plans are memoized per exam in this process under a fingerprint of the answer key, so any change of
+answer_key_json (teacher edit, admin, shell) compiles a new plan on the next submit.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict, namedtuple
+from decimal import Decimal
+from types import MappingProxyType
+
+from tests.evaluate import CompiledOpenAnswer
+
+KIND_ORDER = {'mc': 0, 'open': 1, 'situation': 2}
+PLAN_CACHE_SIZE = 256
+
+
+def points_per_question(exam_type) -> Decimal:
+    """
+    Auto points of one mc/open question. QUIZ: 15 questions = 100 points, each 100/15.
+    İMTAHAN: 27 normal questions (x each) + 3 situasiya (2x each) = 33x = 150, so x = 150/33.
+    """
+    if exam_type == 'quiz':
+        return Decimal('100') / 15
+    return Decimal('150') / Decimal('33')
+
+
+class QuestionRule(namedtuple('QuestionRule', 'number kind correct_key correct_option_id option_keys open_answer')):
+    """
+    One compiled question. option_keys: read-only {option id: key}; open_answer: CompiledOpenAnswer or None
+    (not an open question, or no open_answer in the key).
+    """
+    __slots__ = ()
+
+    def option_correct(self, option_id) -> bool:
+        return bool(self.correct_option_id and option_id and str(option_id).strip() == self.correct_option_id)
+
+    def key_correct(self, key) -> bool:
+        return bool(self.correct_key and key and key == self.correct_key)
+
+    def open_correct(self, text_answer) -> bool:
+        return self.open_answer is not None and self.open_answer.matches(text_answer)
+
+    def key_for_option(self, option_id):
+        if option_id is None:
+            return None
+        return self.option_keys.get(str(option_id).strip())
+
+
+class GradingPlan:
+    """Compiled answer key: questions in grading order (mc, open, situation; by number) and by number."""
+    __slots__ = ('exam_id', 'version', 'questions', 'by_number')
+
+    def __init__(self, exam_id, version, questions, by_number):
+        self.exam_id = exam_id
+        self.version = version
+        self.questions = tuple(questions)
+        self.by_number = MappingProxyType(dict(by_number))
+
+    def rule(self, number):
+        rule = self.by_number.get(number)
+        if rule is None and number is not None:
+            try:
+                rule = self.by_number.get(int(number))
+            except (TypeError, ValueError):
+                pass
+        return rule
+
+
+def _compile_question(q):
+    num = q.get('number')
+    kind = (q.get('kind') or 'mc').lower()
+    correct_key = None
+    correct_option_id = None
+    option_keys = {}
+    open_answer = None
+    if kind == 'mc':
+        correct_key = str(q.get('correct') or '').strip().upper() or None
+        key_to_id = {}
+        for i, o in enumerate(q.get('options') or []):
+            option_id = f'opt_{i + 1}'
+            key = (o.get('key') or '').strip().upper()
+            option_keys[option_id] = key
+            key_to_id[key or option_id] = option_id
+        correct_option_id = key_to_id.get(correct_key) if correct_key else None
+    elif kind == 'open':
+        if q.get('open_answer') is not None:
+            rule = (q.get('open_rule') or 'EXACT_MATCH').strip().upper()
+            open_answer = CompiledOpenAnswer(q.get('open_answer'), rule)
+    return QuestionRule(num, kind, correct_key, correct_option_id, MappingProxyType(option_keys), open_answer)
+
+
+def compile_answer_key(answer_key, exam_id=None, version=None) -> GradingPlan:
+    """Build a GradingPlan from an internal-format answer key ({questions: [{number, kind, ...}]})."""
+    questions_raw = [q for q in ((answer_key or {}).get('questions') or []) if isinstance(q, dict)]
+    compiled = [(q, _compile_question(q)) for q in questions_raw]
+    by_number = {}
+    for _, rule in compiled:
+        # Same question twice: the first one in the key wins, as in the old linear search.
+        by_number.setdefault(rule.number, rule)
+    ordered = sorted(
+        compiled, key=lambda pair: (KIND_ORDER.get((pair[0].get('kind') or '').lower(), 99), pair[0].get('number', 0)),
+    )
+    return GradingPlan(exam_id, version or answer_key_version(answer_key), [rule for _, rule in ordered], by_number)
+
+
+def answer_key_version(answer_key) -> str:
+    """Content fingerprint of an answer key; equal keys give equal versions."""
+    raw = json.dumps(answer_key, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:20]
+
+
+_plans = OrderedDict()
+_plans_lock = threading.Lock()
+
+
+def get_grading_plan(exam):
+    """Compiled plan of exam.answer_key_json, reused until the key changes. None when the exam has no key."""
+    answer_key = exam.answer_key_json
+    if not answer_key or not isinstance(answer_key, dict):
+        return None
+    version = answer_key_version(answer_key)
+    with _plans_lock:
+        plan = _plans.get(exam.pk)
+        if plan is not None and plan.version == version:
+            _plans.move_to_end(exam.pk)
+            return plan
+    plan = compile_answer_key(answer_key, exam.pk, version)
+    with _plans_lock:
+        _plans[exam.pk] = plan
+        _plans.move_to_end(exam.pk)
+        while len(_plans) > PLAN_CACHE_SIZE:
+            _plans.popitem(last=False)
+    return plan
+
+
+def clear_grading_plans():
+    with _plans_lock:
+        _plans.clear()
@@ -0,0 +1,297 @@
+"""
+Load test for exam submission: --students students submit the same PDF/JSON exam at the same moment,
+as when a whole group hits "Bitir" at the end of a run.
+Seeds its own organization, students, an exam (27 mc + 3 open + 3 situation for --type exam, 12 + 2 + 1 for
+quiz) and one started attempt per student, then releases all submits together through the Django test client.
+Reports latency p50/p95/p99 and throughput, transaction time (first to last statement inside the submit
+transaction), statements and INSERTs per submit, and lock waits (PostgreSQL: backends waiting on a lock,
+sampled from pg_locks while the burst runs). --json writes the same numbers as a JSON document.
+Usage: python manage.py benchmark_exam_submit [--students 100] [--type exam|quiz] [--seed 1] [--label NAME]
+       [--json report.json|-] [--keep]
+Seeded data (organization bench-exam, students bench_exam_<n>@bench.local) is deleted afterwards unless --keep.
+Use PostgreSQL for meaningful numbers: SQLite serializes writers and has no lock view.
+Every student holds its own connection during the burst: keep --students below the server's max_connections.
+"""
+import json
+import platform
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tests.management.commands.benchmark_load import percentile, summarize
+
+BENCH_ORG_SLUG = 'bench-exam'
+BENCH_EMAIL = 'bench_exam_{}@bench.local'
+# (mc, open, situation) per exam type
+LAYOUT = {'exam': (27, 3, 3), 'quiz': (12, 2, 1)}
+LOCK_SAMPLE_INTERVAL_S = 0.005
+
+
+def build_answer_key(exam_type):
+    mc, open_n, situation = LAYOUT[exam_type]
+    questions = []
+    for n in range(1, mc + 1):
+        questions.append({
+            'number': n, 'kind': 'mc', 'correct': 'ABCD'[n % 4],
+            'options': [{'key': k, 'text': f'{k}{n}'} for k in 'ABCD'],
+        })
+    for n in range(mc + 1, mc + open_n + 1):
+        questions.append({'number': n, 'kind': 'open', 'open_rule': 'UNORDERED_DIGITS', 'open_answer': str(n * 7)})
+    for n in range(mc + open_n + 1, mc + open_n + situation + 1):
+        questions.append({'number': n, 'kind': 'situation'})
+    return {'type': exam_type, 'questions': questions}
+
+
+def random_answers(blueprint, rng):
+    answers = []
+    for item in blueprint:
+        num = item['questionNumber']
+        if item['kind'] == 'mc':
+            options = [o['id'] for o in item.get('options') or []]
+            answers.append({'questionNumber': num, 'selectedOptionId': rng.choice(options) if options else None})
+        elif item['kind'] == 'open':
+            answers.append({'questionNumber': num, 'textAnswer': str(num * 7) if rng.random() < 0.5 else '0'})
+    return answers
+
+
+class StatementTimer:
+    """execute_wrapper: per-request statement count, INSERT count and the span of statements run inside atomic()."""
+
+    def __init__(self):
+        self.statements = 0
+        self.inserts = 0
+        self.tx_start = None
+        self.tx_end = None
+
+    def __call__(self, execute, sql, params, many, context):
+        in_tx = context['connection'].in_atomic_block
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            end = time.perf_counter()
+            self.statements += 1
+            if sql.lstrip().upper().startswith('INSERT'):
+                self.inserts += 1
+            if in_tx:
+                if self.tx_start is None:
+                    self.tx_start = start
+                self.tx_end = end
+
+    @property
+    def tx_ms(self):
+        if self.tx_start is None:
+            return 0.0
+        return (self.tx_end - self.tx_start) * 1000
+
+
+class LockSampler(threading.Thread):
+    """PostgreSQL only: polls pg_locks for ungranted locks on this database until stopped."""
+
+    def __init__(self):
+        super().__init__(name='bench-lock-sampler', daemon=True)
+        self.stop_event = threading.Event()
+        self.samples = 0
+        self.samples_with_waits = 0
+        self.max_waiting = 0
+
+    def run(self):
+        try:
+            with connection.cursor() as cursor:
+                while not self.stop_event.is_set():
+                    cursor.execute(
+                        'SELECT count(*) FROM pg_locks l JOIN pg_stat_activity a ON a.pid = l.pid '
+                        'WHERE NOT l.granted AND a.datname = current_database()'
+                    )
+                    waiting = cursor.fetchone()[0]
+                    self.samples += 1
+                    if waiting:
+                        self.samples_with_waits += 1
+                        self.max_waiting = max(self.max_waiting, waiting)
+                    self.stop_event.wait(LOCK_SAMPLE_INTERVAL_S)
+        finally:
+            connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Load-test simultaneous exam submits; latency, transaction time, statements and lock waits'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=100, help='Students submitting at the same moment')
+        parser.add_argument('--type', choices=sorted(LAYOUT), default='exam', help='Exam layout (default: exam, 33 questions)')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the answers')
+        parser.add_argument('--label', default='', help='Free-form label stored in the JSON report (e.g. git tag)')
+        parser.add_argument('--json', dest='json_path', default=None, help='Write the report as JSON ("-" = stdout)')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded organization, students and exam')
+
+    def handle(self, *args, **options):
+        students_n = max(1, options['students'])
+        quiet = options['json_path'] == '-'
+        org, exam, attempts = self._seed(students_n, options['type'])
+        if not quiet:
+            self.stdout.write(f"students={students_n} type={options['type']} db={connection.vendor}")
+        rng = random.Random(options['seed'])
+        plans = [(attempt, random_answers(attempt.attempt_blueprint, rng)) for attempt in attempts]
+        barrier = threading.Barrier(students_n)
+        sampler = LockSampler() if connection.vendor == 'postgresql' else None
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                if sampler is not None:
+                    sampler.start()
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=students_n, thread_name_prefix='bench-exam') as pool:
+                    records = list(pool.map(lambda plan: self._submit(exam, plan[0], plan[1], barrier), plans))
+                wall = time.perf_counter() - start
+                if sampler is not None:
+                    sampler.stop_event.set()
+                    sampler.join()
+            report = self._report(options, exam, records, wall, sampler)
+        finally:
+            if sampler is not None:
+                sampler.stop_event.set()
+            if not options['keep']:
+                self._cleanup(org, exam)
+        self._write(report, options['json_path'], quiet)
+
+    def _seed(self, students_n, exam_type):
+        from accounts.models import User
+        from core.models import Organization
+        from students.models import StudentProfile
+        from tests.models import Exam, ExamAttempt
+        from tests.views.exams import _build_blueprint_pdf_json
+
+        org, _ = Organization.objects.get_or_create(slug=BENCH_ORG_SLUG, defaults={'name': 'Bench exam'})
+        now = timezone.now()
+        answer_key = build_answer_key(exam_type)
+        exam = Exam.objects.create(
+            title='Bench exam submit', type=exam_type, source_type='JSON', answer_key_json=answer_key,
+            status='active', start_time=now - timedelta(minutes=5), end_time=now + timedelta(hours=2),
+        )
+        attempts = []
+        for i in range(students_n):
+            user, created = User.objects.get_or_create(
+                email=BENCH_EMAIL.format(i + 1),
+                defaults={'full_name': f'Bench Student {i + 1}', 'role': 'student', 'organization': org},
+            )
+            if created:
+                user.set_unusable_password()
+                user.save(update_fields=['password'])
+            StudentProfile.objects.get_or_create(user=user, defaults={'grade': 'bench'})
+            attempts.append(ExamAttempt(
+                exam=exam, student=user, expires_at=now + timedelta(hours=1),
+                attempt_blueprint=_build_blueprint_pdf_json(answer_key),
+            ))
+        return org, exam, ExamAttempt.objects.bulk_create(attempts)
+
+    def _submit(self, exam, attempt, answers, barrier):
+        """One student: wait for everyone, then submit; the request is timed with its statements."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(attempt.student)}')
+        timer = StatementTimer()
+        try:
+            barrier.wait()
+            with connection.execute_wrapper(timer):
+                start = time.perf_counter()
+                res = client.post(
+                    f'/api/student/exams/{exam.id}/submit', {'attemptId': attempt.id, 'answers': answers}, format='json',
+                )
+                latency_ms = (time.perf_counter() - start) * 1000
+        finally:
+            connection.close()
+        return {
+            'op': 'submit', 'status': res.status_code, 'latency_ms': latency_ms, 'queries': timer.statements,
+            'inserts': timer.inserts, 'tx_ms': timer.tx_ms,
+        }
+
+    def _report(self, options, exam, records, wall, sampler):
+        from tests.models import ExamAnswer, ExamAttempt
+
+        tx = sorted(r['tx_ms'] for r in records)
+        inserts = [r['inserts'] for r in records]
+        report = {
+            'label': options['label'],
+            'created_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'config': {
+                'students': len(records),
+                'type': options['type'],
+                'questions': sum(LAYOUT[options['type']]),
+                'seed': options['seed'],
+                'db_conn_max_age': connections['default'].settings_dict.get('CONN_MAX_AGE'),
+            },
+            'wall_s': round(wall, 3),
+            'throughput_rps': round(len(records) / wall, 2) if wall else 0.0,
+            'submit': summarize(records),
+            'transaction_ms': {
+                'p50': round(percentile(tx, 50), 2),
+                'p95': round(percentile(tx, 95), 2),
+                'p99': round(percentile(tx, 99), 2),
+                'max': round(tx[-1], 2) if tx else 0.0,
+            },
+            'inserts_per_submit': {'min': min(inserts), 'max': max(inserts)},
+            'rows': {
+                'submitted_attempts': ExamAttempt.objects.filter(exam=exam, status='SUBMITTED').count(),
+                'answers': ExamAnswer.objects.filter(attempt__exam=exam).count(),
+            },
+            'lock_waits': None,
+        }
+        if sampler is not None:
+            report['lock_waits'] = {
+                'samples': sampler.samples,
+                'samples_with_waits': sampler.samples_with_waits,
+                'max_waiting_backends': sampler.max_waiting,
+                'interval_ms': LOCK_SAMPLE_INTERVAL_S * 1000,
+            }
+        return report
+
+    def _cleanup(self, org, exam):
+        from accounts.models import User
+
+        exam.delete()
+        User.objects.filter(organization=org, email__endswith='@bench.local').delete()
+        org.delete()
+
+    def _write(self, report, json_path, quiet):
+        if json_path:
+            data = json.dumps(report, indent=2, ensure_ascii=False)
+            if json_path == '-':
+                self.stdout.write(data)
+            else:
+                with open(json_path, 'w', encoding='utf-8') as f:
+                    f.write(data + '\n')
+        if quiet:
+            return
+        stats = report['submit']
+        lat, tx = stats['latency_ms'], report['transaction_ms']
+        self.stdout.write(
+            f"submit n={stats['count']} errors={stats['errors']} wall={report['wall_s']}s "
+            f"throughput={report['throughput_rps']} req/s codes={stats['status_codes']}"
+        )
+        self.stdout.write(f"latency p50={lat['p50']}ms p95={lat['p95']}ms p99={lat['p99']}ms max={lat['max']}ms")
+        self.stdout.write(f"transaction p50={tx['p50']}ms p95={tx['p95']}ms p99={tx['p99']}ms max={tx['max']}ms")
+        self.stdout.write(
+            f"statements/submit={stats['queries']['mean']} (max {stats['queries']['max']}) "
+            f"inserts/submit={report['inserts_per_submit']['min']}..{report['inserts_per_submit']['max']} "
+            f"answers={report['rows']['answers']}"
+        )
+        waits = report['lock_waits']
+        if waits is None:
+            self.stdout.write('lock waits: not sampled (PostgreSQL only)')
+        else:
+            self.stdout.write(
+                f"lock waits: {waits['samples_with_waits']}/{waits['samples']} samples with waiting backends, "
+                f"max {waits['max_waiting_backends']} waiting"
+            )
+        if json_path and json_path != '-':
+            self.stdout.write(self.style.SUCCESS(f'Report written to {json_path}'))
@@ -0,0 +1,289 @@
+"""
+Load generator for the coding run/submit endpoints: the whole request path (auth, admission, sandbox, DB).
+Seeds its own organization, students and tasks with varied test-case counts and output sizes, then
+--students simulated students fire Run and Submit requests concurrently through the Django test client
+(in-process, against the configured database).
+Reports p50/p95/p99 latency, throughput, sandbox CPU time and DB queries per request. --json writes the
+same numbers as a JSON document (label, settings, per-operation stats) so runs of different versions
+can be compared.
+Usage: python manage.py benchmark_load [--students 20] [--requests 5] [--concurrency 20] [--submit-ratio 0.3]
+       [--no-admission] [--reuse-code] [--seed 1] [--label NAME] [--json report.json|-] [--keep]
+Seeded data (organization bench-load, students bench_load_<n>@bench.local) is deleted afterwards unless --keep.
+Use PostgreSQL for meaningful numbers: SQLite serializes writers.
+"""
+import json
+import math
+import platform
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+try:
+    import resource
+except ImportError:  # Windows: no rusage, CPU fields stay 0
+    resource = None
+
+BENCH_ORG_SLUG = 'bench-load'
+BENCH_EMAIL = 'bench_load_{}@bench.local'
+# (title, test cases, output lines of the first case): tiny / typical / output-heavy tasks
+TASK_SPECS = [
+    ('Bench small', 2, 1),
+    ('Bench medium', 10, 50),
+    ('Bench large', 25, 1000),
+]
+SOLUTION = "n = int(input())\nprint('\\n'.join(str(i * i) for i in range(n)))\n"
+OPERATIONS = ('run', 'submit')
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list (0.0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(records):
+    latencies = sorted(r['latency_ms'] for r in records)
+    queries = [r['queries'] for r in records]
+    codes = {}
+    for r in records:
+        codes[str(r['status'])] = codes.get(str(r['status']), 0) + 1
+    return {
+        'count': len(records),
+        'errors': sum(1 for r in records if r['status'] >= 400),
+        'status_codes': codes,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'mean': round(statistics.mean(latencies), 2) if latencies else 0.0,
+            'max': round(latencies[-1], 2) if latencies else 0.0,
+        },
+        'queries': {
+            'mean': round(statistics.mean(queries), 2) if queries else 0.0,
+            'max': max(queries) if queries else 0,
+        },
+    }
+
+
+def _cpu_seconds(who):
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == 'self' else resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class Command(BaseCommand):
+    help = 'Load-test coding run/submit with simulated students; p50/p95/p99, throughput, CPU, queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=20, help='Simulated students')
+        parser.add_argument('--requests', type=int, default=5, help='Requests per student')
+        parser.add_argument('--concurrency', type=int, default=None, help='Students active at once (default: all)')
+        parser.add_argument('--submit-ratio', type=float, default=0.3, help='Share of requests that are Submit')
+        parser.add_argument('--no-admission', action='store_true', help='Disable admission control for the run')
+        parser.add_argument('--reuse-code', action='store_true',
+                            help='Same code every request (result cache hits); default makes each request unique')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the request mix')
+        parser.add_argument('--label', default='', help='Free-form label stored in the JSON report (e.g. git tag)')
+        parser.add_argument('--json', dest='json_path', default=None, help='Write the report as JSON ("-" = stdout)')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded organization, students and tasks')
+
+    def handle(self, *args, **options):
+        students_n = max(1, options['students'])
+        per_student = max(1, options['requests'])
+        concurrency = max(1, min(options['concurrency'] or students_n, students_n))
+        quiet = options['json_path'] == '-'
+        org, students, tasks = self._seed(students_n)
+        if not quiet:
+            self.stdout.write(
+                f'students={students_n} requests/student={per_student} concurrency={concurrency} '
+                f"submit_ratio={options['submit_ratio']} db={connection.vendor}"
+            )
+        overrides = {'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver']}
+        if options['no_admission']:
+            overrides['CODING_ADMISSION_ENABLED'] = False
+        plans = []
+        for i, student in enumerate(students):
+            rng = random.Random(options['seed'] * 100003 + i)
+            plans.append((student, [
+                ('submit' if rng.random() < options['submit_ratio'] else 'run', rng.choice(tasks))
+                for _ in range(per_student)
+            ]))
+        started_at = timezone.now()
+        try:
+            with override_settings(**overrides):
+                cpu_self, cpu_children = _cpu_seconds('self'), _cpu_seconds('children')
+                start = time.perf_counter()
+                records = self._run_sessions(plans, concurrency, options['reuse_code'])
+                wall = time.perf_counter() - start
+                cpu_self = _cpu_seconds('self') - cpu_self
+                cpu_children = _cpu_seconds('children') - cpu_children
+            report = self._report(options, tasks, records, wall, cpu_self, cpu_children, started_at, concurrency)
+        finally:
+            if not options['keep']:
+                self._cleanup(org)
+        self._write(report, options['json_path'], quiet)
+
+    def _seed(self, students_n):
+        from accounts.models import User
+        from coding.models import CodingTask, CodingTestCase, CodingTopic
+        from core.models import Organization
+        from students.models import StudentProfile
+
+        org, _ = Organization.objects.get_or_create(slug=BENCH_ORG_SLUG, defaults={'name': 'Bench load'})
+        students = []
+        for i in range(students_n):
+            user, created = User.objects.get_or_create(
+                email=BENCH_EMAIL.format(i + 1),
+                defaults={'full_name': f'Bench Student {i + 1}', 'role': 'student', 'organization': org},
+            )
+            if created:
+                user.set_unusable_password()
+                user.save(update_fields=['password'])
+            StudentProfile.objects.get_or_create(user=user, defaults={'grade': 'bench'})
+            students.append(user)
+        topic, _ = CodingTopic.objects.get_or_create(name='Bench', organization=org)
+        tasks = []
+        for title, case_count, lines in TASK_SPECS:
+            task, created = CodingTask.objects.get_or_create(
+                title=title, organization=org,
+                defaults={'description': 'Print i*i for i < n, one per line', 'topic': topic},
+            )
+            if created:
+                CodingTestCase.objects.bulk_create([
+                    CodingTestCase(
+                        task=task, input_data=f'{lines + i}\n', order_index=i, is_sample=i < 2,
+                        expected='\n'.join(str(k * k) for k in range(lines + i)),
+                    )
+                    for i in range(case_count)
+                ])
+            tasks.append({'task': task, 'cases': case_count, 'output_lines': lines})
+        return org, students, tasks
+
+    def _run_sessions(self, plans, concurrency, reuse_code):
+        if concurrency == 1:
+            return [r for student, plan in plans for r in self._session(student, plan, reuse_code, threaded=False)]
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='bench-student') as pool:
+            sessions = pool.map(lambda item: self._session(item[0], item[1], reuse_code, threaded=True), plans)
+            return [r for session in sessions for r in session]
+
+    def _session(self, student, plan, reuse_code, threaded):
+        """One simulated student: its requests in order, each timed with its DB queries."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(student)}')
+        records = []
+        try:
+            for n, (op, spec) in enumerate(plan):
+                task = spec['task']
+                code = SOLUTION if reuse_code else f'{SOLUTION}# {student.id}-{n}\n'
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    if op == 'run':
+                        res = client.post('/api/student/coding/run', {'taskId': task.id, 'code': code}, format='json')
+                    else:
+                        res = client.post(f'/api/student/coding/{task.id}/submit', {'code': code}, format='json')
+                    latency_ms = (time.perf_counter() - start) * 1000
+                records.append({
+                    'op': op, 'task': task.title, 'status': res.status_code,
+                    'latency_ms': latency_ms, 'queries': len(queries),
+                })
+        finally:
+            if threaded:
+                connection.close()
+        return records
+
+    def _report(self, options, tasks, records, wall, cpu_self, cpu_children, started_at, concurrency):
+        from coding.models import CodingSubmission
+
+        graded = CodingSubmission.objects.filter(
+            task_id__in=[t['task'].id for t in tasks], run_type='SUBMIT', created_at__gte=started_at,
+        ).exclude(status__in=('queued', 'running'))
+        submit_cpu = sorted(graded.exclude(cpu_time_ms__isnull=True).values_list('cpu_time_ms', flat=True))
+        return {
+            'label': options['label'],
+            'created_at': started_at.isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'config': {
+                'students': max(1, options['students']),
+                'requests_per_student': max(1, options['requests']),
+                'concurrency': concurrency,
+                'submit_ratio': options['submit_ratio'],
+                'reuse_code': options['reuse_code'],
+                'admission': not options['no_admission'],
+                'seed': options['seed'],
+                'settings': {
+                    name: getattr(settings, name, None)
+                    for name in (
+                        'CODING_SANDBOX_POOL_SIZE', 'CODING_PARALLEL_CASES', 'CODING_SUBMIT_ASYNC',
+                        'CODING_RESULT_CACHE_SIZE', 'CODING_SANDBOX_MEMORY_MB',
+                    )
+                },
+            },
+            'tasks': [{'title': t['task'].title, 'cases': t['cases'], 'output_lines': t['output_lines']} for t in tasks],
+            'wall_s': round(wall, 3),
+            'throughput_rps': round(len(records) / wall, 2) if wall else 0.0,
+            'operations': {
+                **{op: summarize([r for r in records if r['op'] == op]) for op in OPERATIONS},
+                'all': summarize(records),
+            },
+            'sandbox': {
+                # Graded submits: user+sys CPU of the sandboxed processes (from their rusage).
+                'submit_cpu_ms_total': sum(submit_cpu),
+                'submit_cpu_ms_p50': percentile(submit_cpu, 50),
+                'submit_cpu_ms_p95': percentile(submit_cpu, 95),
+                'graded_submits': graded.count(),
+                # This process (test client + views) and its reaped children (cold sandbox runs, compilers).
+                'process_cpu_s': round(cpu_self, 3),
+                'children_cpu_s': round(cpu_children, 3),
+            },
+        }
+
+    def _cleanup(self, org):
+        from accounts.models import User
+        from coding.models import CodingSubmission, CodingTask, CodingTopic
+
+        CodingSubmission.objects.filter(task__organization=org).delete()
+        CodingTask.objects.filter(organization=org).delete()
+        CodingTopic.objects.filter(organization=org).delete()
+        User.objects.filter(organization=org, email__endswith='@bench.local').delete()
+        org.delete()
+
+    def _write(self, report, json_path, quiet):
+        if json_path:
+            data = json.dumps(report, indent=2, ensure_ascii=False)
+            if json_path == '-':
+                self.stdout.write(data)
+            else:
+                with open(json_path, 'w', encoding='utf-8') as f:
+                    f.write(data + '\n')
+        if quiet:
+            return
+        self.stdout.write(
+            f"wall={report['wall_s']}s throughput={report['throughput_rps']} req/s "
+            f"process_cpu={report['sandbox']['process_cpu_s']}s children_cpu={report['sandbox']['children_cpu_s']}s"
+        )
+        for op, stats in report['operations'].items():
+            lat = stats['latency_ms']
+            self.stdout.write(
+                f"{op:6s} n={stats['count']} errors={stats['errors']} p50={lat['p50']}ms p95={lat['p95']}ms "
+                f"p99={lat['p99']}ms queries/req={stats['queries']['mean']} (max {stats['queries']['max']}) "
+                f"codes={stats['status_codes']}"
+            )
+        sandbox = report['sandbox']
+        self.stdout.write(
+            f"submit sandbox cpu: total={sandbox['submit_cpu_ms_total']}ms p50={sandbox['submit_cpu_ms_p50']}ms "
+            f"p95={sandbox['submit_cpu_ms_p95']}ms over {sandbox['graded_submits']} graded submit(s)"
+        )
+        if json_path and json_path != '-':
+            self.stdout.write(self.style.SUCCESS(f'Report written to {json_path}'))
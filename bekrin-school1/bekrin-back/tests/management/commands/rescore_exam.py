@@ -0,0 +1,48 @@
+"""
+Rescore a PDF/JSON exam's finished attempts with its current answer key (tests.rescoring).
+Usage: python manage.py rescore_exam --exam ID [--dry-run] [--notes "fixed Q7"] [--json]
+Manual (teacher) scores are kept; every changed answer and total gets a GradingAuditLog row.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tests.models import Exam
+from tests.rescoring import RescoreError, rescore_exam
+
+
+class Command(BaseCommand):
+    help = "Re-grade an exam's submitted attempts after its answer key was corrected"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', type=int, required=True, help='Exam id')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would change')
+        parser.add_argument('--notes', default='', help='Appended to the audit log notes')
+        parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+
+    def handle(self, *args, **options):
+        try:
+            exam = Exam.objects.get(pk=options['exam'])
+        except Exam.DoesNotExist:
+            raise CommandError(f"Exam {options['exam']} not found")
+        try:
+            summary = rescore_exam(exam, dry_run=options['dry_run'], notes=options['notes'])
+        except RescoreError as e:
+            raise CommandError(str(e))
+        if options['json']:
+            self.stdout.write(json.dumps(summary, indent=2, ensure_ascii=False))
+            return
+        prefix = '[dry run] ' if summary['dryRun'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Exam {exam.id} (key {summary['answerKeyVersion']}): {summary['attempts']} attempt(s), "
+            f"{summary['attemptsChanged']} changed ({summary['publishedAttemptsChanged']} published), "
+            f"{summary['answersChanged']} answer(s) changed (+{summary['answersGained']} / -{summary['answersLost']}), "
+            f"{summary['answersSkipped']} skipped, score delta {summary['scoreDelta']:+.2f}"
+        ))
+        for q in summary['questions']:
+            self.stdout.write(f"  Q{q['questionNumber']}: +{q['gained']} / -{q['lost']}")
+        for change in summary['changes']:
+            self.stdout.write(
+                f"  attempt {change['attemptId']} (student {change['studentId']}): "
+                f"{change['oldTotalScore']} -> {change['newTotalScore']}"
+            )
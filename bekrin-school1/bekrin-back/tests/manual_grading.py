@@ -0,0 +1,202 @@
+"""
+Teacher manual grading of exam attempts (single attempt and bulk endpoints).
+For each attempt the teacher sends manualScores ({answer id: points}) and/or per_situation_scores
+([{index, fraction}], index 1-based over the attempt's manual answers by question number):
+  - all answers of the graded attempts are loaded in one query and scores are applied in memory
+  - changed answers are written with bulk_update, GradingAuditLog rows with bulk_create
+    (one per changed answer and per changed attempt total)
+  - attempt auto/manual totals come from one Sum aggregate over the stored answers (Decimal),
+    total_score = auto + manual capped at the exam max
+Exam-level publishing (exam flag, auto-finish) stays with the views.
+"""
+import logging
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, Sum
+
+from tests.models import ExamAnswer, ExamAttempt, GradingAuditLog
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+UPDATE_BATCH_SIZE = 500
+
+# One attempt's grading input: the ExamAttempt (with exam), manualScores dict, per_situation_scores list.
+AttemptGrades = namedtuple('AttemptGrades', ['attempt', 'manual_scores', 'per_situation_scores'])
+
+
+def situation_max_per_question(is_quiz):
+    """Strict unit-based: situation max = 2 units. Exam total units 33, so 150/33*2 per situation."""
+    if is_quiz:
+        return Decimal('0')  # quiz has 0 situation
+    # İMTAHAN: 150/33 per unit, situasiya = 2 units, so 150/33*2
+    return (Decimal('150') / Decimal('33')) * Decimal('2')
+
+
+def situation_fraction_to_points(fraction, is_quiz, max_situation_points=None, use_set2=False):
+    """
+    Option Set 1: fraction in [0, 1/3, 1/2, 2/3, 1]. Points = situation_max_per_question * fraction.
+    Option Set 2: fraction in [0, 2/3, 1, 4/3, 2]. Points = situation_max_per_question * fraction.
+    """
+    situation_max = max_situation_points if max_situation_points is not None else situation_max_per_question(is_quiz)
+    if situation_max == 0:
+        return Decimal('0')
+
+    if use_set2:
+        # SET2: [0, 2/3, 1, 4/3, 2]
+        if fraction in (0, '0'):
+            return Decimal('0')
+        if fraction in (2/3, '2/3', 0.667, '0.667'):
+            return (Decimal('2') / Decimal('3') * situation_max).quantize(Decimal('0.01'))
+        if fraction in (1, '1'):
+            return situation_max.quantize(Decimal('0.01'))
+        if fraction in (4/3, '4/3', 1.333, '1.333'):
+            return (Decimal('4') / Decimal('3') * situation_max).quantize(Decimal('0.01'))
+        if fraction in (2, '2'):
+            return (Decimal('2') * situation_max).quantize(Decimal('0.01'))
+    else:
+        # SET1: [0, 1/3, 1/2, 2/3, 1]
+        if fraction in (0, '0'):
+            return Decimal('0')
+        if fraction in (1/3, '1/3', 0.333):
+            return (Decimal('1') / Decimal('3') * situation_max).quantize(Decimal('0.01'))
+        if fraction in (1/2, '1/2', 0.5):
+            return (Decimal('1') / Decimal('2') * situation_max).quantize(Decimal('0.01'))
+        if fraction in (2/3, '2/3', 0.667):
+            return (Decimal('2') / Decimal('3') * situation_max).quantize(Decimal('0.01'))
+        if fraction in (1, '1'):
+            return situation_max.quantize(Decimal('0.01'))
+
+    try:
+        return (Decimal(str(fraction)) * situation_max).quantize(Decimal('0.01'))
+    except Exception:
+        return Decimal('0')
+
+
+def grades_from_payload(attempt, data):
+    """AttemptGrades from a request body (accepts camelCase and snake_case keys)."""
+    manual_scores = data.get('manualScores') or data.get('manual_scores') or {}
+    per_situation_scores = data.get('per_situation_scores') or data.get('perSituationScores') or []
+    return AttemptGrades(
+        attempt,
+        manual_scores if isinstance(manual_scores, dict) else {},
+        per_situation_scores if isinstance(per_situation_scores, list) else [],
+    )
+
+
+def _situation_points(grades, situation_answers, is_quiz, situation_max):
+    """(answer, points) pairs for per_situation_scores; invalid items are ignored."""
+    for item in grades.per_situation_scores:
+        if not isinstance(item, dict):
+            continue
+        idx = item.get('index') or item.get('situationIndex')
+        fraction = item.get('fraction') or item.get('score')
+        if idx is None:
+            continue
+        try:
+            idx = int(idx)
+        except (TypeError, ValueError):
+            continue
+        if idx < 1 or idx > len(situation_answers):
+            continue
+        # Use SET2: [0, 2/3, 1, 4/3, 2]
+        yield situation_answers[idx - 1], situation_fraction_to_points(
+            fraction, is_quiz, max_situation_points=situation_max, use_set2=True,
+        )
+
+
+def grade_attempts(grades_list, teacher=None, publish=False, notes=''):
+    """
+    Apply manual grades to one or more attempts (list of AttemptGrades) and mark them checked
+    (and published when publish). Returns {attempt id: result dict} in the single grade endpoint's shape.
+    """
+    grades_list = list(grades_list)
+    if not grades_list:
+        return {}
+    attempt_ids = [g.attempt.id for g in grades_list]
+    answers_by_attempt = {}
+    for answer in ExamAnswer.objects.filter(attempt_id__in=attempt_ids).only(
+        'id', 'attempt_id', 'question_number', 'requires_manual_check', 'manual_score',
+    ).order_by('question_number', 'id'):
+        answers_by_attempt.setdefault(answer.attempt_id, []).append(answer)
+
+    changed_answers = {}
+    audit_rows = []
+    for grades in grades_list:
+        attempt = grades.attempt
+        is_quiz = attempt.exam.type == 'quiz'
+        answers = answers_by_attempt.get(attempt.id, [])
+        by_id = {a.id: a for a in answers}
+        updates = []
+        for answer_id_str, score_value in grades.manual_scores.items():
+            try:
+                answer = by_id[int(answer_id_str)]
+                score = Decimal(str(score_value)).quantize(CENT)
+            except (KeyError, TypeError, ValueError, ArithmeticError):
+                continue
+            updates.append((answer, score))
+        situation_answers = [a for a in answers if a.requires_manual_check]
+        updates.extend(_situation_points(grades, situation_answers, is_quiz, situation_max_per_question(is_quiz)))
+
+        for answer, score in updates:
+            old_answer_score = answer.manual_score or Decimal('0')
+            answer.manual_score = score
+            changed_answers[answer.id] = answer
+            # Log audit if score changed
+            if old_answer_score != score:
+                audit_rows.append(GradingAuditLog(
+                    attempt=attempt, teacher=teacher, answer=answer,
+                    old_score=old_answer_score, new_score=score, notes=notes,
+                ))
+
+    with transaction.atomic():
+        ExamAnswer.objects.bulk_update(list(changed_answers.values()), ['manual_score'], batch_size=UPDATE_BATCH_SIZE)
+        totals = {
+            row['attempt_id']: row for row in ExamAnswer.objects.filter(attempt_id__in=attempt_ids).values(
+                'attempt_id',
+            ).annotate(
+                auto=Sum('auto_score', filter=Q(requires_manual_check=False)),
+                manual=Sum('manual_score'),
+            )
+        }
+        results = {}
+        for grades in grades_list:
+            attempt = grades.attempt
+            exam = attempt.exam
+            max_score = Decimal(str(exam.max_score or (100 if exam.type == 'quiz' else 150)))
+            old_total_score = (attempt.auto_score or Decimal('0')) + (attempt.manual_score or Decimal('0'))
+            row = totals.get(attempt.id, {})
+            attempt.auto_score = (row.get('auto') or Decimal('0')).quantize(CENT)
+            attempt.manual_score = (row.get('manual') or Decimal('0')).quantize(CENT)
+            attempt.total_score = min(attempt.auto_score + attempt.manual_score, max_score)
+            attempt.is_checked = True
+            if publish:
+                # Lock scores permanently: set is_result_published on ATTEMPT level
+                attempt.is_result_published = True
+            # Log total score change if different
+            if old_total_score != attempt.total_score:
+                audit_rows.append(GradingAuditLog(
+                    attempt=attempt, teacher=teacher, answer=None,
+                    old_total_score=old_total_score, new_total_score=attempt.total_score, notes=notes,
+                ))
+            results[attempt.id] = {
+                'attemptId': attempt.id,
+                'manualScore': float(attempt.manual_score),
+                'autoScore': float(attempt.auto_score),
+                'totalScore': float(attempt.total_score),
+                'finalScore': float(attempt.total_score),
+                'isPublished': attempt.is_result_published,
+            }
+        fields = ['manual_score', 'auto_score', 'total_score', 'is_checked']
+        if publish:
+            fields.append('is_result_published')
+        ExamAttempt.objects.bulk_update([g.attempt for g in grades_list], fields, batch_size=UPDATE_BATCH_SIZE)
+        GradingAuditLog.objects.bulk_create(audit_rows, batch_size=UPDATE_BATCH_SIZE)
+
+    logger.info(
+        "grade_attempts attempts=%s answers_changed=%s audit_rows=%s publish=%s teacher_id=%s",
+        len(grades_list), len(changed_answers), len(audit_rows), publish, getattr(teacher, 'id', None),
+    )
+    return results
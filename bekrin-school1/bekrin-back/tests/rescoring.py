@@ -0,0 +1,158 @@
+"""
+Rescore a PDF/JSON exam after its answer key was corrected (wrong `correct` option or `open_answer`).
+Every finished attempt's auto-graded answers are graded again with the compiled key (tests.grading):
+  - mc answers by the recorded selected_option_key, open answers by text_answer; situations and
+    teacher manual scores are left alone. mc answers submitted without a recorded key are skipped.
+  - an attempt with a changed answer gets auto_score = correct answers x points (as on submit) and
+    total_score = auto + manual (capped at the exam max); other attempts keep their scores exactly
+  - writes are set-based in one transaction: one UPDATE per new answer score, bulk_update of the
+    attempts, bulk_create of GradingAuditLog rows (one per changed answer and per changed total)
+Runners: `manage.py rescore_exam` and POST /api/teacher/exams/{id}/rescore. dry_run only reports.
+"""
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+
+from tests.grading import get_grading_plan, points_per_question
+from tests.models import ExamAnswer, ExamAttempt, GradingAuditLog
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+UPDATE_BATCH_SIZE = 500
+# Attempts listed one by one in the summary; the counters always cover all of them.
+MAX_LISTED_ATTEMPTS = 200
+
+
+class RescoreError(ValueError):
+    """The exam cannot be rescored (BANK exam or no answer key)."""
+
+
+def _new_auto_score(rule, selected_key, text_answer, pts):
+    """Auto score of one answer under the current key; None when it cannot be regraded."""
+    if rule.kind == 'mc':
+        if not selected_key:
+            return None
+        return pts if rule.key_correct(selected_key.strip().upper()) else Decimal('0')
+    if rule.kind == 'open':
+        return pts if rule.open_correct((text_answer or '').strip()) else Decimal('0')
+    return None
+
+
+def rescore_exam(exam, teacher=None, dry_run=False, notes=''):
+    """
+    Regrade the finished attempts of exam with its current answer key. Returns a summary dict
+    (camelCase, as returned by the teacher endpoint). Raises RescoreError when there is nothing to grade with.
+    """
+    if exam.source_type not in ('PDF', 'JSON'):
+        raise RescoreError('Only PDF/JSON exams can be rescored')
+    plan = get_grading_plan(exam)
+    if plan is None:
+        raise RescoreError('Exam has no answer key')
+    exact_pts = points_per_question(exam.type)
+    pts = exact_pts.quantize(CENT)
+    max_score = Decimal(str(exam.max_score or (100 if exam.type == 'quiz' else 150)))
+    audit_notes = f'Rescore with answer key {plan.version}' + (f': {notes}' if notes else '')
+
+    with transaction.atomic():
+        attempts = {
+            a.id: a for a in ExamAttempt.objects.select_for_update().filter(
+                exam=exam, finished_at__isnull=False,
+            ).only('id', 'student_id', 'auto_score', 'manual_score', 'total_score', 'is_result_published')
+        }
+        answers = ExamAnswer.objects.filter(
+            attempt__exam=exam, attempt__finished_at__isnull=False, question__isnull=True, requires_manual_check=False,
+        ).values_list('id', 'attempt_id', 'question_number', 'selected_option_key', 'text_answer', 'auto_score')
+
+        ids_by_score = {}
+        correct_counts = {}
+        touched = set()
+        audit_rows = []
+        per_question = {}
+        answers_checked = answers_skipped = gained = lost = 0
+        for answer_id, attempt_id, number, selected_key, text_answer, old_score in answers.iterator(chunk_size=2000):
+            if attempt_id not in attempts:
+                continue  # attempt finished after the locking read above
+            rule = plan.rule(number)
+            new_score = _new_auto_score(rule, selected_key, text_answer, pts) if rule is not None else None
+            old_score = (old_score or Decimal('0')).quantize(CENT)
+            if new_score is None:
+                answers_skipped += 1
+                new_score = old_score
+            else:
+                answers_checked += 1
+            if new_score > 0:
+                correct_counts[attempt_id] = correct_counts.get(attempt_id, 0) + 1
+            if new_score == old_score:
+                continue
+            ids_by_score.setdefault(new_score, []).append(answer_id)
+            touched.add(attempt_id)
+            stats = per_question.setdefault(number, {'questionNumber': number, 'gained': 0, 'lost': 0})
+            if new_score > old_score:
+                gained += 1
+                stats['gained'] += 1
+            else:
+                lost += 1
+                stats['lost'] += 1
+            audit_rows.append(GradingAuditLog(
+                attempt_id=attempt_id, teacher=teacher, answer_id=answer_id,
+                old_score=old_score, new_score=new_score, notes=audit_notes,
+            ))
+
+        changed_attempts = []
+        listed = []
+        published_changed = 0
+        score_delta = Decimal('0')
+        for attempt_id in sorted(touched):
+            attempt = attempts[attempt_id]
+            old_auto, old_total = attempt.auto_score or Decimal('0'), attempt.total_score
+            new_auto = (correct_counts.get(attempt_id, 0) * exact_pts).quantize(CENT)
+            if new_auto == old_auto:
+                continue
+            score_delta += new_auto - old_auto
+            attempt.auto_score = new_auto
+            attempt.total_score = min(attempt.auto_score + (attempt.manual_score or Decimal('0')), max_score)
+            changed_attempts.append(attempt)
+            if attempt.is_result_published:
+                published_changed += 1
+            audit_rows.append(GradingAuditLog(
+                attempt_id=attempt_id, teacher=teacher, answer=None,
+                old_total_score=old_total, new_total_score=attempt.total_score, notes=audit_notes,
+            ))
+            if len(listed) < MAX_LISTED_ATTEMPTS:
+                listed.append({
+                    'attemptId': attempt_id,
+                    'studentId': attempt.student_id,
+                    'oldTotalScore': float(old_total) if old_total is not None else None,
+                    'newTotalScore': float(attempt.total_score),
+                })
+
+        if not dry_run:
+            for score, ids in ids_by_score.items():
+                for i in range(0, len(ids), UPDATE_BATCH_SIZE):
+                    ExamAnswer.objects.filter(id__in=ids[i:i + UPDATE_BATCH_SIZE]).update(auto_score=score)
+            ExamAttempt.objects.bulk_update(changed_attempts, ['auto_score', 'total_score'], batch_size=UPDATE_BATCH_SIZE)
+            GradingAuditLog.objects.bulk_create(audit_rows, batch_size=UPDATE_BATCH_SIZE)
+
+    summary = {
+        'examId': exam.id,
+        'answerKeyVersion': plan.version,
+        'dryRun': bool(dry_run),
+        'attempts': len(attempts),
+        'attemptsChanged': len(changed_attempts),
+        'publishedAttemptsChanged': published_changed,
+        'answersChecked': answers_checked,
+        'answersSkipped': answers_skipped,
+        'answersChanged': gained + lost,
+        'answersGained': gained,
+        'answersLost': lost,
+        'scoreDelta': float(score_delta),
+        'questions': [per_question[n] for n in sorted(per_question, key=lambda n: (n is None, n))],
+        'changes': listed,
+    }
+    logger.info(
+        "rescore_exam exam_id=%s version=%s dry_run=%s attempts=%s changed=%s answers_changed=%s skipped=%s",
+        exam.id, plan.version, dry_run, len(attempts), len(changed_attempts), gained + lost, answers_skipped,
+    )
+    return summary
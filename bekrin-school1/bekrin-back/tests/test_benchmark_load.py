@@ -0,0 +1,64 @@
+"""
+Tests for the load generators manage.py benchmark_load (coding run/submit) and benchmark_exam_submit.
+- JSON report: per-operation p50/p95/p99, query counts, throughput and sandbox CPU
+- exam burst: every submit graded, one INSERT per submit, transaction time reported
+- seeded organization, students, tasks and exams are removed afterwards unless --keep
+"""
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TransactionTestCase, skipUnlessDBFeature
+
+from accounts.models import User
+from coding.models import CodingSubmission, CodingTask
+from core.models import Organization
+from tests.models import Exam
+
+
+class BenchmarkLoadCommandTests(TransactionTestCase):
+
+    def test_json_report_and_cleanup(self):
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        out = StringIO()
+        call_command(
+            'benchmark_load', '--students', '2', '--requests', '2', '--concurrency', '1',
+            '--submit-ratio', '0.5', '--label', 'ci', '--json', path, stdout=out,
+        )
+        with open(path, encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual(report['label'], 'ci')
+        self.assertEqual(report['operations']['all']['count'], 4)
+        self.assertEqual(report['operations']['all']['errors'], 0, report['operations'])
+        self.assertEqual(
+            report['operations']['run']['count'] + report['operations']['submit']['count'], 4,
+        )
+        for key in ('p50', 'p95', 'p99'):
+            self.assertGreater(report['operations']['all']['latency_ms'][key], 0)
+        self.assertGreater(report['operations']['all']['queries']['max'], 0)
+        self.assertEqual(report['sandbox']['graded_submits'], report['operations']['submit']['count'])
+        self.assertEqual([t['cases'] for t in report['tasks']], [2, 10, 25])
+        self.assertIn('throughput=', out.getvalue())
+        self.assertFalse(Organization.objects.filter(slug='bench-load').exists())
+        self.assertFalse(User.objects.filter(email__endswith='@bench.local').exists())
+        self.assertFalse(CodingTask.objects.filter(title__startswith='Bench ').exists())
+        self.assertFalse(CodingSubmission.objects.exists())
+
+    @skipUnlessDBFeature('test_db_allows_multiple_connections')
+    def test_exam_submit_burst_report_and_cleanup(self):
+        # Concurrent submits need a test database that takes several connections at once
+        # (PostgreSQL); the in-memory SQLite test database does not.
+        out = StringIO()
+        call_command('benchmark_exam_submit', '--students', '5', '--type', 'quiz', '--json', '-', stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['submit']['count'], 5)
+        self.assertEqual(report['submit']['status_codes'], {'200': 5})
+        self.assertEqual(report['inserts_per_submit'], {'min': 1, 'max': 1})
+        self.assertEqual(report['rows'], {'submitted_attempts': 5, 'answers': 5 * 15})
+        self.assertGreater(report['transaction_ms']['max'], 0)
+        self.assertFalse(Exam.objects.filter(title='Bench exam submit').exists())
+        self.assertFalse(User.objects.filter(email__endswith='@bench.local').exists())
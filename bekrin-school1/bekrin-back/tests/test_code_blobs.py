@@ -0,0 +1,106 @@
+"""
+Tests for content-addressed submitted code (coding.CodeBlob).
+- identical code is stored once (create, bulk_create, queue update), large code is zlib-compressed
+- student / teacher submission detail and the student submissions list return the code
+- the teacher list loads blobs with the page query (no query per row)
+"""
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from coding.code_blobs import pack_code, unpack_code
+from coding.models import CodeBlob, CodingSubmission, CodingTask, CodingTopic
+from core.models import Organization
+from students.models import StudentProfile
+
+BIG_CODE = "for i in range(10):\n    print(i * 2)\n" * 100
+
+
+class CodeBlobTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = Organization.objects.create(name="Test Org", slug="test-org")
+        cls.teacher = User.objects.create_user(
+            email="teacher@blob.test", password="pass123", full_name="Teacher", role="teacher", organization=cls.org,
+        )
+        cls.student = User.objects.create_user(
+            email="student@blob.test", password="pass123", full_name="Student", role="student", organization=cls.org,
+        )
+        StudentProfile.objects.get_or_create(user=cls.student, defaults={"grade": "10"})
+        topic = CodingTopic.objects.create(name="Topic", organization=cls.org)
+        cls.task = CodingTask.objects.create(
+            title="T", description="d", topic=topic, organization=cls.org, created_by=cls.teacher,
+        )
+
+    def _create(self, code, run_type="SUBMIT"):
+        return CodingSubmission.objects.create(
+            task=self.task, student=self.student, submitted_code=code, run_type=run_type, status="passed",
+        )
+
+    def test_identical_code_stored_once(self):
+        first = self._create("print(1)")
+        second = self._create("print(1)", run_type="RUN")
+        CodingSubmission.objects.bulk_create([
+            CodingSubmission(task=self.task, student=self.student, submitted_code=code, status="failed")
+            for code in ("print(1)", "print(2)", "print(2)")
+        ])
+        self.assertEqual(first.code_blob_id, second.code_blob_id)
+        self.assertEqual(CodeBlob.objects.count(), 2)
+        self.assertEqual(
+            sorted(s.submitted_code for s in CodingSubmission.objects.select_related("code_blob")),
+            ["print(1)", "print(1)", "print(1)", "print(2)", "print(2)"],
+        )
+
+    def test_large_code_compressed_round_trip(self):
+        sub = self._create(BIG_CODE)
+        blob = CodeBlob.objects.get(sha256=sub.code_blob_id)
+        self.assertTrue(blob.compressed)
+        self.assertEqual(blob.size, len(BIG_CODE.encode()))
+        self.assertLess(len(bytes(blob.data)), blob.size)
+        self.assertEqual(CodingSubmission.objects.get(id=sub.id).submitted_code, BIG_CODE)
+
+    @override_settings(CODING_CODE_BLOB_COMPRESS_MIN_BYTES=0)
+    def test_compression_disabled(self):
+        sha, data, compressed, size = pack_code(BIG_CODE)
+        self.assertFalse(compressed)
+        self.assertEqual(unpack_code(data, compressed), BIG_CODE)
+        self.assertEqual(size, len(data))
+
+    def test_update_fields_save_keeps_blob(self):
+        sub = self._create("print(1)")
+        sub = CodingSubmission.objects.get(id=sub.id)
+        sub.status = "failed"
+        sub.save(update_fields=["status"])
+        sub.submitted_code = "print(3)"
+        sub.save(update_fields=["status"])
+        self.assertEqual(CodingSubmission.objects.get(id=sub.id).submitted_code, "print(3)")
+
+    def test_detail_views_return_code(self):
+        sub = self._create(BIG_CODE)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.student)}")
+        resp = client.get(f"/api/student/coding/{self.task.id}/submissions/{sub.id}")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["submittedCode"], BIG_CODE)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.teacher)}")
+        resp = client.get(f"/api/teacher/coding/submissions/{sub.id}")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["submittedCode"], BIG_CODE)
+
+    def test_teacher_student_list_no_query_per_row(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.teacher)}")
+        url = f"/api/teacher/coding/student/{self.student.id}/submissions?page_size=50"
+        self._create("print(0)")
+        with CaptureQueriesContext(connection) as small:
+            client.get(url)
+        for i in range(1, 20):
+            self._create(f"print({i})")
+        with CaptureQueriesContext(connection) as large:
+            resp = client.get(url)
+        self.assertEqual(len(resp.json()["submissions"]), 20)
+        self.assertEqual(len(large), len(small))
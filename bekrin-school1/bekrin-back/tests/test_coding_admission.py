@@ -0,0 +1,72 @@
+"""
+Tests for coding.services.admission.AdmissionController: per-user in-flight limit,
+token bucket, global slots with a bounded wait queue.
+"""
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from coding.services.admission import (
+    REASON_BUSY,
+    REASON_RATE,
+    REASON_USER_INFLIGHT,
+    AdmissionController,
+    AdmissionRejected,
+)
+
+
+class AdmissionControllerTests(SimpleTestCase):
+    def _reason(self, fn, *args):
+        with self.assertRaises(AdmissionRejected) as ctx:
+            fn(*args)
+        return ctx.exception
+
+    def test_user_inflight_limit(self):
+        ctl = AdmissionController(user_inflight=1, global_slots=4, rate_per_minute=0)
+        ctl.acquire(1)
+        self.assertEqual(self._reason(ctl.acquire, 1).reason, REASON_USER_INFLIGHT)
+        ctl.acquire(2)
+        ctl.release(1)
+        ctl.acquire(1)
+        self.assertEqual(ctl.stats()['running'], 2)
+
+    def test_token_bucket_burst_and_retry_after(self):
+        ctl = AdmissionController(user_inflight=10, rate_per_minute=60, burst=2)
+        for _ in range(2):
+            ctl.acquire(1)
+            ctl.release(1)
+        exc = self._reason(ctl.acquire, 1)
+        self.assertEqual((exc.reason, exc.retry_after), (REASON_RATE, 1))
+        ctl.acquire(2)
+        self.assertEqual(ctl.stats()['rejected'][REASON_RATE], 1)
+
+    def test_global_slots_queue_then_admit(self):
+        ctl = AdmissionController(global_slots=1, queue_size=1, queue_timeout=5, rate_per_minute=0)
+        ctl.acquire(1)
+        admitted = threading.Event()
+
+        def waiter():
+            ctl.acquire(2)
+            admitted.set()
+
+        t = threading.Thread(target=waiter)
+        t.start()
+        for _ in range(100):
+            if ctl.stats()['queueDepth'] == 1:
+                break
+            time.sleep(0.01)
+        exc = self._reason(ctl.acquire, 3)
+        self.assertEqual((exc.reason, exc.queue_depth), (REASON_BUSY, 1))
+        self.assertFalse(admitted.is_set())
+        ctl.release(1)
+        t.join(5)
+        self.assertTrue(admitted.is_set())
+        self.assertEqual(ctl.stats()['queueDepth'], 0)
+
+    def test_queue_timeout_rejects_and_frees_user(self):
+        ctl = AdmissionController(user_inflight=1, global_slots=1, queue_timeout=0.05, rate_per_minute=0)
+        ctl.acquire(1)
+        self.assertEqual(self._reason(ctl.acquire, 2).reason, REASON_BUSY)
+        ctl.release(1)
+        ctl.acquire(2)
@@ -0,0 +1,111 @@
+"""
+Tests for SUBMIT attempt numbers (CodingStudentTaskStat.last_attempt_no counter).
+- 1, 2, 3 per (student, task); RUNs do not consume numbers; deleting history does not reuse numbers
+- rows with an explicit attempt_no and pre-existing submissions keep the counter ahead
+- concurrent reservations never hand out the same number
+"""
+import threading
+import time
+
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from coding.models import CodingStudentTaskStat, CodingSubmission, CodingTask, CodingTopic
+from coding.services.submissions import next_attempt_no
+from core.models import Organization
+
+
+def _task_and_student(suffix):
+    org = Organization.objects.create(name=f"Org {suffix}", slug=f"org-{suffix}")
+    student = User.objects.create_user(
+        email=f"student@{suffix}.test", password="pass123", full_name="Student", role="student", organization=org,
+    )
+    topic = CodingTopic.objects.create(name="Topic", organization=org)
+    task = CodingTask.objects.create(title="T", description="d", topic=topic, organization=org)
+    return task, student
+
+
+def _submit(task, student):
+    with transaction.atomic():
+        return CodingSubmission.objects.create(
+            task=task, student=student, submitted_code="x", run_type="SUBMIT", status="failed",
+            attempt_no=next_attempt_no(task, student),
+        )
+
+
+class AttemptCounterTests(TestCase):
+
+    def setUp(self):
+        self.task, self.student = _task_and_student("attempts")
+
+    def test_sequential_gap_free(self):
+        first = _submit(self.task, self.student)
+        CodingSubmission.objects.create(
+            task=self.task, student=self.student, submitted_code="x", run_type="RUN", status="passed",
+        )
+        second = _submit(self.task, self.student)
+        self.assertEqual((first.attempt_no, second.attempt_no), (1, 2))
+        CodingSubmission.objects.filter(id=second.id).delete()
+        self.assertEqual(_submit(self.task, self.student).attempt_no, 3)
+
+    def test_query_count_independent_of_history(self):
+        for _ in range(3):
+            _submit(self.task, self.student)
+        with CaptureQueriesContext(connection) as few:
+            next_attempt_no(self.task, self.student)
+        for _ in range(20):
+            _submit(self.task, self.student)
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(next_attempt_no(self.task, self.student), 25)
+        self.assertEqual(len(many), len(few))
+
+    def test_explicit_attempt_no_moves_counter(self):
+        CodingSubmission.objects.create(
+            task=self.task, student=self.student, submitted_code="x", run_type="SUBMIT", status="failed", attempt_no=7,
+        )
+        self.assertEqual(_submit(self.task, self.student).attempt_no, 8)
+
+    def test_existing_history_without_stat_row(self):
+        CodingSubmission.objects.create(
+            task=self.task, student=self.student, submitted_code="x", run_type="SUBMIT", status="failed", attempt_no=4,
+        )
+        CodingStudentTaskStat.objects.all().delete()
+        self.assertEqual(_submit(self.task, self.student).attempt_no, 5)
+
+
+class AttemptCounterConcurrencyTests(TransactionTestCase):
+
+    def test_concurrent_submits_get_distinct_numbers(self):
+        task, student = _task_and_student("concurrent")
+        workers, per_worker = 4, 5
+        start = threading.Barrier(workers)
+        errors = []
+
+        def worker():
+            try:
+                start.wait()
+                done = 0
+                while done < per_worker:
+                    try:
+                        _submit(task, student)
+                        done += 1
+                    except OperationalError as exc:
+                        # SQLite's shared-cache test database reports lock conflicts instead of waiting.
+                        if "locked" not in str(exc):
+                            raise
+                        time.sleep(0.01)
+            except Exception as exc:  # surfaced by the assertion below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        numbers = sorted(CodingSubmission.objects.filter(task=task, student=student).values_list("attempt_no", flat=True))
+        self.assertEqual(numbers, list(range(1, workers * per_worker + 1)))
@@ -1,7 +1,9 @@
 """
 Regression tests for GET /api/teacher/coding-monitor endpoint.
 - Empty dataset, missing relations, group/topic filters
-- sort=last_activity, most_solved, most_attempts
+- sort=last_activity, most_solved (ties: oldest activity first), most_attempts (alias most_submissions),
+  cpu_time, peak_memory
+- ranking keyset pagination (ranking_cursor), constant query count
 - JSON schema (ranking, submissions)
 """
 from django.test import TestCase
@@ -192,3 +194,111 @@ class CodingMonitorTests(TestCase):
         data = res.json()
         self.assertGreater(len(data["ranking"]), 0)
         self.assertGreater(data["submissions"]["count"], 0)
+
+    def test_sort_cpu_time_and_peak_memory(self):
+        """sort=cpu_time / peak_memory: lowest average first, unmeasured students last."""
+        topic = CodingTopic.objects.create(name="Perf", organization=self.org, is_archived=False)
+        task = CodingTask.objects.create(
+            title="P1", description="d", topic=topic, deleted_at=None, created_by=self.teacher
+        )
+        fast = User.objects.create_user(
+            email="fast@monitor.test", password="pass123", full_name="Fast", role="student", organization=self.org
+        )
+        unmeasured = User.objects.create_user(
+            email="old@monitor.test", password="pass123", full_name="Old", role="student", organization=self.org
+        )
+        for user, cpu, peak in ((self.student, 90, 4000), (fast, 10, 9000), (unmeasured, None, None)):
+            CodingSubmission.objects.create(
+                task=task, student=user, status="passed", run_type="SUBMIT", submitted_code="x",
+                is_archived=False, cpu_time_ms=cpu, peak_memory_kb=peak,
+            )
+        data = self._get(sort="cpu_time").json()
+        self.assertEqual([r["student_id"] for r in data["ranking"]], [fast.id, self.student.id, unmeasured.id])
+        self.assertEqual(data["ranking"][0]["avgCpuTimeMs"], 10)
+        self.assertIsNone(data["ranking"][2]["avgCpuTimeMs"])
+        data = self._get(sort="peak_memory").json()
+        self.assertEqual([r["student_id"] for r in data["ranking"]], [self.student.id, fast.id, unmeasured.id])
+        self.assertIn("cpuTimeMs", data["submissions"]["results"][0])
+
+    def _make_ranked_students(self, count):
+        topic = CodingTopic.objects.create(name="Rank", organization=self.org, is_archived=False)
+        tasks = [
+            CodingTask.objects.create(title=f"R{i}", description="d", topic=topic, deleted_at=None, created_by=self.teacher)
+            for i in range(3)
+        ]
+        users = []
+        for i in range(count):
+            user = User.objects.create_user(
+                email=f"rank{i}@monitor.test", password="pass123", full_name=f"Rank {i}",
+                role="student", organization=self.org,
+            )
+            for j, task in enumerate(tasks[: i % 3 + 1]):
+                CodingSubmission.objects.create(
+                    task=task, student=user, status="passed" if (i + j) % 2 else "failed",
+                    run_type="SUBMIT", submitted_code="x", is_archived=False,
+                    cpu_time_ms=(i * 7) % 11 if (i + j) % 2 else None,
+                )
+            users.append(user)
+        return users
+
+    def test_ranking_keyset_pages_cover_all_students_once(self):
+        """ranking_cursor pages: same order as one big page, no duplicates, for every sort."""
+        self._make_ranked_students(12)
+        orders = {}
+        for sort in ("most_solved", "most_attempts", "most_submissions", "last_activity", "cpu_time", "peak_memory"):
+            full = self._get(sort=sort, ranking_page_size=200).json()
+            self.assertEqual(full["rankingPage"]["count"], 12)
+            self.assertIsNone(full["rankingPage"]["next"])
+            expected = [r["student_id"] for r in full["ranking"]]
+            seen, cursor = [], None
+            while True:
+                params = {"sort": sort, "ranking_page_size": 5}
+                if cursor:
+                    params["ranking_cursor"] = cursor
+                data = self._get(**params).json()
+                self.assertLessEqual(len(data["ranking"]), 5)
+                seen += [r["student_id"] for r in data["ranking"]]
+                cursor = data["rankingPage"]["next"]
+                if not cursor:
+                    break
+            self.assertEqual(seen, expected, sort)
+            orders[sort] = expected
+        # most_submissions is the old alias of most_attempts
+        self.assertEqual(orders["most_submissions"], orders["most_attempts"])
+        ranking = self._get(sort="most_solved", ranking_page_size=200).json()["ranking"]
+        solved = [r["totalTasksSolved"] for r in ranking]
+        self.assertEqual(solved, sorted(solved, reverse=True))
+        # Ties on solved count: oldest last activity first
+        for a, b in zip(ranking, ranking[1:]):
+            if a["totalTasksSolved"] == b["totalTasksSolved"]:
+                self.assertLessEqual(a["lastActivity"], b["lastActivity"])
+        row = self._get(sort="most_solved", ranking_page_size=1).json()["ranking"][0]
+        self.assertEqual(set(row["student"]), {"id", "userId", "fullName", "email", "class"})
+
+    def test_ranking_invalid_cursor_returns_400(self):
+        self._make_ranked_students(3)
+        self.assertEqual(self._get(ranking_cursor="not-a-cursor").status_code, 400)
+        cursor = self._get(sort="most_solved", ranking_page_size=1).json()["rankingPage"]["next"]
+        self.assertEqual(self._get(sort="most_attempts", ranking_cursor=cursor).status_code, 400)
+
+    def test_ranking_query_count_independent_of_students(self):
+        """Query count does not grow with the number of ranked students."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        self._make_ranked_students(3)
+        with CaptureQueriesContext(connection) as small:
+            self._get(sort="most_solved")
+        for i in range(20):
+            user = User.objects.create_user(
+                email=f"more{i}@monitor.test", password="pass123", full_name=f"More {i}",
+                role="student", organization=self.org,
+            )
+            CodingSubmission.objects.create(
+                task=CodingTask.objects.first(), student=user, status="passed",
+                run_type="SUBMIT", submitted_code="x", is_archived=False,
+            )
+        with CaptureQueriesContext(connection) as large:
+            data = self._get(sort="most_solved").json()
+        self.assertEqual(len(data["ranking"]), 23)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
@@ -0,0 +1,114 @@
+"""
+Tests for GET /api/teacher/coding-monitor/stream (Server-Sent Events live feed).
+- new submissions streamed with SSE id = submission id
+- group / topic / include_run filters
+- resume with last_id and Last-Event-ID
+"""
+import json
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from core.models import Organization
+from groups.models import Group, GroupStudent
+from students.models import StudentProfile
+from coding.models import CodingSubmission, CodingTask, CodingTopic
+from coding.services.live_feed import get_feed
+
+
+@override_settings(
+    CODING_MONITOR_STREAM_POLL_SECONDS=0.05,
+    CODING_MONITOR_STREAM_MAX_SECONDS=0.3,
+    CODING_MONITOR_STREAM_HEARTBEAT_SECONDS=1,
+)
+class CodingMonitorStreamTests(TestCase):
+
+    def setUp(self):
+        get_feed().reset()
+        self.client = APIClient()
+        self.org = Organization.objects.create(name="Test Org", slug="test-org")
+        self.teacher = User.objects.create_user(
+            email="teacher@stream.test", password="pass123", full_name="Teacher", role="teacher", organization=self.org,
+        )
+        self.student = User.objects.create_user(
+            email="student@stream.test", password="pass123", full_name="Student", role="student", organization=self.org,
+        )
+        self.other = User.objects.create_user(
+            email="other@stream.test", password="pass123", full_name="Other", role="student", organization=self.org,
+        )
+        profile, _ = StudentProfile.objects.get_or_create(user=self.student, defaults={"grade": "10"})
+        self.group = Group.objects.create(name="G", organization=self.org, created_by=self.teacher)
+        GroupStudent.objects.create(
+            group=self.group, student_profile=profile, active=True, left_at=None, organization=self.org,
+        )
+        self.topic = CodingTopic.objects.create(name="A", organization=self.org)
+        other_topic = CodingTopic.objects.create(name="B", organization=self.org)
+        self.task = CodingTask.objects.create(
+            title="T1", description="d", topic=self.topic, organization=self.org, created_by=self.teacher,
+        )
+        self.other_task = CodingTask.objects.create(
+            title="T2", description="d", topic=other_topic, organization=self.org, created_by=self.teacher,
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.teacher)}")
+
+    def _submission(self, student=None, task=None, run_type="SUBMIT"):
+        return CodingSubmission.objects.create(
+            task=task or self.task, student=student or self.student, status="passed", run_type=run_type,
+            submitted_code="x", passed_count=2, total_count=2, runtime_ms=12,
+        )
+
+    def _events(self, **params):
+        qs = "&".join(f"{k}={v}" for k, v in params.items())
+        res = self.client.get(f"/api/teacher/coding-monitor/stream{'?' + qs if qs else ''}")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        body = b"".join(res.streaming_content).decode()
+        events = []
+        for block in body.split("\n\n"):
+            lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":") and ": " in line)
+            if lines.get("event") == "submission":
+                data = json.loads(lines["data"])
+                self.assertEqual(int(lines["id"]), data["id"])
+                events.append(data)
+        return events
+
+    def test_streams_submissions_after_last_id(self):
+        first = self._submission()
+        second = self._submission(student=self.other)
+        events = self._events(last_id=first.id - 1)
+        self.assertEqual([e["id"] for e in events], [first.id, second.id])
+        self.assertEqual(events[0]["studentName"], "Student")
+        self.assertEqual((events[0]["passedCount"], events[0]["totalCount"], events[0]["runtimeMs"]), (2, 2, 12))
+        self.assertEqual([e["id"] for e in self._events(last_id=first.id)], [second.id])
+
+    def test_last_event_id_header_resumes(self):
+        first = self._submission()
+        second = self._submission()
+        res = self.client.get("/api/teacher/coding-monitor/stream", HTTP_LAST_EVENT_ID=str(first.id))
+        body = b"".join(res.streaming_content).decode()
+        self.assertIn(f"id: {second.id}\n", body)
+        self.assertNotIn(f"id: {first.id}\n", body)
+
+    def test_without_cursor_only_new_submissions(self):
+        self._submission()
+        self.assertEqual(self._events(), [])
+
+    def test_group_topic_and_run_filters(self):
+        start = self._submission().id - 1
+        self._submission(student=self.other)
+        self._submission(task=self.other_task)
+        run = self._submission(run_type="RUN")
+        events = self._events(last_id=start, groupId=self.group.id, topic=self.topic.id)
+        self.assertEqual([(e["studentId"], e["taskId"]) for e in events], [(self.student.id, self.task.id)])
+        events = self._events(last_id=start, groupId=self.group.id, topic=self.topic.id, include_run="1")
+        self.assertEqual(events[-1]["id"], run.id)
+
+    def test_validation(self):
+        res = self.client.get("/api/teacher/coding-monitor/stream?groupId=abc")
+        self.assertEqual(res.status_code, 400)
+        res = self.client.get("/api/teacher/coding-monitor/stream?groupId=999999")
+        self.assertEqual(res.status_code, 404)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.student)}")
+        self.assertEqual(self.client.get("/api/teacher/coding-monitor/stream").status_code, 403)
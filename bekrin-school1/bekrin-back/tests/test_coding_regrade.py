@@ -0,0 +1,154 @@
+"""
+Tests for regrading a coding task after its test cases change (coding.services.regrade).
+- manage.py regrade_coding_task: status/score/details, CodingProgress and monitor stats follow the new cases
+- scope latest vs all; a stopped job resumes after its last committed batch
+- POST/GET /api/teacher/coding/{id}/regrade: job queued once per scope, run by --pending
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from coding.models import (
+    CodingProgress, CodingRegradeJob, CodingStudentTaskStat, CodingSubmission, CodingTask, CodingTestCase, CodingTopic,
+)
+from coding.services.regrade import claim_job, run_job, start_regrade
+from core.models import Organization
+from students.models import StudentProfile
+
+GOOD = "print(int(input()) * 2)"
+BAD = "print(0)"
+
+
+class CodingRegradeTests(TestCase):
+
+    def setUp(self):
+        self.org = Organization.objects.create(name="Test Org", slug="test-org")
+        self.teacher = User.objects.create_user(
+            email="teacher@regrade.test", password="pass123", full_name="Teacher", role="teacher", organization=self.org,
+        )
+        self.students = []
+        for i in range(3):
+            user = User.objects.create_user(
+                email=f"s{i}@regrade.test", password="pass123", full_name=f"S{i}", role="student", organization=self.org,
+            )
+            StudentProfile.objects.get_or_create(user=user, defaults={"grade": "10"})
+            self.students.append(user)
+        topic = CodingTopic.objects.create(name="Topic", organization=self.org)
+        self.task = CodingTask.objects.create(
+            title="Double", description="Print 2*n", topic=topic, organization=self.org, created_by=self.teacher,
+        )
+        # Wrong expected output for n=2: correct solutions were graded as failed.
+        self.cases = [
+            CodingTestCase.objects.create(task=self.task, input_data=f"{n}\n", expected=expected, order_index=i)
+            for i, (n, expected) in enumerate([(1, "2"), (2, "5")])
+        ]
+
+    def _sub(self, student, code, status):
+        return CodingSubmission.objects.create(
+            task=self.task, student=student, submitted_code=code, run_type="SUBMIT", status=status,
+            passed_count=1 if status == "failed" else 0, total_count=2, score=50 if status == "failed" else 0,
+        )
+
+    def _fix_case(self):
+        self.cases[1].expected = "4"
+        self.cases[1].save()
+
+    def _regrade(self, *args):
+        out = StringIO()
+        call_command("regrade_coding_task", *args, stdout=out)
+        return out.getvalue()
+
+    def test_regrade_all_updates_results_progress_and_stats(self):
+        s0, s1 = self.students[:2]
+        good = self._sub(s0, GOOD, "failed")
+        bad = self._sub(s1, BAD, "failed")
+        self._fix_case()
+        out = self._regrade("--task", str(self.task.id), "--scope", "all", "--batch-size", "1")
+        self.assertIn("done: 2 submission(s), 2 changed", out)
+        good.refresh_from_db()
+        bad.refresh_from_db()
+        self.assertEqual((good.status, good.score, good.passed_count), ("passed", 100, 2))
+        self.assertEqual(len(good.details_json), 2)
+        self.assertEqual((bad.status, bad.score), ("failed", 0))
+        progress = CodingProgress.objects.get(student_profile__user=s0, exercise=self.task)
+        self.assertEqual((progress.status, progress.score), ("completed", 100))
+        self.assertFalse(CodingProgress.objects.filter(student_profile__user=s1).exists())
+        stat = CodingStudentTaskStat.objects.get(student=s0, task=self.task)
+        self.assertEqual((stat.solved, stat.best_score, stat.attempts), (True, 100, 1))
+
+    def test_regrade_revokes_completion(self):
+        s0 = self.students[0]
+        sub = self._sub(s0, BAD, "passed")
+        CodingProgress.objects.create(student_profile=s0.student_profile, exercise=self.task, status="completed", score=100)
+        self._regrade("--task", str(self.task.id))
+        sub.refresh_from_db()
+        self.assertEqual(sub.status, "failed")
+        progress = CodingProgress.objects.get(student_profile__user=s0, exercise=self.task)
+        self.assertEqual(progress.status, "in_progress")
+        self.assertFalse(CodingStudentTaskStat.objects.get(student=s0, task=self.task).solved)
+
+    def test_scope_latest_only_newest_per_student(self):
+        s0, s1 = self.students[:2]
+        old = self._sub(s0, GOOD, "failed")
+        newest = self._sub(s0, GOOD, "failed")
+        other = self._sub(s1, GOOD, "failed")
+        self._fix_case()
+        self._regrade("--task", str(self.task.id))
+        statuses = dict(CodingSubmission.objects.filter(id__in=[old.id, newest.id, other.id]).values_list("id", "status"))
+        self.assertEqual(statuses, {old.id: "failed", newest.id: "passed", other.id: "passed"})
+
+    def test_stopped_job_resumes_after_last_batch(self):
+        subs = [self._sub(s, GOOD, "failed") for s in self.students]
+        self._fix_case()
+        job, created = start_regrade(self.task, "all")
+        self.assertTrue(created)
+        batches = []
+        job = run_job(claim_job(job.id), batch_size=1, on_progress=lambda j: batches.append(j.processed),
+                      should_stop=lambda: len(batches) >= 1)
+        self.assertEqual((job.status, job.processed, job.last_submission_id), ("pending", 1, subs[0].id))
+        CodingSubmission.objects.filter(id=subs[0].id).update(status="failed")
+        out = self._regrade("--job", str(job.id), "--batch-size", "1")
+        self.assertIn(f"resume_after={subs[0].id}", out)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed, job.total), ("done", 3, 3))
+        # The first row was committed before the stop and is not graded again.
+        self.assertEqual(
+            list(CodingSubmission.objects.order_by("id").values_list("status", flat=True)),
+            ["failed", "passed", "passed"],
+        )
+
+    def test_no_test_cases_fails_and_can_resume(self):
+        self._sub(self.students[0], GOOD, "failed")
+        CodingTestCase.objects.filter(task=self.task).delete()
+        out = self._regrade("--task", str(self.task.id))
+        job = CodingRegradeJob.objects.get()
+        self.assertEqual(job.status, "failed")
+        self.assertIn(f"resume with --job {job.id}", out)
+        CodingTestCase.objects.create(task=self.task, input_data="1\n", expected="2", order_index=0)
+        self._regrade("--job", str(job.id))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.changed), ("done", 1))
+
+    def test_teacher_endpoint_queues_job(self):
+        self._sub(self.students[0], GOOD, "failed")
+        self._fix_case()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.teacher)}")
+        url = f"/api/teacher/coding/{self.task.id}/regrade"
+        self.assertIsNone(client.get(url).json()["job"])
+        self.assertEqual(client.post(url, {"scope": "everything"}, format="json").status_code, 400)
+        res = client.post(url, {"scope": "all"}, format="json")
+        self.assertEqual(res.status_code, 202)
+        job_id = res.json()["job"]["id"]
+        again = client.post(url, {"scope": "all"}, format="json")
+        self.assertEqual((again.status_code, again.json()["job"]["id"]), (200, job_id))
+        self.assertIn("1 queued regrade job(s) run", self._regrade("--pending"))
+        job = client.get(url).json()["job"]
+        self.assertEqual((job["id"], job["status"], job["processed"], job["changed"]), (job_id, "done", 1, 1))
+        student = APIClient()
+        student.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.students[0])}")
+        self.assertEqual(student.post(url, {}, format="json").status_code, 403)
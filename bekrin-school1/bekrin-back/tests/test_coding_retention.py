@@ -0,0 +1,104 @@
+"""
+Tests for RUN submission retention (manage.py compact_coding_runs).
+- old RUN rows -> daily counters + distinct code, raw rows deleted in batches; SUBMIT / recent RUN kept
+- monitor and student submissions keep include_run totals
+- backfill_coding_stats after compaction keeps run counts
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from core.models import Organization
+from coding.models import (
+    CodingRunCode, CodingRunDailyStat, CodingStudentTaskStat, CodingSubmission, CodingTask, CodingTopic,
+)
+
+
+class CodingRunRetentionTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.org = Organization.objects.create(name="Test Org", slug="test-org")
+        self.teacher = User.objects.create_user(
+            email="teacher@ret.test", password="pass123", full_name="Teacher", role="teacher", organization=self.org,
+        )
+        self.student = User.objects.create_user(
+            email="student@ret.test", password="pass123", full_name="Student", role="student", organization=self.org,
+        )
+        topic = CodingTopic.objects.create(name="Topic", organization=self.org)
+        self.task = CodingTask.objects.create(
+            title="T", description="d", topic=topic, organization=self.org, created_by=self.teacher,
+        )
+        now = timezone.now()
+        self.old_day = now - timedelta(days=40)
+        specs = [
+            ("RUN", "print(1)", "passed", self.old_day),
+            ("RUN", "print(1)", "failed", self.old_day + timedelta(minutes=5)),
+            ("RUN", "print(2)", "failed", self.old_day - timedelta(days=1)),
+            ("SUBMIT", "print(1)", "passed", self.old_day),
+            ("RUN", "print(3)", "failed", now),
+        ]
+        for run_type, code, status, created_at in specs:
+            sub = CodingSubmission.objects.create(
+                task=self.task, student=self.student, run_type=run_type, submitted_code=code, status=status,
+            )
+            CodingSubmission.objects.filter(id=sub.id).update(created_at=created_at)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.teacher)}")
+
+    def _compact(self, *args):
+        out = StringIO()
+        call_command("compact_coding_runs", "--older-than-days", "30", *args, stdout=out)
+        return out.getvalue()
+
+    def _monitor_row(self):
+        return self.client.get("/api/teacher/coding-monitor?include_run=true").json()["ranking"][0]
+
+    def _student_subs(self):
+        return self.client.get(f"/api/teacher/coding/student/{self.student.id}/submissions?include_run=1").json()
+
+    def test_compacts_old_runs_only(self):
+        out = self._compact("--batch-size", "2")
+        self.assertIn("Archived 3 RUN row(s) in 2 batch(es)", out)
+        self.assertEqual(
+            sorted((s.run_type, s.submitted_code) for s in CodingSubmission.objects.select_related("code_blob")),
+            [("RUN", "print(3)"), ("SUBMIT", "print(1)")],
+        )
+        daily = {d.day: (d.run_count, d.passed_count) for d in CodingRunDailyStat.objects.all()}
+        self.assertEqual(daily, {
+            timezone.localdate(self.old_day): (2, 1),
+            timezone.localdate(self.old_day - timedelta(days=1)): (1, 0),
+        })
+        codes = {c.code: c.run_count for c in CodingRunCode.objects.all()}
+        self.assertEqual(codes, {"print(1)": 2, "print(2)": 1})
+        self.assertIn("Archived 0 RUN row(s)", self._compact())
+
+    def test_dry_run_and_disabled(self):
+        self.assertIn("3 RUN row(s)", self._compact("--dry-run"))
+        out = StringIO()
+        call_command("compact_coding_runs", "--older-than-days", "0", stdout=out)
+        self.assertIn("disabled", out.getvalue())
+        self.assertEqual(CodingSubmission.objects.filter(run_type="RUN").count(), 4)
+
+    def test_include_run_totals_survive(self):
+        before_row = self._monitor_row()
+        before = self._student_subs()
+        self._compact()
+        after_row = self._monitor_row()
+        after = self._student_subs()
+        self.assertEqual(before_row["totalAttempts"], 5)
+        self.assertEqual(after_row["totalAttempts"], before_row["totalAttempts"])
+        self.assertEqual((before["count"], before["archivedRunCount"]), (5, 0))
+        self.assertEqual((after["count"], after["archivedRunCount"]), (2, 3))
+
+    def test_backfill_after_compaction_keeps_run_counts(self):
+        self._compact()
+        CodingStudentTaskStat.objects.all().delete()
+        call_command("backfill_coding_stats", stdout=StringIO())
+        stat = CodingStudentTaskStat.objects.get(student=self.student, task=self.task)
+        self.assertEqual((stat.attempts, stat.run_attempts, stat.solved), (1, 4, True))
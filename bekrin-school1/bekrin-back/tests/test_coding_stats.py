@@ -0,0 +1,117 @@
+"""
+Tests for the CodingStudentTaskStat rollup.
+- Updated on sync submit, run and the async queue path
+- backfill_coding_stats matches incrementally maintained rows
+- Coding monitor keeps totals after old submissions are deleted
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from core.models import Organization
+from coding.models import CodingStudentTaskStat, CodingSubmission, CodingTask, CodingTestCase, CodingTopic
+from coding.services.admission import get_admission_controller
+
+STAT_FIELDS = (
+    'attempts', 'run_attempts', 'solved', 'first_solved_at', 'last_submitted_at', 'last_run_at',
+    'best_score', 'best_cpu_time_ms', 'best_peak_memory_kb',
+)
+
+
+class CodingStudentTaskStatTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.org = Organization.objects.create(name="Test Org", slug="test-org")
+        self.teacher = User.objects.create_user(
+            email="teacher@stats.test", password="pass123", full_name="Teacher", role="teacher", organization=self.org,
+        )
+        self.student = User.objects.create_user(
+            email="student@stats.test", password="pass123", full_name="Student", role="student", organization=self.org,
+        )
+        topic = CodingTopic.objects.create(name="Topic", organization=self.org)
+        self.task = CodingTask.objects.create(
+            title="Double", description="Print 2*n", topic=topic, organization=self.org, created_by=self.teacher,
+        )
+        for i, n in enumerate([1, 2]):
+            CodingTestCase.objects.create(
+                task=self.task, input_data=f"{n}\n", expected=str(n * 2), order_index=i, is_sample=True
+            )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.student)}")
+        controller = get_admission_controller()
+        if controller is not None:
+            controller.reset()
+
+    def _stat(self):
+        return CodingStudentTaskStat.objects.get(student=self.student, task=self.task)
+
+    def _submit(self, code):
+        return self.client.post(f"/api/student/coding/{self.task.id}/submit", {"code": code}, format="json")
+
+    def test_submit_and_run_update_stat(self):
+        self._submit("print(0)")
+        stat = self._stat()
+        self.assertEqual((stat.attempts, stat.run_attempts, stat.solved, stat.best_score), (1, 0, False, 0))
+        self._submit("print(int(input()) * 2)")
+        self._submit("print(0)")
+        self.client.post("/api/student/coding/run", {"taskId": self.task.id, "code": "print(0)"}, format="json")
+        stat = self._stat()
+        passed = CodingSubmission.objects.get(student=self.student, status='passed')
+        self.assertEqual((stat.attempts, stat.run_attempts, stat.solved, stat.best_score), (3, 1, True, 100))
+        self.assertEqual(stat.first_solved_at, passed.created_at)
+        self.assertEqual(stat.best_cpu_time_ms, passed.cpu_time_ms)
+        self.assertIsNotNone(stat.last_run_at)
+
+    @override_settings(CODING_SUBMIT_ASYNC=True)
+    def test_async_submit_counts_once_and_records_result(self):
+        self._submit("print(int(input()) * 2)")
+        stat = self._stat()
+        self.assertEqual((stat.attempts, stat.solved), (1, False))
+        call_command("process_coding_queue", "--once", "--concurrency", "1", stdout=StringIO())
+        stat = self._stat()
+        self.assertEqual((stat.attempts, stat.solved, stat.best_score), (1, True, 100))
+
+    def test_backfill_matches_incremental_rows(self):
+        other = User.objects.create_user(
+            email="other@stats.test", password="pass123", full_name="Other", role="student", organization=self.org,
+        )
+        for student, status, cpu in ((self.student, 'failed', None), (self.student, 'passed', 40),
+                                     (self.student, 'passed', 25), (other, 'error', None)):
+            CodingSubmission.objects.create(
+                task=self.task, student=student, status=status, run_type='SUBMIT', submitted_code='x',
+                score=100 if status == 'passed' else 0, cpu_time_ms=cpu, peak_memory_kb=cpu and cpu * 100,
+            )
+        CodingSubmission.objects.create(task=self.task, student=other, status='passed', run_type='RUN', submitted_code='x')
+        expected = {
+            (s.student_id, s.task_id): [getattr(s, f) for f in STAT_FIELDS]
+            for s in CodingStudentTaskStat.objects.all()
+        }
+        self.assertEqual(expected[(self.student.id, self.task.id)][:3], [3, 0, True])
+        self.assertEqual(expected[(self.student.id, self.task.id)][7], 25)
+        CodingStudentTaskStat.objects.all().delete()
+        call_command("backfill_coding_stats", stdout=StringIO())
+        rebuilt = {
+            (s.student_id, s.task_id): [getattr(s, f) for f in STAT_FIELDS]
+            for s in CodingStudentTaskStat.objects.all()
+        }
+        self.assertEqual(rebuilt, expected)
+        call_command("backfill_coding_stats", "--student", str(other.id), stdout=StringIO())
+        self.assertEqual(CodingStudentTaskStat.objects.count(), 2)
+
+    def test_monitor_keeps_totals_after_history_cleanup(self):
+        for status in ('failed', 'passed'):
+            CodingSubmission.objects.create(
+                task=self.task, student=self.student, status=status, run_type='SUBMIT', submitted_code='x',
+            )
+        CodingSubmission.objects.create(task=self.task, student=self.student, status='failed', run_type='RUN', submitted_code='x')
+        CodingSubmission.objects.all().delete()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.teacher)}")
+        row = self.client.get("/api/teacher/coding-monitor").json()["ranking"][0]
+        self.assertEqual((row["totalTasksSolved"], row["totalAttempts"]), (1, 2))
+        self.assertEqual(row["per_task_map"][str(self.task.id)]["attempts"], 2)
+        row = self.client.get("/api/teacher/coding-monitor?include_run=true").json()["ranking"][0]
+        self.assertEqual(row["totalAttempts"], 3)
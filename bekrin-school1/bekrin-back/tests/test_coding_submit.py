@@ -0,0 +1,227 @@
+"""
+Regression tests for student coding run/submit endpoints.
+- POST /api/student/coding/run: sample cases, RUN submission row
+- POST /api/student/coding/{id}/submit: status, counts, details_json shape, early stop
+- Async queue: 202 + status polling + process_coding_queue worker
+- Admission control: 429 + Retry-After
+- Languages: CODING_LANGUAGES gates the body "language"; compiled submits run through the same grading
+"""
+import shutil
+import unittest
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from core.models import Organization
+from coding.models import CodingTopic, CodingTask, CodingTestCase, CodingSubmission, CodingProgress
+from coding.services.admission import get_admission_controller
+
+
+class StudentCodingSubmitTests(TestCase):
+    """Tests for student coding run/submit."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.org = Organization.objects.create(name="Test Org", slug="test-org")
+        self.teacher = User.objects.create_user(
+            email="teacher@submit.test",
+            password="pass123",
+            full_name="Teacher",
+            role="teacher",
+            organization=self.org,
+        )
+        self.student = User.objects.create_user(
+            email="student@submit.test",
+            password="pass123",
+            full_name="Student One",
+            role="student",
+            organization=self.org,
+        )
+        self.topic = CodingTopic.objects.create(name="Topic", organization=self.org)
+        self.task = CodingTask.objects.create(
+            title="Double",
+            description="Print 2*n",
+            topic=self.topic,
+            organization=self.org,
+            created_by=self.teacher,
+        )
+        for i, n in enumerate([1, 2, 3]):
+            CodingTestCase.objects.create(
+                task=self.task, input_data=f"{n}\n", expected=str(n * 2), order_index=i, is_sample=i < 2
+            )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.student)}")
+        # Per-process limiter state would otherwise carry over between tests (ids can repeat).
+        controller = get_admission_controller()
+        if controller is not None:
+            controller.reset()
+
+    def _submit(self, code):
+        return self.client.post(f"/api/student/coding/{self.task.id}/submit", {"code": code}, format="json")
+
+    def _run(self, code):
+        return self.client.post("/api/student/coding/run", {"taskId": self.task.id, "code": code}, format="json")
+
+    def test_submit_accepted(self):
+        res = self._submit("print(int(input()) * 2)")
+        self.assertEqual(res.status_code, 201, res.content)
+        data = res.json()
+        self.assertEqual(data["resultStatus"], "passed")
+        self.assertEqual(data["passedCount"], 3)
+        sub = CodingSubmission.objects.get(id=data["submissionId"])
+        self.assertEqual(sub.run_type, "SUBMIT")
+        self.assertEqual(sub.score, 100)
+        self.assertEqual(sub.attempt_no, 1)
+        self.assertEqual(len(sub.details_json), 3)
+        for key in ("test_case_id", "is_sample", "passed", "input", "output", "expected",
+                    "elapsed_ms", "cpu_ms", "peak_memory_kb"):
+            self.assertIn(key, sub.details_json[0])
+        self.assertEqual(sub.cpu_time_ms, sum(d["cpu_ms"] for d in sub.details_json))
+        self.assertEqual(sub.peak_memory_kb, max(d["peak_memory_kb"] for d in sub.details_json))
+        self.assertTrue(CodingProgress.objects.filter(exercise=self.task, status="completed").exists())
+
+    def test_submit_wrong_answer_runs_all_cases(self):
+        res = self._submit("n = int(input())\nprint(4 if n == 2 else 0)")
+        data = res.json()
+        self.assertEqual(data["resultStatus"], "failed")
+        sub = CodingSubmission.objects.get(id=data["submissionId"])
+        self.assertEqual((sub.passed_count, sub.failed_count), (1, 2))
+        self.assertEqual([d["passed"] for d in sub.details_json], [False, True, False])
+        self.assertEqual(sub.details_json[0]["first_diff"], {"line": 1, "column": 1, "expected": "2", "got": "0"})
+        self.assertNotIn("first_diff", sub.details_json[1])
+
+    def test_submit_uses_case_compare_mode(self):
+        CodingTestCase.objects.filter(task=self.task).update(compare_mode="float", float_tolerance=0.01)
+        res = self._submit("n = int(input())\nprint(n * 2 + 0.001)")
+        self.assertEqual(res.json()["resultStatus"], "passed")
+
+    def test_submit_error_stops_at_first_failing_case(self):
+        res = self._submit("n = int(input())\nprint(n * 2 // (n - 2) * (n - 2))")
+        data = res.json()
+        self.assertEqual(data["resultStatus"], "error")
+        sub = CodingSubmission.objects.get(id=data["submissionId"])
+        self.assertEqual(len(sub.details_json), 2)
+        self.assertIn("ZeroDivisionError", sub.error_message)
+
+    @override_settings(CODING_PARALLEL_CASES=True, CODING_PARALLEL_MAX_PER_REQUEST=3)
+    def test_parallel_mode_same_result(self):
+        res = self._submit("n = int(input())\nprint(n * 2 // (n - 2) * (n - 2))")
+        sub = CodingSubmission.objects.get(id=res.json()["submissionId"])
+        self.assertEqual(sub.status, "error")
+        self.assertEqual(len(sub.details_json), 2)
+        self.assertEqual((sub.passed_count, sub.failed_count), (1, 1))
+
+    def test_repeat_submit_hits_cache_and_test_case_change_invalidates(self):
+        from coding.result_cache import get_result_cache
+        cache = get_result_cache()
+        cache.clear()
+        self._submit("print(int(input()) * 2)")
+        self._submit("print(int(input()) * 2)")
+        self.assertEqual(cache.stats()["hits"], 1)
+        case = CodingTestCase.objects.filter(task=self.task).last()
+        case.expected = "7"
+        case.save()
+        self.assertEqual(cache.stats()["size"], 0)
+        res = self._submit("print(int(input()) * 2)")
+        self.assertEqual(res.json()["resultStatus"], "failed")
+
+    def test_attempt_numbers_increase(self):
+        self._submit("print(0)")
+        res = self._submit("print(0)")
+        self.assertEqual(CodingSubmission.objects.get(id=res.json()["submissionId"]).attempt_no, 2)
+
+    def test_run_uses_sample_cases_and_saves_run_row(self):
+        res = self._run("print(int(input()) * 2)")
+        self.assertEqual(res.status_code, 200, res.content)
+        data = res.json()
+        self.assertEqual(data["status"], "OK")
+        self.assertEqual(data["totalCount"], 2)
+        self.assertEqual(CodingSubmission.objects.filter(run_type="RUN").count(), 1)
+
+    def test_dangerous_code_rejected(self):
+        res = self._submit("import os\nprint(1)")
+        self.assertEqual(res.status_code, 400)
+
+    def test_language_not_enabled_rejected(self):
+        res = self.client.post(
+            f"/api/student/coding/{self.task.id}/submit", {"code": "int main(){}", "language": "c"}, format="json",
+        )
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.json()["details"]["language"], "c")
+
+    @unittest.skipUnless(shutil.which("gcc"), "gcc not installed")
+    @override_settings(CODING_LANGUAGES=["python", "c"], CODING_SUBMIT_ASYNC=True)
+    def test_c_submit_graded_by_queue_worker(self):
+        code = '#include <stdio.h>\nint main(void) { int n; scanf("%d", &n); printf("%d\\n", 2 * n); return 0; }'
+        detail = self.client.get(f"/api/student/coding/{self.task.id}").json()
+        self.assertEqual([lang["id"] for lang in detail["languages"]], ["python", "c"])
+        res = self.client.post(
+            f"/api/student/coding/{self.task.id}/submit", {"code": code, "language": "c"}, format="json",
+        )
+        self.assertEqual(res.status_code, 202, res.content)
+        call_command("process_coding_queue", "--once", "--concurrency", "1", stdout=StringIO())
+        sub = CodingSubmission.objects.get(id=res.json()["submissionId"])
+        self.assertEqual((sub.language, sub.status, sub.passed_count), ("c", "passed", 3))
+
+    @override_settings(CODING_SUBMIT_ASYNC=True)
+    def test_async_submit_queued_then_processed(self):
+        res = self._submit("print(int(input()) * 2)")
+        self.assertEqual(res.status_code, 202, res.content)
+        sub_id = res.json()["submissionId"]
+        self.assertEqual(res.json()["resultStatus"], "queued")
+
+        status_url = f"/api/student/coding/submissions/{sub_id}/status"
+        poll = self.client.get(status_url).json()
+        self.assertFalse(poll["done"])
+        self.assertEqual(poll["queuePosition"], 1)
+
+        call_command("process_coding_queue", "--once", "--concurrency", "1", stdout=StringIO())
+
+        poll = self.client.get(status_url).json()
+        self.assertTrue(poll["done"])
+        self.assertEqual(poll["resultStatus"], "passed")
+        self.assertEqual(poll["passedCount"], 3)
+        sub = CodingSubmission.objects.get(id=sub_id)
+        self.assertEqual(len(sub.details_json), 3)
+        self.assertEqual(sub.attempt_no, 1)
+        self.assertTrue(CodingProgress.objects.filter(exercise=self.task, status="completed").exists())
+
+    def test_stale_running_submission_is_requeued(self):
+        sub = CodingSubmission.objects.create(
+            task=self.task, student=self.student, submitted_code="print(int(input()) * 2)",
+            run_type="SUBMIT", status="running", total_count=3,
+        )
+        call_command("process_coding_queue", "--once", "--concurrency", "1", "--stale-after", "0", stdout=StringIO())
+        sub.refresh_from_db()
+        self.assertEqual(sub.status, "passed")
+
+    def test_status_endpoint_only_own_submissions(self):
+        other = User.objects.create_user(
+            email="other@submit.test", password="pass123", full_name="Other", role="student", organization=self.org
+        )
+        sub = CodingSubmission.objects.create(
+            task=self.task, student=other, submitted_code="x", run_type="SUBMIT", status="queued"
+        )
+        res = self.client.get(f"/api/student/coding/submissions/{sub.id}/status")
+        self.assertEqual(res.status_code, 404)
+
+    @override_settings(CODING_ADMISSION_ENABLED=True, CODING_ADMISSION_BURST=2, CODING_ADMISSION_RATE_PER_MINUTE=6)
+    def test_rate_limited_run_returns_429_with_retry_after(self):
+        self.assertEqual(self._run("print(int(input()) * 2)").status_code, 200)
+        self.assertEqual(self._submit("print(int(input()) * 2)").status_code, 201)
+        res = self._run("print(int(input()) * 2)")
+        self.assertEqual(res.status_code, 429)
+        self.assertTrue(1 <= int(res["Retry-After"]) <= 10)
+        self.assertEqual(res.json()["details"]["reason"], "rate_limited")
+        self.assertIn("queueDepth", res.json())
+        self.assertEqual(CodingSubmission.objects.filter(task=self.task).count(), 2)
+
+    @override_settings(CODING_SUBMIT_ASYNC=True, CODING_ADMISSION_ENABLED=True, CODING_ADMISSION_USER_INFLIGHT=1)
+    def test_async_submit_limits_pending_per_user(self):
+        self.assertEqual(self._submit("print(int(input()) * 2)").status_code, 202)
+        res = self._submit("print(int(input()) * 2)")
+        self.assertEqual(res.status_code, 429)
+        self.assertEqual(res.json()["details"]["reason"], "user_inflight")
@@ -0,0 +1,153 @@
+"""
+Tests for per-question exam analytics (tests.analytics) and GET /api/teacher/exams/{id}/analytics.
+- p-value, discrimination (item vs rest of total), option counts with blanks and the correct option
+- score summary and histograms; archived and unfinished attempts are ignored, submitted attempts
+  without answer rows count with 0 on every item
+- cached until an attempt is submitted or graded, also when manual points only move between answers;
+  owner only
+- NumPy and plain-Python paths agree (when NumPy is installed)
+"""
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from core.models import Organization
+from tests.analytics import HAS_NUMPY, clear_exam_analytics, compute_exam_analytics, get_exam_analytics
+from tests.grading import clear_grading_plans, points_per_question
+from tests.models import Exam, ExamAnswer, ExamAttempt
+
+PTS = points_per_question("quiz").quantize(Decimal("0.01"))
+ANSWER_KEY = {
+    "type": "quiz",
+    "questions": [
+        {"number": 1, "kind": "mc", "options": [{"key": k, "text": k} for k in "ABC"], "correct": "A"},
+        {"number": 2, "kind": "mc", "options": [{"key": k, "text": k} for k in "ABC"], "correct": "B"},
+        {"number": 3, "kind": "open", "open_rule": "EXACT_MATCH", "open_answer": "7"},
+    ],
+}
+
+
+class ExamAnalyticsTests(TestCase):
+    def setUp(self):
+        clear_grading_plans()
+        clear_exam_analytics()
+        org = Organization.objects.create(name="Org", slug="exam-analytics")
+        self.teacher = User.objects.create_user(
+            email="teacher@exam-analytics.test", password="pass123", full_name="T", role="teacher", organization=org,
+        )
+        self.org = org
+        now = timezone.now()
+        self.exam = Exam.objects.create(
+            title="Quiz", type="quiz", source_type="JSON", answer_key_json=ANSWER_KEY, status="active",
+            start_time=now - timedelta(hours=1), end_time=now + timedelta(hours=1), created_by=self.teacher,
+        )
+        # (q1 choice, q2 choice, q3 text): strong students get q1 right, only a weak one gets q2 right
+        for row in [("A", "C", "7"), ("A", "C", "7"), ("A", None, "7"), ("C", "B", "1"), ("C", None, None)]:
+            self._attempt(*row)
+
+    def _attempt(self, q1, q2, q3, finished=True, archived=False, answers=True):
+        n = ExamAttempt.objects.count() + 1
+        student = User.objects.create_user(
+            email=f"s{n}@exam-analytics.test", password="pass123", full_name=f"S{n}", role="student", organization=self.org,
+        )
+        scores = [PTS if q1 == "A" else 0, PTS if q2 == "B" else 0, PTS if q3 == "7" else 0]
+        total = sum(scores, Decimal("0"))
+        attempt = ExamAttempt.objects.create(
+            exam=self.exam, student=student, finished_at=timezone.now() if finished else None, status="SUBMITTED",
+            auto_score=total, total_score=total, is_archived=archived,
+        )
+        if not answers:
+            return attempt
+        ExamAnswer.objects.bulk_create([
+            ExamAnswer(attempt=attempt, question_number=1, selected_option_key=q1, auto_score=scores[0]),
+            ExamAnswer(attempt=attempt, question_number=2, selected_option_key=q2, auto_score=scores[1]),
+            ExamAnswer(attempt=attempt, question_number=3, text_answer=q3, auto_score=scores[2]),
+        ])
+        return attempt
+
+    def test_item_statistics(self):
+        self._attempt("B", "B", "7", finished=False)
+        self._attempt("B", "B", "7", archived=True)
+        result = compute_exam_analytics(self.exam, use_numpy=False)
+        self.assertEqual(result["attempts"], 5)
+        q1, q2, q3 = result["questions"]
+        self.assertEqual((q1["pValue"], q2["pValue"], q3["pValue"]), (0.6, 0.2, 0.6))
+        self.assertGreater(q1["discrimination"], 0)
+        self.assertLess(q2["discrimination"], 0)
+        self.assertEqual(q1["options"], [
+            {"key": "A", "count": 3, "share": 0.6, "correct": True},
+            {"key": "B", "count": 0, "share": 0.0, "correct": False},
+            {"key": "C", "count": 2, "share": 0.4, "correct": False},
+        ])
+        self.assertEqual((q2["blank"], q2["answered"], q3["answered"]), (2, 3, 4))
+        self.assertIsNone(q3["options"])
+        self.assertEqual(result["scores"]["max"], float(2 * PTS))
+        self.assertEqual(result["histograms"]["total"], [2, 3, 0, 0, 0, 0, 0, 0, 0, 0])
+        self.assertEqual(len(result["histograms"]["edges"]), 11)
+
+    def test_attempt_without_answers_counts_as_zero(self):
+        self._attempt(None, None, None, answers=False)
+        result = compute_exam_analytics(self.exam, use_numpy=False)
+        self.assertEqual(result["attempts"], 6)
+        q1, q2, q3 = result["questions"]
+        self.assertEqual((q1["pValue"], q2["pValue"], q3["pValue"]), (0.5, round(1 / 6, 4), 0.5))
+        self.assertEqual((q1["options"][0]["count"], q1["blank"], q2["blank"]), (3, 1, 3))
+        self.assertEqual(result["histograms"]["total"][0], 3)
+        self.assertEqual(result["scores"]["min"], 0.0)
+
+    def test_cached_until_attempts_change(self):
+        first = get_exam_analytics(self.exam)
+        self.assertFalse(first["cached"])
+        self.assertTrue(get_exam_analytics(self.exam)["cached"])
+        attempt = ExamAttempt.objects.filter(exam=self.exam).first()
+        ExamAttempt.objects.filter(pk=attempt.pk).update(manual_score=Decimal("1.00"), is_checked=True)
+        self.assertFalse(get_exam_analytics(self.exam)["cached"])
+        self._attempt("A", "B", "7")
+        result = get_exam_analytics(self.exam)
+        self.assertEqual((result["cached"], result["attempts"]), (False, 6))
+
+    def test_cache_sees_points_moving_between_answers(self):
+        first, second = ExamAttempt.objects.filter(exam=self.exam).order_by("id")[:2]
+        ExamAnswer.objects.filter(attempt=first, question_number=3).update(manual_score=Decimal("2.00"))
+        self.assertFalse(get_exam_analytics(self.exam)["cached"])
+        self.assertTrue(get_exam_analytics(self.exam)["cached"])
+        # Same question, other attempt: per-question and attempt-level sums stay the same
+        ExamAnswer.objects.filter(attempt=first, question_number=3).update(manual_score=None)
+        ExamAnswer.objects.filter(attempt=second, question_number=3).update(manual_score=Decimal("2.00"))
+        self.assertFalse(get_exam_analytics(self.exam)["cached"])
+        # Same attempt, other question
+        ExamAnswer.objects.filter(attempt=second, question_number=3).update(manual_score=None)
+        ExamAnswer.objects.filter(attempt=second, question_number=2).update(manual_score=Decimal("2.00"))
+        self.assertFalse(get_exam_analytics(self.exam)["cached"])
+
+    def test_teacher_endpoint(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.teacher)}")
+        url = f"/api/teacher/exams/{self.exam.id}/analytics"
+        with self.assertNumQueries(5):  # auth user, exam, fingerprint (attempts, answers), attempts with answers
+            res = client.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([q["questionNumber"] for q in res.json()["questions"]], [1, 2, 3])
+        with self.assertNumQueries(4):
+            self.assertTrue(client.get(url).json()["cached"])
+        other = User.objects.create_user(
+            email="other@exam-analytics.test", password="pass123", full_name="O", role="teacher", organization=self.org,
+        )
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(other)}")
+        self.assertEqual(client.get(url).status_code, 404)
+
+    @unittest.skipUnless(HAS_NUMPY, "numpy not installed")
+    def test_numpy_matches_python(self):
+        self._attempt("B", None, "7")
+        self._attempt(None, None, None, answers=False)
+        python = compute_exam_analytics(self.exam, use_numpy=False)
+        vectorized = compute_exam_analytics(self.exam, use_numpy=True)
+        self.assertEqual(vectorized["engine"], "numpy")
+        for key in ("questions", "scores", "histograms", "attempts"):
+            self.assertEqual(vectorized[key], python[key], key)
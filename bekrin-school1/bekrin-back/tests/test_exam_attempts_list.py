@@ -0,0 +1,110 @@
+"""
+Tests for the teacher grading list GET /api/teacher/exams/{id}/attempts.
+- attempts grouped under their runs with manualPendingCount; waiting_manual filter
+- attempts without runs (fallback list)
+- query count is constant regardless of the number of runs and attempts
+"""
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from core.models import Organization
+from groups.models import Group
+from tests.models import Exam, ExamAnswer, ExamAttempt, ExamRun
+
+
+class TeacherExamAttemptsListTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org", slug="exam-attempts-list")
+        self.teacher = User.objects.create_user(
+            email="teacher@exam-attempts-list.test", password="pass123", full_name="T", role="teacher",
+            organization=self.org,
+        )
+        now = timezone.now()
+        self.exam = Exam.objects.create(
+            title="Quiz", type="quiz", source_type="JSON", answer_key_json={"questions": []}, status="active",
+            start_time=now - timedelta(hours=1), end_time=now + timedelta(hours=1), created_by=self.teacher,
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.teacher)}")
+        self.url = f"/api/teacher/exams/{self.exam.id}/attempts"
+        self.n = 0
+
+    def _run(self):
+        self.n += 1
+        group = Group.objects.create(name=f"G{self.n}", organization=self.org, created_by=self.teacher)
+        now = timezone.now()
+        return ExamRun.objects.create(
+            exam=self.exam, group=group, start_at=now - timedelta(minutes=self.n), end_at=now + timedelta(hours=1),
+            duration_minutes=60, status="active", created_by=self.teacher,
+        )
+
+    def _attempt(self, run=None, pending=0):
+        self.n += 1
+        student = User.objects.create_user(
+            email=f"s{self.n}@exam-attempts-list.test", password="pass123", full_name=f"S{self.n}", role="student",
+            organization=self.org,
+        )
+        attempt = ExamAttempt.objects.create(
+            exam=self.exam, exam_run=run, student=student, finished_at=timezone.now(),
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        ExamAnswer.objects.create(attempt=attempt, question_number=1, requires_manual_check=False)
+        for i in range(pending):
+            ExamAnswer.objects.create(attempt=attempt, question_number=2 + i, requires_manual_check=True)
+        return attempt
+
+    def test_attempts_grouped_by_run_with_pending_counts(self):
+        run_a, run_b = self._run(), self._run()
+        waiting = self._attempt(run_a, pending=2)
+        done = self._attempt(run_a)
+        other = self._attempt(run_b, pending=1)
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200, res.content)
+        runs = {r["runId"]: r for r in res.json()["runs"]}
+        pending_a = {a["id"]: a["manualPendingCount"] for a in runs[run_a.id]["attempts"]}
+        self.assertEqual(pending_a, {waiting.id: 2, done.id: 0})
+        self.assertEqual([a["id"] for a in runs[run_b.id]["attempts"]], [other.id])
+        self.assertEqual(runs[run_b.id]["attempts"][0]["manualPendingCount"], 1)
+
+        res = self.client.get(self.url, {"status": "waiting_manual"})
+        runs = {r["runId"]: r for r in res.json()["runs"]}
+        self.assertEqual([a["id"] for a in runs[run_a.id]["attempts"]], [waiting.id])
+        self.assertEqual(runs[run_a.id]["attempts"][0]["manualPendingCount"], 2)
+
+    def test_attempts_without_runs(self):
+        waiting = self._attempt(pending=3)
+        self._attempt()
+        res = self.client.get(self.url, {"status": "waiting_manual"})
+        self.assertEqual(res.status_code, 200, res.content)
+        self.assertEqual([(a["id"], a["manualPendingCount"]) for a in res.json()["attempts"]], [(waiting.id, 3)])
+
+    def test_query_count_does_not_grow_with_runs_or_attempts(self):
+        self._attempt(self._run(), pending=1)
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        for _ in range(3):
+            run = self._run()
+            for pending in (0, 1, 2):
+                self._attempt(run, pending=pending)
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.get(self.url)
+        self.assertEqual(sum(len(r["attempts"]) for r in res.json()["runs"]), 10)
+        self.assertEqual(len(many), len(few))
+
+        ExamRun.objects.all().delete()
+        self._attempt(pending=1)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(self.url)
+        for pending in (0, 1, 2):
+            self._attempt(pending=pending)
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.get(self.url)
+        self.assertEqual(len(res.json()["attempts"]), 4)
+        self.assertEqual(len(many), len(few))
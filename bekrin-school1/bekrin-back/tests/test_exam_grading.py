@@ -0,0 +1,166 @@
+"""
+Tests for the compiled exam grading plan (tests.grading) and its use by the exam submit view.
+- CompiledOpenAnswer agrees with evaluate_open_single_value for every open rule
+- compiled option ids match the attempt blueprint; duplicate numbers keep the first definition
+- plans are reused per exam and recompiled when answer_key_json changes
+- POST /api/student/exams/{id}/submit grades blueprint (option id) and key-order (option key) attempts;
+  a blueprint's frozen correct option id wins over a later edit of the key
+- submit writes all ExamAnswer rows with one INSERT
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from core.models import Organization
+from tests.evaluate import CompiledOpenAnswer, evaluate_open_single_value
+from tests.grading import answer_key_version, clear_grading_plans, compile_answer_key, get_grading_plan
+from tests.models import Exam, ExamAnswer, ExamAttempt
+from tests.views.exams import _build_blueprint_pdf_json
+
+ANSWER_KEY = {
+    "type": "quiz",
+    "questions": [
+        {"number": 1, "kind": "mc", "options": [{"key": "A", "text": "1"}, {"key": "B", "text": "2"}], "correct": "B"},
+        {"number": 2, "kind": "mc", "options": [{"key": "A", "text": "x"}, {"key": "B", "text": "y"}], "correct": "A"},
+        {"number": 3, "kind": "open", "open_rule": "UNORDERED_DIGITS", "open_answer": "1,3,5"},
+        {"number": 4, "kind": "open", "open_rule": "NUMERIC_EQUAL", "open_answer": 15},
+        {"number": 5, "kind": "situation"},
+    ],
+}
+
+
+class CompiledOpenAnswerTests(SimpleTestCase):
+    def test_matches_evaluate_open_single_value(self):
+        corrects = ["1,3,5", "15", 15, "15,00", "Paris  city", "a b c", "135", "", None, "abc,def"]
+        answers = ["135", "5 3 1", "1,3,5", "153", "15.0", "015", "1,5", "paris city", "c b a", "a,b,c", "", "  ", "x"]
+        for rule in ("EXACT_MATCH", "ORDERED_MATCH", "UNORDERED_MATCH", "NUMERIC_EQUAL",
+                     "ORDERED_DIGITS", "UNORDERED_DIGITS", "exact_match", None, "UNKNOWN"):
+            for correct in corrects:
+                compiled = CompiledOpenAnswer(correct, rule)
+                for answer in answers:
+                    self.assertEqual(
+                        compiled.matches(answer), evaluate_open_single_value(answer, correct, rule),
+                        (rule, correct, answer),
+                    )
+
+
+class GradingPlanTests(TestCase):
+    def setUp(self):
+        clear_grading_plans()
+
+    def test_option_ids_match_blueprint(self):
+        plan = compile_answer_key(ANSWER_KEY)
+        blueprint = _build_blueprint_pdf_json(ANSWER_KEY)
+        for item in blueprint:
+            rule = plan.rule(item["questionNumber"])
+            self.assertEqual(rule.kind, item["kind"])
+            if item["kind"] == "mc":
+                self.assertEqual(rule.correct_option_id, item["correctOptionId"])
+        self.assertEqual([r.number for r in plan.questions], [1, 2, 3, 4, 5])
+        self.assertEqual(plan.rule("1").key_for_option("opt_2"), "B")
+        self.assertTrue(plan.rule(3).open_correct("5 1 3"))
+
+    def test_duplicate_number_keeps_first_definition(self):
+        key = {"questions": [
+            {"number": 1, "kind": "open", "open_answer": "a"},
+            {"number": 1, "kind": "open", "open_answer": "b"},
+        ]}
+        self.assertTrue(compile_answer_key(key).rule(1).open_correct("a"))
+
+    def test_plan_reused_until_answer_key_changes(self):
+        exam = Exam.objects.create(
+            title="Q", type="quiz", source_type="JSON", answer_key_json=ANSWER_KEY,
+            start_time=timezone.now(), end_time=timezone.now() + timedelta(hours=1),
+        )
+        plan = get_grading_plan(exam)
+        self.assertIs(get_grading_plan(Exam.objects.get(pk=exam.pk)), plan)
+        self.assertEqual(plan.version, answer_key_version(ANSWER_KEY))
+        changed = {**ANSWER_KEY, "questions": [dict(q) for q in ANSWER_KEY["questions"]]}
+        changed["questions"][0]["correct"] = "A"
+        Exam.objects.filter(pk=exam.pk).update(answer_key_json=changed)
+        new_plan = get_grading_plan(Exam.objects.get(pk=exam.pk))
+        self.assertIsNot(new_plan, plan)
+        self.assertEqual(new_plan.rule(1).correct_option_id, "opt_1")
+        self.assertIsNone(get_grading_plan(Exam(pk=0, answer_key_json=None)))
+
+
+class ExamSubmitGradingTests(TestCase):
+    def setUp(self):
+        clear_grading_plans()
+        org = Organization.objects.create(name="Org", slug="exam-grading")
+        self.student = User.objects.create_user(
+            email="student@exam-grading.test", password="pass123", full_name="S", role="student", organization=org,
+        )
+        now = timezone.now()
+        self.exam = Exam.objects.create(
+            title="Quiz", type="quiz", source_type="JSON", answer_key_json=ANSWER_KEY, status="active",
+            start_time=now - timedelta(hours=1), end_time=now + timedelta(hours=1),
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.student)}")
+
+    def _attempt(self, blueprint):
+        return ExamAttempt.objects.create(
+            exam=self.exam, student=self.student, expires_at=timezone.now() + timedelta(hours=1),
+            attempt_blueprint=blueprint,
+        )
+
+    def _submit(self, attempt, answers):
+        return self.client.post(
+            f"/api/student/exams/{self.exam.id}/submit", {"attemptId": attempt.id, "answers": answers}, format="json",
+        )
+
+    def test_blueprint_attempt_graded_by_option_id(self):
+        attempt = self._attempt(_build_blueprint_pdf_json(ANSWER_KEY))
+        res = self._submit(attempt, [
+            {"questionNumber": 1, "selectedOptionId": "opt_2"},
+            {"questionNumber": 2, "selectedOptionId": "opt_2"},
+            {"questionNumber": 3, "textAnswer": "531"},
+            {"questionNumber": 4, "textAnswer": "15,0"},
+        ])
+        self.assertEqual(res.status_code, 200, res.content)
+        per_question = Decimal("100") / 15
+        self.assertAlmostEqual(Decimal(str(res.json()["autoScore"])), 3 * per_question, places=2)
+        answers = {a.question_number: a for a in ExamAnswer.objects.filter(attempt=attempt)}
+        self.assertEqual(len(answers), 5)
+        self.assertEqual(answers[2].auto_score, 0)
+        self.assertTrue(answers[5].requires_manual_check)
+
+    def test_blueprint_frozen_correct_option_wins_over_edited_key(self):
+        attempt = self._attempt(_build_blueprint_pdf_json(ANSWER_KEY))
+        changed = {**ANSWER_KEY, "questions": [dict(q) for q in ANSWER_KEY["questions"]]}
+        changed["questions"][0]["correct"] = "A"
+        Exam.objects.filter(pk=self.exam.pk).update(answer_key_json=changed)
+        res = self._submit(attempt, [{"questionNumber": 1, "selectedOptionId": "opt_2"}])
+        self.assertEqual(res.status_code, 200, res.content)
+        answer = ExamAnswer.objects.get(attempt=attempt, question_number=1)
+        self.assertEqual(answer.auto_score, (Decimal("100") / 15).quantize(Decimal("0.01")))
+
+    def test_attempt_without_blueprint_graded_by_option_key(self):
+        attempt = self._attempt(None)
+        res = self._submit(attempt, [
+            {"questionNumber": 1, "selectedOptionKey": "b"},
+            {"questionNumber": 2, "selectedOptionKey": "A"},
+            {"questionNumber": 4, "textAnswer": "16"},
+        ])
+        self.assertEqual(res.status_code, 200, res.content)
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.status, "SUBMITTED")
+        self.assertEqual(attempt.auto_score, (2 * Decimal("100") / 15).quantize(Decimal("0.01")))
+
+    def test_answers_written_with_one_insert(self):
+        attempt = self._attempt(_build_blueprint_pdf_json(ANSWER_KEY))
+        with CaptureQueriesContext(connection) as queries:
+            res = self._submit(attempt, [{"questionNumber": 1, "selectedOptionId": "opt_2"}])
+        self.assertEqual(res.status_code, 200, res.content)
+        inserts = [q["sql"] for q in queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 1, inserts)
+        self.assertEqual(ExamAnswer.objects.filter(attempt=attempt).count(), 5)
+        self.assertEqual(self._submit(attempt, []).status_code, 400)
@@ -0,0 +1,161 @@
+"""
+Tests for teacher manual grading (tests.manual_grading).
+- POST /api/teacher/attempts/{id}/grade: manualScores and per_situation_scores, Decimal totals from the
+  stored answers, audit rows per changed answer and total, publish
+- regrading one answer keeps the other graded answers in the manual total
+- query count does not grow with the number of answers or attempts
+- POST /api/teacher/exams/{id}/grade grades many attempts at once (owner only, unknown ids reported)
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from core.models import Organization
+from tests.models import Exam, ExamAnswer, ExamAttempt, GradingAuditLog
+
+ONE = Decimal("9.09")   # SET2 fraction 1 of an exam situation (150/33*2)
+TWO = Decimal("18.18")  # SET2 fraction 2
+
+
+class ManualGradingTests(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Org", slug="exam-manual-grading")
+        self.teacher = User.objects.create_user(
+            email="teacher@exam-manual-grading.test", password="pass123", full_name="T", role="teacher",
+            organization=self.org,
+        )
+        now = timezone.now()
+        self.exam = Exam.objects.create(
+            title="Exam", type="exam", source_type="JSON", answer_key_json={"questions": []}, status="active",
+            start_time=now - timedelta(hours=1), end_time=now + timedelta(hours=1), created_by=self.teacher,
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.teacher)}")
+        self.n = 0
+
+    def _attempt(self, situations=2, auto=(Decimal("4.55"), Decimal("4.55"), Decimal("0"))):
+        """A finished attempt with auto-graded answers and situation answers awaiting a manual check."""
+        self.n += 1
+        student = User.objects.create_user(
+            email=f"s{self.n}@exam-manual-grading.test", password="pass123", full_name=f"S{self.n}", role="student",
+            organization=self.org,
+        )
+        attempt = ExamAttempt.objects.create(
+            exam=self.exam, student=student, finished_at=timezone.now(), status="SUBMITTED",
+            expires_at=timezone.now() + timedelta(hours=1), auto_score=sum(auto), total_score=sum(auto),
+        )
+        for number, score in enumerate(auto, start=1):
+            ExamAnswer.objects.create(attempt=attempt, question_number=number, auto_score=score)
+        for i in range(situations):
+            ExamAnswer.objects.create(
+                attempt=attempt, question_number=len(auto) + 1 + i, requires_manual_check=True, auto_score=0,
+            )
+        return attempt
+
+    def _grade(self, attempt, **data):
+        res = self.client.post(f"/api/teacher/attempts/{attempt.id}/grade", data, format="json")
+        self.assertEqual(res.status_code, 200, res.content)
+        return res.json()
+
+    def test_grade_attempt_scores_and_audit(self):
+        attempt = self._attempt()
+        override = attempt.answers.get(question_number=3)
+        body = self._grade(
+            attempt, manualScores={str(override.id): "2.5", "999999": 1, "x": 1},
+            per_situation_scores=[{"index": 1, "fraction": 1}, {"index": 2, "fraction": "2"}, {"index": 7, "fraction": 1}],
+            notes="checked",
+        )
+        manual = Decimal("2.50") + ONE + TWO
+        self.assertEqual(body["autoScore"], 9.1)
+        self.assertEqual(body["manualScore"], float(manual))
+        self.assertEqual(body["totalScore"], float(Decimal("9.10") + manual))
+        self.assertFalse(body["isPublished"])
+        attempt.refresh_from_db()
+        self.assertEqual((attempt.auto_score, attempt.manual_score), (Decimal("9.10"), manual))
+        self.assertEqual(attempt.total_score, Decimal("9.10") + manual)
+        self.assertTrue(attempt.is_checked)
+        scores = dict(attempt.answers.values_list("question_number", "manual_score"))
+        self.assertEqual((scores[3], scores[4], scores[5]), (Decimal("2.50"), ONE, TWO))
+        logs = GradingAuditLog.objects.filter(attempt=attempt)
+        self.assertEqual(logs.filter(answer__isnull=False).count(), 3)
+        self.assertEqual(logs.get(answer__isnull=True).new_total_score, attempt.total_score)
+        self.assertTrue(all(log.notes == "checked" and log.teacher_id == self.teacher.id for log in logs))
+
+        # Same grades again: nothing changes, no new audit rows.
+        self._grade(attempt, manualScores={str(override.id): 2.5},
+                    per_situation_scores=[{"index": 1, "fraction": 1}, {"index": 2, "fraction": 2}])
+        self.assertEqual(GradingAuditLog.objects.filter(attempt=attempt).count(), 4)
+
+    def test_regrading_one_situation_keeps_the_others(self):
+        attempt = self._attempt()
+        self._grade(attempt, per_situation_scores=[{"index": 1, "fraction": 1}, {"index": 2, "fraction": 1}])
+        body = self._grade(attempt, per_situation_scores=[{"index": 2, "fraction": 2}])
+        self.assertEqual(body["manualScore"], float(ONE + TWO))
+
+    def test_publish_marks_attempt_and_exam(self):
+        attempt = self._attempt(situations=1)
+        body = self._grade(attempt, per_situation_scores=[{"index": 1, "fraction": 1}], publish=True)
+        self.assertTrue(body["isPublished"])
+        attempt.refresh_from_db()
+        self.exam.refresh_from_db()
+        self.assertTrue(attempt.is_result_published and attempt.is_checked)
+        self.assertTrue(self.exam.is_result_published)
+        self.assertEqual(self.exam.status, "finished")
+
+    def test_grade_queries_do_not_grow_with_answers(self):
+        small = self._attempt(situations=1)
+        with CaptureQueriesContext(connection) as few:
+            self._grade(small, per_situation_scores=[{"index": 1, "fraction": 1}])
+        large = self._attempt(situations=5, auto=(Decimal("1"),) * 10)
+        with CaptureQueriesContext(connection) as many:
+            self._grade(large, per_situation_scores=[{"index": i, "fraction": 1} for i in range(1, 6)])
+        self.assertEqual(len(many), len(few))
+
+    def test_bulk_grade_endpoint(self):
+        first, second = self._attempt(), self._attempt(situations=1)
+        url = f"/api/teacher/exams/{self.exam.id}/grade"
+        res = self.client.post(url, {"attempts": [
+            {"attemptId": first.id, "per_situation_scores": [{"index": 1, "fraction": 2}]},
+            {"attemptId": second.id, "perSituationScores": [{"index": 1, "fraction": 1}]},
+            {"attemptId": 999999},
+        ], "notes": "bulk"}, format="json")
+        self.assertEqual(res.status_code, 200, res.content)
+        body = res.json()
+        self.assertEqual((body["graded"], body["notFound"]), (2, [999999]))
+        results = {r["attemptId"]: r for r in body["results"]}
+        self.assertEqual(results[first.id]["manualScore"], float(TWO))
+        self.assertEqual(results[second.id]["manualScore"], float(ONE))
+        second.refresh_from_db()
+        self.assertEqual(second.total_score, Decimal("9.10") + ONE)
+        self.assertEqual(GradingAuditLog.objects.filter(notes="bulk").count(), 4)
+
+        self.assertEqual(self.client.post(url, {"attempts": []}, format="json").status_code, 400)
+        other = User.objects.create_user(
+            email="other@exam-manual-grading.test", password="pass123", full_name="O", role="teacher",
+            organization=self.org,
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(other)}")
+        res = self.client.post(url, {"attempts": [{"attemptId": first.id}]}, format="json")
+        self.assertEqual(res.status_code, 404)
+
+    def test_bulk_grade_queries_do_not_grow_with_attempts(self):
+        url = f"/api/teacher/exams/{self.exam.id}/grade"
+        grades = [{"index": 1, "fraction": 1}, {"index": 2, "fraction": 2}]
+        attempts = [self._attempt()]
+        with CaptureQueriesContext(connection) as few:
+            self.client.post(url, {"attempts": [{"attemptId": a.id, "per_situation_scores": grades} for a in attempts]},
+                             format="json")
+        attempts = [self._attempt() for _ in range(6)]
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.post(url, {"attempts": [
+                {"attemptId": a.id, "per_situation_scores": grades} for a in attempts
+            ]}, format="json")
+        self.assertEqual(res.json()["graded"], 6)
+        self.assertEqual(len(many), len(few))
@@ -0,0 +1,181 @@
+"""
+Tests for rescoring an exam after an answer-key correction (tests.rescoring).
+- submit records the chosen option's key for blueprint (option id) answers
+- corrected mc/open key: answer and attempt auto/total scores follow, manual scores are kept
+- GradingAuditLog rows per changed answer and total; dry run writes nothing
+- query count does not grow with the number of attempts
+- manage.py rescore_exam and POST /api/teacher/exams/{id}/rescore (owner only, PDF/JSON only)
+"""
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from core.models import Organization
+from tests.grading import clear_grading_plans
+from tests.models import Exam, ExamAnswer, ExamAttempt, GradingAuditLog
+from tests.rescoring import rescore_exam
+from tests.views.exams import _build_blueprint_pdf_json
+
+PTS = (Decimal("100") / 15).quantize(Decimal("0.01"))
+TWO_PTS = (2 * Decimal("100") / 15).quantize(Decimal("0.01"))  # attempt scores: 13.33, answers: 2 x 6.67
+
+
+def answer_key(mc_correct="B", open_answer="12"):
+    return {
+        "type": "quiz",
+        "questions": [
+            {"number": 1, "kind": "mc", "options": [{"key": "A", "text": "1"}, {"key": "B", "text": "2"}], "correct": mc_correct},
+            {"number": 2, "kind": "open", "open_rule": "EXACT_MATCH", "open_answer": open_answer},
+            {"number": 3, "kind": "situation"},
+        ],
+    }
+
+
+class ExamRescoreTests(TestCase):
+    def setUp(self):
+        clear_grading_plans()
+        self.org = Organization.objects.create(name="Org", slug="exam-rescore")
+        self.teacher = User.objects.create_user(
+            email="teacher@exam-rescore.test", password="pass123", full_name="T", role="teacher", organization=self.org,
+        )
+        now = timezone.now()
+        self.exam = Exam.objects.create(
+            title="Quiz", type="quiz", source_type="JSON", answer_key_json=answer_key(), status="active",
+            start_time=now - timedelta(hours=1), end_time=now + timedelta(hours=1), created_by=self.teacher,
+        )
+        self.n = 0
+
+    def _submitted(self, mc_option_id, text):
+        """A student submits through the API: mc by blueprint option id, open by text."""
+        self.n += 1
+        student = User.objects.create_user(
+            email=f"s{self.n}@exam-rescore.test", password="pass123", full_name=f"S{self.n}", role="student",
+            organization=self.org,
+        )
+        attempt = ExamAttempt.objects.create(
+            exam=self.exam, student=student, expires_at=timezone.now() + timedelta(hours=1),
+            attempt_blueprint=_build_blueprint_pdf_json(self.exam.answer_key_json),
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(student)}")
+        res = client.post(f"/api/student/exams/{self.exam.id}/submit", {"attemptId": attempt.id, "answers": [
+            {"questionNumber": 1, "selectedOptionId": mc_option_id},
+            {"questionNumber": 2, "textAnswer": text},
+        ]}, format="json")
+        self.assertEqual(res.status_code, 200, res.content)
+        attempt.refresh_from_db()
+        return attempt
+
+    def _fix_key(self, **kwargs):
+        self.exam.answer_key_json = answer_key(**kwargs)
+        self.exam.save(update_fields=["answer_key_json"])
+
+    def _grade_situation(self, attempt, score):
+        situation = attempt.answers.get(question_number=3)
+        situation.manual_score = score
+        situation.save(update_fields=["manual_score"])
+        attempt.manual_score = score
+        attempt.total_score = attempt.auto_score + score
+        attempt.save(update_fields=["manual_score", "total_score"])
+
+    def test_submit_records_selected_option_key(self):
+        attempt = self._submitted("opt_1", "12")
+        answers = {a.question_number: a for a in attempt.answers.all()}
+        self.assertEqual(answers[1].selected_option_key, "A")
+        self.assertIsNone(answers[2].selected_option_key)
+
+    def test_corrected_key_rescores_and_keeps_manual_scores(self):
+        chose_a = self._submitted("opt_1", "13")   # both wrong under the original key
+        chose_b = self._submitted("opt_2", "12")   # both right under the original key
+        self._grade_situation(chose_a, Decimal("3.00"))
+        self.assertEqual((chose_a.auto_score, chose_b.auto_score), (0, TWO_PTS))
+        self._fix_key(mc_correct="A", open_answer="13")
+
+        summary = rescore_exam(self.exam, teacher=self.teacher, notes="fixed Q1, Q2")
+        self.assertEqual((summary["attempts"], summary["attemptsChanged"], summary["answersChanged"]), (2, 2, 4))
+        self.assertEqual((summary["answersGained"], summary["answersLost"], summary["scoreDelta"]), (2, 2, 0.0))
+        self.assertEqual(summary["questions"], [
+            {"questionNumber": 1, "gained": 1, "lost": 1}, {"questionNumber": 2, "gained": 1, "lost": 1},
+        ])
+        chose_a.refresh_from_db()
+        self.assertEqual(chose_a.auto_score, TWO_PTS)
+        self.assertEqual(chose_a.manual_score, Decimal("3.00"))
+        self.assertEqual(chose_a.total_score, TWO_PTS + Decimal("3.00"))
+        scores = dict(chose_a.answers.values_list("question_number", "auto_score"))
+        self.assertEqual((scores[1], scores[2]), (PTS, PTS))
+        chose_b.refresh_from_db()
+        self.assertEqual((chose_b.auto_score, chose_b.total_score), (0, 0))
+        self.assertEqual(chose_a.answers.get(question_number=3).manual_score, Decimal("3.00"))
+        logs = GradingAuditLog.objects.filter(attempt=chose_a)
+        self.assertEqual(logs.filter(answer__isnull=False).count(), 2)
+        self.assertEqual(logs.get(answer__isnull=True).new_total_score, TWO_PTS + Decimal("3.00"))
+        self.assertTrue(all(log.teacher_id == self.teacher.id and "fixed Q1, Q2" in log.notes for log in logs))
+        # Running again with the same key changes nothing.
+        self.assertEqual(rescore_exam(self.exam)["answersChanged"], 0)
+
+    def test_dry_run_writes_nothing(self):
+        attempt = self._submitted("opt_1", "12")
+        self._fix_key(mc_correct="A")
+        summary = rescore_exam(self.exam, dry_run=True)
+        self.assertEqual((summary["attemptsChanged"], summary["changes"][0]["newTotalScore"]), (1, float(TWO_PTS)))
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.auto_score, PTS)
+        self.assertFalse(GradingAuditLog.objects.exists())
+
+    def test_mc_without_recorded_key_is_skipped(self):
+        attempt = self._submitted("opt_1", "12")
+        ExamAnswer.objects.filter(attempt=attempt, question_number=1).update(selected_option_key=None)
+        self._fix_key(mc_correct="A")
+        summary = rescore_exam(self.exam)
+        self.assertEqual((summary["answersSkipped"], summary["answersChanged"]), (1, 0))
+
+    def test_queries_do_not_grow_with_attempts(self):
+        self._submitted("opt_1", "12")
+        self._submitted("opt_2", "12")
+        self._fix_key(mc_correct="A")
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(rescore_exam(self.exam)["attemptsChanged"], 2)
+        for option_id in ("opt_1", "opt_2", "opt_1", "opt_2"):
+            self._submitted(option_id, "12")
+        self._fix_key(mc_correct="B")
+        with CaptureQueriesContext(connection) as many:
+            summary = rescore_exam(self.exam)
+        self.assertEqual(summary["attemptsChanged"], 6)
+        self.assertEqual(len(many), len(few))
+
+    def test_command_and_teacher_endpoint(self):
+        self._submitted("opt_1", "12")
+        self._fix_key(mc_correct="A")
+        out = StringIO()
+        call_command("rescore_exam", "--exam", str(self.exam.id), "--dry-run", stdout=out)
+        self.assertIn("[dry run]", out.getvalue())
+        self.assertIn("1 changed", out.getvalue())
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.teacher)}")
+        url = f"/api/teacher/exams/{self.exam.id}/rescore"
+        res = client.post(url, {}, format="json")
+        self.assertEqual(res.status_code, 200, res.content)
+        self.assertEqual((res.json()["attemptsChanged"], res.json()["dryRun"]), (1, False))
+        self.assertEqual(ExamAttempt.objects.get(exam=self.exam).auto_score, TWO_PTS)
+
+        other = User.objects.create_user(
+            email="other@exam-rescore.test", password="pass123", full_name="O", role="teacher", organization=self.org,
+        )
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(other)}")
+        self.assertEqual(client.post(url, {}, format="json").status_code, 404)
+        bank = Exam.objects.create(
+            title="Bank", type="quiz", source_type="BANK", start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(hours=1), created_by=other,
+        )
+        res = client.post(f"/api/teacher/exams/{bank.id}/rescore", {}, format="json")
+        self.assertEqual(res.status_code, 400)
@@ -0,0 +1,483 @@
+"""
+Tests for coding.run_code: warm worker pool parity with the cold subprocess path, sandbox limits,
+batch/parallel case execution, result cache, output comparison, language runners (C/C++/JavaScript:
+compile once per code, compile errors, limits, validator denylists, C/C++ syscall allowlist).
+"""
+import os
+import shutil
+import signal
+import tempfile
+import unittest
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from coding import run_code
+from coding.output_compare import compare_output
+from coding.result_cache import ExecutionResultCache, get_result_cache, result_key, run_cases_cached
+
+
+@unittest.skipUnless(run_code.POOL_SUPPORTED, 'worker pool requires fork')
+class SandboxWorkerPoolTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.pool = run_code.SandboxWorkerPool(1, max_jobs=3)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+        super().tearDownClass()
+
+    def test_stdin_and_stdout(self):
+        self.assertEqual(self.pool.run("print(input()[::-1])", "abc\n", 5), ('cba\n', '', 0))
+
+    def test_matches_cold_path(self):
+        code = "a, b = map(int, input().split())\nprint(a + b)"
+        self.assertEqual(
+            self.pool.run(code, "2 3\n", 5),
+            run_code._run_python_code_cold(code, "2 3\n", 5),
+        )
+
+    def test_exception_sets_returncode_and_traceback(self):
+        stdout, stderr, rc = self.pool.run("raise ValueError('boom')", "", 5)
+        self.assertEqual(rc, 1)
+        self.assertIn('ValueError: boom', stderr)
+        self.assertIn("raise ValueError('boom')", stderr)
+
+    def test_exit_code(self):
+        self.assertEqual(self.pool.run("exit(3)", "", 5)[2], 3)
+
+    def test_state_does_not_leak_between_jobs(self):
+        self.pool.run("import math\nmath.pi = 3", "", 5)
+        self.assertEqual(self.pool.run("import math\nprint(math.pi > 3)", "", 5)[0], 'True\n')
+
+    def test_timeout_recycles_worker(self):
+        self.assertEqual(self.pool.run("while True: pass", "", 1), ('', 'Timeout', -1))
+        self.assertEqual(self.pool.run("print(1)", "", 5), ('1\n', '', 0))
+
+    def test_recycled_after_max_jobs(self):
+        for _ in range(5):
+            self.assertEqual(self.pool.run("print('ok')", "", 5), ('ok\n', '', 0))
+
+    def _batch_signalling_worker(self, sig):
+        """Second case sends sig to the zygote; returns the batch results and a fresh-worker check."""
+        code = f"x = input()\nif x == 'b':\n    import os\n    os.kill(os.getppid(), {int(sig)})\nprint(x)"
+        results = self.pool.run_batch(code, ["a\n", "b\n", "c\n"], 1)
+        self.assertEqual(self.pool.run("print(1)", "", 5), ('1\n', '', 0))
+        return results
+
+    def test_worker_death_keeps_finished_cases(self):
+        results = self._batch_signalling_worker(signal.SIGKILL)
+        self.assertEqual([(r.stdout, r.stderr, r.returncode) for r in results], [
+            ('a\n', '', 0), ('', run_code.WORKER_ERROR_MESSAGE, -1), ('', run_code.WORKER_ERROR_MESSAGE, -1),
+        ])
+
+    def test_hung_worker_keeps_finished_cases(self):
+        results = self._batch_signalling_worker(signal.SIGSTOP)
+        self.assertEqual([(r.stdout, r.stderr, r.returncode) for r in results], [
+            ('a\n', '', 0), ('', 'Timeout', -1), ('', 'Timeout', -1),
+        ])
+        self.assertGreater(results[1].elapsed_ms, 0)
+        self.assertEqual(results[2].elapsed_ms, 0)
+
+
+class RunPythonCodeTimedTests(SimpleTestCase):
+    def test_signature_and_result(self):
+        stdout, stderr, rc, elapsed_ms = run_code.run_python_code_timed("print(6 * 7)", "", timeout_seconds=5)
+        self.assertEqual((stdout, stderr, rc), ('42\n', '', 0))
+        self.assertGreaterEqual(elapsed_ms, 0)
+
+
+class RunPythonCodeBatchTests(SimpleTestCase):
+    def test_one_result_per_input(self):
+        results = run_code.run_python_code_batch("print(int(input()) * 2)", ["1\n", "2\n", "3\n"], per_case_timeout=5)
+        self.assertEqual([r[:3] for r in results], [('2\n', '', 0), ('4\n', '', 0), ('6\n', '', 0)])
+        self.assertTrue(all(r[3] >= 0 for r in results))
+
+    def test_cases_are_isolated(self):
+        code = "import math\nprint(getattr(math, 'seen', 0))\nmath.seen = 1"
+        results = run_code.run_python_code_batch(code, ["", ""], per_case_timeout=5)
+        self.assertEqual([r[0] for r in results], ['0\n', '0\n'])
+
+    def test_stop_on_error(self):
+        code = "n = int(input())\nprint(10 // n)"
+        results = run_code.run_python_code_batch(code, ["1\n", "0\n", "2\n"], per_case_timeout=5, stop_on_error=True)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[1][2], 1)
+        self.assertIn('ZeroDivisionError', results[1][1])
+
+    def test_timeout_case_without_stop_keeps_going(self):
+        code = "n = int(input())\nwhile n: pass\nprint('done')"
+        results = run_code.run_python_code_batch(code, ["1\n", "0\n"], per_case_timeout=1)
+        self.assertEqual(results[0][:3], ('', 'Timeout', -1))
+        self.assertEqual(results[1][:3], ('done\n', '', 0))
+
+    def test_syntax_error_reported_per_case(self):
+        results = run_code.run_python_code_batch("def f(:", ["", ""], per_case_timeout=5, stop_on_error=True)
+        self.assertEqual(len(results), 1)
+        self.assertIn('SyntaxError', results[0][1])
+
+    def test_empty_inputs(self):
+        self.assertEqual(run_code.run_python_code_batch("print(1)", []), [])
+
+    @override_settings(CODING_SANDBOX_POOL_SIZE=0)
+    def test_cold_fallback_matches(self):
+        code = "n = int(input())\nprint(10 // n)"
+        results = run_code.run_python_code_batch(code, ["5\n", "0\n", "1\n"], per_case_timeout=5, stop_on_error=True)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0][:3], ('2\n', '', 0))
+        self.assertEqual(results[1][2], 1)
+
+
+class RunPythonCodeParallelTests(SimpleTestCase):
+    CODE = "n = int(input())\nprint(10 // n)"
+
+    def test_matches_batch_without_errors(self):
+        inputs = [f"{n}\n" for n in range(1, 9)]
+        parallel = run_code.run_python_code_parallel(self.CODE, inputs, per_case_timeout=5, max_concurrency=4)
+        batch = run_code.run_python_code_batch(self.CODE, inputs, per_case_timeout=5)
+        self.assertEqual([r[:3] for r in parallel], [r[:3] for r in batch])
+
+    def test_stop_on_error_cuts_after_first_failure(self):
+        inputs = ["1\n", "2\n", "0\n", "5\n", "0\n", "1\n"]
+        parallel = run_code.run_python_code_parallel(
+            self.CODE, inputs, per_case_timeout=5, stop_on_error=True, max_concurrency=4
+        )
+        batch = run_code.run_python_code_batch(self.CODE, inputs, per_case_timeout=5, stop_on_error=True)
+        self.assertEqual(len(parallel), 3)
+        self.assertEqual([r[:3] for r in parallel], [r[:3] for r in batch])
+
+    @override_settings(CODING_PARALLEL_CASES=True, CODING_PARALLEL_MAX_PER_REQUEST=3)
+    def test_cases_entry_point_uses_parallel_setting(self):
+        results = run_code.run_python_code_cases(self.CODE, ["1\n", "2\n", "5\n"], per_case_timeout=5)
+        self.assertEqual([r[0] for r in results], ['10\n', '5\n', '2\n'])
+
+
+class ExecutionResultCacheTests(SimpleTestCase):
+    def test_lru_eviction_and_task_invalidation(self):
+        cache = ExecutionResultCache(2)
+        cache.put('a', 1, ('x',))
+        cache.put('b', 1, ('y',))
+        cache.get('a')
+        cache.put('c', 2, ('z',))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), ('x',))
+        self.assertEqual(cache.invalidate_task(1), 1)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('c'), ('z',))
+        stats = cache.stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual((stats['hits'], stats['misses']), (3, 2))
+
+    def test_key_is_exact_code_except_crlf(self):
+        k1 = result_key("print(1)\r\n", ["1"], 5, True)
+        self.assertEqual(k1, result_key("print(1)\n", ["1"], 5, True))
+        self.assertNotEqual(k1, result_key("print(1)  \n", ["1"], 5, True))
+        self.assertNotEqual(k1, result_key("print(1)\n", ["2"], 5, True))
+        self.assertNotEqual(k1, result_key("print(1)\n", ["1"], 2, True))
+        # Trailing whitespace inside a string literal or after a continuation changes the program.
+        self.assertNotEqual(
+            result_key('print("""a \nb""")', [""], 5, True), result_key('print("""a\nb""")', [""], 5, True),
+        )
+        self.assertNotEqual(
+            result_key("x = 1 + \\ \n2", [""], 5, True), result_key("x = 1 + \\\n2", [""], 5, True),
+        )
+
+    @override_settings(CODING_RESULT_CACHE_SIZE=16)
+    def test_run_cases_cached_skips_timeouts(self):
+        get_result_cache().clear()
+        run_cases_cached(1, "print(input())", ["a"], 5)
+        run_cases_cached(1, "print(input())", ["a"], 5)
+        run_cases_cached(1, "while True: pass", [""], 1)
+        run_cases_cached(1, "while True: pass", [""], 1)
+        stats = get_result_cache().stats()
+        self.assertEqual((stats['hits'], stats['size']), (1, 1))
+
+
+class ValidateCodeSafeTests(SimpleTestCase):
+    def test_strings_and_comments_are_not_flagged(self):
+        code = "# do not use eval() or import os\nprint('open(file) and exec(x)')\n"
+        self.assertEqual(run_code.validate_code_safe(code), (True, ''))
+
+    def test_allowed_imports_and_stdin_open(self):
+        code = "import math\nfrom collections import Counter\ndata = open(0).read()\nprint(math.pi)"
+        self.assertEqual(run_code.validate_code_safe(code), (True, ''))
+        self.assertEqual(run_code.validate_code_safe("for line in open(0):\n    print(open(1, 'w'))"), (True, ''))
+
+    def test_blocked_constructs(self):
+        for code in (
+            "import importlib",
+            "import os.path",
+            "from subprocess import run",
+            "e = eval\ne('1')",
+            "print(().__class__.__bases__[0].__subclasses__())",
+            "open('secret.txt')",
+            "getattr(str, '__mro__')",
+            "from . import x",
+            "f = open\nf('secret.txt')",
+            "open.__call__('secret.txt')",
+            "print(open)",
+            "getattr(__builtins__, 'open')('secret.txt')",
+            "getattr(print, 'open')",
+            "import codecs\ncodecs.open('secret.txt')",
+            "import io\nio.open('secret.txt')",
+            "import gzip as g\ng.open('secret.gz')",
+            "x.open('secret.txt')",
+            "import operator\noperator.attrgetter('__class__.__base__.__subclasses__')(())()",
+            "from operator import attrgetter",
+            "import _operator",
+            "print('{0.__init__.__globals__}'.format(f))",
+            "t = '{0.__class__.__base__.__subclasses__}'\nprint(t.format(()))",
+            "print('{:{0.__globals__}}'.format(1, f))",
+        ):
+            ok, msg = run_code.validate_code_safe(code)
+            self.assertFalse(ok, code)
+            self.assertIn('sətir', msg)
+
+    def test_attribute_paths_in_strings(self):
+        # The operator-based namespace escape: attribute paths as strings instead of attribute access.
+        escape = (
+            "import operator\n"
+            "subs = operator.attrgetter('__class__.__base__.__subclasses__')(())()\n"
+            "wrap = [c for c in subs if c.__name__ == '_wrap_close'][0]\n"
+            "g = operator.attrgetter('__init__.__globals__')(wrap)\n"
+            "print(g['listdir']('/etc'))\n"
+        )
+        ok, msg = run_code.validate_code_safe(escape)
+        self.assertFalse(ok)
+        self.assertIn('import operator', msg)
+        with override_settings(CODING_VALIDATOR_DENIED_IMPORTS=['os']):
+            # Even with operator allowed, the path literals are rejected.
+            ok, msg = run_code.validate_code_safe(escape)
+            self.assertFalse(ok)
+            self.assertIn('attrgetter()', msg)
+            for code in (
+                "from operator import methodcaller\nmethodcaller('__subclasses__')(object)",
+                "from operator import attrgetter\nname = 'real'\nattrgetter(name)(1)",
+            ):
+                self.assertFalse(run_code.validate_code_safe(code)[0], code)
+            self.assertTrue(run_code.validate_code_safe(
+                "from operator import attrgetter, methodcaller\nprint(attrgetter('real', 'imag')(1j), "
+                "methodcaller('upper')('a'))",
+            )[0])
+        self.assertTrue(run_code.validate_code_safe(
+            "print('{0} {1:>{2}} {x[0]}'.format(1, 2, 3, x=[4]), '{', 'a}b')",
+        )[0])
+
+    def test_syntax_error_left_to_sandbox(self):
+        self.assertEqual(run_code.validate_code_safe("def f(:"), (True, ''))
+
+    def test_empty_code(self):
+        self.assertFalse(run_code.validate_code_safe("   \n")[0])
+
+    @override_settings(CODING_VALIDATOR_ALLOWED_IMPORTS=['math'])
+    def test_allowlist_mode(self):
+        self.assertTrue(run_code.validate_code_safe("import math")[0])
+        self.assertFalse(run_code.validate_code_safe("import random")[0])
+
+
+@unittest.skipUnless(run_code.resource is not None, 'rlimits require the resource module')
+class SandboxLimitsTests(SimpleTestCase):
+    FLOOD = "while True: print('x' * 1000)"
+
+    def _both_paths(self, code, inputs, **kwargs):
+        with override_settings(CODING_SANDBOX_POOL_SIZE=0):
+            cold = run_code.run_python_code_batch(code, inputs, **kwargs)
+        if not run_code.POOL_SUPPORTED:
+            return [cold]
+        with override_settings(CODING_SANDBOX_POOL_SIZE=1):
+            warm = run_code.run_python_code_batch(code, inputs, **kwargs)
+        return [cold, warm]
+
+    @override_settings(CODING_SANDBOX_OUTPUT_LIMIT_KB=16)
+    def test_output_cap_kills_process(self):
+        for results in self._both_paths(self.FLOOD, [""], per_case_timeout=5):
+            result = results[0]
+            self.assertEqual((result.stderr, result.returncode), (run_code.OUTPUT_LIMIT_MESSAGE, -1))
+            self.assertLessEqual(len(result.stdout), 16 * 1024)
+            self.assertLess(result.elapsed_ms, 4000)
+
+    @override_settings(CODING_SANDBOX_MEMORY_MB=256)
+    def test_memory_limit_and_peak_reported(self):
+        code = "n = int(input())\nx = bytearray(n * 1024 * 1024)\nprint(len(x))"
+        for results in self._both_paths(code, ["32\n", "1024\n"], per_case_timeout=5):
+            small, huge = results
+            self.assertEqual(small.returncode, 0)
+            self.assertGreater(small.peak_kb, 32 * 1024)
+            self.assertNotEqual(huge.returncode, 0)
+            self.assertIn('MemoryError', huge.stderr)
+
+    @override_settings(CODING_SANDBOX_MAX_OPEN_FILES=16)
+    def test_open_file_limit(self):
+        code = "import os\nfds = [os.dup(0) for _ in range(64)]\nprint(len(fds))"
+        for results in self._both_paths(code, [""], per_case_timeout=5):
+            self.assertIn('Too many open files', results[0].stderr)
+
+
+class CompiledLanguageAvailabilityTests(SimpleTestCase):
+    def test_c_cpp_unavailable_without_seccomp(self):
+        with mock.patch.object(run_code, 'seccomp_available', return_value=False):
+            self.assertFalse(run_code.CRunner().available())
+            self.assertFalse(run_code.CppRunner().available())
+            with override_settings(CODING_LANGUAGES=['python', 'c', 'cpp']):
+                self.assertEqual(run_code.enabled_languages(), ['python'])
+
+
+@unittest.skipUnless(run_code.CRunner().available() and run_code.CppRunner().available(),
+                     'gcc/g++ or seccomp support not available')
+class CompiledLanguageTests(SimpleTestCase):
+    C_DOUBLE = '#include <stdio.h>\nint main(void) { int n; scanf("%d", &n); printf("%d\\n", 2 * n); return 0; }'
+
+    def setUp(self):
+        run_code.shutdown_artifact_cache()
+
+    def test_batch_builds_once(self):
+        results = run_code.run_code_batch(self.C_DOUBLE, ["1\n", "2\n", "3\n"], language='c')
+        self.assertEqual([(r.stdout, r.returncode) for r in results], [('2\n', 0), ('4\n', 0), ('6\n', 0)])
+        run_code.run_code_batch(self.C_DOUBLE, ["4\n"], language='c')
+        cache = run_code.get_artifact_cache()
+        self.assertEqual((cache.builds, cache.hits), (1, 1))
+
+    @override_settings(CODING_PARALLEL_CASES=True, CODING_PARALLEL_MAX_PER_REQUEST=3)
+    def test_parallel_cases_share_one_build(self):
+        code = "#include <iostream>\nint main() { long long n; std::cin >> n; std::cout << n * n << std::endl; }"
+        results = run_code.run_code_cases(code, [f"{n}\n" for n in range(6)], per_case_timeout=5, language='cpp')
+        self.assertEqual([r.stdout for r in results], [f"{n * n}\n" for n in range(6)])
+        self.assertEqual(run_code.get_artifact_cache().builds, 1)
+
+    def test_compile_error_is_cached_failing_case(self):
+        results = run_code.run_code_batch("int main() { return }", ["", ""], stop_on_error=True, language='cpp')
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].returncode, 1)
+        self.assertTrue(results[0].stderr.startswith('Compilation error:'))
+        self.assertIn('main.cpp:1', results[0].stderr)
+        self.assertEqual(len(run_code.run_code_batch("int main() { return }", ["", ""], language='cpp')), 2)
+        self.assertEqual(run_code.get_artifact_cache().builds, 1)
+
+    @override_settings(CODING_SANDBOX_OUTPUT_LIMIT_KB=16)
+    def test_sandbox_limits_apply(self):
+        flood = '#include <stdio.h>\nint main(void) { for (;;) puts("xxxxxxxxxxxxxxxx"); }'
+        result = run_code.run_code_batch(flood, [""], language='c')[0]
+        self.assertEqual((result.stderr, result.returncode), (run_code.OUTPUT_LIMIT_MESSAGE, -1))
+        spin = "int main(void) { volatile unsigned long i = 0; for (;;) i++; }"
+        result = run_code.run_code_batch(spin, [""], per_case_timeout=1, language='c')[0]
+        self.assertEqual((result.stderr, result.returncode), ('Timeout', -1))
+
+    def test_validator_denylist(self):
+        ok_code = '#include <bits/stdc++.h>\n// system("ls")\nint main() { std::string s = "fork"; std::cout << s; }'
+        self.assertEqual(run_code.validate_code_safe(ok_code, 'cpp'), (True, ''))
+        for code in (
+            '#include <unistd.h>\nint main() {}',
+            '#include "secret.h"\nint main() {}',
+            '#include <stdlib.h>\nint main() { system("ls"); }',
+            'int main() { __asm__("nop"); }',
+            '#define J(a, b) a##b\nint main() {}',
+        ):
+            ok, msg = run_code.validate_code_safe(code, 'c')
+            self.assertFalse(ok, code)
+            self.assertIn('sətir', msg)
+
+    def test_undeclared_syscalls_are_blocked(self):
+        # Self-declared prototypes and stdio calls the token denylist does not know; run_code_batch
+        # skips the validator, so only the seccomp filter stands between the program and the file.
+        code = r"""
+#include <stdio.h>
+extern int execveat(int, const char *, char *const[], char *const[], int);
+extern int execve(const char *, char *const[], char *const[]);
+int main(void) {
+    char path[512], cmd[600];
+    if (scanf("%511s", path) != 1) return 2;
+    printf("%d\n", remove(path));
+    printf("%d\n", rename(path, "moved"));
+    printf("%d\n", fopen(path, "w") != NULL);
+    snprintf(cmd, sizeof cmd, "rm -f %s", path);
+    char *args[] = {"sh", "-c", cmd, NULL}, *envp[] = {NULL};
+    printf("%d\n", execveat(-100, "/bin/sh", args, envp, 0));
+    fflush(stdout);
+    execve("/bin/sh", args, envp);
+    return 3;
+}
+"""
+        with tempfile.TemporaryDirectory() as outside:
+            target = os.path.join(outside, 'keep.txt')
+            with open(target, 'w') as f:
+                f.write('data')
+            result = run_code.run_code_batch(code, [target + "\n"], language='c')[0]
+            self.assertEqual(result.stdout, "-1\n-1\n0\n-1\n")
+            self.assertNotEqual(result.returncode, 0)
+            with open(target) as f:
+                self.assertEqual(f.read(), 'data')
+
+    def test_unknown_language(self):
+        self.assertFalse(run_code.validate_code_safe("print(1)", 'cobol')[0])
+        with self.assertRaises(run_code.UnsupportedLanguage):
+            run_code.run_code_batch("print(1)", [""], language='cobol')
+
+
+@unittest.skipUnless(run_code.JavaScriptRunner().available(), 'node 20+ not installed')
+class JavaScriptRunnerTests(SimpleTestCase):
+    READ = "const n = Number(require('fs').readFileSync(0, 'utf8'));\n"
+
+    @override_settings(CODING_SANDBOX_MEMORY_MB=256)
+    def test_stdin_stdout_under_memory_limit(self):
+        results = run_code.run_code_batch(self.READ + "console.log(n + 1);", ["1\n", "41\n"], language='javascript')
+        self.assertEqual([(r.stdout, r.returncode) for r in results], [('2\n', 0), ('42\n', 0)])
+
+    def test_file_writes_denied_by_permission_model(self):
+        code = self.READ + "require('fs').writeFileSync('out.txt', 'x');"
+        result = run_code.run_code_batch(code, ["1"], language='javascript')[0]
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('ERR_ACCESS_DENIED', result.stderr)
+
+    def test_validator(self):
+        self.assertTrue(run_code.validate_code_safe(
+            self.READ + "class A { constructor() { this.x = 'eval'; } }\nconsole.log(new A().x);", 'javascript',
+        )[0])
+        for code in (
+            "require('child_process').execSync('ls')",
+            "const r = require; r('net')",
+            "require('ht' + 'tp')",
+            "[].map.constructor('return process')()",
+            "process['binding']('fs')",
+            "fetch('http://example.com')",
+        ):
+            self.assertFalse(run_code.validate_code_safe(code, 'javascript')[0], code)
+
+
+class CompareOutputTests(SimpleTestCase):
+    def test_exact_normalizes_newlines_and_whitespace(self):
+        self.assertTrue(compare_output("  1\r\n2  \r3\n\n\n", "1\n2\n3").passed)
+        self.assertTrue(run_code.check_output_match("a\n", "a"))
+
+    def test_exact_reports_first_difference(self):
+        result = compare_output("10\n25\n30\n", "10\n20\n30\n")
+        self.assertEqual((result.passed, result.line, result.column), (False, 2, 2))
+        self.assertEqual((result.expected, result.got), ("20", "25"))
+
+    def test_exact_missing_extra_and_inner_blank_lines(self):
+        self.assertEqual(compare_output("1", "1\n2").line, 2)
+        self.assertEqual(compare_output("1\n2\n3", "1\n2").got, "3")
+        self.assertFalse(compare_output("1\n\n2", "1\n2").passed)
+
+    def test_large_output_stops_at_first_mismatch(self):
+        expected = "\n".join(str(i) for i in range(200000))
+        got = expected.replace("\n150000\n", "\n150001\n")
+        self.assertEqual(compare_output(got, expected).line, 150001)
+        self.assertTrue(compare_output(expected + "\n", expected).passed)
+
+    def test_tokens_mode(self):
+        self.assertTrue(compare_output("1  2\n3", "1 2 3", "tokens").passed)
+        result = compare_output("1 2\n4", "1 2 3", "tokens")
+        self.assertEqual((result.line, result.column, result.got), (2, 1, "4"))
+
+    def test_float_mode(self):
+        self.assertTrue(compare_output("0.3333333 x", "0.33333333 x", "float").passed)
+        self.assertFalse(compare_output("0.34", "0.3333", "float").passed)
+        self.assertTrue(compare_output("0.334", "0.3333", "float", 0.01).passed)
+        self.assertFalse(compare_output("0.3333 y", "0.3333 x", "float").passed)
+
+    def test_unordered_mode(self):
+        self.assertTrue(compare_output("b\na\na\n", "a\nb\na", "unordered").passed)
+        self.assertEqual(compare_output("b\na", "a\nb\na", "unordered").expected, "a")
+        self.assertEqual(compare_output("a\nc", "a\nb", "unordered").got, "c")
@@ -0,0 +1,123 @@
+"""
+Tests for GET /api/student/coding (task list with own submission stats).
+- solved / attemptCount / lastSubmissionStatus per task, status filters, sorts
+- optional page/page_size pagination
+- benchmark fixture: 10k submissions of one student, list stays one query over coding_submissions
+"""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from core.models import Organization
+from students.models import StudentProfile
+from coding.models import CodingSubmission, CodingTask, CodingTopic
+
+BENCH_TASKS = 40
+BENCH_SUBMISSIONS = 10000
+
+
+class StudentCodingListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.org = Organization.objects.create(name="Test Org", slug="test-org")
+        teacher = User.objects.create_user(
+            email="teacher@list.test", password="pass123", full_name="Teacher", role="teacher", organization=cls.org,
+        )
+        cls.student = User.objects.create_user(
+            email="student@list.test", password="pass123", full_name="Student", role="student", organization=cls.org,
+        )
+        StudentProfile.objects.get_or_create(user=cls.student, defaults={"grade": "10"})
+        other = User.objects.create_user(
+            email="other@list.test", password="pass123", full_name="Other", role="student", organization=cls.org,
+        )
+        topic = CodingTopic.objects.create(name="Topic", organization=cls.org)
+        cls.tasks = [
+            CodingTask.objects.create(
+                title=f"Task {i}", description="d", topic=topic, organization=cls.org, created_by=teacher,
+            )
+            for i in range(BENCH_TASKS)
+        ]
+        # Student: task i gets i * 10 submissions (task 0 untouched), even tasks end with a pass
+        # and odd tasks with a failure. Rest of the 10k goes to task 1. Other student: passes everywhere.
+        subs = []
+        for i, task in enumerate(cls.tasks[:-1]):
+            for k in range(i * 10):
+                last = k == i * 10 - 1
+                subs.append(CodingSubmission(
+                    task=task, student=cls.student, submitted_code="x", run_type="SUBMIT",
+                    status=("passed" if i % 2 == 0 else "failed") if last else "error",
+                ))
+        filler = BENCH_SUBMISSIONS - len(subs)
+        subs[10:10] = [
+            CodingSubmission(task=cls.tasks[1], student=cls.student, submitted_code="x", run_type="RUN", status="error")
+            for _ in range(filler)
+        ]
+        subs += [
+            CodingSubmission(task=task, student=other, submitted_code="x", run_type="SUBMIT", status="passed")
+            for task in cls.tasks
+        ]
+        CodingSubmission.objects.bulk_create(subs, batch_size=1000)
+        cls.expected_attempts = {task.id: i * 10 for i, task in enumerate(cls.tasks[:-1])}
+        cls.expected_attempts[cls.tasks[1].id] += filler
+        cls.expected_attempts[cls.tasks[-1].id] = 0
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.student)}")
+
+    def _list(self, **params):
+        res = self.client.get("/api/student/coding", params)
+        self.assertEqual(res.status_code, 200, res.content)
+        return res.json()
+
+    def test_stats_per_task(self):
+        rows = {r["id"]: r for r in self._list()}
+        self.assertEqual(len(rows), BENCH_TASKS)
+        self.assertEqual({tid: r["attemptCount"] for tid, r in rows.items()}, self.expected_attempts)
+        self.assertEqual(sum(r["attemptCount"] for r in rows.values()), BENCH_SUBMISSIONS)
+        task2 = rows[self.tasks[2].id]
+        self.assertTrue(task2["solved"])
+        self.assertEqual(task2["lastSubmissionStatus"], "passed")
+        task3 = rows[self.tasks[3].id]
+        self.assertFalse(task3["solved"])
+        self.assertEqual(task3["lastSubmissionStatus"], "failed")
+        untouched = rows[self.tasks[0].id]
+        self.assertEqual((untouched["attemptCount"], untouched["solved"], untouched["lastSubmissionAt"]), (0, False, None))
+
+    def test_status_filters(self):
+        solved = {r["id"] for r in self._list(status="solved")}
+        self.assertEqual(solved, {t.id for i, t in enumerate(self.tasks[:-1]) if i % 2 == 0 and i > 0})
+        not_attempted = [r["id"] for r in self._list(status="not_attempted")]
+        self.assertEqual(sorted(not_attempted), sorted([self.tasks[0].id, self.tasks[-1].id]))
+        self.assertEqual(len(self._list(status="attempted")), BENCH_TASKS - 2)
+        self.assertEqual(len(self._list(status="not_completed")), BENCH_TASKS - len(solved))
+
+    def test_sorts(self):
+        rows = self._list(sort="most_solved")
+        keys = [(r["solved"], r["attemptCount"]) for r in rows]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+        rows = self._list(sort="last_activity")
+        self.assertIsNone(rows[-1]["lastSubmissionAt"])
+        self.assertEqual([r["id"] for r in self._list()], sorted((t.id for t in self.tasks), reverse=True))
+
+    def test_pagination(self):
+        data = self._list(page=1, page_size=15)
+        self.assertEqual((data["count"], data["next"], data["previous"]), (BENCH_TASKS, 2, None))
+        ids = [r["id"] for r in data["results"]]
+        ids += [r["id"] for r in self._list(page=2, page_size=15)["results"]]
+        last = self._list(page=3, page_size=15)
+        self.assertIsNone(last["next"])
+        ids += [r["id"] for r in last["results"]]
+        self.assertEqual(ids, [r["id"] for r in self._list()])
+
+    def test_single_submission_query(self):
+        """Benchmark fixture: the list reads coding_submissions in exactly one (annotated) query."""
+        with CaptureQueriesContext(connection) as ctx:
+            self._list(sort="last_activity", status="attempted")
+        submission_queries = [q for q in ctx.captured_queries if "coding_submissions" in q["sql"]]
+        self.assertEqual(len(submission_queries), 1)
+        self.assertLessEqual(len(ctx.captured_queries), 3)
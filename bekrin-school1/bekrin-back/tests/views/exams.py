@@ -51,10 +51,18 @@ from tests.serializers import (
     QuestionPublicSerializer,
     TeacherPDFSerializer,
 )
+from tests.analytics import get_exam_analytics
 from tests.evaluate import evaluate_open_single_value
+from tests.grading import get_grading_plan, points_per_question
+from tests.rescoring import RescoreError, rescore_exam
+from tests.manual_grading import grade_attempts, grades_from_payload
 from tests.answer_key import validate_answer_key_json, validate_and_normalize_answer_key_json
 
 
+# Attempts accepted by the bulk grading endpoint in one request.
+MAX_BULK_GRADE_ATTEMPTS = 500
+
+
 def _now():
     return timezone.now()
 
@@ -1467,154 +1475,157 @@ def student_exam_submit_view(request, exam_id):
                 pass
 
     is_quiz = exam.type == 'quiz'
-    if is_quiz:
-        # QUIZ: 15 questions = 100 points, each question = 100/15
-        pts_per_auto = Decimal('100') / 15
-        max_score = Decimal('100')
-    else:
-        # İMTAHAN: 27 normal questions (x each) + 3 situasiya (2x each) = 27x + 6x = 33x = 150
-        # So x = 150/33
-        total_units = 27 + (3 * 2)  # 27 normal + 3 situasiya (each worth 2 units)
-        pts_per_auto = Decimal('150') / Decimal('33')
-        max_score = Decimal('150')
+    pts_per_auto = points_per_question(exam.type)
+    max_score = Decimal('100') if is_quiz else Decimal('150')
 
     total_score = Decimal('0')
+    # PDF/JSON: answer key compiled once per exam version (tests.grading), shared by all submits
+    plan = get_grading_plan(exam) if exam.source_type in ('PDF', 'JSON') else None
+
+    # Grade in memory first; the transaction below only writes (one UPDATE + one bulk INSERT)
+    answer_rows = []
 
     try:
-        with transaction.atomic():
-            blueprint = attempt.attempt_blueprint or []
-            if exam.source_type in ('PDF', 'JSON') and (blueprint or (exam.answer_key_json and isinstance(exam.answer_key_json, dict))):
-                # Prefer blueprint for grading (correctOptionId); fallback to answer_key_json
-                if blueprint:
-                    for item in blueprint:
-                        num = item.get('questionNumber')
-                        kind = (item.get('kind') or 'mc').lower()
-                        ans = answers_by_question_number.get(num) or answers_by_question_number.get(int(num) if num is not None else None) or {}
-                        selected_id = (ans.get('selectedOptionId') or ans.get('selected_option_id'))
-                        if selected_id is not None:
-                            selected_id = str(selected_id).strip()
-                        selected_key = (ans.get('selectedOptionKey') or ans.get('selected_option_key') or '').strip().upper()
-                        text_answer = (ans.get('textAnswer') or ans.get('text_answer') or '').strip()
-                        requires_manual = False
-                        auto_score = Decimal('0')
-                        if kind == 'mc':
-                            correct_option_id = item.get('correctOptionId')
-                            if correct_option_id and selected_id and str(selected_id).strip() == str(correct_option_id).strip():
-                                auto_score = pts_per_auto
-                        elif kind == 'open':
-                            ak = exam.answer_key_json or {}
-                            q_def = next((x for x in (ak.get('questions') or []) if x.get('number') == num), {})
-                            rule = (q_def.get('open_rule') or 'EXACT_MATCH').strip().upper()
-                            open_ans = q_def.get('open_answer')
-                            if open_ans is not None and rule and evaluate_open_single_value(text_answer, open_ans, rule):
-                                auto_score = pts_per_auto
-                        else:
-                            requires_manual = True
-                        total_score += auto_score
-                        ExamAnswer.objects.create(
-                            attempt=attempt,
-                            question=None,
-                            question_number=num,
-                            selected_option_key=selected_key or None,
-                            text_answer=text_answer or None,
-                            auto_score=auto_score,
-                            requires_manual_check=requires_manual,
-                        )
-                else:
-                    questions_list = exam.answer_key_json.get('questions') or []
-                    kind_order = {'mc': 0, 'open': 1, 'situation': 2}
-                    sorted_q = sorted(questions_list, key=lambda q: (kind_order.get((q.get('kind') or '').lower(), 99), q.get('number', 0)))
-                    for q_def in sorted_q:
-                        num = q_def.get('number')
-                        kind = (q_def.get('kind') or 'mc').lower()
-                        ans = answers_by_question_number.get(num) or answers_by_question_number.get(int(num) if num is not None else None) or {}
-                        selected_key = (ans.get('selectedOptionKey') or ans.get('selected_option_key') or '').strip().upper()
-                        text_answer = (ans.get('textAnswer') or ans.get('text_answer') or '').strip()
-                        requires_manual = False
-                        auto_score = Decimal('0')
-                        if kind == 'mc':
-                            correct_key = (str(q_def.get('correct') or '').strip().upper())
-                            if correct_key and selected_key and selected_key == correct_key:
-                                auto_score = pts_per_auto
-                        elif kind == 'open':
-                            rule = (q_def.get('open_rule') or 'EXACT_MATCH').strip().upper()
-                            open_ans = q_def.get('open_answer')
-                            if open_ans is not None and rule:
-                                if evaluate_open_single_value(text_answer, open_ans, rule):
-                                    auto_score = pts_per_auto
-                        else:
-                            requires_manual = True
-                        total_score += auto_score
-                        ExamAnswer.objects.create(
-                            attempt=attempt,
-                            question=None,
-                            question_number=num,
-                            selected_option_key=selected_key or None,
-                            text_answer=text_answer or None,
-                            auto_score=auto_score,
-                            requires_manual_check=requires_manual,
-                        )
+        blueprint = attempt.attempt_blueprint or []
+        if exam.source_type in ('PDF', 'JSON') and (blueprint or plan is not None):
+            # Grade blueprint items (option ids) against the compiled key; fallback to the key's own order
+            if blueprint:
+                for item in blueprint:
+                    num = item.get('questionNumber')
+                    kind = (item.get('kind') or 'mc').lower()
+                    ans = answers_by_question_number.get(num) or answers_by_question_number.get(int(num) if num is not None else None) or {}
+                    selected_id = (ans.get('selectedOptionId') or ans.get('selected_option_id'))
+                    if selected_id is not None:
+                        selected_id = str(selected_id).strip()
+                    selected_key = (ans.get('selectedOptionKey') or ans.get('selected_option_key') or '').strip().upper()
+                    text_answer = (ans.get('textAnswer') or ans.get('text_answer') or '').strip()
+                    requires_manual = False
+                    auto_score = Decimal('0')
+                    rule = plan.rule(num) if plan is not None else None
+                    if kind == 'mc' and not selected_key and rule is not None:
+                        # Record the chosen option's key so the answer can be rescored (tests.rescoring)
+                        selected_key = rule.key_for_option(selected_id) or ''
+                    if kind == 'mc':
+                        # The attempt's frozen blueprint wins; a later key edit must not regrade it silently
+                        correct_option_id = item.get('correctOptionId') or (rule.correct_option_id if rule is not None else None)
+                        if correct_option_id and selected_id and str(selected_id).strip() == str(correct_option_id).strip():
+                            auto_score = pts_per_auto
+                    elif kind == 'open':
+                        if rule is not None and rule.open_correct(text_answer):
+                            auto_score = pts_per_auto
+                    else:
+                        requires_manual = True
+                    total_score += auto_score
+                    answer_rows.append(ExamAnswer(
+                        attempt=attempt,
+                        question=None,
+                        question_number=num,
+                        selected_option_key=selected_key or None,
+                        text_answer=text_answer or None,
+                        auto_score=auto_score,
+                        requires_manual_check=requires_manual,
+                    ))
             else:
-                # BANK: use blueprint correctOptionId when available, else question.correct_answer
-                eqs = list(ExamQuestion.objects.filter(exam=exam).select_related('question').prefetch_related('question__options').order_by('order'))
-                type_order = {'MULTIPLE_CHOICE': 0, 'OPEN_SINGLE_VALUE': 1, 'OPEN_ORDERED': 1, 'OPEN_UNORDERED': 1, 'SITUATION': 2}
-                eqs.sort(key=lambda eq: (type_order.get(eq.question.type, 99), eq.order))
-                blueprint_by_qid = {}
-                if blueprint:
-                    for b in blueprint:
-                        qid = b.get('questionId')
-                        if qid is not None:
-                            blueprint_by_qid[qid] = b
-                for eq in eqs:
-                    q = eq.question
-                    ans = answers_by_question_id.get(q.id) or {}
-                    selected_option_id = ans.get('selectedOptionId') or ans.get('selected_option_id')
+                for rule in plan.questions:
+                    num = rule.number
+                    kind = rule.kind
+                    ans = answers_by_question_number.get(num) or answers_by_question_number.get(int(num) if num is not None else None) or {}
+                    selected_key = (ans.get('selectedOptionKey') or ans.get('selected_option_key') or '').strip().upper()
                     text_answer = (ans.get('textAnswer') or ans.get('text_answer') or '').strip()
                     requires_manual = False
                     auto_score = Decimal('0')
-                    if q.type == 'MULTIPLE_CHOICE':
-                        correct_id = None
-                        bp = blueprint_by_qid.get(q.id)
-                        if bp and bp.get('correctOptionId') is not None:
-                            correct_id = bp.get('correctOptionId')
-                            try:
-                                correct_id = int(correct_id)
-                            except (TypeError, ValueError):
-                                pass
-                        if correct_id is None and q.correct_answer is not None:
-                            if isinstance(q.correct_answer, dict) and 'option_id' in q.correct_answer:
-                                correct_id = q.correct_answer.get('option_id')
-                            elif isinstance(q.correct_answer, (int, float)):
-                                correct_id = int(q.correct_answer)
-                        if correct_id is not None and selected_option_id is not None:
-                            if str(selected_option_id).strip() == str(correct_id).strip():
-                                auto_score = pts_per_auto
-                    elif q.type in ('OPEN_SINGLE_VALUE', 'OPEN_ORDERED', 'OPEN_UNORDERED'):
-                        rule = q.answer_rule_type
-                        if not rule and q.type == 'OPEN_ORDERED':
-                            rule = 'ORDERED_DIGITS'
-                        elif not rule and q.type == 'OPEN_UNORDERED':
-                            rule = 'UNORDERED_DIGITS'
-                        if rule and q.correct_answer is not None:
-                            if evaluate_open_single_value(text_answer, q.correct_answer, rule):
-                                auto_score = pts_per_auto
-                    elif q.type == 'SITUATION':
+                    if kind == 'mc':
+                        if rule.key_correct(selected_key):
+                            auto_score = pts_per_auto
+                    elif kind == 'open':
+                        if rule.open_correct(text_answer):
+                            auto_score = pts_per_auto
+                    else:
                         requires_manual = True
                     total_score += auto_score
-                    ExamAnswer.objects.create(
+                    answer_rows.append(ExamAnswer(
                         attempt=attempt,
-                        question=q,
-                        selected_option_id=int(selected_option_id) if selected_option_id is not None else None,
+                        question=None,
+                        question_number=num,
+                        selected_option_key=selected_key or None,
                         text_answer=text_answer or None,
                         auto_score=auto_score,
                         requires_manual_check=requires_manual,
-                    )
-            attempt.finished_at = now
-            attempt.auto_score = total_score
-            attempt.total_score = total_score  # Will be updated when manual grading is done
-            attempt.status = 'SUBMITTED'
-            attempt.is_visible_to_student = False  # Lock attempt after submission
-            attempt.save(update_fields=['finished_at', 'auto_score', 'total_score', 'status', 'is_visible_to_student'])
+                    ))
+        else:
+            # BANK: use blueprint correctOptionId when available, else question.correct_answer
+            eqs = list(ExamQuestion.objects.filter(exam=exam).select_related('question').prefetch_related('question__options').order_by('order'))
+            type_order = {'MULTIPLE_CHOICE': 0, 'OPEN_SINGLE_VALUE': 1, 'OPEN_ORDERED': 1, 'OPEN_UNORDERED': 1, 'SITUATION': 2}
+            eqs.sort(key=lambda eq: (type_order.get(eq.question.type, 99), eq.order))
+            blueprint_by_qid = {}
+            if blueprint:
+                for b in blueprint:
+                    qid = b.get('questionId')
+                    if qid is not None:
+                        blueprint_by_qid[qid] = b
+            for eq in eqs:
+                q = eq.question
+                ans = answers_by_question_id.get(q.id) or {}
+                selected_option_id = ans.get('selectedOptionId') or ans.get('selected_option_id')
+                text_answer = (ans.get('textAnswer') or ans.get('text_answer') or '').strip()
+                requires_manual = False
+                auto_score = Decimal('0')
+                if q.type == 'MULTIPLE_CHOICE':
+                    correct_id = None
+                    bp = blueprint_by_qid.get(q.id)
+                    if bp and bp.get('correctOptionId') is not None:
+                        correct_id = bp.get('correctOptionId')
+                        try:
+                            correct_id = int(correct_id)
+                        except (TypeError, ValueError):
+                            pass
+                    if correct_id is None and q.correct_answer is not None:
+                        if isinstance(q.correct_answer, dict) and 'option_id' in q.correct_answer:
+                            correct_id = q.correct_answer.get('option_id')
+                        elif isinstance(q.correct_answer, (int, float)):
+                            correct_id = int(q.correct_answer)
+                    if correct_id is not None and selected_option_id is not None:
+                        if str(selected_option_id).strip() == str(correct_id).strip():
+                            auto_score = pts_per_auto
+                elif q.type in ('OPEN_SINGLE_VALUE', 'OPEN_ORDERED', 'OPEN_UNORDERED'):
+                    rule = q.answer_rule_type
+                    if not rule and q.type == 'OPEN_ORDERED':
+                        rule = 'ORDERED_DIGITS'
+                    elif not rule and q.type == 'OPEN_UNORDERED':
+                        rule = 'UNORDERED_DIGITS'
+                    if rule and q.correct_answer is not None:
+                        if evaluate_open_single_value(text_answer, q.correct_answer, rule):
+                            auto_score = pts_per_auto
+                elif q.type == 'SITUATION':
+                    requires_manual = True
+                total_score += auto_score
+                answer_rows.append(ExamAnswer(
+                    attempt=attempt,
+                    question=q,
+                    selected_option_id=int(selected_option_id) if selected_option_id is not None else None,
+                    text_answer=text_answer or None,
+                    auto_score=auto_score,
+                    requires_manual_check=requires_manual,
+                ))
+
+        with transaction.atomic():
+            # Conditional UPDATE: a concurrent second submit of the same attempt matches no row
+            finished = ExamAttempt.objects.filter(pk=attempt.pk, finished_at__isnull=True).update(
+                finished_at=now,
+                auto_score=total_score,
+                total_score=total_score,  # Will be updated when manual grading is done
+                status='SUBMITTED',
+                is_visible_to_student=False,  # Lock attempt after submission
+            )
+            if not finished:
+                logger.warning("student_exam_submit exam_id=%s attempt_id=%s user_id=%s already_submitted", exam_id, attempt.id, getattr(request.user, 'id', None))
+                return Response({'detail': 'Already submitted'}, status=status.HTTP_400_BAD_REQUEST)
+            ExamAnswer.objects.bulk_create(answer_rows)
+        attempt.finished_at = now
+        attempt.auto_score = total_score
+        attempt.total_score = total_score
+        attempt.status = 'SUBMITTED'
+        attempt.is_visible_to_student = False
 
         return Response({
             'attemptId': attempt.id,
@@ -1747,6 +1758,26 @@ def student_exam_result_view(request, exam_id, attempt_id):
 
 
 # ---------- Teacher: Grading ----------
+def _filter_graded_attempts(qs, status_filter):
+    """
+    Annotate attempts with manual_pending (answers awaiting a manual check) and apply the
+    grading list status filter. The count comes from the same query, not one query per attempt.
+    """
+    from django.db.models import Count, Q
+    qs = qs.select_related('student').annotate(
+        manual_pending=Count('answers', filter=Q(answers__requires_manual_check=True))
+    )
+    if status_filter == 'submitted':
+        qs = qs.filter(finished_at__isnull=False)
+    elif status_filter == 'waiting_manual':
+        qs = qs.filter(finished_at__isnull=False, manual_pending__gt=0)
+    elif status_filter == 'graded':
+        qs = qs.filter(manual_score__isnull=False, is_checked=True)
+    elif status_filter == 'published':
+        qs = qs.filter(is_checked=True).filter(exam__is_result_published=True)
+    return qs
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsTeacher])
 def teacher_exam_attempts_view(request, exam_id):
@@ -1780,27 +1811,22 @@ def teacher_exam_attempts_view(request, exam_id):
         except (Group.DoesNotExist, ValueError):
             pass
     
-    # Group attempts by run
-    runs_data = []
-    for run in runs:
-        qs_attempts = ExamAttempt.objects.filter(exam_run=run).select_related('student', 'student__student_profile')
+    # Group attempts by run: one query for the attempts of all runs, grouped in Python
+    runs = list(runs)
+    attempts_by_run = {}
+    if runs:
+        qs_attempts = ExamAttempt.objects.filter(exam_run_id__in=[run.id for run in runs])
         if not show_archived:
             qs_attempts = qs_attempts.filter(is_archived=False)
-        
-        if status_filter == 'submitted':
-            qs_attempts = qs_attempts.filter(finished_at__isnull=False)
-        elif status_filter == 'waiting_manual':
-            qs_attempts = qs_attempts.filter(finished_at__isnull=False).filter(
-                answers__requires_manual_check=True
-            ).distinct()
-        elif status_filter == 'graded':
-            qs_attempts = qs_attempts.filter(manual_score__isnull=False, is_checked=True)
-        elif status_filter == 'published':
-            qs_attempts = qs_attempts.filter(is_checked=True).filter(exam__is_result_published=True)
-        
+        qs_attempts = _filter_graded_attempts(qs_attempts, status_filter).order_by('-started_at')
+        for attempt in qs_attempts:
+            attempts_by_run.setdefault(attempt.exam_run_id, []).append(attempt)
+
+    runs_data = []
+    for run in runs:
         attempts_data = []
-        for attempt in qs_attempts.order_by('-started_at'):
-            manual_pending = ExamAnswer.objects.filter(attempt=attempt, requires_manual_check=True).count()
+        for attempt in attempts_by_run.get(run.id, []):
+            manual_pending = attempt.manual_pending
             auto_s = float(attempt.auto_score or 0)
             manual_s = float(attempt.manual_score or 0) if attempt.manual_score is not None else 0
             final_score = float(attempt.total_score) if attempt.total_score is not None else (auto_s + manual_s)
@@ -1839,7 +1865,7 @@ def teacher_exam_attempts_view(request, exam_id):
     
     # If no runs exist, fallback to old behavior (attempts without runs)
     if not runs_data:
-        qs = ExamAttempt.objects.filter(exam=exam, exam_run__isnull=True).select_related('student', 'student__student_profile').order_by('-started_at')
+        qs = ExamAttempt.objects.filter(exam=exam, exam_run__isnull=True).order_by('-started_at')
         if not show_archived:
             qs = qs.filter(is_archived=False)
         
@@ -1855,20 +1881,11 @@ def teacher_exam_attempts_view(request, exam_id):
             except (Group.DoesNotExist, ValueError):
                 pass
         
-        if status_filter == 'submitted':
-            qs = qs.filter(finished_at__isnull=False)
-        elif status_filter == 'waiting_manual':
-            qs = qs.filter(finished_at__isnull=False).filter(
-                answers__requires_manual_check=True
-            ).distinct()
-        elif status_filter == 'graded':
-            qs = qs.filter(manual_score__isnull=False, is_checked=True)
-        elif status_filter == 'published':
-            qs = qs.filter(is_checked=True).filter(exam__is_result_published=True)
+        qs = _filter_graded_attempts(qs, status_filter)
         
         attempts_data = []
         for attempt in qs:
-            manual_pending = ExamAnswer.objects.filter(attempt=attempt, requires_manual_check=True).count()
+            manual_pending = attempt.manual_pending
             auto_s = float(attempt.auto_score or 0)
             manual_s = float(attempt.manual_score or 0) if attempt.manual_score is not None else 0
             final_score = float(attempt.total_score) if attempt.total_score is not None else (auto_s + manual_s)
@@ -2024,176 +2041,31 @@ def teacher_attempt_detail_view(request, attempt_id):
     })
 
 
-# Option Set 1 (default): multipliers apply to situation max only. Quiz=100, Exam=150; exam units = 22+5+3*2 = 33.
-SITUATION_MULTIPLIERS_SET1 = (0, 1/3, 1/2, 2/3, 1)
-SITUATION_MULTIPLIERS_SET2 = (0, 2/3, 1, 4/3, 2)
-
-
-def _situation_max_per_question(is_quiz):
-    """Strict unit-based: situation max = 2 units. Exam total units 33, so 150/33*2 per situation."""
-    if is_quiz:
-        return Decimal('0')  # quiz has 0 situation
-    # İMTAHAN: 150/33 per unit, situasiya = 2 units, so 150/33*2
-    return (Decimal('150') / Decimal('33')) * Decimal('2')
-
-
-def _situation_fraction_to_points(fraction, is_quiz, max_situation_points=None, use_set2=False):
-    """
-    Option Set 1: fraction in [0, 1/3, 1/2, 2/3, 1]. Points = situation_max_per_question * fraction.
-    Option Set 2: fraction in [0, 2/3, 1, 4/3, 2]. Points = situation_max_per_question * fraction.
-    """
-    situation_max = max_situation_points if max_situation_points is not None else _situation_max_per_question(is_quiz)
-    if situation_max == 0:
-        return Decimal('0')
-    
-    if use_set2:
-        # SET2: [0, 2/3, 1, 4/3, 2]
-        if fraction in (0, '0'):
-            return Decimal('0')
-        if fraction in (2/3, '2/3', 0.667, '0.667'):
-            return (Decimal('2') / Decimal('3') * situation_max).quantize(Decimal('0.01'))
-        if fraction in (1, '1'):
-            return situation_max.quantize(Decimal('0.01'))
-        if fraction in (4/3, '4/3', 1.333, '1.333'):
-            return (Decimal('4') / Decimal('3') * situation_max).quantize(Decimal('0.01'))
-        if fraction in (2, '2'):
-            return (Decimal('2') * situation_max).quantize(Decimal('0.01'))
-    else:
-        # SET1: [0, 1/3, 1/2, 2/3, 1]
-        if fraction in (0, '0'):
-            return Decimal('0')
-        if fraction in (1/3, '1/3', 0.333):
-            return (Decimal('1') / Decimal('3') * situation_max).quantize(Decimal('0.01'))
-        if fraction in (1/2, '1/2', 0.5):
-            return (Decimal('1') / Decimal('2') * situation_max).quantize(Decimal('0.01'))
-        if fraction in (2/3, '2/3', 0.667):
-            return (Decimal('2') / Decimal('3') * situation_max).quantize(Decimal('0.01'))
-        if fraction in (1, '1'):
-            return situation_max.quantize(Decimal('0.01'))
-    
-    try:
-        return (Decimal(str(fraction)) * situation_max).quantize(Decimal('0.01'))
-    except Exception:
-        return Decimal('0')
-
-
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsTeacher])
 def teacher_attempt_grade_view(request, attempt_id):
     """Grade manual answers (manualScores by answer id, or per_situation_scores by situation index) and optionally publish."""
     try:
-        attempt = ExamAttempt.objects.select_related('exam').prefetch_related('answers').get(pk=attempt_id, exam__created_by=request.user)
+        attempt = ExamAttempt.objects.select_related('exam').get(pk=attempt_id, exam__created_by=request.user)
     except ExamAttempt.DoesNotExist:
         logger.warning("teacher_attempt_grade attempt_id=%s user_id=%s not_found", attempt_id, getattr(request.user, 'id', None))
         return Response({'detail': 'Not found'}, status=status.HTTP_404_NOT_FOUND)
 
-    exam = attempt.exam
-    is_quiz = exam.type == 'quiz'
-    max_score = float(exam.max_score or (100 if is_quiz else 150))
-    manual_scores = request.data.get('manualScores') or request.data.get('manual_scores') or {}
-    per_situation_scores = request.data.get('per_situation_scores') or request.data.get('perSituationScores') or []
     publish = request.data.get('publish', False)
     notes = request.data.get('notes', '')
 
     try:
-        total_manual = Decimal('0')
-        old_total_score = (attempt.auto_score or Decimal('0')) + (attempt.manual_score or Decimal('0'))
         with transaction.atomic():
-            for answer_id_str, score_value in manual_scores.items():
-                try:
-                    answer_id = int(answer_id_str)
-                    score = Decimal(str(score_value))
-                    answer = ExamAnswer.objects.get(pk=answer_id, attempt=attempt)
-                    old_answer_score = answer.manual_score or Decimal('0')
-                    answer.manual_score = score
-                    answer.save(update_fields=['manual_score'])
-                    total_manual += score
-                    # Log audit if score changed
-                    if old_answer_score != score:
-                        GradingAuditLog.objects.create(
-                            attempt=attempt,
-                            teacher=request.user,
-                            answer=answer,
-                            old_score=old_answer_score,
-                            new_score=score,
-                        )
-                except (ValueError, ExamAnswer.DoesNotExist):
-                    continue
-
-            # per_situation_scores: [{index: 1, fraction: 0|2/3|1|4/3|2 (Option Set 2)}, ...] - index 1-based
-            situation_max = _situation_max_per_question(is_quiz)
-            situation_answers = list(attempt.answers.filter(requires_manual_check=True).order_by('question_number'))
-            for item in per_situation_scores:
-                if not isinstance(item, dict):
-                    continue
-                idx = item.get('index') or item.get('situationIndex')
-                fraction = item.get('fraction') or item.get('score')
-                if idx is None:
-                    continue
-                try:
-                    idx = int(idx)
-                except (TypeError, ValueError):
-                    continue
-                if idx < 1 or idx > len(situation_answers):
-                    continue
-                # Use SET2: [0, 2/3, 1, 4/3, 2]
-                pts = _situation_fraction_to_points(fraction, is_quiz, max_situation_points=situation_max, use_set2=True)
-                ans = situation_answers[idx - 1]
-                old_answer_score = ans.manual_score or Decimal('0')
-                ans.manual_score = pts
-                ans.save(update_fields=['manual_score'])
-                total_manual += pts
-                # Log audit if score changed
-                if old_answer_score != pts:
-                    GradingAuditLog.objects.create(
-                        attempt=attempt,
-                        teacher=request.user,
-                        answer=ans,
-                        old_score=old_answer_score,
-                        new_score=pts,
-                    )
-
-            auto_total = sum(float(a.auto_score or 0) for a in attempt.answers.filter(requires_manual_check=False))
-            attempt.manual_score = total_manual
-            attempt.auto_score = Decimal(str(auto_total))
-            attempt.is_checked = True
-            new_total_score = attempt.auto_score + attempt.manual_score
-            # Validate: total_score must not exceed max_score
-            if new_total_score > Decimal(str(max_score)):
-                new_total_score = Decimal(str(max_score))
-            attempt.total_score = new_total_score
-            attempt.save(update_fields=['manual_score', 'auto_score', 'total_score', 'is_checked'])
-            # Log total score change if different
-            if old_total_score != new_total_score:
-                GradingAuditLog.objects.create(
-                    attempt=attempt,
-                    teacher=request.user,
-                    answer=None,
-                    old_total_score=old_total_score,
-                    new_total_score=new_total_score,
-                )
-
+            result = grade_attempts(
+                [grades_from_payload(attempt, request.data)], teacher=request.user, publish=publish, notes=notes,
+            )[attempt.id]
             if publish:
-                # Lock scores permanently: set is_result_published on ATTEMPT level
-                attempt.is_result_published = True
-                attempt.save(update_fields=['is_result_published'])
                 # Also set on exam level
                 attempt.exam.is_result_published = True
                 attempt.exam.save(update_fields=['is_result_published'])
                 # Auto-finish exam if all attempts are graded and published
                 _auto_finish_exam_if_all_graded(attempt.exam)
-
-        final = float(attempt.total_score or 0)
-        if final > max_score:
-            final = max_score
-        return Response({
-            'attemptId': attempt.id,
-            'manualScore': float(attempt.manual_score or 0),
-            'autoScore': float(attempt.auto_score or 0),
-            'totalScore': final,
-            'finalScore': final,
-            'isPublished': attempt.is_result_published,
-        })
+        return Response(result)
     except Exception as e:
         logger.exception(
             "teacher_attempt_grade error attempt_id=%s exam_id=%s user_id=%s: %s",
@@ -2202,6 +2074,64 @@ def teacher_attempt_grade_view(request, attempt_id):
         return Response({'detail': 'Could not grade'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsTeacher])
+def teacher_exam_grade_bulk_view(request, exam_id):
+    """
+    Grade many attempts of an exam in one request.
+    Body: {attempts: [{attemptId, manualScores?, per_situation_scores?}], publish?, notes?}
+    Unknown attempt ids are reported in notFound; the others are graded together.
+    """
+    try:
+        exam = Exam.objects.get(pk=exam_id, created_by=request.user)
+    except Exam.DoesNotExist:
+        return Response({'detail': 'Exam not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    items = request.data.get('attempts')
+    if not isinstance(items, list) or not items:
+        return Response({'detail': 'attempts list required'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > MAX_BULK_GRADE_ATTEMPTS:
+        return Response(
+            {'detail': f'At most {MAX_BULK_GRADE_ATTEMPTS} attempts per request'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    payloads = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            payloads[int(item.get('attemptId') or item.get('attempt_id'))] = item
+        except (TypeError, ValueError):
+            continue
+    if not payloads:
+        return Response({'detail': 'attempts list required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    publish = request.data.get('publish', False)
+    notes = request.data.get('notes', '')
+    attempts = ExamAttempt.objects.select_related('exam').filter(exam=exam, pk__in=list(payloads)).order_by('id')
+    grades_list = [grades_from_payload(a, payloads[a.id]) for a in attempts]
+    found = {g.attempt.id for g in grades_list}
+
+    try:
+        with transaction.atomic():
+            results = grade_attempts(grades_list, teacher=request.user, publish=publish, notes=notes)
+            if publish and results:
+                exam.is_result_published = True
+                exam.save(update_fields=['is_result_published'])
+                _auto_finish_exam_if_all_graded(exam)
+    except Exception as e:
+        logger.exception(
+            "teacher_exam_grade_bulk error exam_id=%s user_id=%s: %s", exam.id, getattr(request.user, 'id', None), e
+        )
+        return Response({'detail': 'Could not grade'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return Response({
+        'examId': exam.id,
+        'graded': len(results),
+        'results': list(results.values()),
+        'notFound': [attempt_id for attempt_id in payloads if attempt_id not in found],
+    })
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsTeacher])
 def teacher_attempt_publish_view(request, attempt_id):
@@ -2234,6 +2164,40 @@ def teacher_attempt_publish_view(request, attempt_id):
 # Removed duplicate teacher_attempt_reopen_view - the canonical one is defined later (line ~2141)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsTeacher])
+def teacher_exam_rescore_view(request, exam_id):
+    """
+    POST /api/teacher/exams/{examId}/rescore - Regrade finished attempts with the current answer key
+    (after correcting a wrong answer). Body: { dryRun?: bool, notes?: str }. Manual scores are kept.
+    """
+    try:
+        exam = Exam.objects.get(pk=exam_id, created_by=request.user)
+    except Exam.DoesNotExist:
+        return Response({'detail': 'Exam not found'}, status=status.HTTP_404_NOT_FOUND)
+    dry_run = request.data.get('dryRun', request.data.get('dry_run', False))
+    notes = str(request.data.get('notes') or '')[:500]
+    try:
+        summary = rescore_exam(exam, teacher=request.user, dry_run=bool(dry_run), notes=notes)
+    except RescoreError as e:
+        return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(summary)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsTeacher])
+def teacher_exam_analytics_view(request, exam_id):
+    """
+    GET /api/teacher/exams/{examId}/analytics - Per-question item analysis of finished attempts:
+    p-value, discrimination, option selection counts, score histograms (tests.analytics).
+    """
+    try:
+        exam = Exam.objects.get(pk=exam_id, created_by=request.user)
+    except Exam.DoesNotExist:
+        return Response({'detail': 'Exam not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(get_exam_analytics(exam))
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsTeacher])
 def teacher_exam_reset_student_view(request, exam_id):
@@ -1,12 +1,15 @@
 "use client";
 
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import { useQuery } from "@tanstack/react-query";
-import { teacherApi } from "@/lib/teacher";
+import { teacherApi, type CodingMonitorEvent } from "@/lib/teacher";
 import { Loading } from "@/components/Loading";
 import { Modal } from "@/components/Modal";
 import { useDebounce } from "@/lib/useDebounce";
-import { Trophy, FileCode, Eye, Search } from "lucide-react";
+import { Trophy, FileCode, Eye, Search, Radio } from "lucide-react";
+
+const RANKING_PAGE_SIZE = 50;
+const LIVE_FEED_SIZE = 10;
 
 export default function CodingMonitorPage() {
   const [groupId, setGroupId] = useState("");
@@ -18,8 +21,28 @@ export default function CodingMonitorPage() {
   const [showSubmissionsModal, setShowSubmissionsModal] = useState(false);
   const [selectedSubmissionId, setSelectedSubmissionId] = useState<string | null>(null);
   const [includeRun, setIncludeRun] = useState(false);
+  // Cursors of the ranking pages opened so far (keyset pagination); empty = first page.
+  const [rankingCursors, setRankingCursors] = useState<string[]>([]);
 
   const debouncedStudentSearch = useDebounce(studentSearch, 300);
+  const rankingCursor = rankingCursors[rankingCursors.length - 1];
+
+  useEffect(() => {
+    setRankingCursors([]);
+  }, [groupId, topicId, debouncedStudentSearch, sort, includeRun]);
+
+  // Live feed: new submissions pushed by the server (SSE) instead of re-polling the whole monitor.
+  const [liveEvents, setLiveEvents] = useState<CodingMonitorEvent[]>([]);
+  useEffect(() => {
+    setLiveEvents([]);
+    const controller = new AbortController();
+    teacherApi.streamCodingMonitor(
+      { groupId: groupId || undefined, topic: topicId || undefined, include_run: includeRun },
+      (ev) => setLiveEvents((prev) => [ev, ...prev].slice(0, LIVE_FEED_SIZE)),
+      controller.signal
+    );
+    return () => controller.abort();
+  }, [groupId, topicId, includeRun]);
 
   const { data: groups } = useQuery({
     queryKey: ["teacher", "groups"],
@@ -32,7 +55,7 @@ export default function CodingMonitorPage() {
     staleTime: 60 * 1000, // Cache topics for 1 minute
   });
   const { data, isLoading } = useQuery({
-    queryKey: ["teacher", "coding-monitor", groupId, topicId, debouncedStudentSearch, sort, page, includeRun],
+    queryKey: ["teacher", "coding-monitor", groupId, topicId, debouncedStudentSearch, sort, page, includeRun, rankingCursor],
     queryFn: () =>
       teacherApi.getCodingMonitor({
         groupId: groupId || undefined,
@@ -42,6 +65,8 @@ export default function CodingMonitorPage() {
         page,
         page_size: 20,
         include_run: includeRun,
+        ranking_cursor: rankingCursor,
+        ranking_page_size: RANKING_PAGE_SIZE,
       }),
   });
   const { data: studentSubmissionsData, isLoading: submissionsLoading } = useQuery({
@@ -61,6 +86,9 @@ export default function CodingMonitorPage() {
   const totalSubs = submissions?.count ?? 0;
   const hasNext = submissions?.next != null;
   const hasPrev = submissions?.previous != null;
+  const execCache = data?.executionCache;
+  const rankingNext = data?.rankingPage?.next ?? null;
+  const rankingOffset = rankingCursors.length * RANKING_PAGE_SIZE;
 
   const filteredRanking = ranking.filter((r) => {
     if (!debouncedStudentSearch.trim()) return true;
@@ -78,6 +106,11 @@ export default function CodingMonitorPage() {
         <p className="text-sm text-slate-600 mt-2">
           Şagirdlərin irəliləyişi və göndərişlər
         </p>
+        {execCache?.enabled && (
+          <p className="text-xs text-slate-500 mt-1">
+            Nəticə keşi: {Math.round(execCache.hitRate * 100)}% ({execCache.hits}/{execCache.hits + execCache.misses})
+          </p>
+        )}
       </div>
 
       {/* Compact Filter Row */}
@@ -119,6 +152,8 @@ export default function CodingMonitorPage() {
               <option value="most_solved">Ən çox həll edən</option>
               <option value="most_attempts">Ən çox cəhd edən</option>
               <option value="last_activity">Son aktivlik</option>
+              <option value="cpu_time">Ən az CPU vaxtı</option>
+              <option value="peak_memory">Ən az yaddaş</option>
             </select>
           </div>
           <div className="flex items-center gap-2">
@@ -145,6 +180,32 @@ export default function CodingMonitorPage() {
         </div>
       </div>
 
+      {liveEvents.length > 0 && (
+        <div className="card mb-6">
+          <h2 className="text-sm font-semibold text-slate-900 mb-2 flex items-center gap-2">
+            <Radio className="w-4 h-4 text-red-500" />
+            Canlı göndərişlər
+          </h2>
+          <ul className="space-y-1">
+            {liveEvents.map((ev) => (
+              <li key={ev.id} className="flex items-center gap-3 text-sm">
+                <span className="text-slate-500 w-16">{new Date(ev.createdAt).toLocaleTimeString("az-AZ")}</span>
+                <span className="font-medium text-slate-900">{ev.studentName}</span>
+                <span className="text-slate-600">{ev.taskTitle}</span>
+                <span className={ev.status === "passed" ? "text-green-700" : "text-red-700"}>
+                  {ev.status === "passed" ? "Keçdi" : ev.status}
+                </span>
+                {ev.passedCount != null && ev.totalCount != null && ev.totalCount > 0 && (
+                  <span className="text-xs text-slate-500">{ev.passedCount}/{ev.totalCount}</span>
+                )}
+                {ev.runtimeMs != null && <span className="text-xs text-slate-400">{ev.runtimeMs}ms</span>}
+                {ev.runType === "RUN" && <span className="px-1 py-0.5 bg-slate-100 rounded text-xs text-slate-600">Run</span>}
+              </li>
+            ))}
+          </ul>
+        </div>
+      )}
+
       <div className="grid grid-cols-1 lg:grid-cols-2 gap-6">
         <div className="card">
           <h2 className="text-lg font-semibold text-slate-900 mb-4 flex items-center gap-2">
@@ -165,7 +226,7 @@ export default function CodingMonitorPage() {
                   <div className="flex-1">
                     <div className="flex items-center gap-3">
                       <span className="text-lg font-bold text-slate-400 w-6">
-                        #{idx + 1}
+                        #{rankingOffset + idx + 1}
                       </span>
                       <span className="font-medium text-slate-900">
                         {r.student.fullName}
@@ -193,6 +254,11 @@ export default function CodingMonitorPage() {
                     <span className="block text-slate-500 mt-0.5">
                       {r.totalAttempts} cəhd
                     </span>
+                    {r.avgCpuTimeMs != null && (
+                      <span className="block text-xs text-slate-400">
+                        CPU: {r.avgCpuTimeMs}ms · {Math.round((r.avgPeakMemoryKb ?? 0) / 1024)}MB
+                      </span>
+                    )}
                   </div>
                 </li>
               ))}
@@ -202,6 +268,31 @@ export default function CodingMonitorPage() {
               Bu filtrlərə uyğun nəticə yoxdur
             </p>
           )}
+          {(rankingCursors.length > 0 || rankingNext) && (
+            <div className="flex items-center justify-between mt-3 pt-3 border-t border-slate-100">
+              <span className="text-sm text-slate-500">Cəmi: {data?.rankingPage?.count ?? 0}</span>
+              <div className="flex gap-2">
+                {rankingCursors.length > 0 && (
+                  <button
+                    type="button"
+                    onClick={() => setRankingCursors((c) => c.slice(0, -1))}
+                    className="btn-outline text-sm"
+                  >
+                    Əvvəlki
+                  </button>
+                )}
+                {rankingNext && (
+                  <button
+                    type="button"
+                    onClick={() => setRankingCursors((c) => [...c, rankingNext])}
+                    className="btn-outline text-sm"
+                  >
+                    Növbəti
+                  </button>
+                )}
+              </div>
+            </div>
+          )}
         </div>
 
         <div className="card">
@@ -396,6 +487,8 @@ export default function CodingMonitorPage() {
               <span>Status: <strong>{submissionDetail.status}</strong></span>
               <span>Keçdi: {submissionDetail.passedCount}/{(submissionDetail.passedCount ?? 0) + (submissionDetail.failedCount ?? 0)}</span>
               <span>Vaxt: {submissionDetail.runtimeMs ?? "-"}ms</span>
+              <span>CPU: {submissionDetail.cpuTimeMs ?? "-"}ms</span>
+              <span>Yaddaş: {submissionDetail.peakMemoryKb != null ? `${Math.round(submissionDetail.peakMemoryKb / 1024)}MB` : "-"}</span>
               <span>{new Date(submissionDetail.createdAt).toLocaleString("az-AZ")}</span>
             </div>
             <div>
@@ -7,6 +7,7 @@ import {
   CodingTask,
   CodingTopic,
   CodingTestCase,
+  CodingRegradeJob,
 } from "@/lib/teacher";
 import { Loading } from "@/components/Loading";
 import { Modal } from "@/components/Modal";
@@ -59,6 +60,22 @@ export default function CodingPage() {
     queryFn: () => teacherApi.getCodingTestCases(testCaseTaskId!),
     enabled: !!testCaseTaskId,
   });
+  const { data: regrade } = useQuery({
+    queryKey: ["teacher", "coding", "regrade", testCaseTaskId],
+    queryFn: () => teacherApi.getCodingRegrade(testCaseTaskId!),
+    enabled: !!testCaseTaskId,
+    refetchInterval: (query) => {
+      const job = query.state.data?.job;
+      return job && (job.status === "pending" || job.status === "running") ? 2000 : false;
+    },
+  });
+  const regradeMutation = useMutation({
+    mutationFn: ({ taskId, scope }: { taskId: string; scope: CodingRegradeJob["scope"] }) =>
+      teacherApi.startCodingRegrade(taskId, scope),
+    onSuccess: (data, { taskId }) => {
+      queryClient.setQueryData(["teacher", "coding", "regrade", taskId], data);
+    },
+  });
 
   const createTopicMutation = useMutation({
     mutationFn: (name: string) => teacherApi.createCodingTopic({ name }),
@@ -178,7 +195,9 @@ export default function CodingPage() {
         }
         const is_sample = typeof row.is_sample === "boolean" ? row.is_sample : i < 2;
         try {
-          await teacherApi.createCodingTestCase(taskId, { input_data, expected_output: expected, explanation: typeof row.explanation === "string" ? row.explanation : undefined, order_index: i, is_sample });
+          const compare_mode = (["exact", "tokens", "float", "unordered"] as const).find((m) => m === row.compare_mode);
+          const float_tolerance = typeof row.float_tolerance === "number" ? row.float_tolerance : undefined;
+          await teacherApi.createCodingTestCase(taskId, { input_data, expected_output: expected, explanation: typeof row.explanation === "string" ? row.explanation : undefined, order_index: i, is_sample, compare_mode, float_tolerance });
           ok++;
         } catch (e) {
           setBulkJsonError(`Sətir ${i + 1}: xəta`);
@@ -372,8 +391,31 @@ export default function CodingPage() {
                       >
                         JSON əlavə et
                       </button>
+                      <button
+                        type="button"
+                        disabled={regradeMutation.isPending || regrade?.job?.status === "pending" || regrade?.job?.status === "running"}
+                        onClick={() => {
+                          const all = confirm("Bütün göndərişlər yenidən yoxlansın? (Ləğv et: hər şagirdin yalnız son göndərişi)");
+                          regradeMutation.mutate({ taskId: task.id, scope: all ? "all" : "latest" });
+                        }}
+                        className="text-xs px-2 py-1 bg-slate-100 hover:bg-slate-200 rounded disabled:opacity-50"
+                        title="Göndərişləri cari test case-lərlə yenidən yoxla"
+                      >
+                        Yenidən qiymətləndir
+                      </button>
                     </div>
                   </div>
+                  {regrade?.job && (
+                    <p className={`text-xs mb-2 ${regrade.job.status === "failed" ? "text-red-600" : "text-slate-500"}`}>
+                      Yenidən qiymətləndirmə ({regrade.job.scope === "all" ? "hamısı" : "son göndərişlər"}):{" "}
+                      {regrade.job.status === "done"
+                        ? `bitdi — ${regrade.job.processed} göndəriş, ${regrade.job.changed} dəyişdi`
+                        : regrade.job.status === "failed"
+                          ? `xəta — ${regrade.job.errorMessage ?? ""}`
+                          : `${regrade.job.processed}/${regrade.job.total}`}
+                      {regrade.job.errorCount > 0 ? ` (${regrade.job.errorCount} yoxlanmadı)` : ""}
+                    </p>
+                  )}
                   {testCasesLoading ? (
                     <p className="text-sm text-slate-500">Yüklənir...</p>
                   ) : testCases && testCases.length > 0 ? (
@@ -516,7 +558,7 @@ export default function CodingPage() {
           title="Test case-lər JSON ilə əlavə et"
         >
           <p className="text-sm text-slate-600 mb-2">
-            Format 1 (mövcud tapşırığa): [ {`{"input":"...","expected_output":"...","is_sample":true}`}, ... ]<br />
+            Format 1 (mövcud tapşırığa): [ {`{"input":"...","expected_output":"...","is_sample":true,"compare_mode":"exact|tokens|float|unordered"}`}, ... ]<br />
             Format 2 (yeni tapşırıq): {`{"title":"...","statement":"...","topic_id":1,"testcases":[...]}`}
           </p>
           <textarea
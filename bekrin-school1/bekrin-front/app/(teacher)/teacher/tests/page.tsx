@@ -134,6 +134,7 @@ export default function TestsPage() {
   const [hardDeleteConfirm, setHardDeleteConfirm] = useState(false);
   const [hardDeleteTyped, setHardDeleteTyped] = useState("");
   const [gradingShowArchived, setGradingShowArchived] = useState(false);
+  const [showAnalytics, setShowAnalytics] = useState(false);
   const [showCreateRunModal, setShowCreateRunModal] = useState(false);
   const [createRunGroupId, setCreateRunGroupId] = useState<number | null>(null);
   const [createRunStudentId, setCreateRunStudentId] = useState<number | null>(null);
@@ -192,6 +193,11 @@ export default function TestsPage() {
     enabled: gradingExamId != null && activeTab === "grading",
     refetchInterval: 10000, // Real-time polling 10s
   });
+  const { data: analytics, isLoading: analyticsLoading } = useQuery({
+    queryKey: ["teacher", "exam-analytics", gradingExamId],
+    queryFn: () => teacherApi.getExamAnalytics(gradingExamId!),
+    enabled: gradingExamId != null && activeTab === "grading" && showAnalytics,
+  });
   const { data: archiveExamsData } = useQuery({
     queryKey: ["teacher", "archive", "exams", debouncedArchiveSearch],
     queryFn: () => teacherApi.getArchiveExams({ q: debouncedArchiveSearch || undefined }),
@@ -352,6 +358,7 @@ export default function TestsPage() {
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ["teacher", "exam-attempts"] });
       queryClient.invalidateQueries({ queryKey: ["teacher", "attempt-detail"] });
+      queryClient.invalidateQueries({ queryKey: ["teacher", "exam-analytics"] });
       queryClient.invalidateQueries({ queryKey: ["student", "exam-results"] });
       setShowGradingModal(false);
       setManualScores({});
@@ -449,6 +456,23 @@ export default function TestsPage() {
       }
     },
   });
+  const rescoreExamMutation = useMutation({
+    mutationFn: (examId: number) => teacherApi.rescoreExam(examId),
+    onSuccess: (data) => {
+      queryClient.invalidateQueries({ queryKey: ["teacher", "exam-attempts"] });
+      queryClient.invalidateQueries({ queryKey: ["teacher", "attempt-detail"] });
+      queryClient.invalidateQueries({ queryKey: ["teacher", "exam-analytics"] });
+      queryClient.invalidateQueries({ queryKey: ["student", "exam-results"] });
+      alert(
+        `Yenidən hesablandı: ${data.attemptsChanged}/${data.attempts} cəhd dəyişdi, ` +
+          `${data.answersChanged} cavab (+${data.answersGained} / -${data.answersLost})` +
+          (data.answersSkipped ? `, ${data.answersSkipped} cavab yoxlanmadı (seçim qeyd olunmayıb)` : "")
+      );
+    },
+    onError: (err: any) => {
+      alert(err?.response?.data?.detail || "Yenidən hesablamaq mümkün olmadı");
+    },
+  });
   const restartAttemptMutation = useMutation({
     mutationFn: ({ attemptId, duration }: { attemptId: number; duration?: number }) =>
       teacherApi.restartAttempt(attemptId, duration ?? 60),
@@ -980,14 +1004,31 @@ export default function TestsPage() {
                   <span className="text-xs bg-green-100 text-green-800 px-2 py-0.5 rounded-full animate-pulse">Yeni submit</span>
                 )}
               </h2>
-              <label className="flex items-center gap-2 cursor-pointer text-sm text-slate-600">
-                <input
-                  type="checkbox"
-                  checked={gradingShowArchived}
-                  onChange={(e) => setGradingShowArchived(e.target.checked)}
-                />
-                Köhnə attempt-lər
-              </label>
+              <div className="flex items-center gap-4">
+                {gradingExamId && (
+                  <button
+                    type="button"
+                    className="btn-outline text-sm"
+                    disabled={rescoreExamMutation.isPending}
+                    title="Cavab açarı düzəldildikdən sonra təqdim edilmiş cəhdləri yenidən qiymətləndir (manual ballar saxlanılır)"
+                    onClick={() => {
+                      if (confirm("Bütün təqdim edilmiş cəhdlər cari cavab açarı ilə yenidən hesablansın?")) {
+                        rescoreExamMutation.mutate(gradingExamId);
+                      }
+                    }}
+                  >
+                    {rescoreExamMutation.isPending ? "Hesablanır..." : "Yenidən hesabla"}
+                  </button>
+                )}
+                <label className="flex items-center gap-2 cursor-pointer text-sm text-slate-600">
+                  <input
+                    type="checkbox"
+                    checked={gradingShowArchived}
+                    onChange={(e) => setGradingShowArchived(e.target.checked)}
+                  />
+                  Köhnə attempt-lər
+                </label>
+              </div>
             </div>
             {attemptsLoading ? (
               <p className="text-slate-500 py-4">Yüklənir...</p>
@@ -1201,6 +1242,85 @@ export default function TestsPage() {
             )}
           </div>
 
+          {/* Item analysis */}
+          {gradingExamId && (
+            <div className="card overflow-x-auto">
+              <div className="flex items-center justify-between mb-4">
+                <h2 className="text-lg font-semibold text-slate-900">Sual analizi</h2>
+                <button type="button" className="btn-outline text-sm" onClick={() => setShowAnalytics((v) => !v)}>
+                  {showAnalytics ? "Gizlət" : "Göstər"}
+                </button>
+              </div>
+              {showAnalytics &&
+                (analyticsLoading ? (
+                  <p className="text-slate-500 py-4">Yüklənir...</p>
+                ) : !analytics || analytics.attempts === 0 ? (
+                  <p className="text-slate-500 py-4">Təqdim edilmiş cəhd yoxdur</p>
+                ) : (
+                  <>
+                    <p className="text-sm text-slate-600 mb-3">
+                      {analytics.attempts} cəhd · orta {analytics.scores?.mean} · median {analytics.scores?.median} · min{" "}
+                      {analytics.scores?.min} · max {analytics.scores?.max} / {analytics.maxScore}
+                    </p>
+                    {analytics.histograms && (
+                      <div className="flex items-end gap-1 h-16 mb-4" title="Ümumi bal paylanması">
+                        {analytics.histograms.total.map((count, i) => {
+                          const peak = Math.max(...analytics.histograms!.total, 1);
+                          return (
+                            <div
+                              key={i}
+                              className="flex-1 bg-blue-200 rounded-t"
+                              style={{ height: `${(count / peak) * 100}%` }}
+                              title={`${analytics.histograms!.edges[i]}–${analytics.histograms!.edges[i + 1]}: ${count}`}
+                            />
+                          );
+                        })}
+                      </div>
+                    )}
+                    <table className="w-full">
+                      <thead>
+                        <tr className="border-b border-slate-200">
+                          <th className="text-left py-2 text-sm font-semibold text-slate-700">Sual</th>
+                          <th className="text-left py-2 text-sm font-semibold text-slate-700">Növ</th>
+                          <th className="text-left py-2 text-sm font-semibold text-slate-700" title="Düzgün cavab verənlərin payı">Düzgün %</th>
+                          <th className="text-left py-2 text-sm font-semibold text-slate-700" title="Sualın balı ilə qalan balın korrelyasiyası">Ayırdetmə</th>
+                          <th className="text-left py-2 text-sm font-semibold text-slate-700">Variantlar</th>
+                        </tr>
+                      </thead>
+                      <tbody>
+                        {analytics.questions.map((q) => (
+                          <tr key={q.questionNumber} className="border-b border-slate-100">
+                            <td className="py-2 text-sm text-slate-900">{q.questionNumber}</td>
+                            <td className="py-2 text-sm text-slate-600">
+                              {q.kind === "mc" ? "Qapalı" : q.kind === "open" ? "Açıq" : "Situasiya"}
+                            </td>
+                            <td className="py-2 text-sm">{q.pValue != null ? `${Math.round(q.pValue * 100)}%` : "—"}</td>
+                            <td
+                              className={`py-2 text-sm ${q.discrimination != null && q.discrimination < 0.1 ? "text-red-600" : ""}`}
+                            >
+                              {q.discrimination != null ? q.discrimination.toFixed(2) : "—"}
+                            </td>
+                            <td className="py-2 text-sm text-slate-600">
+                              {q.options
+                                ? q.options.map((o) => (
+                                    <span key={o.key} className={`mr-2 ${o.correct ? "font-semibold text-green-700" : ""}`}>
+                                      {o.key}: {o.count}
+                                    </span>
+                                  ))
+                                : q.kind === "situation"
+                                  ? `Yoxlanılıb: ${q.graded ?? 0}`
+                                  : `Cavablanıb: ${q.answered}`}
+                              {q.options && q.blank ? <span className="text-slate-400">Boş: {q.blank}</span> : null}
+                            </td>
+                          </tr>
+                        ))}
+                      </tbody>
+                    </table>
+                  </>
+                ))}
+            </div>
+          )}
+
           {/* Legacy Results */}
           <div className="card overflow-x-auto">
             <div className="flex items-center justify-between mb-4">
@@ -14,7 +14,7 @@ function runResultOutput(result: RunCodeResult): string {
     return result.results
       .map(
         (r, i) =>
-          `Test ${i + 1}: ${r.passed ? "Keçdi" : "Səhv"}\nGiriş: ${(r.input || "").slice(0, 80)}${r.input && r.input.length > 80 ? "…" : ""}\nGözlənilən: ${(r.expected || "").slice(0, 80)}\nÇıxış: ${(r.actual ?? r.output ?? "(boş)").slice(0, 200)}`
+          `Test ${i + 1}: ${r.passed ? "Keçdi" : "Səhv"}\nGiriş: ${(r.input || "").slice(0, 80)}${r.input && r.input.length > 80 ? "…" : ""}\nGözlənilən: ${(r.expected || "").slice(0, 80)}\nÇıxış: ${(r.actual ?? r.output ?? "(boş)").slice(0, 200)}${r.firstDiff ? `\nFərq: sətir ${r.firstDiff.line}, sütun ${r.firstDiff.column}` : ""}`
       )
       .join("\n\n");
   }
@@ -31,6 +31,7 @@ const difficultyLabels: Record<string, string> = {
 export function TaskDetail({ taskId, code, onCodeChange, onClose }: TaskDetailProps) {
   const [submissionPage, setSubmissionPage] = useState(1);
   const [viewingSubmissionId, setViewingSubmissionId] = useState<number | null>(null);
+  const [language, setLanguage] = useState("python");
   const [lastSubmitResult, setLastSubmitResult] = useState<{
     resultStatus: string;
     passedCount: number;
@@ -76,12 +77,14 @@ export function TaskDetail({ taskId, code, onCodeChange, onClose }: TaskDetailPr
   const hasNext = submissionsData?.next != null;
   const hasPrev = submissionsData?.previous != null;
 
+  const languages = taskDetail.languages ?? [];
+
   const handleRun = () => {
-    runMutation.mutate({ taskId: Number(taskId), code });
+    runMutation.mutate({ taskId: Number(taskId), code, language });
   };
 
   const handleSubmit = () => {
-    submitMutation.mutate({ taskId, code });
+    submitMutation.mutate({ taskId, code, language });
   };
 
   return (
@@ -108,6 +111,23 @@ export function TaskDetail({ taskId, code, onCodeChange, onClose }: TaskDetailPr
         </p>
       </div>
 
+      {languages.length > 1 && (
+        <label className="flex items-center gap-2 text-sm text-slate-600">
+          Dil:
+          <select
+            className="input w-auto py-1 text-sm"
+            value={language}
+            onChange={(e) => setLanguage(e.target.value)}
+          >
+            {languages.map((lang) => (
+              <option key={lang.id} value={lang.id}>
+                {lang.label}
+              </option>
+            ))}
+          </select>
+        </label>
+      )}
+
       <CodeEditor
         value={code}
         onChange={onCodeChange}
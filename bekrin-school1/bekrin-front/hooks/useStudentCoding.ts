@@ -48,8 +48,8 @@ export function useSubmissions(taskId: string | null, page: number) {
 export function useRunCode() {
   const queryClient = useQueryClient();
   return useMutation({
-    mutationFn: ({ taskId, code }: { taskId: number; code: string }) =>
-      studentApi.runCoding(taskId, code),
+    mutationFn: ({ taskId, code, language }: { taskId: number; code: string; language?: string }) =>
+      studentApi.runCoding(taskId, code, language),
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ["student", "coding"] });
     },
@@ -59,8 +59,8 @@ export function useRunCode() {
 export function useSubmitCode() {
   const queryClient = useQueryClient();
   return useMutation({
-    mutationFn: ({ taskId, code }: { taskId: string; code: string }) =>
-      studentApi.submitCoding(taskId, code),
+    mutationFn: ({ taskId, code, language }: { taskId: string; code: string; language?: string }) =>
+      studentApi.submitCoding(taskId, code, language),
     onSuccess: (_, { taskId }) => {
       queryClient.invalidateQueries({ queryKey: ["student", "coding"] });
       queryClient.invalidateQueries({ queryKey: ["student", "coding", "submissions", taskId] });
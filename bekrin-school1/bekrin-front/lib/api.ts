@@ -160,6 +160,44 @@ export const api = {
       body: body instanceof FormData ? body : body ? JSON.stringify(body) : undefined,
       headers: opts?.headers,
     }),
+  /** Read a Server-Sent Events response (fetch keeps the Authorization header, unlike EventSource).
+   * Resolves when the server closes the stream; rejects on HTTP errors or abort. */
+  stream: async (
+    path: string,
+    onEvent: (event: { event: string; id: string | null; data: string }) => void,
+    opts?: { signal?: AbortSignal; lastEventId?: string | null }
+  ): Promise<void> => {
+    const url = `${API_BASE_URL}${path}`;
+    const token = getCookie("accessToken");
+    const headers: Record<string, string> = { Accept: "text/event-stream" };
+    if (token) headers["Authorization"] = `Bearer ${token}`;
+    if (opts?.lastEventId) headers["Last-Event-ID"] = opts.lastEventId;
+    const res = await fetch(url, { method: "GET", headers, credentials: "include", signal: opts?.signal });
+    if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) return;
+      buffer += decoder.decode(value, { stream: true });
+      let sep = buffer.indexOf("\n\n");
+      while (sep !== -1) {
+        const block = buffer.slice(0, sep);
+        buffer = buffer.slice(sep + 2);
+        let event = "message";
+        let id: string | null = null;
+        const data: string[] = [];
+        for (const line of block.split("\n")) {
+          if (line.startsWith("event: ")) event = line.slice(7);
+          else if (line.startsWith("id: ")) id = line.slice(4);
+          else if (line.startsWith("data: ")) data.push(line.slice(6));
+        }
+        if (data.length) onEvent({ event, id, data: data.join("\n") });
+        sep = buffer.indexOf("\n\n");
+      }
+    }
+  },
   patch: <T>(path: string, body?: unknown) =>
     request<T>(path, { method: "PATCH", body: body ? JSON.stringify(body) : undefined }),
   delete: <T>(path: string) => request<T>(path, { method: "DELETE" }),
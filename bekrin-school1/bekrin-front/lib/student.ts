@@ -40,6 +40,8 @@ export interface CodingTaskDetail {
   topicId?: number | null;
   topicName?: string | null;
   testCaseCount: number;
+  /** Languages enabled on the server (CODING_LANGUAGES); python when missing */
+  languages?: { id: string; label: string }[];
 }
 
 export interface CodingSubmissionItem {
@@ -64,6 +66,8 @@ export interface RunCodeResultItem {
   output?: string;
   actual?: string;
   passed: boolean;
+  /** First differing line/column (1-based) when the output did not match */
+  firstDiff?: { line: number; column: number; expected: string; got: string } | null;
 }
 
 export interface RunCodeResult {
@@ -81,6 +85,20 @@ export interface StudentStats {
   attendancePercent: number;
 }
 
+export interface CodingSubmitResult {
+  submissionId: number;
+  resultStatus: string;
+  passedCount: number;
+  totalCases: number;
+  score?: number | null;
+  createdAt: string;
+  done?: boolean;
+  queuePosition?: number;
+}
+
+const CODING_SUBMIT_POLL_MS = 1000;
+const CODING_SUBMIT_POLL_MAX = 120;
+
 export const studentApi = {
   getStats: () => api.get<StudentStats>("/student/stats"),
   getAttendance: () => api.get<StudentAttendance[]>("/student/attendance"),
@@ -96,8 +114,8 @@ export const studentApi = {
     const qs = sp.toString();
     return api.get<CodingExercise[]>(`/student/coding${qs ? `?${qs}` : ""}`);
   },
-  runCoding: (taskId: number, code: string) =>
-    api.post<RunCodeResult>("/student/coding/run", { task_id: taskId, code }),
+  runCoding: (taskId: number, code: string, language?: string) =>
+    api.post<RunCodeResult>("/student/coding/run", { task_id: taskId, code, language }),
   getCodingSubmissionDetail: (taskId: number, submissionId: number) =>
     api.get<CodingSubmissionDetail>(`/student/coding/${taskId}/submissions/${submissionId}`),
   getCodingTaskDetail: (id: string) =>
@@ -111,11 +129,19 @@ export const studentApi = {
       `/student/coding/${taskId}/submissions${qs ? `?${qs}` : ""}`
     );
   },
-  submitCoding: (taskId: string, code: string) =>
-    api.post<{ submissionId: number; resultStatus: string; passedCount: number; totalCases: number; score?: number; createdAt: string }>(
-      `/student/coding/${taskId}/submit`,
-      { code }
-    ),
+  submitCoding: async (taskId: string, code: string, language?: string) => {
+    const res = await api.post<CodingSubmitResult>(`/student/coding/${taskId}/submit`, { code, language });
+    if (res.resultStatus !== "queued" && res.resultStatus !== "running") return res;
+    // Async submit (CODING_SUBMIT_ASYNC): poll until the queue worker has graded it
+    for (let i = 0; i < CODING_SUBMIT_POLL_MAX; i++) {
+      await new Promise((resolve) => setTimeout(resolve, CODING_SUBMIT_POLL_MS));
+      const st = await api.get<CodingSubmitResult>(`/student/coding/submissions/${res.submissionId}/status`);
+      if (st.done) return st;
+    }
+    return res;
+  },
+  getCodingSubmissionStatus: (submissionId: number) =>
+    api.get<CodingSubmitResult>(`/student/coding/submissions/${submissionId}/status`),
 
   // Exams (run-based: runId, examId, remainingSeconds)
   getExams: () =>
@@ -279,15 +279,19 @@ export const teacherApi = {
   deleteCodingTask: (id: string) => api.delete(`/teacher/coding/${id}`),
   getCodingTestCases: (taskId: string) =>
     api.get<CodingTestCase[]>(`/teacher/coding/${taskId}/testcases`),
-  createCodingTestCase: (taskId: string, data: { input_data: string; expected?: string; expected_output?: string; explanation?: string; order_index?: number; is_sample?: boolean }) =>
+  createCodingTestCase: (taskId: string, data: { input_data: string; expected?: string; expected_output?: string; explanation?: string; order_index?: number; is_sample?: boolean; compare_mode?: CodingCompareMode; float_tolerance?: number | null }) =>
     api.post<CodingTestCase>(`/teacher/coding/${taskId}/testcases`, data),
   updateCodingTestCase: (caseId: number, data: Partial<CodingTestCase>) =>
     api.patch<CodingTestCase>(`/teacher/coding/testcases/${caseId}`, data),
   deleteCodingTestCase: (caseId: number) =>
     api.delete(`/teacher/coding/testcases/${caseId}`),
+  getCodingRegrade: (taskId: string) =>
+    api.get<{ job: CodingRegradeJob | null }>(`/teacher/coding/${taskId}/regrade`),
+  startCodingRegrade: (taskId: string, scope: CodingRegradeJob["scope"] = "latest") =>
+    api.post<{ job: CodingRegradeJob }>(`/teacher/coding/${taskId}/regrade`, { scope }),
 
   // Coding Monitor
-  getCodingMonitor: (params?: { groupId?: string; topic?: string; search?: string; page?: number; page_size?: number; sort?: string; include_run?: boolean }) => {
+  getCodingMonitor: (params?: { groupId?: string; topic?: string; search?: string; page?: number; page_size?: number; sort?: string; include_run?: boolean; ranking_cursor?: string; ranking_page_size?: number }) => {
     const sp = new URLSearchParams();
     if (params?.groupId) sp.set("groupId", params.groupId);
     if (params?.topic) sp.set("topic", params.topic);
@@ -296,6 +300,8 @@ export const teacherApi = {
     if (params?.page_size != null) sp.set("page_size", String(params.page_size));
     if (params?.sort) sp.set("sort", params.sort);
     if (params?.include_run) sp.set("include_run", "1");
+    if (params?.ranking_cursor) sp.set("ranking_cursor", params.ranking_cursor);
+    if (params?.ranking_page_size != null) sp.set("ranking_page_size", String(params.ranking_page_size));
     const qs = sp.toString();
     return api.get<{
       ranking: {
@@ -304,10 +310,43 @@ export const teacherApi = {
         totalTasksSolved: number;
         totalAttempts: number;
         perTaskAttemptCount: Record<string, number>;
+        avgCpuTimeMs?: number | null;
+        avgPeakMemoryKb?: number | null;
       }[];
+      rankingPage?: { count: number; next: string | null; pageSize: number };
+      executionCache?: { enabled: boolean; size: number; capacity: number; hits: number; misses: number; hitRate: number };
+      admission?: { enabled: boolean; running: number; globalSlots: number; queueDepth: number; queueSize: number; admitted: number; rejected: Record<string, number> };
       submissions: { count: number; next: number | null; previous: number | null; results: CodingSubmission[] };
     }>(`/teacher/coding-monitor${qs ? `?${qs}` : ""}`);
   },
+  /** Live coding monitor feed (SSE). Reconnects with the last seen id until the signal aborts. */
+  streamCodingMonitor: async (
+    params: { groupId?: string; topic?: string; include_run?: boolean },
+    onSubmission: (event: CodingMonitorEvent) => void,
+    signal: AbortSignal
+  ) => {
+    const sp = new URLSearchParams();
+    if (params.groupId) sp.set("groupId", params.groupId);
+    if (params.topic) sp.set("topic", params.topic);
+    if (params.include_run) sp.set("include_run", "1");
+    const qs = sp.toString();
+    let lastId: string | null = null;
+    while (!signal.aborted) {
+      try {
+        await api.stream(
+          `/teacher/coding-monitor/stream${qs ? `?${qs}` : ""}`,
+          (ev) => {
+            if (ev.id) lastId = ev.id;
+            if (ev.event === "submission") onSubmission(JSON.parse(ev.data) as CodingMonitorEvent);
+          },
+          { signal, lastEventId: lastId }
+        );
+      } catch {
+        if (signal.aborted) return;
+      }
+      await new Promise((resolve) => setTimeout(resolve, 2000));
+    }
+  },
   getCodingSubmissions: (params?: { taskId?: string; groupId?: string; studentId?: string; page?: number }) => {
     const sp = new URLSearchParams();
     if (params?.taskId) sp.set("taskId", params.taskId);
@@ -339,6 +378,8 @@ export const teacherApi = {
       failedCount?: number;
       errorMessage?: string;
       runtimeMs?: number;
+      cpuTimeMs?: number | null;
+      peakMemoryKb?: number | null;
       attemptNo?: number;
       createdAt: string;
       detailsJson: { test_case_id: number; is_sample: boolean; passed: boolean; output?: string; expected?: string }[];
@@ -373,6 +414,8 @@ export const teacherApi = {
         createdAt: string;
         detailsJson?: { test_case_id: number; is_sample: boolean; passed: boolean; output?: string; expected?: string }[];
       }[];
+      count?: number;
+      archivedRunCount?: number;
     }>(`/teacher/coding/student/${studentId}/submissions${qs ? `?${qs}` : ""}`);
   },
 
@@ -536,6 +579,21 @@ export const teacherApi = {
     notes?: string;
   }) =>
     api.post<{ attemptId: number; manualScore: number; autoScore: number; finalScore: number; isPublished: boolean }>(`/teacher/attempts/${attemptId}/grade`, data),
+  gradeExamAttempts: (examId: number, data: {
+    attempts: {
+      attemptId: number;
+      manualScores?: Record<string, number>;
+      per_situation_scores?: { index: number; fraction: number | string }[];
+    }[];
+    publish?: boolean;
+    notes?: string;
+  }) =>
+    api.post<{
+      examId: number;
+      graded: number;
+      results: { attemptId: number; manualScore: number; autoScore: number; finalScore: number; isPublished: boolean }[];
+      notFound: number[];
+    }>(`/teacher/exams/${examId}/grade`, data),
   publishAttempt: (attemptId: number, publish: boolean) => api.post(`/teacher/attempts/${attemptId}/publish`, { publish }),
   restartAttempt: (attemptId: number, durationMinutes?: number) =>
     api.post<{ message: string; studentId: number; durationMinutes: number; endTime: string }>(
@@ -548,6 +606,9 @@ export const teacherApi = {
       { studentId, durationMinutes: durationMinutes ?? 60 }
     ),
   reopenAttempt: (attemptId: number) => api.post(`/teacher/attempts/${attemptId}/reopen`),
+  getExamAnalytics: (examId: number) => api.get<ExamAnalytics>(`/teacher/exams/${examId}/analytics`),
+  rescoreExam: (examId: number, data?: { dryRun?: boolean; notes?: string }) =>
+    api.post<ExamRescoreSummary>(`/teacher/exams/${examId}/rescore`, data ?? {}),
   getPDFs: (params?: { q?: string; year?: string; tag?: string }) => {
     const sp = new URLSearchParams();
     if (params?.q) sp.set("q", params.q);
@@ -797,9 +858,29 @@ export interface CodingTestCase {
   explanation?: string | null;
   order_index?: number | null;
   is_sample?: boolean;
+  compare_mode?: CodingCompareMode;
+  float_tolerance?: number | null;
   created_at?: string;
 }
 
+export type CodingCompareMode = "exact" | "tokens" | "float" | "unordered";
+
+/** Re-run of a task's submissions against its current test cases (GET/POST /teacher/coding/{id}/regrade) */
+export interface CodingRegradeJob {
+  id: number;
+  taskId: number;
+  scope: "latest" | "all";
+  status: "pending" | "running" | "done" | "failed";
+  total: number;
+  processed: number;
+  changed: number;
+  errorCount: number;
+  errorMessage: string | null;
+  createdAt: string | null;
+  startedAt: string | null;
+  finishedAt: string | null;
+}
+
 export interface CodingSubmission {
   id: string;
   taskTitle: string;
@@ -810,6 +891,22 @@ export interface CodingSubmission {
   totalCount?: number | null;
 }
 
+/** One event of GET /teacher/coding-monitor/stream */
+export interface CodingMonitorEvent {
+  id: number;
+  studentId: number;
+  studentName: string;
+  taskId: number;
+  taskTitle: string;
+  topicId: number | null;
+  status: string;
+  runType: "RUN" | "SUBMIT";
+  passedCount: number | null;
+  totalCount: number | null;
+  runtimeMs: number | null;
+  createdAt: string;
+}
+
 export interface Test {
   id: string;
   type: "quiz" | "exam";
@@ -939,6 +1036,49 @@ export interface ExamAttempt {
   isPublished: boolean;
 }
 
+/** POST /teacher/exams/{id}/rescore: attempts regraded with the corrected answer key */
+export interface ExamRescoreSummary {
+  examId: number;
+  answerKeyVersion: string;
+  dryRun: boolean;
+  attempts: number;
+  attemptsChanged: number;
+  publishedAttemptsChanged: number;
+  answersChecked: number;
+  answersSkipped: number;
+  answersChanged: number;
+  answersGained: number;
+  answersLost: number;
+  scoreDelta: number;
+  questions: { questionNumber: number; gained: number; lost: number }[];
+  changes: { attemptId: number; studentId: number; oldTotalScore: number | null; newTotalScore: number }[];
+}
+
+/** GET /teacher/exams/{id}/analytics: item analysis of finished attempts */
+export interface ExamAnalytics {
+  examId: number;
+  attempts: number;
+  maxScore: number;
+  engine: "numpy" | "python";
+  computedAt: string;
+  cached: boolean;
+  questions: {
+    questionNumber: number;
+    questionId: number | null;
+    kind: "mc" | "open" | "situation";
+    pValue: number | null;
+    meanScore: number | null;
+    maxScore: number | null;
+    discrimination: number | null;
+    answered: number;
+    graded: number | null;
+    options: { key: string; count: number; share: number; correct: boolean }[] | null;
+    blank?: number;
+  }[];
+  scores: { mean: number; median: number; std: number; min: number; max: number } | null;
+  histograms: { edges: number[]; total: number[]; auto: number[] } | null;
+}
+
 export interface ExamAttemptDetail {
   attemptId: number;
   examId: number;